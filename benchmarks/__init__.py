@@ -0,0 +1,5 @@
+"""Benchmarks and synthetic data generators of SpotMAX. 
+
+Run the scripts from the root of the repository as modules, e.g. 
+`python -m benchmarks.bench_pipeline`.
+"""
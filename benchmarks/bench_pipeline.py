@@ -0,0 +1,269 @@
+"""Benchmark the detection and quantification pipeline on synthetic data.
+
+Each benchmark case generates a synthetic timelapse (see
+`synthetic_experiment.generate_timelapse`) with a given spot density,
+number of cells, number of z-slices and number of frames, and times:
+
+* `pipe.spot_detection`
+* `pipe.spots_calc_features_and_filter`
+* `pipe.spotfit`
+* `transformations.aggregate_objs`
+* the full analysis (`Kernel.run`) from a generated INI file, run in a
+  separate process with the command-line interface
+
+The first frame of each case is used for the single-step benchmarks, while
+the full analysis runs on all the frames. Each step is run once before
+timing to exclude compilation times (e.g., numba). Results are saved as
+JSON so that they can be compared across versions with `--compare`.
+
+Run with `python -m benchmarks.bench_pipeline --output results.json`
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import skimage.filters
+import skimage.measure
+
+from benchmarks import synthetic_experiment
+
+import spotmax
+from spotmax import core, filters, pipe, transformations
+
+ZYX_VOXEL_SIZE = (
+    synthetic_experiment.VOXEL_DEPTH,
+    synthetic_experiment.PIXEL_SIZE_YX,
+    synthetic_experiment.PIXEL_SIZE_YX
+)
+SPOTS_ZYX_RADII_PXL = np.array((2.0, 3.0, 3.0))
+ZYX_SPOT_MIN_VOL_UM = SPOTS_ZYX_RADII_PXL*np.array(ZYX_VOXEL_SIZE)
+GOP_FILTERING_THRESHOLDS = {'spot_vs_backgr_ttest_pvalue': (None, 0.025)}
+
+CASES = (
+    {'spots_per_cell': 10, 'num_cells': 4, 'size_z': 12, 'size_t': 1},
+    {'spots_per_cell': 40, 'num_cells': 4, 'size_z': 12, 'size_t': 1},
+    {'spots_per_cell': 20, 'num_cells': 16, 'size_z': 12, 'size_t': 1},
+    {'spots_per_cell': 20, 'num_cells': 4, 'size_z': 30, 'size_t': 1},
+    {'spots_per_cell': 20, 'num_cells': 4, 'size_z': 12, 'size_t': 4},
+)
+QUICK_CASES = CASES[:1]
+
+def _time_func(func, repeat):
+    func()
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - t0)
+    return result, timings
+
+def _timings_summary(timings):
+    return {
+        'min': min(timings),
+        'mean': float(np.mean(timings)),
+        'repeat': len(timings)
+    }
+
+def bench_steps(case, repeat=3, size_yx=(128, 128)):
+    spots_data, _, segm_data = synthetic_experiment.generate_timelapse(
+        size_t=1, size_z=case['size_z'], size_yx=size_yx,
+        num_cells=case['num_cells'], spots_per_cell=case['spots_per_cell']
+    )
+    image = spots_data[0].astype(float)/np.iinfo(spots_data.dtype).max
+    lab = np.repeat(segm_data[0][np.newaxis], len(image), axis=0)
+    rp = skimage.measure.regionprops(lab)
+    delta_tol = transformations.get_expand_obj_delta_tolerance(
+        SPOTS_ZYX_RADII_PXL
+    )
+    sharp_image = filters.DoG_spots(image, SPOTS_ZYX_RADII_PXL, lab=lab)
+    spots_semantic_segm = np.logical_and(
+        filters.threshold(sharp_image, skimage.filters.threshold_li), lab > 0
+    )
+
+    timings = {}
+
+    def detect():
+        return pipe.spot_detection(
+            sharp_image,
+            spots_segmantic_segm=spots_semantic_segm,
+            spots_zyx_radii_pxl=SPOTS_ZYX_RADII_PXL,
+            lab=lab,
+            return_df=True
+        )[0]
+
+    df_spots_coords, step_timings = _time_func(detect, repeat)
+    timings['pipe.spot_detection'] = _timings_summary(step_timings)
+
+    def calc_features():
+        return pipe.spots_calc_features_and_filter(
+            image, SPOTS_ZYX_RADII_PXL, df_spots_coords.copy(),
+            sharp_spots_image=sharp_image,
+            lab=lab,
+            rp=rp,
+            gop_filtering_thresholds=GOP_FILTERING_THRESHOLDS,
+            delta_tol=delta_tol,
+            zyx_voxel_size=ZYX_VOXEL_SIZE,
+            optimise_for_high_spot_density=True,
+            show_progress=False,
+            verbose=False
+        )
+
+    features_result, step_timings = _time_func(calc_features, repeat)
+    timings['pipe.spots_calc_features_and_filter'] = (
+        _timings_summary(step_timings)
+    )
+    keys, _, dfs_spots_gop = features_result
+    df_spots_gop = pd.concat(
+        dfs_spots_gop, keys=keys, names=['frame_i', 'Cell_ID', 'spot_id']
+    ).loc[0]
+
+    def spotfit():
+        return pipe.spotfit(
+            core.SpotFIT(),
+            image,
+            df_spots_gop,
+            zyx_voxel_size=ZYX_VOXEL_SIZE,
+            zyx_spot_min_vol_um=ZYX_SPOT_MIN_VOL_UM,
+            spots_zyx_radii_pxl=SPOTS_ZYX_RADII_PXL,
+            delta_tol=delta_tol,
+            rp=rp,
+            lab=lab,
+            show_progress=False,
+            verbose=False
+        )
+
+    _, step_timings = _time_func(spotfit, repeat)
+    timings['pipe.spotfit'] = _timings_summary(step_timings)
+
+    def aggregate():
+        return transformations.aggregate_objs(
+            image, lab, zyx_tolerance=delta_tol
+        )
+
+    _, step_timings = _time_func(aggregate, repeat)
+    timings['transformations.aggregate_objs'] = _timings_summary(step_timings)
+
+    num_spots = {
+        'detected': len(df_spots_coords), 'valid': len(df_spots_gop)
+    }
+    return timings, num_spots
+
+def bench_kernel_run(case):
+    root_path = tempfile.mkdtemp(prefix='spotmax_bench_')
+    try:
+        exp_path = os.path.join(root_path, 'experiment')
+        synthetic_experiment.make_experiment(
+            exp_path, size_t=case['size_t'], size_z=case['size_z'],
+            num_cells=case['num_cells'],
+            spots_per_cell=case['spots_per_cell']
+        )
+        ini_filepath = synthetic_experiment.write_params_ini(
+            os.path.join(root_path, 'params.ini'), exp_path,
+            case['size_t'], case['size_z']
+        )
+        t0 = time.perf_counter()
+        synthetic_experiment.run_spotmax_cli(ini_filepath)
+        elapsed = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(root_path, ignore_errors=True)
+    return {'min': elapsed, 'mean': elapsed, 'repeat': 1}
+
+def _case_name(case):
+    return '_'.join(f'{key}={value}' for key, value in case.items())
+
+def get_environment_info():
+    return {
+        'spotmax_version': spotmax.read_version(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'skimage': skimage.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def compare_results(results, previous, tolerance):
+    """Print the ratio between current and previous min timings and return
+    the list of (case, step) that are slower than `1 + tolerance`
+    """
+    regressions = []
+    print(f'{"case":>55} {"step":>38} {"ratio":>7}')
+    for case_name, case_result in results['cases'].items():
+        previous_case = previous['cases'].get(case_name)
+        if previous_case is None:
+            continue
+        for step, timing in case_result['timings'].items():
+            previous_timing = previous_case['timings'].get(step)
+            if previous_timing is None:
+                continue
+            ratio = timing['min']/previous_timing['min']
+            flag = ''
+            if ratio > 1 + tolerance:
+                flag = ' <-- slower'
+                regressions.append((case_name, step))
+            print(f'{case_name:>55} {step:>38} {ratio:>7.2f}{flag}')
+    return regressions
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--output', default='', help='Path of the JSON results')
+    ap.add_argument(
+        '--compare', default='',
+        help='Path of previous JSON results to compare with'
+    )
+    ap.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='Relative slowdown reported as regression with `--compare`'
+    )
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument(
+        '--quick', action='store_true', help='Run only the first case'
+    )
+    ap.add_argument(
+        '--skip_kernel_run', action='store_true',
+        help='Do not benchmark the full analysis'
+    )
+    args = ap.parse_args()
+
+    cases = QUICK_CASES if args.quick else CASES
+    results = {
+        'datetime': datetime.now().isoformat(),
+        'environment': get_environment_info(),
+        'cases': {}
+    }
+    for case in cases:
+        case_name = _case_name(case)
+        print(f'Running case {case_name}...')
+        timings, num_spots = bench_steps(case, repeat=args.repeat)
+        if not args.skip_kernel_run:
+            timings['Kernel.run'] = bench_kernel_run(case)
+        results['cases'][case_name] = {
+            'params': case, 'num_spots': num_spots, 'timings': timings
+        }
+        for step, timing in timings.items():
+            print(f'  {step:>38}: {timing["min"]:.3f} s')
+
+    if args.output:
+        with open(args.output, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+    if not args.compare:
+        return
+
+    with open(args.compare) as json_file:
+        previous = json.load(json_file)
+    regressions = compare_results(results, previous, args.tolerance)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Benchmark scaling of `Spheroid.get_spots_mask` and
+`Spheroid.expand_spots_labels` (used by spotSIZE) with number of spots.
+
+Run with `python -m benchmarks.bench_spheroid`
+"""
+import time
+
+import numpy as np
+
+from spotmax import core
+
+SHAPE = (20, 256, 256)
+ZYX_VOXEL_SIZE = (0.35, 0.07, 0.07)
+ZYX_SEED_SIZE = np.array((0.5, 0.25, 0.25))/2
+NUM_SPOTS = (10, 50, 200, 800, 2000)
+NUM_GROW_ITER = 5
+
+def time_spheroid(num_spots, shape=SHAPE, rng_seed=11):
+    rng = np.random.default_rng(rng_seed)
+    zyx_centers = np.column_stack(
+        [rng.integers(0, size, num_spots) for size in shape]
+    )
+    spot_ids = list(range(1, num_spots+1))
+    spheroid = core.Spheroid(np.zeros(shape), show_progress=False)
+
+    t0 = time.perf_counter()
+    spheroid.get_spots_mask(0, ZYX_VOXEL_SIZE, ZYX_SEED_SIZE, zyx_centers)
+    t1 = time.perf_counter()
+
+    labels = spheroid.get_spots_mask(
+        0, ZYX_VOXEL_SIZE, ZYX_SEED_SIZE, zyx_centers, dtype=np.uint32,
+        ids=spot_ids
+    )
+    t2 = time.perf_counter()
+    for i in range(NUM_GROW_ITER):
+        labels = spheroid.expand_spots_labels(
+            labels, ZYX_VOXEL_SIZE, ZYX_SEED_SIZE, zyx_centers,
+            grow_iter=i+1
+        )
+    t3 = time.perf_counter()
+    return t1-t0, (t3-t2)/NUM_GROW_ITER
+
+def main():
+    print(f'Volume shape = {SHAPE}')
+    print(f'{"num_spots":>10} {"spots_mask [s]":>15} {"expand_iter [s]":>16}')
+    for num_spots in NUM_SPOTS:
+        mask_time, expand_time = time_spheroid(num_spots)
+        print(f'{num_spots:>10} {mask_time:>15.4f} {expand_time:>16.4f}')
+
+if __name__ == '__main__':
+    main()
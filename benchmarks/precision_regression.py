@@ -0,0 +1,117 @@
+"""Compare the features computed with `Floating point precision = float32` 
+against the reference `float64` on a synthetic experiment.
+
+For each output table, reports the number of spots detected with each 
+precision and, for the spots detected with both, the maximum absolute and 
+relative difference of every feature.
+
+Run with `python -m benchmarks.precision_regression [--output results.json]`
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import synthetic_experiment
+
+TABLES = ('1_0_detected_spots', '1_1_valid_spots', '1_2_spotfit')
+INDEX_COLS = ['frame_i', 'Cell_ID', 'z', 'y', 'x']
+SKIP_COLS = {'analysis_datetime', 'run_timestamp'}
+PRECISIONS = ('float64', 'float32')
+
+def run_precision(root_path, precision, size_t, size_z, num_cells):
+    exp_path = os.path.join(root_path, precision)
+    synthetic_experiment.make_experiment(
+        exp_path, size_t=size_t, size_z=size_z, num_cells=num_cells
+    )
+    ini_filepath = synthetic_experiment.write_params_ini(
+        os.path.join(root_path, f'{precision}.ini'), exp_path, size_t, size_z,
+        configuration={'Floating point precision': precision}
+    )
+    synthetic_experiment.run_spotmax_cli(ini_filepath)
+    return os.path.join(exp_path, 'Position_1', 'spotMAX_output')
+
+def compare_tables(df_ref, df_test):
+    df_ref = df_ref.set_index(INDEX_COLS)
+    df_test = df_test.set_index(INDEX_COLS)
+    common_idx = df_ref.index.intersection(df_test.index)
+    result = {
+        'num_spots_float64': len(df_ref), 
+        'num_spots_float32': len(df_test),
+        'num_spots_common': len(common_idx),
+        'features': {}
+    }
+    for col in df_ref.columns:
+        if col in SKIP_COLS or col not in df_test.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df_ref[col]):
+            continue
+        ref_values = df_ref.loc[common_idx, col].to_numpy(dtype=float)
+        test_values = df_test.loc[common_idx, col].to_numpy(dtype=float)
+        abs_delta = np.abs(test_values - ref_values)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rel_delta = abs_delta/np.abs(ref_values)
+        rel_delta[abs_delta == 0] = 0
+        result['features'][col] = {
+            'max_abs_delta': float(np.nanmax(abs_delta, initial=0)),
+            'max_rel_delta': float(np.nanmax(rel_delta, initial=0)),
+        }
+    return result
+
+def print_report(results, top_n):
+    for table, result in results.items():
+        print('-'*100)
+        print(
+            f'{table}: {result["num_spots_float64"]} spots (float64), '
+            f'{result["num_spots_float32"]} spots (float32), '
+            f'{result["num_spots_common"]} in common'
+        )
+        features = sorted(
+            result['features'].items(), 
+            key=lambda item: item[1]['max_rel_delta'], reverse=True
+        )
+        print(f'{"feature":>45} {"max_abs_delta":>15} {"max_rel_delta":>15}')
+        for col, deltas in features[:top_n]:
+            print(
+                f'{col:>45} {deltas["max_abs_delta"]:>15.3g} '
+                f'{deltas["max_rel_delta"]:>15.3g}'
+            )
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--size_t', type=int, default=2)
+    ap.add_argument('--size_z', type=int, default=12)
+    ap.add_argument('--num_cells', type=int, default=4)
+    ap.add_argument('--top_n', type=int, default=15)
+    ap.add_argument('--output', default='', help='Path of the JSON report')
+    args = ap.parse_args()
+    
+    root_path = tempfile.mkdtemp(prefix='spotmax_precision_')
+    try:
+        output_paths = {
+            precision: run_precision(
+                root_path, precision, args.size_t, args.size_z, args.num_cells
+            )
+            for precision in PRECISIONS
+        }
+        results = {}
+        for table in TABLES:
+            dfs = [
+                pd.read_csv(os.path.join(output_paths[precision], f'{table}.csv'))
+                for precision in PRECISIONS
+            ]
+            results[table] = compare_tables(*dfs)
+    finally:
+        shutil.rmtree(root_path, ignore_errors=True)
+    
+    print_report(results, args.top_n)
+    if args.output:
+        with open(args.output, 'w') as json_file:
+            json.dump(results, json_file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Generate synthetic SpotMAX experiments (Position folder + INI parameters 
+file) used by the benchmarks.
+
+The spots channel is made of gaussian peaks (see 
+`spotmax.data._generate_syntetic_spots_img`) placed inside rectangular 
+cells arranged on a grid, plus gamma-distributed background noise. 
+"""
+import os
+import subprocess
+import sys
+
+import numpy as np
+import tifffile
+
+from spotmax import data
+
+BASENAME = 'synthetic_s01_'
+SPOTS_CH_ENDNAME = 'spots'
+REF_CH_ENDNAME = 'ref'
+SEGM_ENDNAME = 'segm'
+PIXEL_SIZE_YX = 0.06
+VOXEL_DEPTH = 0.28
+
+PARAMS_INI_TEMPLATE = """\
+[File paths and channels]
+Experiment folder path(s) to analyse = {exp_path}
+Spots channel end name = {spots_ch_endname}
+Cells segmentation end name = {segm_endname}.npz
+Reference channel end name = {ref_ch_endname}
+Spots channel segmentation end name = 
+Ref. channel segmentation end name = 
+Spots coordinates table end name = 
+Table with lineage info end name = 
+Run number = 1
+Text to append at the end of the output files = 
+File extension of the output tables = .csv
+
+[METADATA]
+Number of frames (SizeT) = {size_t}
+Analyse until frame number = -1
+Number of z-slices (SizeZ) = {size_z}
+Pixel width (μm) = {pixel_size_yx}
+Pixel height (μm) = {pixel_size_yx}
+Voxel depth (μm) = {voxel_depth}
+Numerical aperture = 1.4
+Spots reporter emission wavelength (nm) = 500.0
+Spot minimum z-size (μm) = 1.0
+Resolution multiplier in y- and x- direction = 1.0
+
+[Pre-processing]
+Aggregate cells prior analysis = {aggregate}
+Threshold only inside segmented objects = True
+Remove hot pixels = False
+Initial gaussian filter sigma = 0.75
+Sharpen spots signal prior detection = True
+Extend 3D input segm. objects in Z = (0, 0)
+
+[Reference channel]
+Segment reference channel = {segm_ref_ch}
+Keep only spots that are inside ref. channel mask = False
+Use the ref. channel mask to determine background = False
+Ref. channel is single object (e.g., nucleus) = False
+Keep external touching objects intact = False
+Ref. channel gaussian filter sigma = 0.75
+Sigmas used to enhance network-like structures = 0
+Ref. channel segmentation method = Thresholding
+Ref. channel threshold function = threshold_otsu
+Features for filtering ref. channel objects = 
+Save reference channel features = False
+Save reference channel segmentation masks = False
+Save pre-processed reference channel image = False
+
+[Spots channel]
+Spots segmentation method = Thresholding
+Minimum size of spot segmentation mask = 5
+Spot detection threshold function = threshold_li
+Spots detection method = peak_local_max
+Features and thresholds for filtering true spots = 
+\tspot_vs_backgr_ttest_pvalue, None, 0.025
+Local background ring width = 0.5 micrometre
+Optimise detection for high spot density = True
+Compute spots size (fit gaussian peak(s)) = {do_spotfit}
+After spotFIT, drop spots that are too close = True
+Merge spots pairs where single peak fits better = False
+Maximum number of spot pairs to check = 11
+Save spots segmentation masks = False
+Save pre-processed spots image = False
+Skip objects where segmentation failed = False
+
+[Configuration]
+Folder path of the log file = 
+Folder path of the final report = 
+Filename of final report = 
+Disable saving of the final report = True
+Use default values for missing parameters = True
+Stop analysis on critical error = True
+Use CUDA-compatible GPU = False
+Number of threads used by numba = -1
+{extra_configuration}
+Reduce logging verbosity = True
+"""
+
+def get_cells_slices(size_yx, num_cells, margin=4):
+    """Get the (y, x) slices of `num_cells` rectangular cells arranged on a 
+    grid filling an image with shape `size_yx`
+    """
+    num_rows = int(np.ceil(np.sqrt(num_cells)))
+    num_cols = int(np.ceil(num_cells/num_rows))
+    cell_h = size_yx[0]//num_rows
+    cell_w = size_yx[1]//num_cols
+    cells_slices = []
+    for i in range(num_cells):
+        row, col = divmod(i, num_cols)
+        y0, x0 = row*cell_h + margin, col*cell_w + margin
+        y1, x1 = (row+1)*cell_h - margin, (col+1)*cell_w - margin
+        cells_slices.append((slice(y0, y1), slice(x0, x1)))
+    return cells_slices
+
+def generate_timelapse(
+        size_t=1, size_z=12, size_yx=(128, 128), num_cells=2, 
+        spots_per_cell=20, spots_sigmas=(1.0, 1.5, 1.5), noise_scale=0.05,
+        rng_seed=11
+    ):
+    """Generate spots channel, reference channel and 2D segmentation masks
+
+    Returns
+    -------
+    tuple of numpy.ndarray
+        `(spots_data, ref_ch_data, segm_data)` where `spots_data` and 
+        `ref_ch_data` are uint16 with shape (size_t, size_z, Y, X) and 
+        `segm_data` is uint32 with shape (size_t, Y, X).
+    """    
+    rng = np.random.default_rng(rng_seed)
+    cells_slices = get_cells_slices(size_yx, num_cells)
+    shape = (size_z, *size_yx)
+    segm_data = np.zeros((size_t, *size_yx), dtype=np.uint32)
+    spots_data = np.zeros((size_t, *shape), dtype=np.uint16)
+    ref_ch_data = np.zeros((size_t, *shape), dtype=np.uint16)
+    margin_z = int(np.ceil(spots_sigmas[0]))
+    for frame_i in range(size_t):
+        zyx_spots = []
+        ref_ch_img = np.zeros(shape)
+        for cell_id, (y_slice, x_slice) in enumerate(cells_slices, start=1):
+            segm_data[frame_i, y_slice, x_slice] = cell_id
+            zz = rng.integers(margin_z, max(margin_z+1, size_z-margin_z), 
+                              spots_per_cell)
+            yy = rng.integers(y_slice.start+2, y_slice.stop-2, spots_per_cell)
+            xx = rng.integers(x_slice.start+2, x_slice.stop-2, spots_per_cell)
+            zyx_spots.extend(zip(zz, yy, xx))
+            ref_ch_img[:, y_slice, x_slice] = 0.2
+        
+        spots_img = data._generate_syntetic_spots_img(
+            np.zeros(shape), zyx_spots, spots_sigmas
+        )
+        spots_img /= spots_img.max()
+        spots_img += rng.gamma(1.0, noise_scale, size=shape)
+        spots_img /= spots_img.max()
+        ref_ch_img += rng.gamma(1.0, noise_scale/2, size=shape)
+        spots_data[frame_i] = np.round(spots_img*40000)
+        ref_ch_data[frame_i] = np.round(ref_ch_img*40000)
+    
+    return spots_data, ref_ch_data, segm_data
+
+def make_experiment(exp_path, **generate_kwargs):
+    """Save the data from `generate_timelapse` in Cell-ACDC format in the 
+    folder `exp_path/Position_1/Images`
+    """
+    spots_data, ref_ch_data, segm_data = generate_timelapse(**generate_kwargs)
+    size_t, size_z = spots_data.shape[:2]
+    images_path = os.path.join(exp_path, 'Position_1', 'Images')
+    os.makedirs(images_path, exist_ok=True)
+    
+    tifffile.imwrite(
+        os.path.join(images_path, f'{BASENAME}{SPOTS_CH_ENDNAME}.tif'), 
+        np.squeeze(spots_data)
+    )
+    tifffile.imwrite(
+        os.path.join(images_path, f'{BASENAME}{REF_CH_ENDNAME}.tif'), 
+        np.squeeze(ref_ch_data)
+    )
+    np.savez_compressed(
+        os.path.join(images_path, f'{BASENAME}{SEGM_ENDNAME}.npz'), 
+        np.squeeze(segm_data)
+    )
+    metadata_filepath = os.path.join(images_path, f'{BASENAME}metadata.csv')
+    with open(metadata_filepath, 'w') as csv:
+        csv.write(
+            'Description,values\n'
+            f'SizeT,{size_t}\n'
+            f'SizeZ,{size_z}\n'
+            'TimeIncrement,1.0\n'
+            f'PhysicalSizeZ,{VOXEL_DEPTH}\n'
+            f'PhysicalSizeY,{PIXEL_SIZE_YX}\n'
+            f'PhysicalSizeX,{PIXEL_SIZE_YX}\n'
+            f'segmSizeT,{size_t}\n'
+            'isSegm3D,False\n'
+        )
+    return images_path
+
+def write_params_ini(
+        ini_filepath, exp_path, size_t, size_z, do_spotfit=True, 
+        segm_ref_ch=False, aggregate=False, configuration=None
+    ):
+    """Write the INI parameters file to analyse the experiment created with 
+    `make_experiment`. `configuration` is a dictionary of additional 
+    parameters of the `[Configuration]` section.
+    """
+    if configuration is None:
+        configuration = {}
+    extra_configuration = '\n'.join(
+        f'{option} = {value}' for option, value in configuration.items()
+    )
+    params_ini_text = PARAMS_INI_TEMPLATE.format(
+        exp_path=exp_path, 
+        spots_ch_endname=SPOTS_CH_ENDNAME,
+        ref_ch_endname=REF_CH_ENDNAME if segm_ref_ch else '',
+        segm_endname=SEGM_ENDNAME,
+        size_t=size_t, 
+        size_z=size_z, 
+        pixel_size_yx=PIXEL_SIZE_YX,
+        voxel_depth=VOXEL_DEPTH,
+        aggregate=aggregate,
+        segm_ref_ch=segm_ref_ch,
+        do_spotfit=do_spotfit,
+        extra_configuration=extra_configuration
+    )
+    with open(ini_filepath, 'w', encoding='utf-8') as ini:
+        ini.write(params_ini_text)
+    return ini_filepath
+
+def run_spotmax_cli(ini_filepath):
+    """Run SpotMAX in a separate process in command-line mode"""
+    args = [sys.executable, '-m', 'spotmax', '-c', '-p', ini_filepath]
+    completed = subprocess.run(
+        args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, 
+        stderr=subprocess.STDOUT, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(
+            f'SpotMAX exited with code {completed.returncode}:\n\n'
+            f'{completed.stdout[-5000:]}'
+        )
+    return completed.stdout
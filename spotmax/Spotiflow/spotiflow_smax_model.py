@@ -23,6 +23,77 @@ class SubPixel:
 class OutputLabels:
     values = ['Boolean mask', 'Connected components']
 
+def rasterize_disks(lab, zyx_points, radius, values=True):
+    """Draw a disk of radius `radius` centered at each point in the z-slice 
+    of the point, equivalent to calling `skimage.draw.disk` for each point 
+    but with all points at once. The pixels within the disks are selected 
+    from a precomputed stencil of candidate offsets around the rounded 
+    centers and clipped to the shape of `lab`.
+
+    Parameters
+    ----------
+    lab : (Z, Y, X) numpy.ndarray
+        Output array. Modified in-place.
+    zyx_points : (N, 3) numpy.ndarray
+        Coordinates of the disks' centers. The z coordinate is rounded to 
+        the closest integer.
+    radius : float
+        Radius of the disks in pixels
+    values : scalar or (N,) numpy.ndarray, optional
+        Value(s) assigned to the disks' pixels. Where disks overlap, the 
+        value of the last point wins. Default is True
+
+    Returns
+    -------
+    (Z, Y, X) numpy.ndarray
+        The input `lab` with the disks drawn.
+    """
+    zyx_points = np.asarray(zyx_points, dtype=np.float64).reshape(-1, 3)
+    if len(zyx_points) == 0:
+        return lab
+    
+    Z, Y, X = lab.shape
+    values = np.broadcast_to(np.asarray(values), (len(zyx_points),))
+    
+    # Stencil of candidate offsets large enough to contain the disk of 
+    # any center within +-0.5 pixel from the rounded center
+    r_box = int(np.ceil(radius)) + 1
+    dy, dx = np.mgrid[-r_box:r_box+1, -r_box:r_box+1]
+    dy, dx = dy.ravel(), dx.ravel()
+    
+    zz_c = np.round(zyx_points[:, 0]).astype(np.intp)
+    yy_c, xx_c = zyx_points[:, 1], zyx_points[:, 2]
+    
+    # Process the points in chunks to bound the memory of the 
+    # (num_points, num_offsets) candidates arrays
+    chunk_size = max(1, 2_000_000//len(dy))
+    linear_idxs = []
+    pixel_values = []
+    for start in range(0, len(zyx_points), chunk_size):
+        chunk = slice(start, start+chunk_size)
+        yc, xc = yy_c[chunk, np.newaxis], xx_c[chunk, np.newaxis]
+        rr = np.round(yc).astype(np.intp) + dy
+        cc = np.round(xc).astype(np.intp) + dx
+        # Same test as skimage.draw.ellipse
+        inside = (((rr - yc)/radius)**2 + ((cc - xc)/radius)**2) < 1
+        inside &= (rr >= 0) & (rr < Y) & (cc >= 0) & (cc < X)
+        zz = np.broadcast_to(zz_c[chunk, np.newaxis], rr.shape)
+        linear_idxs.append((zz[inside]*Y + rr[inside])*X + cc[inside])
+        pixel_values.append(
+            np.broadcast_to(values[chunk, np.newaxis], rr.shape)[inside]
+        )
+    
+    linear_idxs = np.concatenate(linear_idxs)
+    pixel_values = np.concatenate(pixel_values)
+    
+    # Keep the value of the last point for pixels shared by multiple disks
+    reversed_idxs = linear_idxs[::-1]
+    unique_idxs, first_in_reversed = np.unique(reversed_idxs, return_index=True)
+    lab[np.unravel_index(unique_idxs, lab.shape)] = (
+        pixel_values[::-1][first_in_reversed]
+    )
+    return lab
+
 class Model:
     """SpotMAX implementation of Spotiflow model
     """   
@@ -172,25 +243,17 @@ class Model:
             points = []
             for z, img in enumerate(image):
                 yx_points, details = self.model.predict(img, **predict_kwargs)
-                zyx_points = np.zeros((len(yx_points), 3))
-                zyx_points[:, 0] = z
-                zyx_points[:, 1:] = yx_points
-                points.append(zyx_points)
+                zz = np.full((len(yx_points), 1), z)
+                points.append(np.hstack((zz, np.reshape(yx_points, (-1, 2)))))
             points = np.vstack(points)
         
-        for zyx_coords in points:
-            zc, yc, xc = zyx_coords
-            z_slice = round(zc)
-            img = image[z_slice]
-            rr, cc = skimage.draw.disk(
-                (yc, xc), expected_spot_radius, shape=img.shape
-            )
-            if output_labels == 'Boolean mask' and is2D:
-                values = np.arange(1, len(rr)+1)
-            else:
-                values = True
-            
-            lab[z_slice, rr, cc] = values
+        if output_labels != 'Boolean mask' and is2D:
+            # Each spot mask receives a unique integer ID
+            values = np.arange(1, len(points)+1)
+        else:
+            values = True
+        
+        rasterize_disks(lab, points, expected_spot_radius, values=values)
         
         if is2D:
             lab = lab[0]
@@ -100,16 +100,39 @@ except Exception as err:
         _run_pip_commands(commands)
     print('Cell-ACDC installed')
 
-try:
-    from cellacdc import gui as acdc_gui
-    from qtpy.QtGui import QFont
-    font = QFont()
-    font.setPixelSize(11)
-    font_small = QFont()
-    font_small.setPixelSize(9)
-    GUI_INSTALLED = True
-except ModuleNotFoundError:
+import importlib.util
+
+QT_BINDINGS = ('PyQt6', 'PySide6', 'PyQt5', 'PySide2')
+
+def _is_gui_installed():
+    # Check without importing Qt (importing is slow and not needed in the 
+    # command line)
+    if os.environ.get('SPOTMAX_NO_GUI', '0') == '1':
+        return False
+    try:
+        if importlib.util.find_spec('qtpy') is None:
+            return False
+        if importlib.util.find_spec('pyqtgraph') is None:
+            return False
+        return any(
+            importlib.util.find_spec(binding) is not None 
+            for binding in QT_BINDINGS
+        )
+    except Exception as err:
+        return False
+
+GUI_INSTALLED = _is_gui_installed()
+
+def disable_gui_imports():
+    """Do not import the GUI libraries (Qt, pyqtgraph, matplotlib, and the 
+    Cell-ACDC GUI modules) in the SpotMAX modules imported from now on. 
+    
+    Called by the command line entry point before importing `spotmax.core`. 
+    The environment variable is inherited by the worker processes.
+    """
+    global GUI_INSTALLED
     GUI_INSTALLED = False
+    os.environ['SPOTMAX_NO_GUI'] = '1'
 
 spotmax_path = os.path.dirname(os.path.abspath(__file__))
 resources_folderpath = os.path.join(spotmax_path, 'resources')
@@ -295,7 +318,7 @@ def read_version():
         except Exception as e:
             return 'ND'
 
-def njit_replacement(parallel=False):
+def njit_replacement(parallel=False, cache=False):
     def wrap(func):
         def inner_function(*args, **kwargs):
             return func(*args, **kwargs)
@@ -319,6 +342,29 @@ def get_watchdog_filepaths(identifier: str):
     )
     return watchdog_filepaths
 
-from . import (
-    config, core, data, features, filters, io, pipe, transformations, utils
-)
\ No newline at end of file
+LAZY_SUBMODULES = (
+    'config', 'core', 'data', 'features', 'filters', 'io', 'pipe', 
+    'transformations', 'utils'
+)
+
+def _get_font(pixel_size):
+    from qtpy.QtGui import QFont
+    font = QFont()
+    font.setPixelSize(pixel_size)
+    return font
+
+def __getattr__(name):
+    # Submodules and Qt fonts are imported on first access to keep 
+    # `import spotmax` fast (e.g., when running in the command line)
+    if name in LAZY_SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    
+    if name == 'font':
+        globals()['font'] = _get_font(11)
+        return globals()['font']
+    
+    if name == 'font_small':
+        globals()['font_small'] = _get_font(9)
+        return globals()['font_small']
+    
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
\ No newline at end of file
@@ -35,8 +35,9 @@ if spotmax_installation_path != site_packages:
         exit()
 
 
-from spotmax._run import run_gui, run_cli
-from spotmax import help_text, GUI_INSTALLED
+# NOTE: keep the imports at module level light (i.e., import the modules 
+# depending on the command in `run`) to reduce the start-up time
+from spotmax import help_text
 
 def cli_parser():
     ap = argparse.ArgumentParser(
@@ -96,6 +97,16 @@ def cli_parser():
         metavar='COMMAND',
         help='Text identifier to distinguish multiple SpotMAX instances.'
     )
+    
+    ap.add_argument(
+        '--profile-import',
+        action='store_true',
+        help=(
+            'Print the time required to import the modules used to run '
+            'SpotMAX in the command line (based on `python -X importtime`) '
+            'and exit.'
+        )
+    )
 
     return vars(ap.parse_args())
 
@@ -107,6 +118,7 @@ def run():
     DEBUG = parser_args['debug']
     RUN_CLI = parser_args['cli']
     DISPLAY_VERSION = parser_args['version']
+    PROFILE_IMPORT = parser_args['profile_import']
     
     if DISPLAY_VERSION:
         from cellacdc.myutils import get_info_version_text as acdc_info
@@ -117,9 +129,14 @@ def run():
         print(acdc_info_txt)
         return
     
+    if PROFILE_IMPORT:
+        from spotmax._profile_import import print_import_profile
+        print_import_profile()
+        return
+    
     from spotmax import error_up_str
-    from cellacdc._run import _install_tables
-    requires_restart = _install_tables(parent_software='SpotMAX')
+    from spotmax._run import check_install_tables
+    requires_restart = check_install_tables()
     if requires_restart:
         exit(
             '[NOTE]: SpotMAX had to install a required library and needs to be '
@@ -136,8 +153,13 @@ def run():
         raise FileNotFoundError(error_msg)
 
     if PARAMS_PATH:
+        from spotmax import disable_gui_imports
+        disable_gui_imports()
+        
+        from spotmax._run import run_cli
         run_cli(parser_args, debug=DEBUG)
     else:
+        from spotmax._run import run_gui
         run_gui(debug=DEBUG)
 
 if __name__ == "__main__":
@@ -0,0 +1,155 @@
+# Report of the time required to import the modules used by SpotMAX in the
+# command line. Run it with `spotmax --profile-import` to check that heavy
+# libraries (e.g., Qt or torch) are not imported when they are not needed.
+
+import sys
+import subprocess
+
+CLI_IMPORT_CODE = (
+    'import spotmax; spotmax.disable_gui_imports(); import spotmax.core'
+)
+
+# Libraries that should be imported only when they are needed
+# (GUI, plotting, OpenCV, and neural networks)
+LAZY_MODULES = (
+    'qtpy', 'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'pyqtgraph',
+    'matplotlib', 'cv2', 'torch', 'cellacdc.gui', 'cellacdc.apps',
+    'cellacdc.widgets', 'spotmax.gui', 'spotmax.widgets', 'spotmax.dialogs'
+)
+
+def profile_import(code=CLI_IMPORT_CODE):
+    """Run `python -X importtime` on `code` in a new process
+
+    Parameters
+    ----------
+    code : str, optional
+        Python code to run. Default is the code that imports the modules
+        used to run SpotMAX in the command line
+
+    Returns
+    -------
+    list of (str, int, int, str)
+        List of (module name, self time [µs], cumulative time [µs],
+        name of the module that imported it) of the modules that were 
+        imported successfully, in the same order as printed by Python. 
+        The name of the importing module is '' for top-level imports.
+    """
+    # Failed imports (e.g., optional dependencies that are not installed) 
+    # are also reported by `-X importtime` --> get the imported modules
+    print_modules_code = 'import sys; print(*sys.modules, sep="\\n")'
+    result = subprocess.run(
+        [
+            sys.executable, '-X', 'importtime', '-c', 
+            f'{code}; {print_modules_code}'
+        ],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f'Running `{code}` failed with the following error:\n\n'
+            f'{result.stderr}'
+        )
+    
+    loaded_modules = set(result.stdout.splitlines())
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[12:].split('|')
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # Header line
+            continue
+
+        level = (len(name) - len(name.lstrip()) - 1)//2
+        entries.append((name.strip(), self_us, cumulative_us, level))
+    
+    # Modules are printed after the modules they import --> the importer 
+    # is the next module with a lower nesting level
+    imports = []
+    for i, (name, self_us, cumulative_us, level) in enumerate(entries):
+        if name not in loaded_modules:
+            continue
+        
+        importer = ''
+        for next_name, _, _, next_level in entries[i+1:]:
+            if next_level < level:
+                importer = next_name
+                break
+        imports.append((name, self_us, cumulative_us, importer))
+    return imports
+
+def print_import_profile(code=CLI_IMPORT_CODE, num_top=20):
+    """Print the total import time, the slowest modules and packages, and 
+    the libraries in `LAZY_MODULES` that were imported
+
+    Parameters
+    ----------
+    code : str, optional
+        Python code to profile. Default is `CLI_IMPORT_CODE`
+    num_top : int, optional
+        Number of slowest modules and packages to print. Default is 20
+    """
+    imports = profile_import(code=code)
+    total_us = sum([
+        cumulative_us for _, _, cumulative_us, importer in imports 
+        if not importer
+    ])
+
+    separator = '-'*100
+    print(separator)
+    print(f'Profiled code: `{code}`')
+    print(f'Number of imported modules: {len(imports)}')
+    print(f'Total import time: {total_us/1e6:.3f} s')
+    print(separator)
+
+    print(f'Slowest {num_top} modules (excluding the modules they import):')
+    slowest = sorted(imports, key=lambda item: item[1], reverse=True)
+    for name, self_us, cumulative_us, _ in slowest[:num_top]:
+        print(
+            f'  {self_us/1e3:>9.1f} ms (cumulative {cumulative_us/1e3:>9.1f} '
+            f'ms)  {name}'
+        )
+    print(separator)
+
+    print(f'Slowest {num_top} packages (sum of their modules):')
+    packages_us = {}
+    for name, self_us, _, _ in imports:
+        package = name.split('.')[0]
+        packages_us[package] = packages_us.get(package, 0) + self_us
+    slowest_packages = sorted(
+        packages_us.items(), key=lambda item: item[1], reverse=True
+    )
+    for package, package_us in slowest_packages[:num_top]:
+        print(f'  {package_us/1e3:>9.1f} ms  {package}')
+    print(separator)
+
+    lazy_imported = [
+        (name, cumulative_us, importer) 
+        for name, _, cumulative_us, importer in imports 
+        if name in LAZY_MODULES
+    ]
+    if not lazy_imported:
+        print(
+            'None of the GUI, plotting, OpenCV or neural network libraries '
+            'were imported.'
+        )
+        print(separator)
+        return
+    
+    print(
+        '[WARNING]: The following libraries should be imported only when '
+        'needed:'
+    )
+    for name, cumulative_us, importer in lazy_imported:
+        print(
+            f'  {name} ({cumulative_us/1e3:.1f} ms) imported by '
+            f'"{importer}"'
+        )
+    print(separator)
+
+if __name__ == '__main__':
+    print_import_profile()
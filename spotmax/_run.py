@@ -3,6 +3,18 @@ import os
 
 from . import printl, spotmax_path, resources_folderpath
 
+def check_install_tables():
+    """Install `tables` if missing. Returns True if SpotMAX needs to be 
+    restarted after the installation"""
+    import importlib.util
+    # Importing cellacdc._run and tables is slow --> check first without
+    # importing
+    if importlib.util.find_spec('tables') is not None:
+        return False
+    
+    from cellacdc._run import _install_tables
+    return _install_tables(parent_software='SpotMAX')
+
 def run_gui(debug=False, app=None, mainWin=None, launcherSlot=None):
     from cellacdc._run import _setup_gui_libraries, _setup_app
     
@@ -565,7 +565,7 @@ def _filepaths_params():
             'addComputeButton': False,
             'addApplyButton': False,
             'addBrowseButton': True,
-            'browseExtensions': {'Table': ['.csv', '.h5']},
+            'browseExtensions': {'Table': ['.csv', '.h5', '.parquet']},
             'addEditButton': False,
             'formWidgetFunc': 'widgets._CenteredLineEdit',
             'actions': None,
@@ -746,6 +746,133 @@ def _configuration_params():
             'dtype': int, 
             'parser_arg': 'num_threads'
         },
+        'numParallelPositions': {
+            'desc': 'Number of Positions analysed in parallel',
+            'initialVal': 1,
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'widgets.SpinBox',
+            'actions': None,
+            'dtype': int, 
+            'parser_arg': 'num_parallel_positions'
+        },
+        'streamFrames': {
+            'desc': 'Stream frames from disk (low memory)',
+            'initialVal': False,
+            'stretchWidget': False,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'acdc_widgets.Toggle',
+            'actions': None,
+            'dtype': get_bool, 
+            'parser_arg': 'stream_frames'
+        },
+        'imagesOutputFileFormat': {
+            'desc': 'File format of the saved images',
+            'initialVal': 'default',
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'widgets._imagesOutputFileFormatWidget',
+            'actions': None,
+            'dtype': str, 
+            'parser_arg': 'images_output_file_format'
+        },
+        'imagesOutputCompression': {
+            'desc': 'Compression of the saved .h5 images',
+            'initialVal': 'none',
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'widgets._imagesOutputCompressionWidget',
+            'actions': None,
+            'dtype': str, 
+            'parser_arg': 'images_output_compression'
+        },
+        'imagesOutputChunks': {
+            'desc': 'Chunks of the saved .h5 images',
+            'initialVal': 'frame',
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'widgets._imagesOutputChunksWidget',
+            'actions': None,
+            'dtype': str, 
+            'parser_arg': 'images_output_chunks'
+        },
+        'floatPrecision': {
+            'desc': 'Floating point precision',
+            'initialVal': 'float32',
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'widgets._floatPrecisionWidget',
+            'actions': None,
+            'dtype': str, 
+            'parser_arg': 'float_precision'
+        },
+        'usePredictionCache': {
+            'desc': 'Cache neural network predictions on disk',
+            'initialVal': False,
+            'stretchWidget': False,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'acdc_widgets.Toggle',
+            'actions': None,
+            'dtype': get_bool, 
+            'parser_arg': 'use_prediction_cache'
+        },
+        'predictionCacheMaxSizeGB': {
+            'desc': 'Maximum size of the prediction cache (GB)',
+            'initialVal': 10.0,
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'widgets.FloatLineEdit',
+            'actions': None,
+            'dtype': float, 
+            'valueSetter': 'setValue',
+            'parser_arg': 'prediction_cache_max_size_GB'
+        },
+        'saveResultsStore': {
+            'desc': 'Save experiment-level results store',
+            'initialVal': False,
+            'stretchWidget': False,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'addBrowseButton': False,
+            'addAutoButton': False,
+            'formWidgetFunc': 'acdc_widgets.Toggle',
+            'actions': None,
+            'dtype': get_bool, 
+            'parser_arg': 'save_results_store'
+        },
         'reduceVerbosity': {
             'desc': 'Reduce logging verbosity',
             'initialVal': False,
@@ -1354,6 +1481,17 @@ def _spots_ch_params():
             'actions': None,
             'dtype': get_bool
         },
+        'spotsMasksFormat': {
+            'desc': 'File format of the saved spots masks',
+            'initialVal': 'dense', 
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'formWidgetFunc': 'widgets._spotsMasksFormatWidget',
+            'actions': None,
+            'dtype': str
+        },
         'spotsMasksSizeFeatures': {
             'desc': 'Features for the size of the saved spots masks',
             'initialVal': '',
@@ -1538,6 +1676,28 @@ def _spotfit_params():
             'valueSetter': 'setValue',
             'dtype': str
         },
+        'numWorkersSpotfit': {
+            'desc': 'Number of parallel workers',
+            'initialVal': 1, 
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'formWidgetFunc': 'widgets.SpinBox',
+            'actions': None,
+            'dtype': int
+        },
+        'parallelBackendSpotfit': {
+            'desc': 'Parallel workers backend',
+            'initialVal': 'processes', 
+            'stretchWidget': True,
+            'addInfoButton': True,
+            'addComputeButton': False,
+            'addApplyButton': False,
+            'formWidgetFunc': 'widgets._spotfitParallelBackendWidget',
+            'actions': None,
+            'dtype': str
+        },
     }
     return spotfit_params
 
@@ -2,6 +2,7 @@ from importlib import import_module
 import os
 import warnings
 import shutil
+import tempfile
 import traceback
 from typing import Tuple
 from tqdm import tqdm
@@ -16,8 +17,6 @@ import scipy.stats
 import scipy.ndimage
 import scipy.optimize
 
-import cv2
-
 import skimage.morphology
 import skimage.measure
 import skimage.transform
@@ -63,6 +62,8 @@ from . import issues_url, printl, io, features, config
 from . import transformations
 from . import filters
 from . import pipe
+from . import prediction_cache
+from . import results_store
 from . import ZYX_GLOBAL_COLS, ZYX_AGGR_COLS, ZYX_LOCAL_COLS
 from . import ZYX_LOCAL_EXPANDED_COLS, ZYX_FIT_COLS, ZYX_RESOL_COLS
 from . import BASE_COLUMNS, COLUMNS_FROM_DF_AGG, CATEGORIES
@@ -86,6 +87,14 @@ class _DataLoader:
     def __init__(self, debug=False, log=print):
         self.debug = debug
         self.log = log
+        self._lazy_image_data = []
+    
+    def _close_lazy_image_data(self):
+        """Close the files of the channels loaded with `lazy=True`"""
+        lazy_image_data = getattr(self, '_lazy_image_data', [])
+        self._lazy_image_data = []
+        for image_data in lazy_image_data:
+            image_data.close()
     
     def get_data_from_images_path(
             self, 
@@ -98,11 +107,14 @@ class _DataLoader:
             lineage_table_endname: str,
             df_spots_coords_in_endname: str,
             transformed_spots_ch_nnet=None,
+            stream_frames=False,
+            float_dtype=None
         ):
         data = self._load_data_from_images_path(
             images_path, spots_ch_endname, ref_ch_endname, segm_endname, 
             spots_ch_segm_endname, ref_ch_segm_endname, lineage_table_endname,
-            df_spots_coords_in_endname
+            df_spots_coords_in_endname, stream_frames=stream_frames,
+            float_dtype=float_dtype
         )
         if transformed_spots_ch_nnet is not None:
             data['transformed_spots_ch'] = transformed_spots_ch_nnet
@@ -173,7 +185,9 @@ class _DataLoader:
             spots_ch_segm_endname: str, 
             ref_ch_segm_endname: str,
             lineage_table_endname: str, 
-            df_spots_coords_in_endname: str
+            df_spots_coords_in_endname: str,
+            stream_frames=False,
+            float_dtype=None
         ):
         self._log_files_images_path(images_path)
         channels = {
@@ -202,13 +216,20 @@ class _DataLoader:
 
             self.log(f'Loading "{channel}" channel from "{ch_path}"...')
             to_float = key == 'spots_ch' or key == 'ref_ch'
+            # When streaming, frames are read from disk and converted to 
+            # float only when analysed
             ch_data, ch_dtype = io.load_image_data(
-                ch_path, to_float=to_float, return_dtype=True
+                ch_path, to_float=to_float, return_dtype=True, 
+                lazy=to_float and stream_frames, float_dtype=float_dtype
             )
             self.log(
                 f'Image data "{channel}" has shape {ch_data.shape} '
                 f'and data type {ch_dtype}'
             )
+            if isinstance(ch_data, io.FloatFramesImageData):
+                # Files are closed at the end of the Position 
+                # (see `_close_lazy_image_data`)
+                self._lazy_image_data.append(ch_data)
             data[f'{key}.dtype'] = ch_dtype
             data[key] = ch_data
             data[f'{key}.shape'] = ch_data.shape
@@ -871,6 +892,10 @@ class _ParamsParser(_DataLoader):
         config_default_params = config._configuration_params()
         for anchor, options in config_default_params.items():
             option = configPars.get(SECTION, options['desc'], fallback='')                        
+            if not option and not isinstance(options['initialVal'], str):
+                # Option missing in the INI file (e.g., older INI files) 
+                # --> use default value since casting '' would fail
+                option = str(options['initialVal'])
             dtype_converter = options['dtype']
             value = dtype_converter(option)
             
@@ -1392,6 +1417,19 @@ class _ParamsParser(_DataLoader):
         )
         if df_spots_file_ext is None:
             df_spots_file_ext = '.h5'
+        if df_spots_file_ext == '.parquet':
+            acdc_myutils.check_install_package(
+                'pyarrow', is_cli=self.is_cli, caller_name='SpotMAX'
+            )
+        images_output_compression = (
+            self._params.get('Configuration', {})
+            .get('imagesOutputCompression', {})
+            .get('loadedVal')
+        )
+        if images_output_compression in ('zstd', 'blosc'):
+            acdc_myutils.check_install_package(
+                'hdf5plugin', is_cli=self.is_cli, caller_name='SpotMAX'
+            )
         for i in range(len(self.exp_paths_list)):
             for exp_path in list(self.exp_paths_list[i].keys()):
                 exp_info = self.exp_paths_list[i][exp_path]
@@ -2277,6 +2315,10 @@ class _ParamsParser(_DataLoader):
             if biio_model_kwargs is not None:
                 model_class.set_kwargs(model_params['kwargs'])
             
+            model_class = self._wrap_model_with_prediction_cache(
+                model_class, model_params
+            )
+            
             if 'verbose' in model_params['segment']:
                 model_params['segment']['verbose'] = False
             # Set threshold func to None to not perform it since we use AI
@@ -2371,60 +2413,239 @@ class _ParamsParser(_DataLoader):
                 return False
         return True
 
+@njit(parallel=False, cache=True)
+def _jac_gauss3D(z, y, x, coeffs, num_spots, num_coeffs):
+    # Jacobian ((m,n) matrix) of the model in `GaussianModel.numba_func`:
+    # jac[i,j] = derivative of model[i] wrt coeffs[j]
+    # e.g. m data points with n coeffs --> jac with m rows and n col
+    # The last coeff is the background B (shared between spots)
+    jac = np.zeros((len(z), num_spots*num_coeffs+1))
+    for i in range(num_spots):
+        n = i*num_coeffs
+        z0 = coeffs[n]
+        y0 = coeffs[n+1]
+        x0 = coeffs[n+2]
+        sz = coeffs[n+3]
+        sy = coeffs[n+4]
+        sx = coeffs[n+5]
+        A = coeffs[n+6]
+        # Center rotation around peak center
+        zc = z - z0
+        yc = y - y0
+        xc = x - x0
+        sz2 = sz*sz
+        sy2 = sy*sy
+        sx2 = sx*sx
+        # Product of the three 1D gaussian functions
+        g = np.exp(-(zc**2)/(2*sz2) - (yc**2)/(2*sy2) - (xc**2)/(2*sx2))
+        Ag = A*g
+        
+        # Partial derivatives
+        jac[:, n] = Ag*zc/sz2 # wrt z0
+        jac[:, n+1] = Ag*yc/sy2 # wrt y0
+        jac[:, n+2] = Ag*xc/sx2 # wrt x0
+        jac[:, n+3] = Ag*zc*zc/(sz2*sz) # wrt sz
+        jac[:, n+4] = Ag*yc*yc/(sy2*sy) # wrt sy
+        jac[:, n+5] = Ag*xc*xc/(sx2*sx) # wrt sx
+        jac[:, n+6] = g # wrt A
+    jac[:, -1] = 1.0 # wrt B
+    return jac
+
+@njit(parallel=False, cache=True)
+def _gauss3D_model_jac(z, y, x, coeffs, num_spots, num_coeffs, const):
+    # Model and Jacobian with a single evaluation of the gaussians 
+    # (derivative wrt A is the gaussian itself)
+    jac = _jac_gauss3D(z, y, x, coeffs, num_spots, num_coeffs)
+    model = const + coeffs[-1]
+    for i in range(num_spots):
+        n = i*num_coeffs
+        model = model + coeffs[n+6]*jac[:, n+6]
+    return model, jac
+
+@njit(parallel=False, cache=True)
+def _lm_fit_gauss3D(
+        z, y, x, data, const, num_spots, num_coeffs, init_guess, 
+        low_limit, high_limit, tol
+    ):
+    # Levenberg-Marquardt with box constraints. Steps are projected onto 
+    # the bounds and the coefficients at a bound whose gradient points 
+    # outside are kept fixed during the step. Coefficients with equal 
+    # lower and upper bounds are constants.
+    num_vars = len(init_guess)
+    max_nfev = 100*num_vars
+    coeffs = np.minimum(np.maximum(init_guess, low_limit), high_limit)
+    is_variable = low_limit < high_limit
+    model, jac = _gauss3D_model_jac(
+        z, y, x, coeffs, num_spots, num_coeffs, const
+    )
+    residuals = data - model
+    cost = 0.5*np.dot(residuals, residuals)
+    nfev = 1
+    damping = 1e-3
+    while nfev < max_nfev:
+        # Gauss-Newton step solves (J^T J) step = J^T residuals
+        gradient = jac.T @ residuals
+        hessian = jac.T @ jac
+        is_step_variable = is_variable.copy()
+        max_gradient = 0.0
+        for j in range(num_vars):
+            at_low = coeffs[j] <= low_limit[j] and gradient[j] < 0
+            at_high = coeffs[j] >= high_limit[j] and gradient[j] > 0
+            if at_low or at_high:
+                is_step_variable[j] = False
+            if is_step_variable[j]:
+                max_gradient = max(max_gradient, abs(gradient[j]))
+        
+        if max_gradient <= tol:
+            return coeffs, True, nfev
+        
+        diag_max = 0.0
+        for j in range(num_vars):
+            if is_step_variable[j]:
+                diag_max = max(diag_max, hessian[j, j])
+        diag_min = max(1e-12*diag_max, 1e-30)
+        for j in range(num_vars):
+            if not is_step_variable[j]:
+                hessian[j, :] = 0.0
+                hessian[:, j] = 0.0
+                hessian[j, j] = 1.0
+                gradient[j] = 0.0
+            else:
+                hessian[j, j] += damping*max(hessian[j, j], diag_min)
+        
+        step = np.linalg.solve(hessian, gradient)
+        new_coeffs = np.minimum(
+            np.maximum(coeffs + step, low_limit), high_limit
+        )
+        step_norm = np.sqrt(np.sum((new_coeffs - coeffs)**2))
+        coeffs_norm = np.sqrt(np.sum(coeffs**2))
+        if step_norm <= tol*(tol + coeffs_norm):
+            return coeffs, True, nfev
+        
+        new_model, new_jac = _gauss3D_model_jac(
+            z, y, x, new_coeffs, num_spots, num_coeffs, const
+        )
+        nfev += 1
+        new_residuals = data - new_model
+        new_cost = 0.5*np.dot(new_residuals, new_residuals)
+        if new_cost < cost:
+            cost_reduction = cost - new_cost
+            prev_cost = cost
+            coeffs = new_coeffs
+            jac = new_jac
+            residuals = new_residuals
+            cost = new_cost
+            damping = max(damping/3, 1e-12)
+            if cost_reduction <= tol*prev_cost:
+                return coeffs, True, nfev
+        else:
+            damping *= 4
+            if damping > 1e16:
+                # Steps are too small to reduce the cost any further
+                return coeffs, True, nfev
+    
+    return coeffs, False, nfev
+
+@njit(parallel=False, cache=True)
+def _lm_fit_gauss3D_batch(
+        z, y, x, data, const, voxels_starts, coeffs_starts, num_spots, 
+        num_coeffs, init_guess, low_limit, high_limit, tol
+    ):
+    # Fit independent groups of spots stored as ragged arrays. Voxels of 
+    # group g are `voxels_starts[g]:voxels_starts[g+1]` and its coefficients 
+    # are `coeffs_starts[g]:coeffs_starts[g+1]`
+    num_groups = len(num_spots)
+    fit_coeffs = np.empty_like(init_guess)
+    converged = np.zeros(num_groups, dtype=np.bool_)
+    nfevs = np.zeros(num_groups, dtype=np.int64)
+    for g in range(num_groups):
+        v0 = voxels_starts[g]
+        v1 = voxels_starts[g+1]
+        c0 = coeffs_starts[g]
+        c1 = coeffs_starts[g+1]
+        coeffs, group_converged, nfev = _lm_fit_gauss3D(
+            z[v0:v1], y[v0:v1], x[v0:v1], data[v0:v1], const[v0:v1], 
+            num_spots[g], num_coeffs, init_guess[c0:c1], 
+            low_limit[c0:c1], high_limit[c0:c1], tol
+        )
+        fit_coeffs[c0:c1] = coeffs
+        converged[g] = group_converged
+        nfevs[g] = nfev
+    return fit_coeffs, converged, nfevs
+
 class GaussianModel:
-    def __init__(self, nfev=0):
-        pass
+    def __init__(self, nfev=0, check_jac=False):
+        self.check_jac = check_jac
 
-    @staticmethod
-    @njit(parallel=True)
-    def jac_gauss3D(coeffs, data, z, y, x, num_spots, num_coeffs, const=0):
-        # Gradient ((m,n) Jacobian matrix):
-        # grad[i,j] = derivative of f[i] wrt coeffs[j]
-        # e.g. m data points with n coeffs --> grad with m rows and n col
-        grad = np.empty((len(z), num_coeffs*num_spots))
-        ns = np.arange(0,num_coeffs*num_spots,num_coeffs)
-        for i in prange(num_spots):
-            n = ns[i]
-            coeffs_i = coeffs[n:n+num_coeffs]
-            z0, y0, x0, sz, sy, sx, A, B = coeffs_i
-            # Center rotation around peak center
-            zc = z - z0
-            yc = y - y0
-            xc = x - x0
-            # Build 3D gaussian by multiplying each 1D gaussian function
-            gauss_x = np.exp(-(xc**2)/(2*(sx**2)))
-            gauss_y = np.exp(-(yc**2)/(2*(sy**2)))
-            gauss_z = np.exp(-(zc**2)/(2*(sz**2)))
-            f_x = 1/(sx*np.sqrt(2*np.pi))
-            f_y = 1/(sy*np.sqrt(2*np.pi))
-            f_z = 1/(sz*np.sqrt(2*np.pi))
-            g = gauss_x*gauss_y*gauss_z
-            f = f_x*f_y*f_z
-            fg = f*g
-
-            # Partial derivatives
-            d_g_sz = g * zc**2 / (sz**3)
-            d_f_sz = A/(np.sqrt(2*np.pi)*(sz**2))
-            d_fg_sz = g*d_f_sz + f*d_g_sz
-
-            d_g_sy = g * yc**2 / (sy**2)
-            d_f_sy = -A/(np.sqrt(2*np.pi)*(sy**2))
-            d_fg_sy = g*d_f_sz + f*d_g_sz
-
-            d_g_sx = g * xc**2 / (sx**2)
-            d_f_sx = A/(np.sqrt(2*np.pi)*(sx**2))
-            d_fg_sx = g*d_f_sz + f*d_g_sz
-
-            # Gradient array
-            grad[:,n] = A*fg * zc / (sz**2) # wrt zc
-            grad[:,n+1] = A*fg * yc / (sy**2) # wrt yc
-            grad[:,n+2] = A*fg * xc / (sx**2) # wrt xc
-            grad[:,n+3] = d_fg_sz # wrt sz
-            grad[:,n+4] = d_fg_sy # wrt sy
-            grad[:,n+5] = d_fg_sx # wrt sx
-            grad[:,n+6] = fg # wrt A
-        grad[:,-1] = np.ones(len(x)) # wrt B
-        return -grad
+    jac_gauss3D = staticmethod(_jac_gauss3D)
+    
+    def jacobian(
+            self, 
+            variable_coeffs, 
+            data, 
+            z, y, x, 
+            num_spots, 
+            num_coeffs, 
+            const_coeffs,
+            const=0,
+        ):
+        """Jacobian of `residuals` with respect to the variable coefficients 
+        (i.e., those not fixed by equal lower and upper bounds)
+        """        
+        coeffs = self.get_func_coeffs(variable_coeffs, const_coeffs)
+        jac = self.jac_gauss3D(z, y, x, coeffs, num_spots, num_coeffs)
+        variable_idxs = np.nonzero(np.isnan(const_coeffs))[0]
+        # residuals = data - model --> negative sign
+        return -jac[:, variable_idxs]
+    
+    def finite_diff_jacobian(self, variable_coeffs, *args, const=0):
+        """Central finite differences approximation of `jacobian`. 
+        Used to validate the analytic Jacobian.
+        """        
+        variable_coeffs = np.asarray(variable_coeffs, dtype=float)
+        steps = np.finfo(float).eps**(1/3)*np.maximum(
+            1.0, np.abs(variable_coeffs)
+        )
+        pbar = getattr(self, 'pbar', None)
+        self.pbar = None
+        columns = []
+        for j, step in enumerate(steps):
+            coeffs_plus = variable_coeffs.copy()
+            coeffs_plus[j] += step
+            coeffs_minus = variable_coeffs.copy()
+            coeffs_minus[j] -= step
+            res_plus = self.residuals(coeffs_plus, *args, const=const)
+            res_minus = self.residuals(coeffs_minus, *args, const=const)
+            columns.append((res_plus - res_minus)/(2*step))
+        self.pbar = pbar
+        return np.column_stack(columns)
+    
+    def check_jacobian(self, variable_coeffs, *args, const=0, rtol=1e-4):
+        """Compare the analytic Jacobian with finite differences
+
+        Parameters
+        ----------
+        variable_coeffs : (n,) numpy.ndarray
+            Variable coefficients where to evaluate the Jacobians.
+        *args : 
+            Additional arguments passed to `residuals` 
+            (data, z, y, x, num_spots, num_coeffs, const_coeffs)
+        const : float or numpy.ndarray, optional
+            Constant term of the model. Default is 0
+        rtol : float, optional
+            Maximum absolute difference relative to the maximum absolute 
+            value of the Jacobian. Default is 1e-4
+
+        Returns
+        -------
+        tuple of (float, bool)
+            Maximum relative difference and True if it is below `rtol`.
+        """        
+        jac = self.jacobian(variable_coeffs, *args, const=const)
+        jac_fd = self.finite_diff_jacobian(variable_coeffs, *args, const=const)
+        scale = max(1.0, np.abs(jac_fd).max())
+        max_rel_diff = np.abs(jac - jac_fd).max()/scale
+        return max_rel_diff, max_rel_diff <= rtol
     
     def variable_num_coeffs(self, bounds, num_coeffs):
         lb, hb = bounds
@@ -2464,41 +2685,122 @@ class GaussianModel:
             tol,
             pbar_desc=''
         ):
+        fit_coeffs, success = self.curve_fit_batch(
+            [init_guess_s], [s_data], [z_s], [y_s], [x_s], [num_spots_s], 
+            num_coeffs, [const], [bounds], tol, pbar_desc=pbar_desc
+        )
+        return fit_coeffs[0], success[0]
+    
+    def curve_fit_batch(
+            self, 
+            init_guesses,
+            datas,
+            zz, yy, xx, 
+            nums_spots,
+            num_coeffs,
+            consts,
+            bounds,
+            tol,
+            pbar_desc=''
+        ):
+        """Fit multiple independent groups of spots with a single call to 
+        the numba Levenberg-Marquardt solver.
+
+        Parameters
+        ----------
+        init_guesses : list of (num_spots_s*num_coeffs+1,) numpy.ndarrays
+            Initial guess of each group
+        datas : list of numpy.ndarrays
+            Intensities of the voxels of each group
+        zz, yy, xx : lists of numpy.ndarrays
+            Coordinates of the voxels of each group
+        nums_spots : list of ints
+            Number of spots of each group
+        num_coeffs : int
+            Number of coefficients of each spot (without the background)
+        consts : list of floats or numpy.ndarrays
+            Constant term of the model of each group (e.g., the already 
+            fitted neighbouring spots)
+        bounds : list of (low_limit, high_limit) tuples
+            Bounds of each group. Coefficients with equal lower and upper 
+            bounds are constants.
+        tol : float
+            Tolerance on the cost reduction, step size and gradient
+        pbar_desc : str or None, optional
+            If not None, description of the progress bar. Default is ''
+
+        Returns
+        -------
+        tuple of (list of numpy.ndarrays, list of bools)
+            Fitted coefficients and True if the solver converged for each 
+            group.
+        """
         self.pbar = None
+        num_groups = len(init_guesses)
         if pbar_desc is not None:
             self.pbar = tqdm(
-                desc=pbar_desc, total=100*len(z_s), unit=' fev',
+                desc=pbar_desc, total=num_groups, unit=' group',
                 position=4, leave=False, ncols=100
             )
         
-        # variable_num_coeffs = self.variable_num_coeffs(bounds, num_coeffs)
-        const_coeffs = self.const_coeffs(
-            bounds, num_coeffs, num_spots_s
-        )
-        lb, hb, init_guess = self.remove_equal_bounds(bounds, init_guess_s)
-        args=(
-            s_data, z_s, y_s, x_s, num_spots_s, num_coeffs, const_coeffs
-        )
-        leastsq_result = scipy.optimize.least_squares(
-            self.residuals, init_guess,
-            args=args,
-            # jac=model.jac_gauss3D,
-            kwargs={'const': const},
-            loss='linear', 
-            f_scale=0.1,
-            bounds=(lb, hb),
-            ftol=tol,
-            xtol=tol, 
-            gtol=tol
+        if self.check_jac:
+            for g in range(num_groups):
+                self._check_group_jacobian(
+                    init_guesses[g], datas[g], zz[g], yy[g], xx[g], 
+                    nums_spots[g], num_coeffs, consts[g], bounds[g]
+                )
+        
+        num_voxels = [len(z_s) for z_s in zz]
+        voxels_starts = np.zeros(num_groups+1, dtype=np.int64)
+        voxels_starts[1:] = np.cumsum(num_voxels)
+        num_group_coeffs = [len(init_guess) for init_guess in init_guesses]
+        coeffs_starts = np.zeros(num_groups+1, dtype=np.int64)
+        coeffs_starts[1:] = np.cumsum(num_group_coeffs)
+        
+        consts = [
+            np.broadcast_to(np.asarray(const, dtype=float), (num_vox,))
+            for const, num_vox in zip(consts, num_voxels)
+        ]
+        fit_coeffs, converged, _ = _lm_fit_gauss3D_batch(
+            np.concatenate(zz).astype(float), 
+            np.concatenate(yy).astype(float), 
+            np.concatenate(xx).astype(float), 
+            np.concatenate(datas).astype(float), 
+            np.concatenate(consts), 
+            voxels_starts, 
+            coeffs_starts, 
+            np.asarray(nums_spots, dtype=np.int64), 
+            num_coeffs, 
+            np.concatenate(init_guesses).astype(float), 
+            np.concatenate([low for low, _ in bounds]).astype(float), 
+            np.concatenate([high for _, high in bounds]).astype(float), 
+            tol
         )
-        fit_coeffs = self.get_func_coeffs(leastsq_result.x, const_coeffs)
         if self.pbar is not None:
+            self.pbar.update(num_groups)
             self.pbar.close()
         
-        return fit_coeffs, leastsq_result.success
+        fit_coeffs = np.split(fit_coeffs, coeffs_starts[1:-1])
+        return fit_coeffs, [bool(success) for success in converged]
+    
+    def _check_group_jacobian(
+            self, init_guess_s, s_data, z_s, y_s, x_s, num_spots_s, 
+            num_coeffs, const, bounds
+        ):
+        const_coeffs = self.const_coeffs(bounds, num_coeffs, num_spots_s)
+        _, _, init_guess = self.remove_equal_bounds(bounds, init_guess_s)
+        args = (s_data, z_s, y_s, x_s, num_spots_s, num_coeffs, const_coeffs)
+        max_rel_diff, is_jac_valid = self.check_jacobian(
+            init_guess, *args, const=const
+        )
+        if not is_jac_valid:
+            warnings.warn(
+                'Analytic Jacobian of the gaussian model differs from '
+                f'finite differences (max. relative diff. = {max_rel_diff})'
+            )
     
     @staticmethod
-    @njit(parallel=False)
+    @njit(parallel=False, cache=True)
     def numba_func(
             z, y, x, coeffs, num_spots, num_coeffs, const
         ):
@@ -2568,6 +2870,11 @@ class GaussianModel:
     def goodness_of_fit(
             self, y_obs, y_model, ddof, is_linear_regr=False, weights=None
         ):
+        # Statistics are computed in double precision regardless of the 
+        # precision of the image data
+        y_obs = np.asarray(y_obs, dtype=np.float64)
+        y_model = np.asarray(y_model, dtype=np.float64)
+        
         # Degree of freedom
         N = len(y_obs)
         dof = N-ddof
@@ -2624,10 +2931,13 @@ class GaussianModel:
 
     def set_df_spots_ID(self, df_spots_ID):
         self.df_spots_ID = df_spots_ID
+        # Bounds and initial guesses of all the spots are evaluated once 
+        # and cached (see `_get_spots_bounds` and `_get_spots_init_guess`)
+        self._spots_bounds_cache = {}
+        self._spots_init_guess_cache = {}
     
-    def get_bounds(
+    def _get_spots_bounds(
             self, 
-            num_spots_s, num_coeffs, fit_ids,
             xy_center_half_interval_val: float, 
             z_center_half_interval_val: float, 
             sigma_x_min_max_expr: Tuple[str, str],
@@ -2636,8 +2946,25 @@ class GaussianModel:
             A_min_max_expr: Tuple[str, str],
             B_min_max_expr: Tuple[str, str],
         ):
-        low_limit = np.zeros(num_spots_s*num_coeffs+1)
-        high_limit = np.zeros(num_spots_s*num_coeffs+1)
+        """Evaluate the bounds of all the spots in `df_spots_ID` at once.
+
+        Returns
+        -------
+        low_limits, high_limits : (N, 7) numpy.ndarrays
+            Lower and upper bounds of the coefficients of each spot.
+        B_mins, B_maxs : (N,) numpy.ndarrays
+            Lower and upper bounds of the background of each spot.
+        """        
+        cache_key = (
+            xy_center_half_interval_val, z_center_half_interval_val,
+            tuple(sigma_x_min_max_expr), tuple(sigma_y_min_max_expr), 
+            tuple(sigma_z_min_max_expr), tuple(A_min_max_expr), 
+            tuple(B_min_max_expr)
+        )
+        cache = getattr(self, '_spots_bounds_cache', {})
+        if cache_key in cache:
+            return cache[cache_key]
+        
         z_cbl = z_center_half_interval_val
         xy_cbl = xy_center_half_interval_val
         
@@ -2653,59 +2980,88 @@ class GaussianModel:
             self.df_spots_ID = self.df_spots_ID.eval(
                 f'{feature}_min = {min_expr}')       
             self.df_spots_ID = self.df_spots_ID.eval(
-                f'{feature}_max = {max_expr}')          
-        
-        n = 0
-        for spot_idx in fit_ids:
-            zyx_cols = ZYX_LOCAL_EXPANDED_COLS
-            z0, y0, x0 = self.df_spots_ID.loc[spot_idx, zyx_cols]
-            
-            min_sigma_z = self.df_spots_ID.at[spot_idx, 'sigma_z_fit_bound_min']
-            max_sigma_z = self.df_spots_ID.at[spot_idx, 'sigma_z_fit_bound_max']
-            
-            min_sigma_y = self.df_spots_ID.at[spot_idx, 'sigma_y_fit_bound_min']
-            max_sigma_y = self.df_spots_ID.at[spot_idx, 'sigma_y_fit_bound_max']
-            
-            min_sigma_x = self.df_spots_ID.at[spot_idx, 'sigma_x_fit_bound_min']
-            max_sigma_x = self.df_spots_ID.at[spot_idx, 'sigma_x_fit_bound_max']
-            
-            min_A_fit = self.df_spots_ID.at[spot_idx, 'A_fit_bound_min']
-            max_A_fit = self.df_spots_ID.at[spot_idx, 'A_fit_bound_max']
-            
-            low_lim = np.array([
-                z0-z_cbl, y0-xy_cbl, x0-xy_cbl, 
-                min_sigma_z, min_sigma_y, min_sigma_x, 
-                min_A_fit
-            ])
-            high_lim = np.array([
-                z0+z_cbl, y0+xy_cbl, x0+xy_cbl, 
-                max_sigma_z, max_sigma_y, max_sigma_x, 
-                max_A_fit
-            ])
-            low_limit[n:n+num_coeffs] = low_lim
-            high_limit[n:n+num_coeffs] = high_lim
-            n += num_coeffs
-        
-        min_B_fit = self.df_spots_ID.loc[fit_ids, 'B_fit_bound_min'].min()
-        max_B_fit = self.df_spots_ID.loc[fit_ids, 'B_fit_bound_max'].max()
+                f'{feature}_max = {max_expr}')
+        
+        df = self.df_spots_ID
+        z0, y0, x0 = df[ZYX_LOCAL_EXPANDED_COLS].to_numpy(dtype=float).T
+        low_limits = np.column_stack((
+            z0-z_cbl, y0-xy_cbl, x0-xy_cbl, 
+            df['sigma_z_fit_bound_min'].to_numpy(dtype=float), 
+            df['sigma_y_fit_bound_min'].to_numpy(dtype=float), 
+            df['sigma_x_fit_bound_min'].to_numpy(dtype=float), 
+            df['A_fit_bound_min'].to_numpy(dtype=float), 
+        ))
+        high_limits = np.column_stack((
+            z0+z_cbl, y0+xy_cbl, x0+xy_cbl, 
+            df['sigma_z_fit_bound_max'].to_numpy(dtype=float), 
+            df['sigma_y_fit_bound_max'].to_numpy(dtype=float), 
+            df['sigma_x_fit_bound_max'].to_numpy(dtype=float), 
+            df['A_fit_bound_max'].to_numpy(dtype=float), 
+        ))
+        B_mins = df['B_fit_bound_min'].to_numpy(dtype=float)
+        B_maxs = df['B_fit_bound_max'].to_numpy(dtype=float)
+        
+        spots_bounds = (low_limits, high_limits, B_mins, B_maxs)
+        cache[cache_key] = spots_bounds
+        self._spots_bounds_cache = cache
+        return spots_bounds
+    
+    def get_bounds(
+            self, 
+            num_spots_s, num_coeffs, fit_ids,
+            xy_center_half_interval_val: float, 
+            z_center_half_interval_val: float, 
+            sigma_x_min_max_expr: Tuple[str, str],
+            sigma_y_min_max_expr: Tuple[str, str],
+            sigma_z_min_max_expr: Tuple[str, str],
+            A_min_max_expr: Tuple[str, str],
+            B_min_max_expr: Tuple[str, str],
+        ):
+        low_limits, high_limits, B_mins, B_maxs = self._get_spots_bounds(
+            xy_center_half_interval_val, 
+            z_center_half_interval_val, 
+            sigma_x_min_max_expr,
+            sigma_y_min_max_expr,
+            sigma_z_min_max_expr,
+            A_min_max_expr,
+            B_min_max_expr,
+        )
+        spots_idxs = self.df_spots_ID.index.get_indexer(fit_ids)
         
-        low_limit[-1] = min_B_fit
-        high_limit[-1] = max_B_fit
+        low_limit = np.zeros(num_spots_s*num_coeffs+1)
+        high_limit = np.zeros(num_spots_s*num_coeffs+1)
+        low_limit[:-1] = low_limits[spots_idxs].ravel()
+        high_limit[:-1] = high_limits[spots_idxs].ravel()
+        low_limit[-1] = np.nanmin(B_mins[spots_idxs])
+        high_limit[-1] = np.nanmax(B_maxs[spots_idxs])
         
         return low_limit, high_limit
     
-    def get_init_guess(
+    def _get_spots_init_guess(
             self,
-            num_spots_s, num_coeffs, fit_ids,
             sigma_x_guess_expr: str,
             sigma_y_guess_expr: str,
             sigma_z_guess_expr: str,
             A_guess_expr: str,
             B_guess_expr: str,
-            low_limit: np.array,
-            high_limit: np.array        
         ):
-        init_guess = np.zeros(num_spots_s*num_coeffs+1)
+        """Evaluate the initial guess of all the spots in `df_spots_ID` at 
+        once.
+
+        Returns
+        -------
+        init_guesses : (N, 7) numpy.ndarray
+            Initial guess of the coefficients of each spot.
+        B_guesses : (N,) numpy.ndarray
+            Initial guess of the background of each spot.
+        """        
+        cache_key = (
+            sigma_x_guess_expr, sigma_y_guess_expr, sigma_z_guess_expr, 
+            A_guess_expr, B_guess_expr
+        )
+        cache = getattr(self, '_spots_init_guess_cache', {})
+        if cache_key in cache:
+            return cache[cache_key]
         
         all_exprs = {
             'sigma_x_fit': sigma_x_guess_expr,
@@ -2718,24 +3074,45 @@ class GaussianModel:
             self.df_spots_ID = self.df_spots_ID.eval(
                 f'{feature}_init_guess = {expression}')
         
-        n = 0
-        for spot_idx in fit_ids:
-            zyx_cols = ZYX_LOCAL_EXPANDED_COLS
-            z0, y0, x0 = self.df_spots_ID.loc[spot_idx, zyx_cols]
-            
-            sigma_x_ig = self.df_spots_ID.at[spot_idx, 'sigma_x_fit_init_guess']
-            sigma_y_ig = self.df_spots_ID.at[spot_idx, 'sigma_y_fit_init_guess']
-            sigma_z_ig = self.df_spots_ID.at[spot_idx, 'sigma_z_fit_init_guess']
-            
-            A_fit_ig = self.df_spots_ID.at[spot_idx, 'A_fit_init_guess']
-            
-            init_guess_spot = np.array([
-                z0, y0, x0, sigma_z_ig, sigma_y_ig, sigma_x_ig, A_fit_ig
-            ])
-            init_guess[n:n+num_coeffs] = init_guess_spot
-            n += num_coeffs
+        df = self.df_spots_ID
+        zyx_centers = df[ZYX_LOCAL_EXPANDED_COLS].to_numpy(dtype=float)
+        init_guesses = np.column_stack((
+            zyx_centers, 
+            df['sigma_z_fit_init_guess'].to_numpy(dtype=float), 
+            df['sigma_y_fit_init_guess'].to_numpy(dtype=float), 
+            df['sigma_x_fit_init_guess'].to_numpy(dtype=float), 
+            df['A_fit_init_guess'].to_numpy(dtype=float), 
+        ))
+        B_guesses = df['B_fit_init_guess'].to_numpy(dtype=float)
+        
+        spots_init_guess = (init_guesses, B_guesses)
+        cache[cache_key] = spots_init_guess
+        self._spots_init_guess_cache = cache
+        return spots_init_guess
+    
+    def get_init_guess(
+            self,
+            num_spots_s, num_coeffs, fit_ids,
+            sigma_x_guess_expr: str,
+            sigma_y_guess_expr: str,
+            sigma_z_guess_expr: str,
+            A_guess_expr: str,
+            B_guess_expr: str,
+            low_limit: np.array,
+            high_limit: np.array        
+        ):
+        init_guesses, B_guesses = self._get_spots_init_guess(
+            sigma_x_guess_expr,
+            sigma_y_guess_expr,
+            sigma_z_guess_expr,
+            A_guess_expr,
+            B_guess_expr,
+        )
+        spots_idxs = self.df_spots_ID.index.get_indexer(fit_ids)
         
-        init_guess[-1] = self.df_spots_ID.loc[fit_ids, 'B_fit_init_guess'].min()
+        init_guess = np.zeros(num_spots_s*num_coeffs+1)
+        init_guess[:-1] = init_guesses[spots_idxs].ravel()
+        init_guess[-1] = np.nanmin(B_guesses[spots_idxs])
         init_guess = np.clip(init_guess, low_limit, high_limit)
         
         return init_guess
@@ -3104,16 +3481,25 @@ class Spheroid:
     def get_spots_mask(
             self, i, zyx_vox_dim, zyx_resolution, zyx_centers,
             method='min_spheroid', dtype=bool, ids=[], 
-            semiax_len=None
+            semiax_len=None, shape=None
         ):
-        Z, Y, X = self.V_shape
+        if shape is None:
+            shape = self.V_shape
+        Z, Y, X = shape
         # Calc spheroid semiaxis lengths in pixels (c: z, a: x and y)
         if semiax_len is None:
             semiax_len = self.calc_semiax_len(i, zyx_vox_dim, zyx_resolution)
         local_spot_mask = self.get_local_spot_mask(semiax_len)
-        # Pre-allocate arrays
-        spots_mask = np.zeros(self.V_shape, dtype)
-        temp_mask = np.zeros(self.V_shape, bool)
+        # Pre-allocate output array. Each spot only touches its own 
+        # neighbourhood (slice_G_to_L) so the cost is independent of the 
+        # number of spots times the volume
+        spots_mask = np.zeros(shape, dtype)
+        if dtype == bool:
+            fill_values = [True]*len(zyx_centers)
+        elif dtype == np.uint32:
+            fill_values = ids
+        else:
+            return spots_mask
         # Insert local spot masks into global mask
         if self.show_progress:
             in_pbar = tqdm(
@@ -3121,41 +3507,82 @@ class Spheroid:
                 unit=' spot', leave=False, position=4, ncols=100
             )
         for c, zyx_c in enumerate(zyx_centers):
-            (temp_mask, _, slice_G_to_L,
-            slice_crop) = self.index_local_into_global_mask(
-                temp_mask, local_spot_mask, zyx_c, semiax_len, Z, Y, X,
-                return_slice=True
-            )
-            if dtype == bool:
-                spots_mask = np.logical_or(spots_mask, temp_mask)
-            elif dtype == np.uint32:
-                cropped_mask = local_spot_mask[slice_crop]
-                spots_mask[slice_G_to_L][cropped_mask] = ids[c]
+            slice_G_to_L, slice_crop = self.get_slice_G_to_L(
+                semiax_len, zyx_c, Z, Y, X
+            )
+            cropped_mask = local_spot_mask[slice_crop]
+            spots_mask[slice_G_to_L][cropped_mask] = fill_values[c]
             if self.show_progress:
                 in_pbar.update(1)
         if self.show_progress:
             in_pbar.close()
         return spots_mask
+    
+    def get_spots_bbox_slice(self, semiax_len, zyx_centers, labels=None):
+        """Get the slice of the bounding box enclosing all the spheroids 
+        with semi-axis lengths `semiax_len` centered at `zyx_centers` and 
+        all the non-zero voxels of `labels` (if not None).
+        """
+        Z, Y, X = self.V_shape
+        a, c = semiax_len
+        a_int = int(np.ceil(a))
+        c_int = int(np.ceil(c))
+        zyx_centers = np.asarray(zyx_centers, dtype=int).reshape(-1, 3)
+        radii = np.array((c_int, a_int, a_int))
+        bbox_min = zyx_centers.min(axis=0) - radii
+        bbox_max = zyx_centers.max(axis=0) + radii + 1
+        if labels is not None:
+            for axis in range(3):
+                other_axes = tuple(ax for ax in range(3) if ax != axis)
+                nonzero_idx = np.flatnonzero(labels.any(axis=other_axes))
+                if len(nonzero_idx) == 0:
+                    continue
+                bbox_min[axis] = min(bbox_min[axis], nonzero_idx[0])
+                bbox_max[axis] = max(bbox_max[axis], nonzero_idx[-1]+1)
+        bbox_min = np.clip(bbox_min, 0, None)
+        bbox_max = np.minimum(bbox_max, (Z, Y, X))
+        bbox_slice = tuple(
+            slice(start, stop) for start, stop in zip(bbox_min, bbox_max)
+        )
+        return bbox_slice
 
     def expand_spots_labels(
             self, labels, zyx_vox_size, zyx_seed_size, spots_centers,
             grow_iter=0
         ):
+        labels_out = np.zeros_like(labels)
+        if len(spots_centers) == 0 or not np.any(labels):
+            return labels_out
+        
+        semiax_len = self.calc_semiax_len(
+            grow_iter, zyx_vox_size, zyx_seed_size
+        )
+        
+        # Restrict the distance transform to the bounding box enclosing 
+        # both the dilated spots and the input labels. Since all the 
+        # labels are inside the box, the nearest label of every voxel in 
+        # the box is the same as the one computed on the full volume.
+        bbox_slice = self.get_spots_bbox_slice(
+            semiax_len, spots_centers, labels=labels
+        )
+        offset = np.array([s.start for s in bbox_slice])
+        labels_bbox = labels[bbox_slice]
         _, nearest_label_coords = scipy.ndimage.distance_transform_edt(
-            labels==0, return_indices=True, sampling=zyx_vox_size,
+            labels_bbox==0, return_indices=True, sampling=zyx_vox_size,
         )
         dilate_mask = self.get_spots_mask(
-            grow_iter, zyx_vox_size, zyx_seed_size, spots_centers
+            grow_iter, zyx_vox_size, zyx_seed_size, 
+            np.asarray(spots_centers) - offset, semiax_len=semiax_len, 
+            shape=labels_bbox.shape
         )
-        labels_out = np.zeros_like(labels)
 
         # build the coordinates to find nearest labels
         masked_nearest_label_coords = [
             dimension_indices[dilate_mask]
             for dimension_indices in nearest_label_coords
         ]
-        nearest_labels = labels[tuple(masked_nearest_label_coords)]
-        labels_out[dilate_mask] = nearest_labels
+        nearest_labels = labels_bbox[tuple(masked_nearest_label_coords)]
+        labels_out[bbox_slice][dilate_mask] = nearest_labels
         return labels_out
 
     def calc_foregr_sum(self, j, V_spots, min_int, spot_filled_mask):
@@ -3290,7 +3717,7 @@ class SpotFIT(Spheroid):
             zyx_spot_radii_pixel, pair_fit_coeffs, num_coeffs, weights=None     
         ):
         
-        model = GaussianModel(100*len(zz))
+        model = GaussianModel(100*len(zz), check_jac=self.debug)
         model.set_df_spots_ID(df_spots_ID)
         
         num_spots_s = 1
@@ -3379,7 +3806,7 @@ class SpotFIT(Spheroid):
             self, zz, yy, xx, df_spots_ID, zyx_centers,
             zyx_spot_radii_pixel, weights=None
         ):
-        model = GaussianModel(100*len(zz))
+        model = GaussianModel(100*len(zz), check_jac=self.debug)
         model.set_df_spots_ID(df_spots_ID)
         
         num_spots_s = 2
@@ -3602,6 +4029,63 @@ class SpotFIT(Spheroid):
         self.df_spotFIT_ID = df_spotFIT_ID
         self.df_spotFIT_ID.index.names = ['spot_id']
 
+    def _get_grown_spots_surf_idxs(
+            self, expanded_labels, prev_labels, spots_slices, ids
+        ):
+        """Get the linear indices of the surface voxels of the spots `ids` 
+        grown from `prev_labels` to `expanded_labels` with a single pass 
+        over the volume.
+
+        The surface of each spot is the symmetric difference between its 
+        expanded and previous masks inside the bounding box of the expanded 
+        spot (`spots_slices` from `scipy.ndimage.find_objects`). 
+        
+        Returns a dictionary of {id: linear indices} sorted in raster order. 
+        Spots without surface voxels are not included.
+        """
+        if len(ids) == 0:
+            return {}
+        
+        changed_idxs = np.flatnonzero(expanded_labels != prev_labels)
+        surf_idxs = np.concatenate((changed_idxs, changed_idxs))
+        surf_ids = np.concatenate((
+            expanded_labels.ravel()[changed_idxs], 
+            prev_labels.ravel()[changed_idxs]
+        ))
+        active_mask = np.isin(surf_ids, ids)
+        surf_idxs = surf_idxs[active_mask]
+        surf_ids = surf_ids[active_mask]
+        
+        # Voxels lost by a spot are part of the surface only if they are 
+        # inside the bounding box of the expanded spot
+        max_id = max(ids)
+        bbox_starts = np.zeros((max_id+1, expanded_labels.ndim), dtype=int)
+        bbox_stops = np.zeros((max_id+1, expanded_labels.ndim), dtype=int)
+        for id in ids:
+            spot_slice = spots_slices[id-1]
+            bbox_starts[id] = [s.start for s in spot_slice]
+            bbox_stops[id] = [s.stop for s in spot_slice]
+        surf_coords = np.column_stack(
+            np.unravel_index(surf_idxs, expanded_labels.shape)
+        )
+        in_bbox_mask = np.all(
+            (surf_coords >= bbox_starts[surf_ids]) 
+            & (surf_coords < bbox_stops[surf_ids]), 
+            axis=1
+        )
+        surf_idxs = surf_idxs[in_bbox_mask]
+        surf_ids = surf_ids[in_bbox_mask]
+        
+        sort_idxs = np.lexsort((surf_idxs, surf_ids))
+        surf_idxs = surf_idxs[sort_idxs]
+        unique_ids, split_idxs = np.unique(
+            surf_ids[sort_idxs], return_index=True
+        )
+        spots_surf_idxs = dict(
+            zip(unique_ids, np.split(surf_idxs, split_idxs[1:]))
+        )
+        return spots_surf_idxs
+
     def spotSIZE(self):
         df_spots_ID = self.df_spots_ID
         # spots_img_denoise = filters.gaussian(
@@ -3649,7 +4133,9 @@ class SpotFIT(Spheroid):
         
         # Start expanding the labels
         stop_grow_info = [] # list of (stop_id, stop_mask, stop_slice)
-        stop_grow_ids = []
+        stop_grow_ids = set()
+        id_to_idx = {id: c_idx for c_idx, id in enumerate(self.spot_ids)}
+        spots_img_local_flat = self.spots_img_local.ravel()
         max_i = 10
         max_size = max_i*yvd
         self.spots_yx_size_um = [ys+max_size]*num_spots
@@ -3676,49 +4162,55 @@ class SpotFIT(Spheroid):
             )
 
             # Replace expanded labels with the ones that stopped growing
+            if stop_grow_info:
+                stopped_mask = np.isin(expanded_labels, list(stop_grow_ids))
+                expanded_labels[stopped_mask] = 0
             for stop_id, stop_mask, stop_slice in stop_grow_info:
-                expanded_labels[expanded_labels==stop_id] = 0
                 expanded_labels[stop_slice][stop_mask] = stop_id
 
             # Iterate spots to determine which ones should stop growing
-            spots_rp = skimage.measure.regionprops(expanded_labels)
-            for o, s_obj in enumerate(spots_rp):
-                id = s_obj.label
+            spots_slices = scipy.ndimage.find_objects(expanded_labels)
+            spots_ids = [
+                id for id, s_slice in enumerate(spots_slices, start=1) 
+                if s_slice is not None
+            ]
+            active_ids = [id for id in spots_ids if id not in stop_grow_ids]
+            spots_surf_idxs = self._get_grown_spots_surf_idxs(
+                expanded_labels, prev_iter_expanded_lab, spots_slices, 
+                active_ids
+            )
+            for o, id in enumerate(spots_ids):
                 # Skip spots where we stopped growing
                 if id in stop_grow_ids:
                     continue
                 
-                expanded_spot_mask = expanded_labels[s_obj.slice]==id
-                prev_iter_spot_mask = prev_iter_expanded_lab[s_obj.slice]==id
-                local_spot_surf_mask = np.logical_xor(
-                    expanded_spot_mask, prev_iter_spot_mask
-                )
-                surf_vals = self.spots_img_local[s_obj.slice][local_spot_surf_mask]
-                if len(surf_vals) == 0:
+                surf_idxs = spots_surf_idxs.get(id)
+                if surf_idxs is None:
                     # drop_spots_ids.add(id)
                     continue
-                    
+                
+                surf_vals = spots_img_local_flat[surf_idxs]
                 surf_mean = surf_vals.mean()
 
                 if surf_mean > limit and i < max_i:
                     continue
-
-                stop_grow_info.append((id, s_obj.image, s_obj.slice))
-                stop_grow_ids.append(id)
+                
+                spot_slice = spots_slices[id-1]
+                spot_image = expanded_labels[spot_slice] == id
+                stop_grow_info.append((id, spot_image, spot_slice))
+                stop_grow_ids.add(id)
                 self.spots_yx_size_um[o] = ys+yvd*i
                 self.spots_z_size_um[o] = zs+yvd*i
                 self.spots_yx_size_pxl[o] = (ys+yvd*i)/yvd
                 self.spots_z_size_pxl[o] = (zs+yvd*i)/zvd
                 # Insert grown spot into spots lab used for fitting
-                c_idx = self.spot_ids.index(id)
+                c_idx = id_to_idx[id]
                 zyx_c = spots_centers[c_idx]
                 spots_3D_lab = self.insert_grown_spot_id(
                     i, id, zyx_vox_dim, zyx_seed_size, zyx_c, 
                     spots_3D_lab
                 )
-                raw_spot_surf_vals = (
-                    self.spots_img_local[s_obj.slice][local_spot_surf_mask]
-                )
+                raw_spot_surf_vals = surf_vals
                 self.Bs_guess[o] = np.median(raw_spot_surf_vals)
                 _spot_surf_5percentiles[o] = np.quantile(raw_spot_surf_vals, 0.05)
                 _mean = raw_spot_surf_vals.mean()
@@ -3727,7 +4219,7 @@ class SpotFIT(Spheroid):
                 _spot_surf_stds[o] = _std
                 B_min = _mean-3*_std
                 _spot_B_mins[o] = B_min if B_min >= 0 else 0
-                spot_values = self.spots_img_local[s_obj.slice][s_obj.image]
+                spot_values = self.spots_img_local[spot_slice][spot_image]
                 _spot_A_maxs[o] = spot_values.max()
                 
             prev_iter_expanded_lab = expanded_labels
@@ -3782,179 +4274,232 @@ class SpotFIT(Spheroid):
         self.spots_3D_lab_ID = spots_3D_lab
         
 
+    def _index_spots_voxels(self):
+        """Store the linear indices of the voxels of each spot in 
+        `spots_3D_lab_ID` with a single pass over the volume. 
+        
+        Used to get the coordinates of groups of spots without scanning 
+        the entire volume for every group (see `_get_spots_voxels_coords`).
+        """        
+        spots_lab = self.spots_3D_lab_ID
+        linear_idxs = np.flatnonzero(spots_lab)
+        ids = spots_lab.ravel()[linear_idxs]
+        # Stable sort keeps the raster order of the voxels of each spot
+        sort_idxs = np.argsort(ids, kind='stable')
+        linear_idxs = linear_idxs[sort_idxs]
+        unique_ids, starts, counts = np.unique(
+            ids[sort_idxs], return_index=True, return_counts=True
+        )
+        self._spots_voxels_idxs = {
+            id: linear_idxs[start:start+count]
+            for id, start, count in zip(unique_ids, starts, counts)
+        }
+    
+    def _get_spots_voxels_coords(self, spot_ids):
+        """Equivalent to `np.nonzero(np.isin(spots_3D_lab_ID, spot_ids))`"""
+        spots_voxels_idxs = [
+            self._spots_voxels_idxs.get(id, np.zeros(0, dtype=np.intp)) 
+            for id in spot_ids
+        ]
+        linear_idxs = np.concatenate(spots_voxels_idxs)
+        if len(spots_voxels_idxs) > 1:
+            linear_idxs = np.sort(linear_idxs)
+        return np.unravel_index(linear_idxs, self.spots_3D_lab_ID.shape)
+    
+    def _get_fit_groups(self):
+        """Get the groups of intersecting spots that are fitted together, in 
+        the order they are fitted.
+        
+        A spot is fitted together with the spots it intersects, unless they 
+        were all already fitted. The already fully fitted spots of the same 
+        connected component are model constants of the group. Which groups 
+        are fitted does not depend on the fitted values, so that the groups 
+        can be determined before fitting.
+
+        Returns
+        -------
+        list of (int, list, list, list, int) tuples
+            List of (s, fit_idx, const_idx, const_groups_idxs, level) where 
+            `s` is the index of the spot that started the group, `fit_idx` 
+            the indices of the fitted spots, `const_idx` the indices of the 
+            spots used as constants, `const_groups_idxs` the indices of the 
+            groups that fitted the constants last, and `level` is 0 for 
+            groups without constants and 1 + the maximum level of the 
+            `const_groups_idxs` otherwise. Groups with the same level are 
+            independent.
+        """
+        num_spots = self.num_spots
+        is_fitted = [False]*num_spots
+        all_intersect_fitted_bool = [False]*num_spots
+        last_fit_group = [-1]*num_spots
+        levels = []
+        fit_groups = []
+        iterable = zip(
+            self.df_intersect.index,
+            self.df_intersect['intersecting_idx'],
+            self.df_intersect['neigh_idx']
+        )
+        for s, intersect_idx, neigh_idx in iterable:
+            if all([is_fitted[i] for i in intersect_idx]):
+                all_intersect_fitted_bool[s] = True
+                continue
+            
+            # Coeffs of already fitted neighbours are model constants
+            const_idx = [
+                i for i in neigh_idx 
+                if i not in intersect_idx and all_intersect_fitted_bool[i]
+            ]
+            const_groups_idxs = [last_fit_group[i] for i in const_idx]
+            level = 0
+            if const_groups_idxs:
+                level = 1 + max([levels[g] for g in const_groups_idxs])
+            
+            group_idx = len(fit_groups)
+            for i in intersect_idx:
+                is_fitted[i] = True
+                last_fit_group[i] = group_idx
+            all_intersect_fitted_bool[s] = True
+            levels.append(level)
+            fit_groups.append(
+                (s, intersect_idx, const_idx, const_groups_idxs, level)
+            )
+        
+        return fit_groups
+    
     def _fit(self):
         verbose = self.verbose
         t0_opt = time.perf_counter()
         num_spots = self.num_spots
-        df_intersect = self.df_intersect
         spots_centers = self.spots_centers
-        spots_radii_pxl = self.spots_radii_pxl
-        spots_Bs_guess = self.Bs_guess
-        spots_B_mins = self.B_mins
-        spots_3D_lab_ID = self.spots_3D_lab_ID
         spots_img = self.spots_img_local
         num_coeffs = self.num_coeffs
-        inspect = self.inspect
-        spots_rp = self.spots_rp
 
-        init_guess_li = [None]*num_spots
-        fitted_coeffs = [[] for _ in range(num_spots)]
-        Bs_fitted = [0]*num_spots
-        all_intersect_fitted_bool = [0]*num_spots
-        solution_found_li = [0]*num_spots
-        iterable = zip(
-            df_intersect.index,
-            df_intersect['id'],
-            df_intersect['intersecting_idx'],
-            df_intersect['neigh_idx']
-        )
-        for count, (s, s_id, intersect_idx, neigh_idx) in enumerate(iterable):
-            # Get the fitted coeffs of the intersecting peaks
-            intersect_coeffs = [fitted_coeffs[i] for i in intersect_idx]
-            if verbose > 2:
-                print('-----------')
-                print(f'Current spot idx: {s}')
-                print(f'Neighbours indices of current spot: {intersect_idx}')
-            all_intersect_fitted = all(intersect_coeffs)
-            if all_intersect_fitted:
-                if verbose > 2:
-                    print(f'Fully fitted spot idx: {s}')
-                all_intersect_fitted_bool[s] = True
-                if self.show_progress:
-                    pbar = tqdm(
-                        desc=f'Spot done {count+1}/{num_spots}', total=4, 
-                        unit=' fev', position=2, leave=False, ncols=100
-                    )
-                    pbar.update(1)
-                    pbar.close()
-                if verbose > 2:
-                    print('-----------')
-                continue
-            if verbose > 2:
-                print(f'Intersect. coeffs: {intersect_coeffs}')
-            # Set coeffs of already fitted neighbours as model constants
-            non_inters_neigh_idx = [
-                s for s in neigh_idx if s not in intersect_idx
-            ]
-            if verbose > 2:
-                print(f'Fitted bool: {all_intersect_fitted_bool}')
-                print(f'Non-intersecting neighbours idx: {non_inters_neigh_idx}')
-            neigh_fitted_coeffs = [
-                fitted_coeffs[i] for i in non_inters_neigh_idx
-                if all_intersect_fitted_bool[i]
-            ]
-            neigh_fitted_idx = [
-                i for i in non_inters_neigh_idx if all_intersect_fitted_bool[i]
-            ]
-            if verbose > 2:
-                print('All-neighbours-fitted coeffs (model constants): '
-                      f'{neigh_fitted_coeffs}')
-            # Use not completely fitted neigh coeffs as initial guess
-            not_all_intersect_fitted_coeffs = [
-                fitted_coeffs[i] for i in intersect_idx
-                if not all_intersect_fitted_bool[i]
-            ]
-            if verbose > 2:
-                print(
-                    'Not-all-neighbours-fitted coeffs (model initial guess): '
-                    f'{not_all_intersect_fitted_coeffs}'
+        self._index_spots_voxels()
+        
+        # A single model for all the groups of spots --> bounds and initial 
+        # guesses of all the spots are evaluated only once
+        model = GaussianModel(check_jac=self.debug)
+        model.set_df_spots_ID(self.df_spots_ID)
+        
+        fit_groups = self._get_fit_groups()
+        
+        # Fit all the groups of the same level with one call to the solver. 
+        # Groups of level > 0 need the fitted coeffs of previous levels as 
+        # constants (coeffs of the group that fitted them last before them)
+        groups_inputs = [None]*len(fit_groups)
+        groups_results = [None]*len(fit_groups)
+        num_levels = max([group[-1] for group in fit_groups], default=-1) + 1
+        for level in range(num_levels):
+            level_groups_idxs = []
+            for group_idx, fit_group in enumerate(fit_groups):
+                _, fit_idx, const_idx, const_groups_idxs, group_level = (
+                    fit_group
                 )
-
-            # Fit n intersecting spots as sum of n gaussian + model constants
-            fit_idx = intersect_idx
+                if group_level != level:
+                    continue
+                
+                fit_ids = [self.df_intersect.at[i, 'id'] for i in fit_idx]
+                num_spots_s = len(fit_idx)
+                z, y, x = self._get_spots_voxels_coords(fit_ids)
+                s_data = spots_img[z, y, x]
+                
+                const = 0
+                if const_idx:
+                    const_coeffs = [
+                        self._get_group_fitted_coeffs(
+                            i, fit_groups[const_group_idx], 
+                            groups_results[const_group_idx]
+                        ) 
+                        for i, const_group_idx in zip(
+                            const_idx, const_groups_idxs
+                        )
+                    ]
+                    const = model.compute_const(z, y, x, const_coeffs)
+                
+                low_limit, high_limit = model.get_bounds(
+                    num_spots_s, num_coeffs, fit_ids,
+                    self.xy_center_half_interval_val, 
+                    self.z_center_half_interval_val, 
+                    self.sigma_x_min_max_expr,
+                    self.sigma_y_min_max_expr,
+                    self.sigma_z_min_max_expr,
+                    self.A_min_max_expr,
+                    self.B_min_max_expr,
+                )
+                init_guess_s = model.get_init_guess(
+                    num_spots_s, num_coeffs, fit_ids,
+                    self.sigma_x_guess_expr,
+                    self.sigma_y_guess_expr,
+                    self.sigma_z_guess_expr,
+                    self.A_guess_expr,
+                    self.B_guess_expr,
+                    low_limit,
+                    high_limit
+                )
+                groups_inputs[group_idx] = (
+                    init_guess_s, s_data, z, y, x, num_spots_s, const, 
+                    (low_limit, high_limit), fit_ids
+                )
+                level_groups_idxs.append(group_idx)
+            
             if verbose > 2:
                 print(
-                    f'Fitting spot idx: {fit_idx}, with centers {spots_centers}'
+                    f'Fitting {len(level_groups_idxs)} groups of spots of '
+                    f'level {level}'
                 )
-
-            # Fit multipeaks
-            fit_spots_lab = np.zeros(spots_3D_lab_ID.shape, bool)
-            fit_ids = []
-            num_spots_s = len(fit_idx)
-            for i in fit_idx:
-                fit_id = self.df_intersect.at[i, 'id']
-                fit_ids.append(fit_id)
-                fit_spots_lab[spots_3D_lab_ID==fit_id] = True
-            z, y, x = np.nonzero(fit_spots_lab)
-            s_data = self.spots_img_local[z,y,x]
-            model = GaussianModel(100*len(z))
-            model.set_df_spots_ID(self.df_spots_ID)
-
-            # Get constants
-            if neigh_fitted_idx:
-                const = model.compute_const(z,y,x, neigh_fitted_coeffs)
-            else:
-                const = 0
-            # test this https://cars9.uchicago.edu/software/python/lmfit/examples/example_reduce_fcn.html#sphx-glr-examples-example-reduce-fcn-py
-            low_limit, high_limit = model.get_bounds(
-                num_spots_s, num_coeffs, fit_ids,
-                self.xy_center_half_interval_val, 
-                self.z_center_half_interval_val, 
-                self.sigma_x_min_max_expr,
-                self.sigma_y_min_max_expr,
-                self.sigma_z_min_max_expr,
-                self.A_min_max_expr,
-                self.B_min_max_expr,
-            )
-            init_guess_s = model.get_init_guess(
-                num_spots_s, num_coeffs, fit_ids,
-                self.sigma_x_guess_expr,
-                self.sigma_y_guess_expr,
-                self.sigma_z_guess_expr,
-                self.A_guess_expr,
-                self.B_guess_expr,
-                low_limit,
-                high_limit
-            )
-            bounds = (low_limit, high_limit)
             
             desc = None
             if self.show_progress:
-                desc = f'Fitting spot {s} ({count+1}/{num_spots})'
+                desc = f'Fitting spots (level {level+1}/{num_levels})'
             
-            fit_coeffs, success = model.curve_fit(
-                init_guess_s,
-                s_data,
-                z, y, x, 
-                num_spots_s,
+            level_inputs = [groups_inputs[i] for i in level_groups_idxs]
+            fit_coeffs_li, success_li = model.curve_fit_batch(
+                [inputs[0] for inputs in level_inputs],
+                [inputs[1] for inputs in level_inputs],
+                [inputs[2] for inputs in level_inputs],
+                [inputs[3] for inputs in level_inputs],
+                [inputs[4] for inputs in level_inputs],
+                [inputs[5] for inputs in level_inputs],
                 num_coeffs,
-                const,
-                bounds,
+                [inputs[6] for inputs in level_inputs],
+                [inputs[7] for inputs in level_inputs],
                 self._tol,
                 pbar_desc=desc
             )
+            for group_idx, fit_coeffs, success in zip(
+                    level_groups_idxs, fit_coeffs_li, success_li
+                ):
+                groups_results[group_idx] = (fit_coeffs, success)
+        
+        # Store the fitted coeffs in fitting order --> spots fitted in 
+        # multiple groups keep the coeffs of the last group
+        init_guess_li = [None]*num_spots
+        fitted_coeffs = [[] for _ in range(num_spots)]
+        Bs_fitted = [0]*num_spots
+        solution_found_li = [0]*num_spots
+        for group_idx, (s, fit_idx, _, _, _) in enumerate(fit_groups):
+            (init_guess_s, s_data, z, y, x, num_spots_s, _, bounds, 
+            fit_ids) = groups_inputs[group_idx]
+            fit_coeffs, success = groups_results[group_idx]
             
             if self.debug and self.ID == 24:
                 from . import _debug
+                low_limit, high_limit = bounds
                 _debug._spotfit_fit(
                     model.numba_func, spots_img, fit_coeffs, num_spots_s,
                     num_coeffs, z, y, x, s_data, spots_centers, self.ID, 
                     fit_ids, init_guess_s, low_limit, high_limit, fit_idx
                 )
-
+            
             _shape = (num_spots_s, num_coeffs)
             B_fit = fit_coeffs[-1]
-            B_guess = init_guess_s[-1]
-            lstsq_x = fit_coeffs[:-1]
-            lstsq_x = lstsq_x.reshape(_shape)
+            lstsq_x = fit_coeffs[:-1].reshape(_shape)
             init_guess_s_2D = init_guess_s[:-1].reshape(_shape)
-            # print(f'Fitted coeffs: {lstsq_x}')
-            # Store already fitted peaks
             for i, s_fit in enumerate(fit_idx):
                 fitted_coeffs[s_fit] = list(lstsq_x[i])
                 init_guess_li[s_fit] = list(init_guess_s_2D[i])
                 Bs_fitted[s_fit] = B_fit
                 solution_found_li[s_fit] = success
-            # Check if now the fitted spots are fully fitted
-            all_intersect_fitted = all(
-                [True if fitted_coeffs[i] else False for i in intersect_idx]
-            )
-            if all_intersect_fitted:
-                if verbose > 2:
-                    print(f'Fully fitted spot idx: {s}')
-                all_intersect_fitted_bool[s] = True
-            if verbose == 2:
-                print('-----------')
 
         self.model = model
         self.fitted_coeffs = fitted_coeffs
@@ -3968,64 +4513,89 @@ class SpotFIT(Spheroid):
         if verbose > 1:
             print('')
             print(f'Fitting process done in {exec_time_delta} HH:mm:ss')
+    
+    def _get_group_fitted_coeffs(self, s, fit_group, group_result):
+        """Get the coeffs of spot `s` fitted in the group `fit_group`"""
+        fit_idx = fit_group[1]
+        fit_coeffs = group_result[0]
+        n = fit_idx.index(s)*self.num_coeffs
+        return list(fit_coeffs[n:n+self.num_coeffs])
 
     def compute_neigh_intersect(self):
-        inspect = self.inspect
-        verbose = self.verbose
+        """Compute the spots that are touching each spot (intersecting) and 
+        the spots that are in the same connected component (neighbours).
+
+        Both are computed for all the spots with a single pass over the 
+        volume and stored in `self.df_intersect`.
+        """
         zyx_vox_dim = self.zyx_vox_size
         zvd, yvd, _ = zyx_vox_dim
         spots_3D_lab_ID = self.spots_3D_lab_ID
         spots_3D_lab_ID_connect = skimage.measure.label(spots_3D_lab_ID>0)
         self.spots_3D_lab_ID_connect = spots_3D_lab_ID_connect
-        # Get intersect ids by expanding each single object by 1 pixel
+        id_to_idx = {id: s for s, id in enumerate(self.spot_ids)}
+        
+        # Get intersect ids from the pairs of spots that are closer than 
+        # 1 pixel (expansion of each single object by 1 pixel)
+        touching_pairs = transformations.get_touching_labels_pairs(
+            spots_3D_lab_ID, distance=yvd, zyx_vox_size=zyx_vox_dim
+        )
+        intersect_ids_mapper = {id: [] for id in self.spot_ids}
+        for id, intersect_id in touching_pairs:
+            intersect_ids_mapper[id].append(intersect_id)
+        
+        # Get neigh ids from the connected component of each spot
+        foregr_mask = spots_3D_lab_ID > 0
+        ids_obj_ids = np.unique(
+            np.column_stack((
+                spots_3D_lab_ID[foregr_mask], 
+                spots_3D_lab_ID_connect[foregr_mask]
+            )), 
+            axis=0
+        )
+        spot_obj_id_mapper = {}
+        obj_neigh_ids_mapper = {}
+        for id, obj_id in zip(
+                ids_obj_ids[:, 0].astype(spots_3D_lab_ID.dtype), 
+                ids_obj_ids[:, 1].astype(spots_3D_lab_ID_connect.dtype)
+            ):
+            # Pairs are sorted --> last obj_id is the max
+            spot_obj_id_mapper[id] = obj_id
+            obj_neigh_ids_mapper.setdefault(obj_id, []).append(id)
+        
         all_intersect_idx = []
         all_neigh_idx = []
         obj_ids = []
         num_intersect = []
         num_neigh = []
         all_neigh_ids = []
-        for s, s_obj in enumerate(self.spots_rp):
-            spot_3D_lab = np.zeros_like(spots_3D_lab_ID)
-            spot_3D_lab[s_obj.slice][s_obj.image] = s_obj.label
-            spot_3D_mask = spot_3D_lab>0
-            expanded_spot_3D = transformations.expand_labels(
-                spot_3D_lab, distance=yvd, zyx_vox_size=zyx_vox_dim
-            )
-            spot_surf_mask = np.logical_xor(expanded_spot_3D>0, spot_3D_mask)
-            intersect_ids = np.unique(spots_3D_lab_ID[spot_surf_mask])
+        for s, id in enumerate(self.spot_ids):
             intersect_idx = [
-                self.spot_ids.index(id) for id in intersect_ids if id!=0
+                id_to_idx[intersect_id] 
+                for intersect_id in intersect_ids_mapper[id]
             ]
             intersect_idx.append(s)
             all_intersect_idx.append(intersect_idx)
             num_intersect.append(len(intersect_idx))
-
-            # Get neigh idx by indexing the spots labels with the
-            # connected component mask
-            obj_id = np.unique(spots_3D_lab_ID_connect[spot_3D_mask])[-1]
+            
+            obj_id = spot_obj_id_mapper[id]
             obj_ids.append(obj_id)
-            obj_mask = np.zeros_like(spot_3D_mask)
-            obj_mask[spots_3D_lab_ID_connect == obj_id] = True
-            neigh_ids = np.unique(spots_3D_lab_ID[obj_mask])
-            neigh_ids = [id for id in neigh_ids if id!=0]
-            neigh_idx = [self.spot_ids.index(id) for id in neigh_ids]
+            neigh_ids = obj_neigh_ids_mapper[obj_id]
+            neigh_idx = [id_to_idx[neigh_id] for neigh_id in neigh_ids]
             all_neigh_idx.append(neigh_idx)
             all_neigh_ids.append(neigh_ids)
             num_neigh.append(len(neigh_idx))
 
-        try:
-            self.df_intersect = pd.DataFrame({
-                'id': self.spot_ids,
-                'obj_id': obj_ids,
-                'num_intersect': num_intersect,
-                'num_neigh': num_neigh,
-                'intersecting_idx': all_intersect_idx,
-                'neigh_idx': all_neigh_idx,
-                'neigh_ids': all_neigh_ids}
-            ).sort_values('num_intersect')
-            self.df_intersect.index.name = 's'
-        except Exception as err:
-            import pdb; pdb.set_trace()
+        self.df_intersect = pd.DataFrame({
+            'id': self.spot_ids,
+            'obj_id': obj_ids,
+            'num_intersect': num_intersect,
+            'num_neigh': num_neigh,
+            'intersecting_idx': all_intersect_idx,
+            'neigh_idx': all_neigh_idx,
+            'neigh_ids': all_neigh_ids}
+        ).sort_values('num_intersect')
+        self.df_intersect.index.name = 's'
 
     def _quality_control(self):
         """
@@ -4044,9 +4614,6 @@ class SpotFIT(Spheroid):
 
         self._df_spotFIT = df_spotFIT
         verbose = self.verbose
-        inspect = self.inspect
-        spots_3D_lab_ID = self.spots_3D_lab_ID
-        spots_3D_lab_ID_connect = self.spots_3D_lab_ID_connect
         fitted_coeffs = self.fitted_coeffs
         init_guess_li = self.init_guess_li
         Bs_fitted = self.Bs_fitted
@@ -4064,7 +4631,7 @@ class SpotFIT(Spheroid):
             for s in obj_s_idxs:
                 s_id = df_obj.at[(obj_id, s), 'id']
                 s_intersect_idx = df_obj.at[(obj_id, s), 'intersecting_idx']
-                z_s, y_s, x_s = np.nonzero(spots_3D_lab_ID==s_id)
+                z_s, y_s, x_s = self._get_spots_voxels_coords([s_id])
 
                 # Compute fit data
                 B_fit = Bs_fitted[s]
@@ -4173,27 +4740,19 @@ class SpotFIT(Spheroid):
         num_spots = len(df_intersect_fit_again)
         num_coeffs = self.num_coeffs
         model = self.model
-        spots_3D_lab_ID = self.spots_3D_lab_ID
-        spots_centers = self.spots_centers
-        spots_radii_pxl = self.spots_radii_pxl
-        spots_Bs_guess = self.Bs_guess
-        spots_B_mins = self.B_mins
         fitted_coeffs = self.fitted_coeffs
-        init_guess_li = self.init_guess_li
         img = self.spots_img_local
-        verbose = self.verbose
-        inspect = self.inspect
-        spots_rp = self.spots_rp
-
-        # Iterate each badly fitted spot and fit individually again
-        for count, (obj_id, s) in enumerate(df_intersect_fit_again.index):
-            neigh_idx = df_intersect_fit_again.loc[(obj_id, s)]['neigh_idx']
-            s_id = df_intersect_fit_again.loc[(obj_id, s)]['id']
-            s_intersect_idx = df_intersect_fit_again.at[(obj_id, s),
-                                                        'intersecting_idx']
+
+        # Each badly fitted spot is fitted individually again with the good 
+        # neighbours as constants --> spots are independent and they are 
+        # fitted with a single call to the solver
+        fit_inputs = []
+        for obj_id, s in df_intersect_fit_again.index:
+            neigh_idx = df_intersect_fit_again.at[(obj_id, s), 'neigh_idx']
+            s_id = df_intersect_fit_again.at[(obj_id, s), 'id']
             good_neigh_idx = [s for s in neigh_idx if s not in bad_fit_idx]
 
-            z_s, y_s, x_s = np.nonzero(spots_3D_lab_ID==s_id)
+            z_s, y_s, x_s = self._get_spots_voxels_coords([s_id])
 
             # Constants from good neigh idx
             const_coeffs = [fitted_coeffs[good_s] for good_s in good_neigh_idx]
@@ -4201,7 +4760,6 @@ class SpotFIT(Spheroid):
             
             # Bounds and initial guess
             num_spots_s = 1
-            fit_ids = [s_id]
             low_limit, high_limit = model.get_bounds(
                 num_spots_s, num_coeffs, [s_id],
                 self.xy_center_half_interval_val, 
@@ -4213,7 +4771,7 @@ class SpotFIT(Spheroid):
                 self.B_min_max_expr,
             )
             init_guess_s = model.get_init_guess(
-                num_spots_s, num_coeffs, fit_ids,
+                num_spots_s, num_coeffs, [s_id],
                 self.sigma_x_guess_expr,
                 self.sigma_y_guess_expr,
                 self.sigma_z_guess_expr,
@@ -4222,26 +4780,37 @@ class SpotFIT(Spheroid):
                 low_limit,
                 high_limit
             )
-            bounds = (low_limit, high_limit)
-
-            # Fit with constants
             s_data = img[z_s, y_s, x_s]
-            desc = None
-            if self.show_progress:
-                desc = f'Fitting spot {s} ({count+1}/{num_spots})'
-                
-            fit_coeffs, success = model.curve_fit(
-                init_guess_s,
-                s_data,
-                z_s, y_s, x_s, 
-                num_spots_s,
-                num_coeffs,
-                const,
-                bounds,
-                self._tol,
-                pbar_desc=desc
-            )
-
+            fit_inputs.append((
+                init_guess_s, s_data, z_s, y_s, x_s, const, 
+                (low_limit, high_limit)
+            ))
+        
+        desc = None
+        if self.show_progress:
+            desc = f'Fitting {num_spots} spots again'
+        
+        fit_coeffs_li, success_li = model.curve_fit_batch(
+            [inputs[0] for inputs in fit_inputs],
+            [inputs[1] for inputs in fit_inputs],
+            [inputs[2] for inputs in fit_inputs],
+            [inputs[3] for inputs in fit_inputs],
+            [inputs[4] for inputs in fit_inputs],
+            [1]*num_spots,
+            num_coeffs,
+            [inputs[5] for inputs in fit_inputs],
+            [inputs[6] for inputs in fit_inputs],
+            self._tol,
+            pbar_desc=desc
+        )
+        
+        iterable = zip(
+            df_intersect_fit_again.index, fit_inputs, fit_coeffs_li, 
+            success_li
+        )
+        for (obj_id, s), inputs, fit_coeffs, success in iterable:
+            _, s_data, z_s, y_s, x_s, const, _ = inputs
+            
             # Goodness of fit
             ddof = num_coeffs
             s_fit_data =  model.numba_func(
@@ -4377,6 +4946,8 @@ class Kernel(_ParamsParser):
         self.is_cli = is_cli
         self._force_close_on_critical = False
         self._SpotFit = SpotFIT(debug=debug)
+        self._spotfit_executor = None
+        self._spotfit_executor_key = None
         self._current_frame_i = -1
         self._current_step = 'Kernel initialization'
         self._current_pos_path = 'Not determined yet'
@@ -4625,6 +5196,13 @@ class Kernel(_ParamsParser):
             self._params[SECTION]['maxNumPairs']['loadedVal']
         )
         
+        num_workers = self._get_spotfit_num_workers()
+        parallel_backend = (
+            self._params['SpotFIT']['parallelBackendSpotfit'].get('loadedVal')
+        )
+        if not parallel_backend:
+            parallel_backend = 'processes'
+        
         zyx_spot_min_vol_um = self.metadata['zyxResolutionLimitUm']
         spots_zyx_radii_pxl = self.metadata['zyxResolutionLimitPxl']
         zyx_voxel_size = self.metadata['zyxVoxelSize']
@@ -4673,6 +5251,11 @@ class Kernel(_ParamsParser):
                 logger_func=self.logger.info,
                 custom_combined_measurements=custom_combined_measurements,
                 max_number_pairs_check_merge=max_number_pairs_check_merge,
+                num_workers=num_workers,
+                parallel_backend=parallel_backend,
+                executor=self._get_spotfit_executor(
+                    num_workers, parallel_backend
+                ),
                 **bounds_kwargs,
                 **init_guess_kwargs, 
             )
@@ -5049,10 +5632,13 @@ class Kernel(_ParamsParser):
             skip_invalid_IDs_spots_labels=False
         ):        
         # Detect peaks on aggregated image
+        aggr_plan = transformations.AggregationPlan(
+            lab, lineage_table=lineage_table, 
+            zyx_tolerance=self.metadata['deltaTolerance']
+        )
         aggregated = transformations.aggregate_objs(
             sharp_spots_img, lab, 
-            lineage_table=lineage_table, 
-            zyx_tolerance=self.metadata['deltaTolerance'],
+            aggr_plan=aggr_plan,
             additional_imgs_to_aggr=[
                 spots_ch_segm_mask, 
                 transf_spots_nnet_img,
@@ -5121,7 +5707,7 @@ class Kernel(_ParamsParser):
         nnet_pred_map = None
         if aggr_nnet_pred_map is not None:
             nnet_pred_map = transformations.deaggregate_img(
-                aggr_nnet_pred_map, aggregated_lab, lab
+                aggr_nnet_pred_map, aggregated_lab, lab, aggr_plan=aggr_plan
             )
         
         spots_labels = None
@@ -5151,7 +5737,8 @@ class Kernel(_ParamsParser):
             spots_labels = transformations.deaggregate_img(
                 labels, aggregated_lab, lab,
                 delta_expand=self.metadata['deltaTolerance'], 
-                debug=False
+                debug=False, 
+                aggr_plan=aggr_plan
             )
         else:
             df_spots_coords, num_spots_objs_txts = (
@@ -5626,7 +6213,8 @@ class Kernel(_ParamsParser):
             return transformed_spots_ch_nnet
         
         if transformed_spots_ch_nnet is None:
-            input_data = spots_data
+            # Streamed spots data is converted to float here
+            input_data = np.asarray(spots_data)
         else:
             input_data = transformed_spots_ch_nnet
         
@@ -5661,6 +6249,8 @@ class Kernel(_ParamsParser):
             df_agg,
             do_aggregate, 
             save_preproc_ref_ch_img,
+            ref_ch_segm_data=None,
+            preproc_ref_ch_data=None,
             verbose=True
         ):
         print('')
@@ -5690,9 +6280,9 @@ class Kernel(_ParamsParser):
             ref_ch_section['calcRefChRegionprops']['loadedVal']
         )
         vox_to_um3 = self.metadata.get('vox_to_um3_factor', 1)
-        ref_ch_segm_data = np.zeros(ref_ch_data.shape, dtype=np.uint32)
-        preproc_ref_ch_data = None
-        if save_preproc_ref_ch_img:
+        if ref_ch_segm_data is None:
+            ref_ch_segm_data = np.zeros(ref_ch_data.shape, dtype=np.uint32)
+        if save_preproc_ref_ch_img and preproc_ref_ch_data is None:
             preproc_ref_ch_data = np.zeros_like(ref_ch_data)
         desc = 'Frames completed (segm. ref. ch.)'
         pbar = tqdm(
@@ -5786,11 +6376,14 @@ class Kernel(_ParamsParser):
         ):
         self.set_metadata()
         self._current_step = 'Loading data from images path'
+        stream_frames = self._get_stream_frames()
         data = self.get_data_from_images_path(
             images_path, spots_ch_endname, ref_ch_endname, segm_endname, 
             spots_ch_segm_endname, ref_ch_segm_endname, lineage_table_endname,
             df_spots_coords_in_endname, 
-            transformed_spots_ch_nnet=transformed_spots_ch_nnet
+            transformed_spots_ch_nnet=transformed_spots_ch_nnet,
+            stream_frames=stream_frames,
+            float_dtype=self._get_float_dtype()
         )
         extend_3D_segm_range = (
             self._params['Pre-processing']['extend3DsegmRange']['loadedVal']
@@ -5860,6 +6453,19 @@ class Kernel(_ParamsParser):
             self._params[SECTION]['saveRefChFeatures']['loadedVal']
         )
         if segment_ref_ch:
+            basename = data.get('basename', '')
+            ref_ch_segm_data = None
+            preproc_ref_ch_data = None
+            if stream_frames:
+                ref_ch_segm_data = io.get_temp_memmap_array(
+                    self._get_stream_temp_dirpath(), 'ref_ch_segm', 
+                    ref_ch_data.shape, np.uint32
+                )
+            if save_preproc_ref_ch_img:
+                preproc_ref_ch_data = self._init_preproc_img_writer(
+                    data, 'ref_ch', ref_ch_endname, run_number, 
+                    ref_ch_data.shape, text_to_append=text_to_append
+                )
             result = self._preprocess_and_segment_ref_channel(
                 ref_ch_data, 
                 stopFrameNum, 
@@ -5869,6 +6475,8 @@ class Kernel(_ParamsParser):
                 df_agg,
                 do_aggregate, 
                 save_preproc_ref_ch_img,
+                ref_ch_segm_data=ref_ch_segm_data,
+                preproc_ref_ch_data=preproc_ref_ch_data,
                 verbose=verbose
             )
             ref_ch_segm_data, preproc_ref_ch_data, df_ref_ch = result
@@ -5876,9 +6484,25 @@ class Kernel(_ParamsParser):
 
             data['df_agg'] = df_agg
             data['ref_ch_segm'] = ref_ch_segm_data
-            if save_ref_ch_segm:
+            if save_ref_ch_segm and stream_frames:
+                print('')
+                ref_ch_segm_writer = io.ImageDataFramesWriter(
+                    io.get_ref_ch_mask_filepath(
+                        images_path, ref_ch_endname, basename, run_number, 
+                        text_to_append=text_to_append
+                    ),
+                    ref_ch_segm_data.shape, 
+                    np.uint32, 
+                    pad_width=data['pad_width']
+                )
+                for frame_i, ref_ch_lab in enumerate(ref_ch_segm_data):
+                    ref_ch_segm_writer[frame_i] = ref_ch_lab
+                self._close_frames_writer(
+                    ref_ch_segm_writer, 'reference channel masks', 
+                    verbose=verbose
+                )
+            elif save_ref_ch_segm:
                 print('')
-                basename = data.get('basename', '')
                 io.save_ref_ch_mask(
                     ref_ch_segm_data, 
                     images_path, 
@@ -5892,19 +6516,11 @@ class Kernel(_ParamsParser):
                 )
             if save_preproc_ref_ch_img:
                 print('')
-                basename = data.get('basename', '')
-                raw_ref_ch_data_filepath = data['ref_ch.filepath']
-                io.save_preprocessed_img_data(
+                self._close_frames_writer(
                     preproc_ref_ch_data, 
-                    raw_ref_ch_data_filepath, 
-                    basename,
-                    ref_ch_endname, 
-                    run_number,
-                    text_to_append=text_to_append,
-                    cast_to_dtype=data['ref_ch.dtype'], 
-                    pad_width=data['pad_width'],
-                    verbose=verbose,
-                    logger_func=self.logger.info
+                    'pre-processed image data from channel '
+                    f'"{ref_ch_endname}"', 
+                    verbose=verbose
                 )
             
             if save_ref_ch_features:
@@ -6005,8 +6621,14 @@ class Kernel(_ParamsParser):
         transformed_spots_ch_nnet = self.check_preprocess_data_nnet_across_time(
             spots_data, transformed_spots_ch_nnet=transformed_spots_ch_nnet
         )
+        basename = data.get('basename', '')
         if save_preproc_spots_img:
-            preproc_spots_data = np.zeros_like(spots_data)[:stopFrameNum]
+            # Frames are written as soon as they are computed
+            preproc_spots_data = self._init_preproc_img_writer(
+                data, 'spots_ch', spots_ch_endname, run_number, 
+                (stopFrameNum, *spots_data.shape[1:]), 
+                text_to_append=text_to_append
+            )
         
         """---------------------SPOT DETECTION-------------------------------"""
         nnet_pred_map = None
@@ -6034,8 +6656,6 @@ class Kernel(_ParamsParser):
             preproc_spots_img = self._preprocess(
                 raw_spots_img
             )
-            if save_preproc_spots_img:
-                preproc_spots_data[frame_i] = preproc_spots_img
             if do_sharpen_spots:
                 sharp_spots_img = self.sharpen_spots(
                     preproc_spots_img, self.metadata, lab=lab
@@ -6045,6 +6665,8 @@ class Kernel(_ParamsParser):
             
             if save_preproc_spots_img and sharp_spots_img is not None:
                 preproc_spots_data[frame_i] = sharp_spots_img
+            elif save_preproc_spots_img:
+                preproc_spots_data[frame_i] = preproc_spots_img
             
             ref_ch_img = None
             filtered_ref_ch_img = None
@@ -6108,12 +6730,23 @@ class Kernel(_ParamsParser):
             )
             
             if nnet_pred_map is None and nnet_pred_map_frame_i is not None:
-                nnet_pred_map = np.zeros(spots_data.shape)
+                nnet_pred_map = self._init_nnet_pred_map(
+                    data, spots_ch_endname, run_number, 
+                    text_to_append=text_to_append
+                )
             if nnet_pred_map_frame_i is not None:
                 nnet_pred_map[frame_i] = nnet_pred_map_frame_i
             
             if spots_labels is not None and spots_labels_data is None:
-                spots_labels_data = np.zeros(spots_data.shape, dtype=np.uint32)
+                if stream_frames:
+                    spots_labels_data = io.get_temp_memmap_array(
+                        self._get_stream_temp_dirpath(), 'spots_labels',
+                        spots_data.shape, np.uint32
+                    )
+                else:
+                    spots_labels_data = np.zeros(
+                        spots_data.shape, dtype=np.uint32
+                    )
             
             if spots_labels is not None:
                 spots_labels_data[frame_i] = spots_labels
@@ -6123,35 +6756,18 @@ class Kernel(_ParamsParser):
         
         if save_preproc_spots_img:
             print('')
-            basename = data.get('basename', '')
-            raw_spots_data_filepath = data['spots_ch.filepath']
-            io.save_preprocessed_img_data(
+            self._close_frames_writer(
                 preproc_spots_data, 
-                raw_spots_data_filepath, 
-                basename,
-                spots_ch_endname,
-                run_number,
-                text_to_append=text_to_append,
-                cast_to_dtype=data['spots_ch.dtype'], 
-                pad_width=data['pad_width'],
-                verbose=verbose,
-                logger_func=self.logger.info
+                f'pre-processed image data from channel "{spots_ch_endname}"', 
+                verbose=verbose
             )
         
         if nnet_pred_map is not None:
             print('')
-            basename = data.get('basename', '')
-            raw_spots_data_filepath = data['spots_ch.filepath']
-            io.save_nnet_pred_map(
+            self._close_frames_writer(
                 nnet_pred_map, 
-                raw_spots_data_filepath, 
-                basename,
-                spots_ch_endname,
-                run_number,
-                text_to_append=text_to_append, 
-                pad_width=data['pad_width'],
-                verbose=verbose,
-                logger_func=self.logger.info
+                f'SpotMAX AI prediction map from channel "{spots_ch_endname}"', 
+                verbose=verbose
             )
         
         aggregate_spots_feature_func = (
@@ -6256,6 +6872,410 @@ class Kernel(_ParamsParser):
             bounds_kwargs[kwarg] = self._params[SECTION][anchor]['loadedVal']
         return bounds_kwargs
     
+    def _get_stream_frames(self):
+        SECTION = 'Configuration'
+        ANCHOR = 'streamFrames'
+        options = self._params[SECTION].get(ANCHOR, {})
+        return bool(options.get('loadedVal', False))
+    
+    def _get_prediction_cache(self):
+        SECTION = 'Configuration'
+        options = self._params[SECTION].get('usePredictionCache', {})
+        if not options.get('loadedVal', False):
+            return
+        
+        options = self._params[SECTION].get('predictionCacheMaxSizeGB', {})
+        max_size_GB = options.get('loadedVal')
+        if not max_size_GB:
+            max_size_GB = options.get('initialVal', 10.0)
+        return prediction_cache.PredictionCache(max_size_GB=max_size_GB)
+    
+    def _wrap_model_with_prediction_cache(self, model, model_params):
+        cache = self._get_prediction_cache()
+        if cache is None:
+            return model
+        
+        init_params = {
+            **model_params.get('init', {}), 
+            **(model_params.get('kwargs') or {})
+        }
+        self.logger.info(
+            f'Using prediction cache at "{cache.cache_folderpath}"'
+        )
+        return prediction_cache.CachedModel(
+            model, cache, init_params=init_params
+        )
+    
+    def _get_float_dtype(self):
+        SECTION = 'Configuration'
+        ANCHOR = 'floatPrecision'
+        options = self._params[SECTION].get(ANCHOR, {})
+        float_precision = options.get('loadedVal')
+        if not float_precision:
+            float_precision = options.get('initialVal', 'float64')
+        
+        if float_precision not in ('float32', 'float64'):
+            raise ValueError(
+                f'"{float_precision}" is not a valid floating point precision. '
+                'Valid options are "float32" and "float64".'
+            )
+        return np.dtype(float_precision)
+    
+    def _get_stream_temp_dirpath(self):
+        temp_dirpath = getattr(self, '_stream_temp_dirpath', None)
+        if temp_dirpath is None:
+            temp_dirpath = tempfile.mkdtemp(prefix='spotmax_stream_')
+            self._stream_temp_dirpath = temp_dirpath
+        return temp_dirpath
+    
+    def _remove_stream_temp_dir(self):
+        temp_dirpath = getattr(self, '_stream_temp_dirpath', None)
+        self._stream_temp_dirpath = None
+        if temp_dirpath is None:
+            return
+        
+        try:
+            shutil.rmtree(temp_dirpath)
+        except Exception as err:
+            warn_text = (
+                f'Failed to remove the temporary folder "{temp_dirpath}" '
+                f'({err}). You can delete it manually.'
+            )
+            self.log_warning_report(warn_text)
+            self.logger.info(f'[WARNING]: {warn_text}')
+    
+    def _get_images_output_format(self):
+        """Get the file extension (None for default), the compression, and 
+        the chunks of the saved pre-processed images and prediction maps"""
+        SECTION = 'Configuration'
+        options = self._params[SECTION].get('imagesOutputFileFormat', {})
+        ext = options.get('loadedVal')
+        if not ext or ext == 'default':
+            return None, None, 'frame'
+        
+        options = self._params[SECTION].get('imagesOutputCompression', {})
+        compression = options.get('loadedVal')
+        if not compression:
+            compression = 'none'
+        
+        options = self._params[SECTION].get('imagesOutputChunks', {})
+        chunks = options.get('loadedVal')
+        if not chunks:
+            chunks = 'frame'
+        return ext, compression, chunks
+    
+    def _init_preproc_img_writer(
+            self, data, channel_key, ch_endname, run_number, shape, 
+            text_to_append=''
+        ):
+        ext, compression, chunks = self._get_images_output_format()
+        preproc_img_filepath = io.get_preprocessed_img_data_filepath(
+            data[f'{channel_key}.filepath'], data.get('basename', ''), 
+            ch_endname, run_number, text_to_append=text_to_append, ext=ext
+        )
+        return io.ImageDataFramesWriter(
+            preproc_img_filepath, shape, float, 
+            cast_to_dtype=data[f'{channel_key}.dtype'],
+            pad_width=data['pad_width'], 
+            compression=compression, 
+            chunks=chunks
+        )
+    
+    def _init_nnet_pred_map(
+            self, data, spots_ch_endname, run_number, text_to_append=''
+        ):
+        # The prediction map is written to disk one frame at a time also 
+        # when not streaming frames since it is only saved
+        spots_ch_shape = data['spots_ch'].shape
+        float_dtype = data['spots_ch'].dtype
+        ext, compression, chunks = self._get_images_output_format()
+        if ext is None:
+            ext = '.npz'
+        nnet_pred_map_filepath = io.get_nnet_pred_map_filepath(
+            data['spots_ch.filepath'], data.get('basename', ''), 
+            spots_ch_endname, run_number, text_to_append=text_to_append, 
+            ext=ext
+        )
+        return io.ImageDataFramesWriter(
+            nnet_pred_map_filepath, spots_ch_shape, float_dtype, 
+            pad_width=data['pad_width'], compression=compression, 
+            chunks=chunks
+        )
+    
+    def _close_frames_writer(self, writer, desc, verbose=True):
+        if verbose:
+            self.logger.info(f'Saving {desc}...')
+        
+        writer.close()
+        
+        if verbose:
+            self.logger.info(
+                f'{desc[0].upper()}{desc[1:]} saved to "{writer.filepath}"'
+            )
+    
+    def _get_num_parallel_positions(self, num_pos):
+        SECTION = 'Configuration'
+        ANCHOR = 'numParallelPositions'
+        options = self._params[SECTION].get(ANCHOR, {})
+        num_workers = options.get('loadedVal')
+        if num_workers is None:
+            num_workers = 1
+        
+        num_workers = int(num_workers)
+        if num_workers <= 0:
+            num_workers = os.cpu_count()
+        
+        return max(1, min(num_workers, num_pos))
+    
+    def _run_single_pos(
+            self, exp_path, pos, exp_info, 
+            transformed_spots_ch_nnet=None, 
+            verbose=True
+        ):
+        """Analyse a single Position folder and save the results
+
+        Parameters
+        ----------
+        exp_path : os.PathLike
+            Path of the experiment folder containing the Position folder.
+        pos : str
+            Name of the Position folder (e.g., 'Position_1').
+        exp_info : dict
+            Dictionary with the experiment info (see `_run_exp_paths`).
+        transformed_spots_ch_nnet : dict, optional
+            Spots channel data pre-processed across the experiment for the 
+            neural network. Default is None
+        verbose : bool, optional
+            If True, log additional information. Default is True
+
+        Returns
+        -------
+        bool
+            True if the analysis completed and the results were saved, False 
+            if an error was raised (and logged) during the analysis.
+        """        
+        exp_foldername = os.path.basename(exp_path)
+        exp_parent_foldername = os.path.basename(os.path.dirname(exp_path))
+        run_number = exp_info['run_number']
+        spots_ch_endname = exp_info['spotsEndName'] 
+        df_spots_coords_in_endname = exp_info['inputDfSpotsEndname']
+        text_to_append = exp_info['textToAppend']
+        
+        pos_path = os.path.join(exp_path, pos)
+        rel_path = os.path.join(exp_parent_foldername, exp_foldername, pos)
+        self.logger.info(f'Analysing "...{os.sep}{rel_path}"...')
+        images_path = os.path.join(pos_path, 'Images')
+        self._current_pos_path = pos_path
+        pos_analysis_started_datetime = datetime.now()
+        t0_pos = time.perf_counter()
+        result = None
+        data = None
+        try:
+            result = self._run_from_images_path(
+                images_path, 
+                spots_ch_endname=spots_ch_endname, 
+                ref_ch_endname=exp_info['refChEndName'], 
+                segm_endname=exp_info['segmEndName'],
+                spots_ch_segm_endname=exp_info['spotChSegmEndName'],
+                ref_ch_segm_endname=exp_info['refChSegmEndName'], 
+                lineage_table_endname=exp_info['lineageTableEndName'],
+                df_spots_coords_in_endname=df_spots_coords_in_endname,
+                text_to_append=text_to_append,                   
+                transformed_spots_ch_nnet=transformed_spots_ch_nnet,
+                run_number=run_number,
+                verbose=verbose
+            )
+            if result is None:
+                # Error raised, logged while dfs is None
+                return False
+            
+            dfs, data = result
+            basename = data.get('basename', '')
+            uncropped_shape = data.get('spots_ch.shape')
+            
+            # Drop the references to the arrays stored in the temporary 
+            # files of the streaming mode (memmaps) so that they are closed
+            result = None
+            data = None
+            
+            self.add_post_analysis_features(dfs)
+            dfs = self.filter_requested_features(dfs)
+            dfs = self.filter_requested_features(dfs, on_aggr=True)
+            self.save_dfs_and_spots_masks(
+                pos_path, dfs, 
+                images_path=images_path,
+                basename=basename,
+                spots_ch_endname=spots_ch_endname,
+                uncropped_shape=uncropped_shape,
+                run_number=run_number, 
+                text_to_append=text_to_append, 
+                df_spots_file_ext=exp_info['df_spots_file_ext'], 
+                df_spots_coords_in_endname=df_spots_coords_in_endname,
+                verbose=verbose,
+                pos_analysis_started_datetime=pos_analysis_started_datetime
+            )
+        finally:
+            # Temporary files of the streaming mode are not needed anymore
+            result = None
+            data = None
+            self._close_lazy_image_data()
+            self._remove_stream_temp_dir()
+        
+        self._log_exec_time(
+            t0_pos, 'single Position', 
+            additional_txt=f'(Path: "{pos_path}")'
+        )
+        return True
+    
+    def _get_spotfit_num_workers(self):
+        """Number of workers of `pipe.spotfit`. In the worker processes that 
+        analyse Positions in parallel, the number is capped to the CPU cores 
+        available to each process since every Position starts its own pool
+        """
+        num_workers = self._params['SpotFIT']['numWorkersSpotfit'].get(
+            'loadedVal'
+        )
+        if num_workers is None:
+            num_workers = 1
+        
+        num_pos_workers = getattr(self, '_num_parallel_pos_workers', 1)
+        if num_pos_workers <= 1:
+            return num_workers
+        
+        max_num_workers = max(1, os.cpu_count()//num_pos_workers)
+        if 0 < num_workers <= max_num_workers:
+            return num_workers
+        
+        if not getattr(self, '_spotfit_num_workers_warned', False):
+            warn_text = (
+                f'Using {max_num_workers} spotFIT workers per Position '
+                f'instead of {num_workers} because {num_pos_workers} '
+                'Positions are analysed in parallel (the total number of '
+                'processes would exceed the number of CPU cores).'
+            )
+            self.log_warning_report(warn_text)
+            self.logger.info(f'[WARNING]: {warn_text}')
+            self._spotfit_num_workers_warned = True
+        return max_num_workers
+    
+    def _get_spotfit_executor(self, num_workers, parallel_backend):
+        """Pool of workers of `pipe.spotfit` created at the first call and 
+        reused for every frame and Position until `quit` is called"""
+        if num_workers == 1:
+            return
+        
+        executor_key = (num_workers, parallel_backend)
+        if self._spotfit_executor is not None:
+            if self._spotfit_executor_key == executor_key:
+                return self._spotfit_executor
+            self._shutdown_spotfit_executor()
+        
+        self._spotfit_executor = pipe.get_spotfit_executor(
+            num_workers, parallel_backend=parallel_backend
+        )
+        self._spotfit_executor_key = executor_key
+        return self._spotfit_executor
+    
+    def _shutdown_spotfit_executor(self):
+        executor = getattr(self, '_spotfit_executor', None)
+        if executor is None:
+            return
+        executor.shutdown()
+        self._spotfit_executor = None
+    
+    def _get_parallel_pos_worker_state(self):
+        # The logger (and its bound methods) and the pool of spotFIT 
+        # workers cannot be shared with the worker processes --> each 
+        # worker creates its own
+        state = self.__dict__.copy()
+        state.pop('logger', None)
+        state.pop('log', None)
+        state['_spotfit_executor'] = None
+        return state
+    
+    def _merge_parallel_pos_result(self, pos_result):
+        log_text = pos_result['log_text'].rstrip()
+        if log_text:
+            self.logger.info(log_text)
+        
+        if pos_result['were_errors_detected']:
+            self.were_errors_detected = True
+        
+        if not hasattr(self, '_report'):
+            return
+        
+        for pos_path, info in pos_result['pos_info'].items():
+            if pos_path not in self._report['pos_info']:
+                self._report['pos_info'][pos_path] = {
+                    'errors': [], 'warnings': []
+                }
+            self._report['pos_info'][pos_path]['errors'].extend(
+                info['errors']
+            )
+            self._report['pos_info'][pos_path]['warnings'].extend(
+                info['warnings']
+            )
+    
+    def _run_positions_parallel(
+            self, exp_path, pos_foldernames, exp_info, transformed_data_nnet, 
+            num_workers, pbar_pos, verbose=True
+        ):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        
+        # Interactive checks cannot run in the worker processes
+        for pos in pos_foldernames:
+            images_path = os.path.join(exp_path, pos, 'Images')
+            self._current_pos_path = os.path.join(exp_path, pos)
+            self.check_segm_masks_endnames(images_path)
+        
+        # Split numba threads between the workers to avoid oversubscription. 
+        # NOTE: do not call `numba.get_num_threads()` here because it starts 
+        # numba's threading layer in the parent process
+        num_numba_threads = 1
+        if NUMBA_INSTALLED:
+            num_numba_threads = getattr(self, '_num_numba_threads', 0)
+            if num_numba_threads <= 0:
+                num_numba_threads = numba.config.NUMBA_NUM_THREADS
+            num_numba_threads = max(1, num_numba_threads//num_workers)
+        
+        self.logger.info(
+            f'Analysing {len(pos_foldernames)} Positions with {num_workers} '
+            'parallel processes...'
+        )
+        worker_state = self._get_parallel_pos_worker_state()
+        worker_state['_num_parallel_pos_workers'] = num_workers
+        # Forking after numba started its threading layer (e.g., with 
+        # `numba.set_num_threads`) makes the interpreter hang at exit 
+        # --> start the workers with 'spawn'
+        executor = ProcessPoolExecutor(
+            max_workers=num_workers, 
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_parallel_pos_worker, 
+            initargs=(worker_state, num_numba_threads)
+        )
+        with executor:
+            futures = [
+                executor.submit(
+                    _run_pos_in_parallel_worker, exp_path, pos, exp_info, 
+                    transformed_data_nnet[pos], verbose
+                )
+                for pos in pos_foldernames
+            ]
+            # Gather in submission order to keep logs and report deterministic
+            for pos, future in zip(pos_foldernames, futures):
+                self._current_pos_path = os.path.join(exp_path, pos)
+                try:
+                    pos_result = future.result()
+                except Exception as error:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.quit(error)
+                    return
+                
+                self._merge_parallel_pos_result(pos_result)
+                if pos_result['completed']:
+                    pbar_pos.update()
+    
     @exception_handler_cli
     def _run_exp_paths(self, exp_paths, verbose=True):
         """Run SpotMAX analysis from a dictionary of Cell-ACDC style experiment 
@@ -6270,24 +7290,19 @@ class Kernel(_ParamsParser):
             `refChSegmEndName`, and `lineageTableEndName`.
 
             NOTE: This dictionary is computed in the `set_abs_exp_paths` method.
+        
+        Notes
+        -----
+        If the parameter `Number of Positions analysed in parallel` is 
+        greater than 1, the Positions of each experiment are analysed in 
+        separate processes (see `_run_positions_parallel`).
         """      
         desc = 'Experiments completed'
         pbar_exp = tqdm(total=len(exp_paths), ncols=100, desc=desc, position=0)  
         for exp_path, exp_info in exp_paths.items():
             exp_path = utils.io.get_abspath(exp_path)
-            exp_foldername = os.path.basename(exp_path)
-            exp_parent_foldername = os.path.basename(os.path.dirname(exp_path))
-            run_number = exp_info['run_number']
             pos_foldernames = exp_info['pos_foldernames']  
             spots_ch_endname = exp_info['spotsEndName'] 
-            ref_ch_endname = exp_info['refChEndName']
-            segm_endname = exp_info['segmEndName']
-            spots_ch_segm_endname = exp_info['spotChSegmEndName']
-            ref_ch_segm_endname = exp_info['refChSegmEndName']
-            lineage_table_endname = exp_info['lineageTableEndName']
-            df_spots_coords_in_endname = exp_info['inputDfSpotsEndname']
-            text_to_append = exp_info['textToAppend']
-            df_spots_file_ext = exp_info['df_spots_file_ext']
             desc = 'Experiments completed'
             pbar_pos = tqdm(
                 total=len(exp_paths), ncols=100, desc=desc, position=1
@@ -6295,57 +7310,32 @@ class Kernel(_ParamsParser):
             transformed_data_nnet = self.check_preprocess_data_nnet_across_exp(
                 exp_path, pos_foldernames, spots_ch_endname
             )
+            num_workers = self._get_num_parallel_positions(
+                len(pos_foldernames)
+            )
+            if num_workers > 1:
+                self._run_positions_parallel(
+                    exp_path, pos_foldernames, exp_info, 
+                    transformed_data_nnet, num_workers, pbar_pos, 
+                    verbose=verbose
+                )
+                pbar_pos.close()
+                pbar_exp.update()
+                continue
+            
             for pos in pos_foldernames:
                 print('')
-                pos_path = os.path.join(exp_path, pos)
-                rel_path = os.path.join(
-                    exp_parent_foldername, exp_foldername, pos
-                )
-                self.logger.info(f'Analysing "...{os.sep}{rel_path}"...')
-                images_path = os.path.join(pos_path, 'Images')
-                self._current_pos_path = pos_path
-                pos_analysis_started_datetime = datetime.now()
-                t0_pos = time.perf_counter()
+                images_path = os.path.join(exp_path, pos, 'Images')
+                self._current_pos_path = os.path.join(exp_path, pos)
                 self.check_segm_masks_endnames(images_path)
-                result = self._run_from_images_path(
-                    images_path, 
-                    spots_ch_endname=spots_ch_endname, 
-                    ref_ch_endname=ref_ch_endname, 
-                    segm_endname=segm_endname,
-                    spots_ch_segm_endname=spots_ch_segm_endname,
-                    ref_ch_segm_endname=ref_ch_segm_endname, 
-                    lineage_table_endname=lineage_table_endname,
-                    df_spots_coords_in_endname=df_spots_coords_in_endname,
-                    text_to_append=text_to_append,                   
-                    transformed_spots_ch_nnet=transformed_data_nnet[pos],
-                    run_number=run_number,
+                completed = self._run_single_pos(
+                    exp_path, pos, exp_info, 
+                    transformed_spots_ch_nnet=transformed_data_nnet[pos], 
                     verbose=verbose
-                )      
-                if result is None:
-                    # Error raised, logged while dfs is None
-                    continue
-                dfs, data = result
-                self.add_post_analysis_features(dfs)
-                dfs = self.filter_requested_features(dfs)
-                dfs = self.filter_requested_features(dfs, on_aggr=True)
-                self.save_dfs_and_spots_masks(
-                    pos_path, dfs, 
-                    images_path=images_path,
-                    basename=data.get('basename', ''),
-                    spots_ch_endname=spots_ch_endname,
-                    uncropped_shape=data.get('spots_ch.shape'),
-                    run_number=run_number, 
-                    text_to_append=text_to_append, 
-                    df_spots_file_ext=df_spots_file_ext, 
-                    df_spots_coords_in_endname=df_spots_coords_in_endname,
-                    verbose=verbose,
-                    pos_analysis_started_datetime=pos_analysis_started_datetime
                 )
+                if not completed:
+                    continue
                 pbar_pos.update()
-                self._log_exec_time(
-                    t0_pos, 'single Position', 
-                    additional_txt=f'(Path: "{pos_path}")'
-                )
             pbar_pos.close()
             pbar_exp.update()
         pbar_exp.close()
@@ -6645,6 +7635,7 @@ class Kernel(_ParamsParser):
             pos_analysis_started_datetime=pos_analysis_started_datetime
         )
         
+        saved_dfs = {}
         for key, filename in dfs_filenames.items():
             df_spots_filename = filename.replace('*rn*', str(run_number))
             df_spots_filename = df_spots_filename.replace(
@@ -6662,6 +7653,12 @@ class Kernel(_ParamsParser):
                 if key != 'spots_spotfit':
                     # Save additional spots masks only with spotfit
                     sizes_for_spot_masks = None
+                spots_masks_format = (
+                    spots_channel_params.get('spotsMasksFormat', {})
+                    .get('loadedVal')
+                )
+                if not spots_masks_format:
+                    spots_masks_format = 'dense'
                 print('')
                 if 'spot_mask' in df_spots.columns:
                     df_spots = io.save_spots_masks(
@@ -6675,20 +7672,54 @@ class Kernel(_ParamsParser):
                         text_to_append=text_to_append,
                         mask_shape=uncropped_shape,
                         verbose=verbose,
-                        logger_func=self.logger.info
+                        logger_func=self.logger.info,
+                        spots_masks_format=spots_masks_format
                     )
                     
                 io.save_df_spots(
                     df_spots, spotmax_out_path, df_spots_filename,
                     extension=df_spots_file_ext
                 )
+                saved_dfs[key] = df_spots
             
-            agg_filename = f'{df_spots_filename}_aggregated.csv'
             agg_key = key.replace('spots', 'agg')
             df_agg = dfs.get(agg_key, None)
 
             if df_agg is not None:
-                df_agg.to_csv(os.path.join(spotmax_out_path, agg_filename))
+                io.save_df_agg(
+                    df_agg, spotmax_out_path, df_spots_filename, 
+                    df_spots_file_ext=df_spots_file_ext
+                )
+                saved_dfs[agg_key] = df_agg
+        
+        self._append_to_results_store(
+            folder_path, saved_dfs, run_number, text_to_append
+        )
+    
+    def _append_to_results_store(
+            self, pos_path, dfs, run_number, text_to_append
+        ):
+        SECTION = 'Configuration'
+        options = self._params[SECTION].get('saveResultsStore', {})
+        if not options.get('loadedVal', False):
+            return
+        
+        pos_path = os.path.normpath(pos_path)
+        exp_path = os.path.dirname(pos_path)
+        pos_foldername = os.path.basename(pos_path)
+        try:
+            store_filepath = results_store.append_position_results(
+                exp_path, pos_foldername, run_number, dfs, 
+                text_to_append=text_to_append
+            )
+        except Exception as err:
+            self.logger.info(
+                f'[WARNING]: Results of "{pos_path}" could not be added '
+                f'to the experiment-level results store ({err})'
+            )
+            return
+        
+        self.logger.info(f'Results added to "{store_filepath}"')
 
     @exception_handler_cli
     def run(
@@ -6719,6 +7750,7 @@ class Kernel(_ParamsParser):
         
         self._force_default = force_default_values
         self._force_close_on_critical = force_close_on_critical
+        self._num_numba_threads = num_numba_threads
         if NUMBA_INSTALLED and num_numba_threads > 0:
             numba.set_num_threads(num_numba_threads)
         
@@ -6775,6 +7807,7 @@ class Kernel(_ParamsParser):
             pass
         
     def quit(self, error=None):
+        self._shutdown_spotfit_executor()
         is_watchdog_warning = utils.stop_watchdog(self.watchdog_id)
         
         if not self.is_cli and error is not None:
@@ -6837,6 +7870,68 @@ class Kernel(_ParamsParser):
         self.logger.info('='*100)
         exit()
 
+_PARALLEL_POS_KERNEL = None
+
+def _init_parallel_pos_worker(kernel_state, num_numba_threads):
+    """Initializer of the worker processes used to analyse Positions in 
+    parallel (see `Kernel._run_positions_parallel`)
+    """    
+    import logging
+    from io import StringIO
+    
+    global _PARALLEL_POS_KERNEL
+    
+    if NUMBA_INSTALLED:
+        numba.set_num_threads(num_numba_threads)
+    
+    kernel = Kernel.__new__(Kernel)
+    kernel.__dict__.update(kernel_state)
+    
+    # The worker cannot stop the entire analysis with `exit()` --> setting 
+    # `is_cli` to False makes `quit(error)` raise the error to the parent
+    kernel.is_cli = False
+    
+    logger = logging.getLogger(f'spotmax-pos-worker-{os.getpid()}')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    log_stream = StringIO()
+    logger.addHandler(logging.StreamHandler(log_stream))
+    logger._log_stream = log_stream
+    kernel.logger = logger
+    kernel.log = logger.info
+    
+    _PARALLEL_POS_KERNEL = kernel
+
+def _run_pos_in_parallel_worker(
+        exp_path, pos, exp_info, transformed_spots_ch_nnet, verbose
+    ):
+    kernel = _PARALLEL_POS_KERNEL
+    
+    # Reset log and report to collect only this Position's entries
+    log_stream = kernel.logger._log_stream
+    log_stream.seek(0)
+    log_stream.truncate(0)
+    kernel.were_errors_detected = False
+    if hasattr(kernel, '_report'):
+        kernel._report['pos_info'] = {}
+    
+    completed = kernel._run_single_pos(
+        exp_path, pos, exp_info, 
+        transformed_spots_ch_nnet=transformed_spots_ch_nnet, 
+        verbose=verbose
+    )
+    pos_info = {}
+    if hasattr(kernel, '_report'):
+        pos_info = kernel._report['pos_info']
+    
+    pos_result = {
+        'completed': bool(completed),
+        'log_text': log_stream.getvalue(),
+        'pos_info': pos_info,
+        'were_errors_detected': kernel.were_errors_detected
+    }
+    return pos_result
+
 def eucl_dist_point_2Dyx(points, all_others):
     """
     Given 2D array of [y, x] coordinates points and all_others return the
@@ -6943,6 +8038,8 @@ def skeletonize(dataToSkel, is_zstack=False):
     return skeletonCoords
 
 def objContours(obj):
+    import cv2
+    
     contours, _ = cv2.findContours(
         obj.image.astype(np.uint8),
         cv2.RETR_TREE,
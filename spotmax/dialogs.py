@@ -4450,7 +4450,9 @@ class SpotsItemPropertiesDialog(QBaseDialog):
     
     def setSizeFromTable(self, filename):
         from .core import ZYX_RESOL_COLS
-        df = io.load_spots_table(self.spotmax_out_path, filename)
+        df = io.load_spots_table(
+            self.spotmax_out_path, filename, columns=[ZYX_RESOL_COLS[1]]
+        )
         try:
             size = round(df[ZYX_RESOL_COLS[1]].iloc[0])
         except Exception as err:
@@ -5563,7 +5565,7 @@ class SetupUnetTrainingDialog(QBaseDialog):
             self.selectEntries, 
             widget_name='widgets.EndnameLineEdit', 
             attrToSet='selectedSpotsCoordsFiles', 
-            extensions={'Tables': ['.csv', '.h5']}, 
+            extensions={'Tables': ['.csv', '.h5', '.parquet']}, 
             allow_spotmax_output=True, 
             use_value_as_widgets_value=True,
             widgets_values_are_multiple_entries=True,
@@ -390,14 +390,112 @@ def add_ttest_values(
     df.at[idx, f'{name}_ttest_tstat'] = tstat
     df.at[idx, f'{name}_ttest_pvalue'] = pvalue
 
+class DataFrameColumnsBuffer:
+    """Buffer of single-value assignments to a pandas.DataFrame.
+
+    It exposes the same `df.at[idx, col]` interface used by the `add_*` 
+    functions of this module, but values are stored in dictionaries and 
+    assigned to the DataFrame as whole columns when calling `to_df`. 
+    This avoids the overhead of pandas scalar setitem when computing 
+    features for many spots.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame whose columns will be added or updated by `to_df`. 
+        Values that are not in the buffer are read from `df`.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self._columns = {}
+    
+    @property
+    def at(self):
+        return self
+    
+    def __setitem__(self, key, value):
+        idx, col = key
+        self._columns.setdefault(col, {})[idx] = value
+    
+    def __getitem__(self, key):
+        idx, col = key
+        column = self._columns.get(col)
+        if column is None:
+            return self._df.at[idx, col]
+        
+        if idx not in column:
+            if col in self._df.columns:
+                return self._df.at[idx, col]
+            return np.nan
+        
+        value = column[idx]
+        if isinstance(value, (bool, int, np.bool_, np.integer)):
+            # Columns created by setting scalars with `df.at` are float
+            value = np.float64(value)
+        return value
+    
+    def to_df(self):
+        """Assign the buffered values to the DataFrame.
+
+        Returns
+        -------
+        pandas.DataFrame
+            DataFrame with existing columns updated and new columns 
+            appended in the order they were first set. Missing values 
+            are NaN.
+        """
+        df = self._df
+        new_columns = {}
+        for col, values in self._columns.items():
+            idx = list(values.keys())
+            col_values = np.array(list(values.values()))
+            if col_values.dtype.kind not in 'fc':
+                col_values = col_values.astype(np.float64)
+            if col in df.columns:
+                df.loc[idx, col] = col_values
+                continue
+            
+            new_col_values = np.full(len(df), np.nan, dtype=col_values.dtype)
+            new_col_values[df.index.get_indexer(idx)] = col_values
+            new_columns[col] = new_col_values
+        
+        self._columns = {}
+        if not new_columns:
+            return df
+        
+        df_new_columns = pd.DataFrame(new_columns, index=df.index)
+        return pd.concat([df, df_new_columns], axis=1)
+
+def get_distribution_metrics(arr, col_name='*name'):
+    """Compute the metrics from `get_distribution_metrics_func` of `arr`
+
+    Parameters
+    ----------
+    arr : np.ndarray
+        Input values
+    col_name : str, optional
+        Pattern of the keys of the returned dictionary where '*name' is 
+        replaced with the name of the metric. Default is '*name'
+
+    Returns
+    -------
+    dict
+        Dictionary of {col_name: value} 
+    """    
+    distribution_metrics_func = get_distribution_metrics_func()
+    metrics = {}
+    for name, func in distribution_metrics_func.items():
+        _col_name = col_name.replace('*name', name)
+        metrics[_col_name] = func(arr)
+    return metrics
+
 def add_distribution_metrics(
         arr, df, idx, col_name='*name', add_bkgr_corrected_metrics=False, 
         logger_warning_report=None, logger_func=print, iter_idx=0
     ):
-    distribution_metrics_func = get_distribution_metrics_func()
-    for name, func in distribution_metrics_func.items():
-        _col_name = col_name.replace('*name', name)
-        df.at[idx, _col_name] = func(arr)
+    metrics = get_distribution_metrics(arr, col_name=col_name)
+    for _col_name, value in metrics.items():
+        df.at[idx, _col_name] = value
     
     if not add_bkgr_corrected_metrics:
         return
@@ -12,7 +12,9 @@ try:
 except Exception as e:
     CUPY_INSTALLED = False
 
+import scipy.spatial
 import skimage.morphology
+import skimage.exposure
 import skimage.filters
 import skimage.measure
 
@@ -70,7 +72,11 @@ def gaussian(image, sigma, use_gpu=False, logger_func=print):
     
     if CUPY_INSTALLED and use_gpu:
         try:
-            image = cp.array(image, dtype=float)
+            float_dtype = (
+                image.dtype if np.issubdtype(image.dtype, np.floating) 
+                else float
+            )
+            image = cp.array(image, dtype=float_dtype)
             filtered = gpu_gaussian_filter(image, sigma)
             filtered = cp.asnumpy(filtered)
         except Exception as err:
@@ -135,10 +141,7 @@ def DoG_spots(
     
     return sharp_rescaled
 
-def threshold(
-        image, threshold_func, do_max_proj=False, logger_func=print, 
-        mask=None
-    ):
+def _get_threshold_input_vals(image, do_max_proj=False, mask=None):
     if do_max_proj and image.ndim == 3:
         input_image = image.max(axis=0)
         if mask is not None:
@@ -151,6 +154,16 @@ def threshold(
     else:
         input_vals = input_image[mask]
     
+    return input_vals
+
+def threshold(
+        image, threshold_func, do_max_proj=False, logger_func=print, 
+        mask=None
+    ):
+    input_vals = _get_threshold_input_vals(
+        image, do_max_proj=do_max_proj, mask=mask
+    )
+    
     try:
         thresh_val = threshold_func(input_vals)
     except Exception as e:
@@ -194,6 +207,318 @@ def threshold_masked_by_obj(
     else:
         return thresholded
 
+class HistogramThresholds:
+    """Compute multiple automatic threshold values from a single histogram.
+
+    The histogram of the input values is computed only once (with the same 
+    bins used by `skimage.filters`) and it is shared by all the supported 
+    methods. Li's method is computed on the sorted values with cumulative 
+    sums, which avoids re-scanning the values at every iteration.
+    
+    The threshold values are the same as the ones of `skimage.filters` up 
+    to floating point rounding (Li's method sums the values in a different 
+    order, so the last bits of the result can differ).
+
+    Parameters
+    ----------
+    values : (N, ...) numpy.ndarray
+        Input intensities. They are flattened.
+    nbins : int, optional
+        Number of bins of the histogram. Ignored for integer arrays. 
+        Default is 256 (as in `skimage.filters`)
+    
+    Examples
+    --------
+    >>> thresholder = HistogramThresholds(image[lab > 0])
+    >>> thresh_vals = thresholder.thresholds(['threshold_otsu', 'threshold_li'])
+    """
+    SUPPORTED_METHODS = (
+        'threshold_li',
+        'threshold_isodata',
+        'threshold_otsu',
+        'threshold_minimum',
+        'threshold_triangle',
+        'threshold_mean',
+        'threshold_yen'
+    )
+    
+    def __init__(self, values, nbins=256):
+        self._values = np.asarray(values).reshape(-1)
+        self._nbins = nbins
+        self._hist = None
+        self._sorted = None
+    
+    @classmethod
+    def is_supported(cls, threshold_func):
+        """Check if `threshold_func` is a `skimage.filters` function that can 
+        be computed from the shared histogram
+        """
+        if isinstance(threshold_func, str):
+            return threshold_func in cls.SUPPORTED_METHODS
+        
+        method = getattr(threshold_func, '__name__', '')
+        if method not in cls.SUPPORTED_METHODS:
+            return False
+        
+        return getattr(skimage.filters, method) is threshold_func
+    
+    @property
+    def hist(self):
+        if self._hist is None:
+            self._hist = skimage.exposure.histogram(
+                self._values, self._nbins, source_range='image'
+            )
+        return self._hist
+    
+    @property
+    def sorted_values(self):
+        if self._sorted is None:
+            self._sorted = np.sort(self._values)
+        return self._sorted
+    
+    def _is_constant(self):
+        return self.sorted_values[0] == self.sorted_values[-1]
+    
+    def threshold(self, method):
+        """Return the threshold value of the `skimage.filters` method with name 
+        `method` (e.g., 'threshold_otsu')
+        """
+        if isinstance(method, str):
+            method_name = method
+        else:
+            method_name = method.__name__
+        
+        if method_name not in self.SUPPORTED_METHODS:
+            raise NameError(
+                f'Threshold method "{method_name}" is not supported. '
+                f'Valid methods are {self.SUPPORTED_METHODS}'
+            )
+        
+        if self._values.size == 0:
+            raise ValueError('Cannot compute the threshold of empty values.')
+        
+        if method_name == 'threshold_mean':
+            return np.mean(self._values)
+        
+        if method_name == 'threshold_li':
+            return self._threshold_li()
+        
+        if self._is_constant() and method_name != 'threshold_minimum':
+            return self.sorted_values[0]
+        
+        if method_name == 'threshold_triangle':
+            return self._threshold_triangle()
+        
+        threshold_func = getattr(skimage.filters, method_name)
+        return threshold_func(hist=self.hist)
+    
+    def thresholds(self, methods=None, logger_func=None, error_value=np.nan):
+        """Return a dictionary of {method: threshold value}. 
+        
+        If a method fails, its threshold value is `error_value` and the error 
+        is logged with `logger_func` (if not None).
+        """
+        if methods is None:
+            methods = self.SUPPORTED_METHODS
+        
+        thresh_vals = {}
+        for method in methods:
+            try:
+                thresh_vals[method] = self.threshold(method)
+            except Exception as err:
+                if logger_func is not None:
+                    logger_func(f'{err} ({method})')
+                thresh_vals[method] = error_value
+        return thresh_vals
+    
+    def _threshold_triangle(self):
+        # Same as `skimage.filters.threshold_triangle` but from the histogram
+        hist, bin_centers = self.hist
+        nbins = len(hist)
+
+        arg_peak_height = np.argmax(hist)
+        peak_height = hist[arg_peak_height]
+        arg_low_level, arg_high_level = np.flatnonzero(hist)[[0, -1]]
+
+        flip = (
+            arg_peak_height - arg_low_level < arg_high_level - arg_peak_height
+        )
+        if flip:
+            hist = hist[::-1]
+            arg_low_level = nbins - arg_high_level - 1
+            arg_peak_height = nbins - arg_peak_height - 1
+
+        width = arg_peak_height - arg_low_level
+        x1 = np.arange(width)
+        y1 = hist[x1 + arg_low_level]
+
+        norm = np.sqrt(peak_height**2 + width**2)
+        peak_height = peak_height/norm
+        width = width/norm
+
+        length = peak_height*x1 - width*y1
+        arg_level = np.argmax(length) + arg_low_level
+
+        if flip:
+            arg_level = nbins - arg_level - 1
+
+        return bin_centers[arg_level]
+    
+    def _threshold_li(self):
+        # Same algorithm as `skimage.filters.threshold_li` but the means of 
+        # foreground and background are computed from the cumulative sum of 
+        # the sorted values (equal to skimage up to rounding errors)
+        sorted_values = self.sorted_values
+        sorted_values = sorted_values[np.isfinite(sorted_values)]
+        if sorted_values.size == 0:
+            return np.nan
+        
+        if sorted_values[0] == sorted_values[-1]:
+            return sorted_values[0]
+        
+        values_min = sorted_values[0]
+        shifted = sorted_values.astype(np.float64) - float(values_min)
+        if sorted_values.dtype.kind in 'iu':
+            tolerance = 0.5
+        else:
+            diff = np.diff(shifted)
+            tolerance = diff[diff > 0].min()/2
+        
+        cumsum = np.cumsum(shifted)
+        total_sum = cumsum[-1]
+        size = shifted.size
+        
+        t_next = total_sum/size
+        t_curr = -2*tolerance
+        with np.errstate(divide='ignore', invalid='ignore'):
+            while abs(t_next - t_curr) > tolerance:
+                t_curr = t_next
+                num_back = np.searchsorted(shifted, t_curr, side='right')
+                back_sum = cumsum[num_back-1] if num_back > 0 else 0.0
+                mean_back = np.float64(back_sum)/num_back
+                mean_fore = np.float64(total_sum-back_sum)/(size-num_back)
+
+                if mean_back == 0.0:
+                    break
+
+                t_next = (
+                    (mean_back - mean_fore)
+                    /(np.log(mean_back) - np.log(mean_fore))
+                )
+        
+        thresh_val = t_next + values_min
+        if sorted_values.dtype.kind == 'f':
+            # Return same float dtype as the input like skimage does
+            thresh_val = sorted_values.dtype.type(thresh_val)
+        
+        return thresh_val
+
+def threshold_values(
+        input_vals, threshold_funcs, logger_func=None, error_value=np.nan
+    ):
+    """Compute the threshold values of multiple threshold functions.
+
+    The functions from `skimage.filters` listed in 
+    `HistogramThresholds.SUPPORTED_METHODS` share the same histogram, while 
+    any other function is called on `input_vals`.
+
+    Parameters
+    ----------
+    input_vals : numpy.ndarray
+        Input intensities
+    threshold_funcs : dict
+        Dictionary of {method: callable}
+    logger_func : callable, optional
+        If not None, function used to log errors. Default is None
+    error_value : float, optional
+        Threshold value returned for failed methods. Default is np.nan
+
+    Returns
+    -------
+    dict
+        Dictionary of {method: threshold value}
+    """
+    thresholder = HistogramThresholds(input_vals)
+    thresh_vals = {}
+    for method, threshold_func in threshold_funcs.items():
+        try:
+            if HistogramThresholds.is_supported(threshold_func):
+                thresh_val = thresholder.threshold(threshold_func)
+            else:
+                thresh_val = threshold_func(input_vals)
+        except Exception as err:
+            if logger_func is not None:
+                logger_func(f'{err} ({threshold_func})')
+            thresh_val = error_value
+        thresh_vals[method] = thresh_val
+    return thresh_vals
+
+def threshold_values_per_object(
+        image, lab, threshold_funcs, do_max_proj=False, zyx_tolerance=None,
+        logger_func=None
+    ):
+    """Compute the threshold values of multiple threshold functions for 
+    every object in `lab` in a single batched call.
+
+    The pixels are grouped by object ID with one sort of the labels, and 
+    each object histogram is shared by all the methods.
+
+    Parameters
+    ----------
+    image : (Y, X) or (Z, Y, X) numpy.ndarray
+        Input image
+    lab : numpy.ndarray
+        Labels array with same shape as `image`
+    threshold_funcs : dict
+        Dictionary of {method: callable} (see `_get_threshold_funcs`)
+    do_max_proj : bool, optional
+        If True and `image` is 3D, the thresholds are computed on the 
+        max projection of each object. Default is False
+    zyx_tolerance : (int, int, int), optional
+        If not None, the z-range of each object is expanded by 
+        `zyx_tolerance[0]` before the max projection, as done by 
+        `transformations.SliceImageFromSegmObject`. Default is None
+    logger_func : callable, optional
+        If not None, function used to log errors. Default is None
+
+    Returns
+    -------
+    pandas.DataFrame
+        DataFrame with index 'Cell_ID' and one column per method.
+    """
+    if do_max_proj and image.ndim == 3:
+        dz = 0 if zyx_tolerance is None else zyx_tolerance[0]
+        Z = image.shape[0]
+        rp = skimage.measure.regionprops(lab)
+        IDs = [obj.label for obj in rp]
+        objs_vals = []
+        for obj in rp:
+            z_start = max(obj.slice[0].start - dz, 0)
+            z_stop = min(obj.slice[0].stop + dz, Z)
+            obj_slice = (slice(z_start, z_stop), *obj.slice[1:])
+            obj_image = image[obj_slice].max(axis=0)
+            obj_mask = obj.image.max(axis=0)
+            objs_vals.append(obj_image[obj_mask])
+    else:
+        lab_vals = lab.reshape(-1)
+        fg_idxs = np.flatnonzero(lab_vals)
+        fg_lab_vals = lab_vals[fg_idxs]
+        sort_idxs = np.argsort(fg_lab_vals, kind='stable')
+        sorted_IDs = fg_lab_vals[sort_idxs]
+        sorted_vals = image.reshape(-1)[fg_idxs[sort_idxs]]
+        IDs, split_idxs = np.unique(sorted_IDs, return_index=True)
+        objs_vals = np.split(sorted_vals, split_idxs[1:])
+    
+    thresh_vals = [
+        threshold_values(obj_vals, threshold_funcs, logger_func=logger_func) 
+        for obj_vals in objs_vals
+    ]
+    df = pd.DataFrame(
+        thresh_vals, index=pd.Index(IDs, name='Cell_ID'), 
+        columns=list(threshold_funcs.keys())
+    )
+    return df
+
 def _get_threshold_funcs(threshold_func=None, try_all=True):
     if threshold_func is None and try_all:
         threshold_funcs = {
@@ -229,6 +554,58 @@ def _get_semantic_segm_output(
         return segm_out, nnet_pred_map
     return segm_out
 
+def _add_local_predict_mask_to_labels(
+        predict_mask_merged, local_labels, obj_mask_lab, ID, bud_ID,
+        keep_objects_touching_lab_intact=False, min_mask_size=1
+    ):
+    if not keep_objects_touching_lab_intact:
+        predict_mask_merged[~(obj_mask_lab>0)] = False
+    else:
+        predict_mask_merged = clear_objs_outside_mask(
+            predict_mask_merged, obj_mask_lab
+        )
+    
+    if bud_ID > 0:
+        # Split object into mother and bud 
+        predict_lab_merged = np.zeros(
+            predict_mask_merged.shape, dtype=int
+        )
+        moth_mask = obj_mask_lab == ID
+        predict_moth_mask = np.zeros_like(predict_mask_merged)
+        predict_moth_mask[moth_mask] = predict_mask_merged[moth_mask]
+        
+        # Label sub-objects in the mother and add them to labels
+        predict_moth_lab = skimage.measure.label(predict_moth_mask)
+        predict_lab_merged[moth_mask] = predict_moth_lab[moth_mask]
+        
+        # Label sub-objects in the bud and add them to labels
+        bud_mask = obj_mask_lab == bud_ID
+        predict_bud_mask = np.zeros_like(predict_mask_merged)
+        predict_bud_mask[bud_mask] = predict_mask_merged[bud_mask]
+        
+        predict_bud_lab = skimage.measure.label(predict_bud_mask)
+        predict_moth_rp = skimage.measure.regionprops(predict_moth_lab)
+        max_sub_id_moth = max(
+            [obj.label for obj in predict_moth_rp], default=1
+        )
+        predict_bud_lab[predict_bud_mask] += max_sub_id_moth
+        predict_lab_merged[bud_mask] = predict_bud_lab[bud_mask]
+    else:
+        predict_lab_merged = skimage.measure.label(predict_mask_merged)
+    
+    # Assign ID to sub-objets in predict_mask_merged depending on 
+    # the most common ID they lie on
+    predict_rp = skimage.measure.regionprops(predict_lab_merged)
+    for sub_obj in predict_rp:
+        if sub_obj.area < min_mask_size:
+            continue
+        IDs = obj_mask_lab[sub_obj.slice][sub_obj.image]
+        IDs = IDs[IDs>0]
+        IDs, counts = np.unique(IDs, return_counts=True)
+        most_common_idx = np.argmax(counts)
+        ID = IDs[most_common_idx]
+        local_labels[sub_obj.slice][sub_obj.image] = ID
+
 def local_semantic_segmentation(
         image, lab, 
         threshold_func=None, 
@@ -291,25 +668,55 @@ def local_semantic_segmentation(
     if return_nnet_prediction:
         result['neural_network_prediciton'] = np.zeros(lab.shape)
     
+    thresh_funcs = {
+        method: thresh_func for method, thresh_func in threshold_funcs.items()
+        if thresh_func is not None
+    }
+    labels = {method: np.zeros_like(lab) for method in threshold_funcs.keys()}
+    
+    # Without ridge filter and mother-bud merging the thresholded pixels of 
+    # each object are its own pixels --> compute all objects in one call
+    df_thresh_vals = None
+    if thresh_funcs and not ridge_filter_sigmas and lineage_table is None:
+        df_thresh_vals = threshold_values_per_object(
+            image, lab, thresh_funcs, do_max_proj=do_max_proj, 
+            zyx_tolerance=zyx_tolerance
+        )
+    
+    # Iterate objects first so that each object is sliced only once and all 
+    # the threshold values are computed from the same histogram
     if do_try_all_thresholds:
-        pbar = tqdm(total=len(threshold_funcs), ncols=100)
-    for method, thresh_func in threshold_funcs.items():
-        labels = np.zeros_like(lab)
-        for obj in rp:
-            if lineage_table is not None:
-                try:
-                    if lineage_table.at[obj.label, 'relationship'] == 'bud':
-                        # Skip buds since they are aggregated with mother
-                        continue
-                except Exception as err:
-                    printl(traceback.format_exc())
-                    import pdb; pdb.set_trace()
-            
-            spots_img_obj, lab_mask_lab, merged_obj_slice, bud_ID = (
-                slicer.slice(image, obj)
+        pbar = tqdm(total=len(rp), ncols=100)
+    for obj in rp:
+        if lineage_table is not None:
+            try:
+                if lineage_table.at[obj.label, 'relationship'] == 'bud':
+                    # Skip buds since they are aggregated with mother
+                    if do_try_all_thresholds:
+                        pbar.update()
+                    continue
+            except Exception as err:
+                printl(traceback.format_exc())
+                import pdb; pdb.set_trace()
+        
+        spots_img_obj, lab_mask_lab, merged_obj_slice, bud_ID = (
+            slicer.slice(image, obj)
+        )
+        obj_mask_lab = lab_mask_lab[merged_obj_slice]
+        
+        if ridge_filter_sigmas:
+            spots_img_obj = ridge(spots_img_obj, ridge_filter_sigmas)
+        
+        thresh_vals = {}
+        if df_thresh_vals is not None:
+            thresh_vals = df_thresh_vals.loc[obj.label].to_dict()
+        elif thresh_funcs:
+            input_vals = _get_threshold_input_vals(
+                spots_img_obj, do_max_proj=do_max_proj, mask=obj_mask_lab>0
             )
-            obj_mask_lab = lab_mask_lab[merged_obj_slice]
-
+            thresh_vals = threshold_values(input_vals, thresh_funcs)
+        
+        for method in threshold_funcs.keys():
             if method == 'neural_network' and nnet_input_data is not None:
                 input_img, _, _, _ = (
                     slicer.slice(nnet_input_data, obj)
@@ -323,9 +730,11 @@ def local_semantic_segmentation(
                     slicer.slice(spotiflow_input_image, obj)
                 )
             else:
-                input_img = spots_img_obj
+                input_img = None
             
-            if ridge_filter_sigmas:
+            if input_img is None:
+                input_img = spots_img_obj
+            elif ridge_filter_sigmas:
                 input_img = ridge(input_img, ridge_filter_sigmas)
             
             if return_image:
@@ -352,70 +761,26 @@ def local_semantic_segmentation(
                     input_img, **spotiflow_params['segment']
                 )
             else:
-                # Threshold
-                predict_mask_merged = threshold_masked_by_obj(
-                    input_img, obj_mask_lab, thresh_func, 
-                    do_max_proj=do_max_proj, 
-                    # use_mask=not keep_objects_touching_lab_intact
-                )
-            
-            if not keep_objects_touching_lab_intact:
-                predict_mask_merged[~(obj_mask_lab>0)] = False
-            else:
-                predict_mask_merged = clear_objs_outside_mask(
-                    predict_mask_merged, obj_mask_lab
-                )
-            
-            if bud_ID > 0:
-                # Split object into mother and bud 
-                predict_lab_merged = np.zeros(
-                    predict_mask_merged.shape, dtype=int
-                )
-                moth_mask = obj_mask_lab == obj.label
-                predict_moth_mask = np.zeros_like(predict_mask_merged)
-                predict_moth_mask[moth_mask] = predict_mask_merged[moth_mask]
-                
-                # Label sub-objects in the mother and add them to labels
-                predict_moth_lab = skimage.measure.label(predict_moth_mask)
-                predict_lab_merged[moth_mask] = predict_moth_lab[moth_mask]
-                
-                # Label sub-objects in the bud and add them to labels
-                bud_mask = obj_mask_lab == bud_ID
-                predict_bud_mask = np.zeros_like(predict_mask_merged)
-                predict_bud_mask[bud_mask] = predict_mask_merged[bud_mask]
-                
-                predict_bud_lab = skimage.measure.label(predict_bud_mask)
-                predict_moth_rp = skimage.measure.regionprops(predict_moth_lab)
-                max_sub_id_moth = max(
-                    [obj.label for obj in predict_moth_rp], default=1
-                )
-                predict_bud_lab[predict_bud_mask] += max_sub_id_moth
-                predict_lab_merged[bud_mask] = predict_bud_lab[bud_mask]
-            else:
-                predict_lab_merged = skimage.measure.label(predict_mask_merged)
+                # Threshold (failed methods have NaN threshold --> all False)
+                predict_mask_merged = input_img > thresh_vals[method]
             
-            # Assign ID to sub-objets in predict_mask_merged depending on 
-            # the most common ID they lie on
-            local_labels = labels[merged_obj_slice]
-            predict_rp = skimage.measure.regionprops(predict_lab_merged)
-            for sub_obj in predict_rp:
-                if sub_obj.area < min_mask_size:
-                    continue
-                IDs = obj_mask_lab[sub_obj.slice][sub_obj.image]
-                IDs = IDs[IDs>0]
-                IDs, counts = np.unique(IDs, return_counts=True)
-                most_common_idx = np.argmax(counts)
-                ID = IDs[most_common_idx]
-                local_labels[sub_obj.slice][sub_obj.image] = ID
+            _add_local_predict_mask_to_labels(
+                predict_mask_merged, labels[method][merged_obj_slice], 
+                obj_mask_lab, obj.label, bud_ID, 
+                keep_objects_touching_lab_intact=(
+                    keep_objects_touching_lab_intact
+                ),
+                min_mask_size=min_mask_size
+            )
         
-        # labels = filter_labels_by_size(labels, min_mask_size)
-
-        result[method] = labels.astype(np.int32)
         if do_try_all_thresholds:
             pbar.update()
     if do_try_all_thresholds:
         pbar.close()
     
+    for method, method_labels in labels.items():
+        result[method] = method_labels.astype(np.int32)
+    
     out = _get_semantic_segm_output(
         result, return_only_output_mask, nnet_model, return_nnet_prediction, 
         bioimageio_model, spotiflow_model
@@ -468,15 +833,19 @@ def global_semantic_segmentation(
         aggr_transf_spots_nnet_img = nnet_input_data
         aggr_transf_spots_bioimageio_img = bioimageio_input_image
         aggr_transf_spotiflow_img = spotiflow_input_image
+        aggr_plan = transformations.DeaggregationPlan(lab, aggregated_lab)
     else:
         additional_imgs_to_aggr = (
             nnet_input_data, bioimageio_input_image, spotiflow_input_image
         )
+        aggr_plan = transformations.AggregationPlan(
+            lab, lineage_table=lineage_table, zyx_tolerance=zyx_tolerance
+        )
         aggregated = transformations.aggregate_objs(
-            image, lab, lineage_table=lineage_table, 
-            zyx_tolerance=zyx_tolerance,
+            image, lab, 
             additional_imgs_to_aggr=additional_imgs_to_aggr, 
-            return_x_slice_idxs=True 
+            return_x_slice_idxs=True, 
+            aggr_plan=aggr_plan
         )
         aggr_img, aggregated_lab, aggr_imgs, x_slice_idxs = aggregated
         aggr_transf_spots_nnet_img = aggr_imgs[0]
@@ -499,11 +868,18 @@ def global_semantic_segmentation(
         thresh_mask = aggregated_lab > 0
         
     result = {}
-    for method, thresh_func in threshold_funcs.items():
-        thresholded = threshold(
-            aggr_img, thresh_func, logger_func=logger_func,
-            do_max_proj=True, mask=thresh_mask
+    thresh_vals = {}
+    if threshold_funcs:
+        # Compute all the threshold values from the same histogram
+        input_vals = _get_threshold_input_vals(
+            aggr_img, do_max_proj=True, mask=thresh_mask
+        )
+        thresh_vals = threshold_values(
+            input_vals, threshold_funcs, logger_func=logger_func, 
+            error_value=np.inf
         )
+    for method, thresh_val in thresh_vals.items():
+        thresholded = aggr_img > thresh_val
         thresholded = filter_labels_by_size(thresholded, min_mask_size)
         result[method] = thresholded
     
@@ -551,19 +927,20 @@ def global_semantic_segmentation(
                 transformations.index_aggregated_segm_into_input_lab(
                     lab, aggr_segm, aggregated_lab, x_slice_idxs,
                     keep_objects_touching_lab_intact=keep_subobj_intact, 
+                    aggr_plan=aggr_plan
                 )
             )
 
         result = reindexed_result
         if return_image:
             deaggr_img = transformations.deaggregate_img(
-                aggr_img, aggregated_lab, lab
+                aggr_img, aggregated_lab, lab, aggr_plan=aggr_plan
             )
             input_image_dict = {'input_image': deaggr_img}
             result = {**input_image_dict, **result}
         if return_nnet_prediction:
             deaggr_nnet_pred = transformations.deaggregate_img(
-                aggr_nnet_pred, aggregated_lab, lab
+                aggr_nnet_pred, aggregated_lab, lab, aggr_plan=aggr_plan
             )
             result['neural_network_prediciton'] = deaggr_nnet_pred
     else:
@@ -776,24 +1153,31 @@ def filter_valid_points_min_distance(
         # Sort points by descending intensities
         sorting_idxs_descending = np.flip(intensities.argsort())
         points = points[sorting_idxs_descending]
-        
-    masked_points = np.ma.masked_array(
-        data=points, 
-        mask=np.zeros(points.shape, bool), 
-        fill_value=-1
-    )
+    
     valid_points_mask = np.ones(num_points, dtype=bool)
-    for i, point in enumerate(points):
-        if not valid_points_mask[i]:
-            # Skip points that have already been dropped
-            continue
-        points_ellipsoid = np.square((masked_points - point)/min_distance)
-        points_too_close_mask = np.sum(points_ellipsoid, axis=1) < 1
-        valid_points_mask[i+1:] = np.invert(points_too_close_mask[i+1:])
-        
-        # Mask dropped points to avoid computing the distance to them in 
-        # future iterations
-        masked_points.mask[points_too_close_mask] = True
+    if num_points > 1:
+        # Scaling by min_distance the ellipsoid becomes a sphere of radius 1. 
+        # The ball query is slightly larger to get a superset of the 
+        # neighbours, which are then checked with the ellipsoid equation
+        min_distance = np.asarray(min_distance)
+        scaled_points = points/min_distance
+        tree = scipy.spatial.cKDTree(scaled_points)
+        neighbours = tree.query_ball_point(scaled_points, r=1+1e-6)
+        for i, point in enumerate(points):
+            if not valid_points_mask[i]:
+                # Skip points that have already been dropped
+                continue
+            
+            neigh_idxs = np.array(neighbours[i], dtype=int)
+            neigh_idxs = neigh_idxs[neigh_idxs > i]
+            if len(neigh_idxs) == 0:
+                continue
+            
+            points_ellipsoid = np.square(
+                (points[neigh_idxs] - point)/min_distance
+            )
+            points_too_close_mask = np.sum(points_ellipsoid, axis=1) < 1
+            valid_points_mask[neigh_idxs[points_too_close_mask]] = False
     
     valid_points = points[valid_points_mask]
     
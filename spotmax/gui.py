@@ -59,6 +59,7 @@ from . import widgets, config
 from . import tune, utils
 from . import core
 from . import transformations
+from . import prediction_cache
 from . import icon_path
 from . import issues_url
 from . import features
@@ -1326,7 +1327,9 @@ class spotMAX_Win(acdc_gui.guiWin):
                 df.reset_index().set_index(['frame_i', 'Cell_ID', 'spot_id'])
                 .sort_index()
             )
-            aggr_dst_filename = f'{dst_filename}_aggregated.csv'
+            aggr_dst_filename = io.get_df_agg_filename(
+                dst_filename, df_spots_file_ext=f'.{ext}'
+            )
             aggr_dst_filepath = os.path.join(
                 spotmax_output_folderpath, aggr_dst_filename
             )
@@ -1371,7 +1374,10 @@ class spotMAX_Win(acdc_gui.guiWin):
             df_agg = features.add_columns_from_acdc_output_file(
                 df_agg, posData.acdc_df
             )
-            df_agg.to_csv(aggr_dst_filepath)
+            aggr_dst_filepath = io.save_df_agg(
+                df_agg, spotmax_output_folderpath, dst_filename, 
+                df_spots_file_ext=f'.{ext}'
+            )
             
             saved_filepaths.append(aggr_dst_filepath)
         
@@ -2331,8 +2337,10 @@ class spotMAX_Win(acdc_gui.guiWin):
         if not self.isNeuralNetworkRequested():
             return kwargs
         
-        kwargs['nnet_model'] = self.getNeuralNetworkModel()
         kwargs['nnet_params'] = self.getNeuralNetParams()
+        kwargs['nnet_model'] = self.wrapModelWithPredictionCache(
+            self.getNeuralNetworkModel(), kwargs['nnet_params']
+        )
         kwargs['nnet_input_data'] = self.getNeuralNetInputData()
         kwargs['return_nnet_prediction'] = True
         
@@ -2346,8 +2354,11 @@ class spotMAX_Win(acdc_gui.guiWin):
         if not self.isBioImageIOModelRequested(section, anchor):
             return kwargs
         
-        kwargs['bioimageio_model'] = self.getBioImageIOModel(section, anchor)
         kwargs['bioimageio_params'] = self.getBioImageIOParams(section, anchor)
+        kwargs['bioimageio_model'] = self.wrapModelWithPredictionCache(
+            self.getBioImageIOModel(section, anchor), 
+            kwargs['bioimageio_params']
+        )
         
         if section == 'Reference channel':
             threshold_func = self.getRefChThresholdMethod()
@@ -2363,8 +2374,10 @@ class spotMAX_Win(acdc_gui.guiWin):
         if not self.isSpotiflowRequested():
             return kwargs
         
-        kwargs['spotiflow_model'] = self.getSpotiflowModel()
         kwargs['spotiflow_params'] = self.getSpotiflowParams()
+        kwargs['spotiflow_model'] = self.wrapModelWithPredictionCache(
+            self.getSpotiflowModel(), kwargs['spotiflow_params']
+        )
         
         threshold_func = self.getSpotsThresholdMethod()
         kwargs['thresholding_method'] = threshold_func
@@ -2372,6 +2385,39 @@ class spotMAX_Win(acdc_gui.guiWin):
         
         return kwargs
     
+    def wrapModelWithPredictionCache(self, model, model_params):
+        if model is None or model_params is None:
+            return model
+        
+        ParamsGroupBox = self.computeDockWidget.widget().parametersQGBox
+        configParams = ParamsGroupBox.params['Configuration']
+        usePredictionCache = (
+            configParams['usePredictionCache']['widget'].isChecked()
+        )
+        if not usePredictionCache:
+            return model
+        
+        max_size_GB = configParams['predictionCacheMaxSizeGB']['widget'].value()
+        init_params = {
+            **model_params.get('init', {}), 
+            **(model_params.get('kwargs') or {})
+        }
+        
+        # Hashing the model weights is slow --> reuse the wrapped model 
+        # as long as the model and its parameters do not change
+        if not hasattr(self, 'cachedModels'):
+            self.cachedModels = {}
+        key = (id(model), prediction_cache.params_to_str(init_params))
+        cached = self.cachedModels.get(key)
+        if cached is None or cached.model is not model:
+            cache = prediction_cache.PredictionCache(max_size_GB=max_size_GB)
+            cached = prediction_cache.CachedModel(
+                model, cache, init_params=init_params
+            )
+            self.cachedModels[key] = cached
+        cached.cache.max_size_bytes = int(max_size_GB*1e9)
+        return cached
+    
     def getSpotFootprint(self):
         ParamsGroupBox = self.computeDockWidget.widget().parametersQGBox
         metadataParams = ParamsGroupBox.params['METADATA']
@@ -10,9 +10,9 @@ from functools import partial
 from typing import List, Literal, Union
 import json
 import traceback
-import cv2
 import tempfile
 import shutil
+import zipfile
 
 from collections.abc import Iterable
 from concurrent.futures import ThreadPoolExecutor
@@ -260,6 +260,8 @@ def is_images_path(path, check_parent=False):
     return folder_name == 'Images' and parent_foldername.startswith('Position_')
 
 def _load_video(path):
+    import cv2
+    
     video = cv2.VideoCapture(path)
     num_frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
     for i in range(num_frames):
@@ -271,15 +273,275 @@ def _load_video(path):
         chData[i] = frame
     return chData
 
-def load_image_data(path: os.PathLike, to_float=False, return_dtype=False):
-    filename, ext = os.path.splitext(path)
+class _TiffPagesReader:
+    """Read only the pages of a TIFF file that are required by an index"""
+    def __init__(self, path):
+        self._tif = tifffile.TiffFile(path)
+        series = self._tif.series[0]
+        self.shape = series.shape
+        self.dtype = series.dtype
+        self.ndim = len(self.shape)
+        self._page_shape = series.keyframe.shape
+        self._num_lead_axes = self.ndim - len(self._page_shape)
+    
+    def __getitem__(self, key):
+        lead_key = key[:self._num_lead_axes]
+        page_key = key[self._num_lead_axes:]
+        lead_shape = self.shape[:self._num_lead_axes]
+        pages_idx = np.arange(np.prod(lead_shape, dtype=int))
+        pages_idx = pages_idx.reshape(lead_shape)[lead_key]
+        pages_idx = np.asarray(pages_idx)
+        if pages_idx.size == 0:
+            pages_data = np.zeros(
+                (*pages_idx.shape, *self._page_shape), dtype=self.dtype
+            )
+        else:
+            pages_data = self._tif.asarray(
+                key=pages_idx.ravel().tolist(), series=0
+            )
+            pages_data = pages_data.reshape(
+                (*pages_idx.shape, *self._page_shape)
+            )
+        return pages_data[(Ellipsis, *page_key)]
+    
+    def close(self):
+        self._tif.close()
+
+class LazyImageData:
+    """Array-like view of image data stored on disk.
+
+    Slicing (e.g., cropping or adding axes with `numpy.newaxis`) returns 
+    a new `LazyImageData` without reading any data. Indexing the first 
+    axis with an integer (e.g., `image_data[frame_i]`) reads only the 
+    requested frame from the file and returns it as a numpy array. 
+    Only integers, slices with positive steps, `numpy.newaxis` and `...` 
+    are supported.
+
+    Parameters
+    ----------
+    source : array-like
+        Object with `shape`, `dtype` and `ndim` attributes that reads data 
+        when indexed with a tuple of integers and slices (e.g., 
+        `numpy.memmap` or `h5py.Dataset`).
+    file : object with `close` method, optional
+        File opened to read `source` (e.g., `h5py.File`). It is closed by 
+        `close` or when exiting the `with` block. Views created by slicing 
+        share the same file. Default is None
+    """
+    def __init__(self, source, file=None, _axes=None, _fixed_idx=None):
+        self._source = source
+        self._file = file
+        if _axes is None:
+            _axes = [
+                (axis, range(size)) for axis, size in enumerate(source.shape)
+            ]
+            _fixed_idx = {}
+        # List of (source axis, source range) of each axis where a source 
+        # axis of None means an axis added with `numpy.newaxis`
+        self._axes = _axes
+        # Mapping of source axis to index for axes indexed with integers 
+        self._fixed_idx = _fixed_idx
+    
+    @property
+    def shape(self):
+        return tuple(
+            1 if src_axis is None else len(src_range) 
+            for src_axis, src_range in self._axes
+        )
+    
+    @property
+    def ndim(self):
+        return len(self._axes)
+    
+    @property
+    def dtype(self):
+        return self._source.dtype
+    
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+    
+    def __len__(self):
+        if self.ndim == 0:
+            raise TypeError('len() of unsized object')
+        return self.shape[0]
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+    
+    def _normalise_key(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        
+        num_indexed_axes = len(
+            [k for k in key if k is not None and k is not Ellipsis]
+        )
+        if num_indexed_axes > self.ndim:
+            raise IndexError(
+                f'Too many indices for image data with {self.ndim} dimensions'
+            )
+        
+        num_missing_axes = self.ndim - num_indexed_axes
+        for i, k in enumerate(key):
+            if k is Ellipsis:
+                key = (
+                    *key[:i], *[slice(None)]*num_missing_axes, *key[i+1:]
+                )
+                break
+        else:
+            key = (*key, *[slice(None)]*num_missing_axes)
+        return key
+    
+    def __getitem__(self, key):
+        key = self._normalise_key(key)
+        axes = []
+        fixed_idx = self._fixed_idx.copy()
+        axes_iter = iter(self._axes)
+        for k in key:
+            if k is None:
+                axes.append((None, None))
+                continue
+            
+            src_axis, src_range = next(axes_iter)
+            if isinstance(k, (int, np.integer)):
+                size = 1 if src_axis is None else len(src_range)
+                if k < -size or k >= size:
+                    raise IndexError(
+                        f'Index {k} is out of bounds for axis with size {size}'
+                    )
+                if src_axis is not None:
+                    fixed_idx[src_axis] = src_range[k]
+            elif isinstance(k, slice):
+                if k.step is not None and k.step < 1:
+                    raise IndexError('Only positive slice steps are supported')
+                if src_axis is None and len(range(1)[k]) == 0:
+                    raise IndexError('Empty slices of new axes are not supported')
+                if src_axis is None:
+                    axes.append((None, None))
+                else:
+                    axes.append((src_axis, src_range[k]))
+            else:
+                raise IndexError(f'Index {k!r} is not supported')
+        
+        view = LazyImageData(
+            self._source, file=self._file, _axes=axes, _fixed_idx=fixed_idx
+        )
+        if not isinstance(key[0], (int, np.integer)):
+            return view
+        
+        img = np.asarray(view)
+        if img.ndim == 0:
+            return img[()]
+        return img
+    
+    def __array__(self, dtype=None, copy=None):
+        src_ranges = {
+            src_axis: src_range for src_axis, src_range in self._axes 
+            if src_axis is not None
+        }
+        src_key = []
+        for src_axis in range(self._source.ndim):
+            if src_axis in self._fixed_idx:
+                src_key.append(self._fixed_idx[src_axis])
+                continue
+            src_range = src_ranges[src_axis]
+            src_key.append(
+                slice(src_range.start, src_range.stop, src_range.step)
+            )
+        
+        img = self._source[tuple(src_key)]
+        if isinstance(img, np.memmap):
+            # Do not return read-only views of the file
+            img = np.array(img)
+        img = np.asarray(img).reshape(self.shape)
+        if dtype is not None:
+            img = img.astype(dtype)
+        return img
+    
+    def copy(self):
+        # Data is read from the file only when accessed --> there is nothing 
+        # to copy in memory
+        return LazyImageData(
+            self._source, file=self._file, _axes=list(self._axes), 
+            _fixed_idx=self._fixed_idx.copy()
+        )
+    
+    def close(self):
+        """Close the file opened to read the data (if any). The data (and 
+        the views sharing the same file) cannot be read afterwards."""
+        if self._file is None:
+            return
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def _load_lazy_image_data(path, ext):
     if ext == '.h5':
+        _import_hdf5plugin()
         h5f = h5py.File(path, 'r')
-        image_data = h5f['data']
+        return LazyImageData(h5f['data'], file=h5f)
+    
+    if ext == '.npy':
+        return LazyImageData(np.load(path, mmap_mode='r'))
+    
+    try:
+        # Uncompressed and contiguous TIFF files can be memory-mapped
+        source = tifffile.memmap(path, mode='r')
+        file = None
+    except Exception as err:
+        source = _TiffPagesReader(path)
+        file = source
+    return LazyImageData(source, file=file)
+
+def load_image_data(
+        path: os.PathLike, to_float=False, return_dtype=False, lazy=False, 
+        float_dtype=None
+    ):
+    """Load image data from file
+
+    Parameters
+    ----------
+    path : os.PathLike
+        Path of the image file.
+    to_float : bool, optional
+        If True, convert the image data to float with 
+        `cellacdc.myutils.img_to_float`. Default is False
+    return_dtype : bool, optional
+        If True, return also the data type of the image data stored in the 
+        file. Default is False
+    lazy : bool, optional
+        If True, `.h5`, `.npy`, `.tif` and `.tiff` files are not read into 
+        memory and a `LazyImageData` is returned instead. Each frame is then 
+        read (and converted to float if `to_float` is True) only when 
+        accessed. Files with other extensions are read into memory. 
+        Default is False
+    float_dtype : numpy.dtype or None, optional
+        Floating point data type used when `to_float` is True (e.g., 
+        `numpy.float32` to halve the memory). If None, the data is converted 
+        to `float` (64-bit). Default is None
+
+    Returns
+    -------
+    numpy.ndarray, LazyImageData or FloatFramesImageData
+        Image data. If `return_dtype` is True, the data type of the image 
+        data stored in the file is returned as second element.
+    """    
+    filename, ext = os.path.splitext(path)
+    if lazy and ext in ('.h5', '.npy', '.tif', '.tiff'):
+        image_data = _load_lazy_image_data(path, ext)
+    elif ext == '.h5':
+        _import_hdf5plugin()
+        with h5py.File(path, 'r') as h5f:
+            image_data = h5f['data'][()]
     elif ext == '.npz':
         with np.load(path) as data:
             key = list(data.keys())[0]
-            image_data = np.load(path)[key]
+            image_data = data[key]
     elif ext == '.npy':
         image_data = np.load(path)
     elif ext == '.tif' or ext == '.tiff':
@@ -290,7 +552,14 @@ def load_image_data(path: os.PathLike, to_float=False, return_dtype=False):
         except Exception as e:
             image_data = _load_video(path)
     _dtype = image_data.dtype
-    if to_float:
+    if to_float and lazy:
+        image_data = FloatFramesImageData(image_data, float_dtype=float_dtype)
+    elif to_float and float_dtype is not None and float_dtype != np.float64:
+        # Convert directly to `float_dtype` without a 64-bit temporary copy
+        image_data = np.asarray(
+            FloatFramesImageData(image_data, float_dtype=float_dtype)
+        )
+    elif to_float:
         image_data = acdc_myutils.img_to_float(image_data)
     if return_dtype:
         return image_data, _dtype
@@ -311,6 +580,401 @@ def save_image_data(filepath, img_data):
     else:
         skimage.io.imsave(filepath, img_data)
 
+class FloatFramesImageData:
+    """Array-like wrapper of image data that converts to float only the 
+    frames that are accessed.
+
+    Indexing with an integer (e.g., `image_data[frame_i]`) returns the frame 
+    converted to float with the same scaling that 
+    `cellacdc.myutils.img_to_float` would apply to the entire image data. 
+    Any other indexing (e.g., adding axes or cropping) returns a new 
+    `FloatFramesImageData` of the indexed raw data, hence the float data 
+    is never allocated for all the frames at once.
+
+    Parameters
+    ----------
+    image_data : numpy.ndarray or LazyImageData
+        Raw image data with frames on the first axis.
+    float_dtype : numpy.dtype or None, optional
+        Floating point data type of the converted frames. If None, frames 
+        are converted to `float` (64-bit) like in 
+        `cellacdc.myutils.img_to_float`. Default is None
+    """
+    def __init__(self, image_data, float_dtype=None, _float_divisor='auto'):
+        if not isinstance(image_data, (np.ndarray, LazyImageData)):
+            image_data = np.asarray(image_data)
+        self._data = image_data
+        self._float_dtype = float_dtype
+        if _float_divisor == 'auto':
+            _float_divisor = self._get_float_divisor()
+        self._float_divisor = _float_divisor
+    
+    def _get_float_divisor(self):
+        dtype = self._data.dtype
+        if self._data.size == 0:
+            return None
+        
+        for uint_dtype in (np.uint8, np.uint16, np.uint32):
+            if dtype == uint_dtype:
+                return np.iinfo(uint_dtype).max
+        
+        # Scaling depends on the max of the entire data --> compute it 
+        # one frame at a time
+        img_max = max(np.max(frame) for frame in self._data)
+        value = self._data[(0,)*self._data.ndim]
+        if img_max <= 1.0 and isinstance(value, (np.floating, float)):
+            return None
+        
+        for uint_dtype in (np.uint8, np.uint16, np.uint32):
+            uint_max = np.iinfo(uint_dtype).max
+            if img_max <= uint_max:
+                return uint_max
+        
+        raise TypeError(
+            f'The maximum value in the image is {img_max} which is greater '
+            f'than the maximum value supported of {uint_max} (32-bit). '
+            'Please consider converting your images to 32-bit or 16-bit first.'
+        )
+    
+    def _to_float(self, img):
+        if self._float_divisor is None and self._float_dtype is None:
+            return img
+        
+        if self._float_divisor is None:
+            return img.astype(self._float_dtype, copy=False)
+        
+        float_dtype = np.dtype(
+            float if self._float_dtype is None else self._float_dtype
+        )
+        return img.astype(float_dtype)/float_dtype.type(self._float_divisor)
+    
+    @property
+    def shape(self):
+        return self._data.shape
+    
+    @property
+    def ndim(self):
+        return self._data.ndim
+    
+    @property
+    def dtype(self):
+        if self._float_dtype is not None:
+            return np.dtype(self._float_dtype)
+        if self._float_divisor is None:
+            return self._data.dtype
+        return np.dtype(float)
+    
+    def __len__(self):
+        return len(self._data)
+    
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._to_float(self._data[key])
+        return FloatFramesImageData(
+            self._data[key], float_dtype=self._float_dtype, 
+            _float_divisor=self._float_divisor
+        )
+    
+    def __array__(self, dtype=None, copy=None):
+        img = self._to_float(np.asarray(self._data))
+        if dtype is not None:
+            img = img.astype(dtype)
+        return img
+    
+    def copy(self):
+        return FloatFramesImageData(
+            self._data.copy(), float_dtype=self._float_dtype, 
+            _float_divisor=self._float_divisor
+        )
+    
+    def close(self):
+        """Close the file of the wrapped `LazyImageData` (if any)"""
+        if isinstance(self._data, LazyImageData):
+            self._data.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+H5_COMPRESSIONS = ('none', 'gzip', 'lzf', 'zstd', 'blosc')
+H5_CHUNKS = ('frame', 'z-slice')
+
+def get_h5_compression_kwargs(compression):
+    """Get the keyword arguments of `h5py.File.create_dataset` for the 
+    requested compression
+
+    Parameters
+    ----------
+    compression : {None, 'none', 'gzip', 'lzf', 'zstd', 'blosc'}
+        Compression filter. 'zstd' and 'blosc' (with zstd codec) require 
+        the package `hdf5plugin`.
+
+    Returns
+    -------
+    dict
+        Keyword arguments for `h5py.File.create_dataset`
+    """
+    if compression is None or compression == 'none':
+        return {}
+    
+    if compression == 'gzip':
+        return {'compression': 'gzip', 'compression_opts': 4}
+    
+    if compression == 'lzf':
+        return {'compression': 'lzf'}
+    
+    if compression not in H5_COMPRESSIONS:
+        raise ValueError(
+            f'"{compression}" is not a valid compression. Valid compressions '
+            f'are {H5_COMPRESSIONS}'
+        )
+    
+    import hdf5plugin
+    if compression == 'zstd':
+        return dict(hdf5plugin.Zstd(clevel=3))
+    
+    return dict(hdf5plugin.Blosc(
+        cname='zstd', clevel=3, shuffle=hdf5plugin.Blosc.SHUFFLE
+    ))
+
+def _import_hdf5plugin():
+    # Registers the zstd and blosc filters required to read compressed .h5 
+    # files (if the package is installed)
+    try:
+        import hdf5plugin
+    except Exception as err:
+        pass
+
+class ImageDataFramesWriter:
+    """Write image data to file one frame at a time.
+
+    The file is the same as the one written by `save_image_data` with 
+    `numpy.squeeze(img_data)` where `img_data` is the entire padded 
+    image data, but only one frame at a time is kept in memory. 
+    Frames are written with `writer[frame_i] = img`. Frames that are never 
+    written are filled with zeros.
+    
+    Note that `.npz` and `.tif` files are written sequentially, hence 
+    frames must be written in increasing order. Files with other extensions 
+    than `.h5`, `.npz`, `.npy`, `.tif` and `.tiff` are saved in memory and 
+    written when calling `close`.
+
+    Parameters
+    ----------
+    filepath : os.PathLike
+        Path of the output file.
+    shape : tuple of ints
+        Shape of the entire image data with frames on the first axis 
+        (before padding).
+    dtype : numpy.dtype
+        Data type of the saved data.
+    cast_to_dtype : numpy.dtype or None, optional
+        If not None, float frames are converted with 
+        `cellacdc.myutils.float_img_to_dtype` before saving. Default is None
+    pad_width : sequence of 2-tuples or None, optional
+        Padding added to the image data as in `numpy.pad`. For `.h5` and 
+        `.npy` files the frames are written at the padding offset without 
+        padded copies. Default is None
+    compression : {None, 'gzip', 'lzf', 'zstd', 'blosc'}, optional
+        Compression of `.h5` files. 'zstd' and 'blosc' require the package 
+        `hdf5plugin`. Ignored for the other file formats. Default is None
+    chunks : {'frame', 'z-slice'} or tuple of ints, optional
+        Chunk shape of `.h5` files. 'frame' stores one chunk per frame, while 
+        'z-slice' one chunk per z-slice. A tuple is passed directly to 
+        `h5py.File.create_dataset`. Default is 'frame'
+    """
+    def __init__(
+            self, filepath, shape, dtype, cast_to_dtype=None, pad_width=None, 
+            compression=None, chunks='frame'
+        ):
+        self.filepath = filepath
+        self._compression = compression
+        self._chunks = chunks
+        self._cast_to_dtype = cast_to_dtype
+        if cast_to_dtype is not None:
+            dtype = cast_to_dtype
+        self.dtype = np.dtype(dtype)
+        
+        if pad_width is None:
+            pad_width = [(0, 0)]*len(shape)
+        pad_width = [tuple(pad) for pad in pad_width]
+        self._frame_pad_width = pad_width[1:]
+        if not np.any(self._frame_pad_width):
+            self._frame_pad_width = None
+        self._pad_t = pad_width[0]
+        self._padded_shape = tuple(
+            size+before+after for size, (before, after) 
+            in zip(shape, pad_width)
+        )
+        self._frame_shape = self._padded_shape[1:]
+        self._squeezed_frame_shape = tuple(
+            size for size in self._frame_shape if size != 1
+        )
+        # Slice of the unpadded frame in the padded frame (without the axes 
+        # that are squeezed in the saved data)
+        self._frame_offset_slice = tuple(
+            slice(before, before+size) for size, (before, _), padded_size 
+            in zip(shape[1:], pad_width[1:], self._frame_shape) 
+            if padded_size != 1
+        )
+        self._unpadded_frame_shape = tuple(
+            size for size, padded_size in zip(shape[1:], self._frame_shape) 
+            if padded_size != 1
+        )
+        self.shape = tuple(size for size in self._padded_shape if size != 1)
+        self._num_frames = self._padded_shape[0]
+        self._next_frame_i = 0
+        self._open()
+    
+    def _open(self):
+        _, ext = os.path.splitext(self.filepath)
+        self._ext = ext
+        if ext == '.h5':
+            self._file = h5py.File(self.filepath, 'w')
+            self._dataset = self._file.create_dataset(
+                'data', shape=self.shape, dtype=self.dtype, 
+                chunks=self._get_h5_chunks(), 
+                **get_h5_compression_kwargs(self._compression)
+            )
+        elif ext == '.npy':
+            self._dataset = np.lib.format.open_memmap(
+                self.filepath, mode='w+', dtype=self.dtype, shape=self.shape
+            )
+        elif ext == '.npz':
+            self._file = zipfile.ZipFile(
+                self.filepath, mode='w', compression=zipfile.ZIP_DEFLATED, 
+                allowZip64=True
+            )
+            self._dataset = self._file.open(
+                'arr_0.npy', mode='w', force_zip64=True
+            )
+            header = {
+                'descr': np.lib.format.dtype_to_descr(self.dtype),
+                'fortran_order': False,
+                'shape': self.shape
+            }
+            np.lib.format.write_array_header_1_0(self._dataset, header)
+        elif ext == '.tif' or ext == '.tiff':
+            self._file = tifffile.TiffWriter(self.filepath, bigtiff=True)
+        else:
+            self._dataset = np.zeros(self.shape, dtype=self.dtype)
+    
+    def _get_h5_chunks(self):
+        if not isinstance(self._chunks, str):
+            return self._chunks
+        
+        chunks = (1, *self._squeezed_frame_shape)
+        if self._num_frames == 1 or len(chunks) > len(self.shape):
+            return True
+        
+        if self._chunks == 'z-slice' and len(self._squeezed_frame_shape) == 3:
+            chunks = (1, 1, *self._squeezed_frame_shape[1:])
+        return chunks
+    
+    def _is_sequential(self):
+        return self._ext in ('.npz', '.tif', '.tiff')
+    
+    def _is_padded_by_offset(self):
+        return self._frame_pad_width is not None and self._ext in ('.h5', '.npy')
+    
+    def _write_frame_at_offset(self, frame_i, img):
+        img = np.reshape(img, self._unpadded_frame_shape)
+        if self._num_frames == 1:
+            self._dataset[self._frame_offset_slice] = img
+        else:
+            self._dataset[(frame_i, *self._frame_offset_slice)] = img
+    
+    def _write_padded_frame(self, frame_i, img):
+        img = np.reshape(img, self._squeezed_frame_shape)
+        if self._ext == '.npz':
+            self._dataset.write(np.ascontiguousarray(img).tobytes())
+        elif self._ext == '.tif' or self._ext == '.tiff':
+            self._file.write(img, contiguous=True)
+        elif self._num_frames == 1:
+            self._dataset[...] = img
+        else:
+            self._dataset[frame_i] = img
+    
+    def _fill_zero_frames(self, stop_frame_i):
+        if not self._is_sequential():
+            self._next_frame_i = max(self._next_frame_i, stop_frame_i)
+            return
+        
+        zero_frame = np.zeros(self._frame_shape, dtype=self.dtype)
+        for frame_i in range(self._next_frame_i, stop_frame_i):
+            self._write_padded_frame(frame_i, zero_frame)
+        self._next_frame_i = max(self._next_frame_i, stop_frame_i)
+    
+    def __setitem__(self, frame_i, img):
+        frame_i = frame_i + self._pad_t[0]
+        if self._is_sequential() and frame_i < self._next_frame_i:
+            raise IndexError(
+                f'Frames of "{self._ext}" files must be written in '
+                f'increasing order, but frame n. {frame_i+1} was already '
+                'written.'
+            )
+        self._fill_zero_frames(frame_i)
+        
+        if self._cast_to_dtype is not None:
+            img = acdc_myutils.float_img_to_dtype(img, self._cast_to_dtype)
+        
+        img = img.astype(self.dtype, copy=False)
+        if self._is_padded_by_offset():
+            # The padding is already zero-filled in the file
+            self._write_frame_at_offset(frame_i, img)
+        elif self._frame_pad_width is not None:
+            self._write_padded_frame(frame_i, np.pad(img, self._frame_pad_width))
+        else:
+            self._write_padded_frame(frame_i, img)
+        self._next_frame_i = frame_i + 1
+    
+    def close(self):
+        self._fill_zero_frames(self._num_frames)
+        if self._ext == '.h5':
+            self._file.close()
+        elif self._ext == '.npy':
+            self._dataset.flush()
+            del self._dataset
+        elif self._ext == '.npz':
+            self._dataset.close()
+            self._file.close()
+        elif self._ext == '.tif' or self._ext == '.tiff':
+            self._file.close()
+        else:
+            save_image_data(self.filepath, self._dataset)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def get_temp_memmap_array(dirpath, name, shape, dtype):
+    """Create a zero-filled array stored in a temporary `.npy` file
+
+    Parameters
+    ----------
+    dirpath : os.PathLike
+        Folder where to store the file (e.g., from `tempfile.mkdtemp`).
+    name : str
+        Name of the file without extension.
+    shape : tuple of ints
+        Shape of the array
+    dtype : numpy.dtype
+        Data type of the array
+
+    Returns
+    -------
+    numpy.memmap
+        Array stored on disk.
+    """    
+    filepath = os.path.join(dirpath, f'{name}.npy')
+    return np.lib.format.open_memmap(
+        filepath, mode='w+', dtype=dtype, shape=tuple(shape)
+    )
+
 def readStoredParamsCSV(csv_path, params):
     """Read old format of analysis_inputs.csv file from SpotMAX v1"""
     old_csv_options_to_anchors = {
@@ -500,39 +1164,79 @@ def readStoredParamsINI(ini_path, params, cast_dtypes=True):
     params = add_neural_network_params(params, configPars)
     return params
 
-def save_preprocessed_img_data(
-        img_data, raw_img_filepath, basename, ch_endname, run_number, 
-        text_to_append='', cast_to_dtype=None, pad_width=None, 
-        verbose=True, logger_func=print
+def _get_run_output_filename(
+        basename, run_number, ch_endname, suffix, text_to_append=''
     ):
-    if verbose:
-        logger_func(
-            f'Saving pre-processed image data from channel "{ch_endname}"'
-        )
-    
     if not basename.endswith('_'):
         basename = f'{basename}_'
-        
-    if cast_to_dtype is not None:
-        img_data = acdc_myutils.float_img_to_dtype(img_data, cast_to_dtype)
-    
-    if pad_width is not None:
-        img_data = np.pad(img_data, pad_width)
-    
-    in_filename = os.path.basename(raw_img_filepath)
-    _, ext = os.path.splitext(in_filename)
     
-    out_filename = f'{basename}run_num{run_number}_{ch_endname}_preprocessed'
+    out_filename = f'{basename}run_num{run_number}_{ch_endname}_{suffix}'
     if text_to_append:
         if not text_to_append.startswith('_'):
             text_to_append = f'_{text_to_append}'
         out_filename = f'{out_filename}{text_to_append}'
-    out_filename = f'{out_filename}{ext}'    
+    return out_filename
+
+def get_preprocessed_img_data_filepath(
+        raw_img_filepath, basename, ch_endname, run_number, text_to_append='', 
+        ext=None
+    ):
+    if ext is None:
+        _, ext = os.path.splitext(os.path.basename(raw_img_filepath))
+    out_filename = _get_run_output_filename(
+        basename, run_number, ch_endname, 'preprocessed', 
+        text_to_append=text_to_append
+    )
+    in_folderpath = os.path.dirname(raw_img_filepath)
+    return os.path.join(in_folderpath, f'{out_filename}{ext}')
+
+def get_nnet_pred_map_filepath(
+        raw_img_filepath, basename, ch_endname, run_number, text_to_append='', 
+        ext='.npz'
+    ):
+    out_filename = _get_run_output_filename(
+        basename, run_number, ch_endname, 'AI_pred_map', 
+        text_to_append=text_to_append
+    )
     in_folderpath = os.path.dirname(raw_img_filepath)
+    return os.path.join(in_folderpath, f'{out_filename}{ext}')
+
+def get_ref_ch_mask_filepath(
+        images_path, ref_ch_endname, basename, run_number, text_to_append=''
+    ):
+    out_filename = _get_run_output_filename(
+        basename, run_number, ref_ch_endname, 'ref_ch_segm_mask', 
+        text_to_append=text_to_append
+    )
+    return os.path.join(images_path, f'{out_filename}.npz')
+
+def _save_frames(writer, img_data):
+    with writer:
+        for frame_i, img in enumerate(img_data):
+            writer[frame_i] = img
+
+def save_preprocessed_img_data(
+        img_data, raw_img_filepath, basename, ch_endname, run_number, 
+        text_to_append='', cast_to_dtype=None, pad_width=None, 
+        verbose=True, logger_func=print, ext=None, compression=None
+    ):
+    if verbose:
+        logger_func(
+            f'Saving pre-processed image data from channel "{ch_endname}"'
+        )
     
-    out_filepath = os.path.join(in_folderpath, out_filename)
+    out_filepath = get_preprocessed_img_data_filepath(
+        raw_img_filepath, basename, ch_endname, run_number, 
+        text_to_append=text_to_append, ext=ext
+    )
     
-    save_image_data(out_filepath, np.squeeze(img_data))
+    # Cast and pad one frame at a time to avoid full-size copies
+    writer = ImageDataFramesWriter(
+        out_filepath, img_data.shape, img_data.dtype, 
+        cast_to_dtype=cast_to_dtype, pad_width=pad_width, 
+        compression=compression
+    )
+    _save_frames(writer, img_data)
     
     if verbose:
         logger_func(
@@ -542,30 +1246,24 @@ def save_preprocessed_img_data(
 
 def save_nnet_pred_map(
         nnet_pred_map, raw_img_filepath, basename, ch_endname, run_number, 
-        text_to_append='', pad_width=None, verbose=True, logger_func=print
+        text_to_append='', pad_width=None, verbose=True, logger_func=print, 
+        ext='.npz', compression=None
     ):
     if verbose:
         logger_func(
             f'Saving SpotMAX AI prediction map from channel "{ch_endname}"...'
         )
     
-    if not basename.endswith('_'):
-        basename = f'{basename}_'
-    
-    if pad_width is not None:
-        nnet_pred_map = np.pad(nnet_pred_map, pad_width)
-    
-    out_filename = f'{basename}run_num{run_number}_{ch_endname}_AI_pred_map'
-    if text_to_append:
-        if not text_to_append.startswith('_'):
-            text_to_append = f'_{text_to_append}'
-        out_filename = f'{out_filename}{text_to_append}'
-    out_filename = f'{out_filename}.npz'    
-    in_folderpath = os.path.dirname(raw_img_filepath)
-    
-    out_filepath = os.path.join(in_folderpath, out_filename)
+    out_filepath = get_nnet_pred_map_filepath(
+        raw_img_filepath, basename, ch_endname, run_number, 
+        text_to_append=text_to_append, ext=ext
+    )
     
-    np.savez_compressed(out_filepath, np.squeeze(nnet_pred_map))
+    writer = ImageDataFramesWriter(
+        out_filepath, nnet_pred_map.shape, nnet_pred_map.dtype, 
+        pad_width=pad_width, compression=compression
+    )
+    _save_frames(writer, nnet_pred_map)
     
     if verbose:
         logger_func(
@@ -678,18 +1376,70 @@ def writeConfigINI(params=None, ini_path=None):
     
     return configPars
 
-def _load_spots_table_h5(filepath):
+def _load_spots_table_h5(filepath, columns=None):
     with pd.HDFStore(filepath, mode='r') as store:
         dfs = []
         keys = []
         for key in store.keys():
             df = store.get(key)
+            if columns is not None:
+                df = df[[col for col in columns if col in df.columns]]
             frame_i = int(re.findall(r'frame_(\d+)', key)[0])
             dfs.append(df)
             keys.append(frame_i)
     df = pd.concat(dfs, keys=keys, names=['frame_i'])
     return df
 
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ModuleNotFoundError as err:
+        raise ModuleNotFoundError(
+            'Reading and writing `.parquet` tables requires the package '
+            '`pyarrow`. Install it with the command `pip install pyarrow`'
+        ) from err
+    return pyarrow, pyarrow.parquet
+
+def _load_spots_table_parquet(filepath, columns=None):
+    """Load a table saved with `save_df_spots_to_parquet`
+
+    Parameters
+    ----------
+    filepath : os.PathLike
+        Path to the .parquet file
+    columns : list of str, optional
+        If not None, read only these columns from disk (the index columns 
+        are always loaded). Columns that are not in the file are ignored. 
+        Default is None
+
+    Returns
+    -------
+    pd.DataFrame
+        The loaded table with the index restored from the pandas metadata
+    """
+    _, pq = _import_pyarrow_parquet()
+    if columns is not None:
+        schema_names = pq.read_schema(filepath).names
+        columns = [col for col in columns if col in schema_names]
+    table = pq.read_table(
+        filepath, columns=columns, use_pandas_metadata=True
+    )
+    df = table.to_pandas()
+    return df
+
+def _csv_usecols(columns, index_col):
+    if columns is None:
+        return
+    
+    if index_col is None:
+        index_col = []
+    elif isinstance(index_col, str):
+        index_col = [index_col]
+    
+    usecols = set(index_col).union(columns)
+    return lambda col: col in usecols
+
 def disable_saving_masks_configparser(configparser):
     section = 'Reference channel'
     anchor = 'saveRefChFeatures'
@@ -709,9 +1459,11 @@ def disable_saving_masks_configparser(configparser):
     configparser[section][anchor] = 'False'
     return configparser
 
-def load_spots_table(spotmax_out_path, filename, filepath=None):
+def load_spots_table(spotmax_out_path, filename, filepath=None, columns=None):
     if filepath is not None:
-        return load_table_to_df(filepath, index_col=['frame_i', 'Cell_ID'])
+        return load_table_to_df(
+            filepath, index_col=['frame_i', 'Cell_ID'], columns=columns
+        )
     
     filepath = os.path.join(spotmax_out_path, filename)
     if not os.path.exists(filepath):
@@ -721,9 +1473,14 @@ def load_spots_table(spotmax_out_path, filename, filepath=None):
         return
     
     if filename.endswith('.csv'):
-        df = pd.read_csv(filepath, index_col=['frame_i', 'Cell_ID'])
+        df = pd.read_csv(
+            filepath, index_col=['frame_i', 'Cell_ID'], 
+            usecols=_csv_usecols(columns, ['frame_i', 'Cell_ID'])
+        )
     elif filename.endswith('.h5'):
-        df = _load_spots_table_h5(filepath)
+        df = _load_spots_table_h5(filepath, columns=columns)
+    elif filename.endswith('.parquet'):
+        df = _load_spots_table_parquet(filepath, columns=columns)
     
     if df.empty:
         return
@@ -784,11 +1541,16 @@ def get_spots_channel_name_from_params(params):
     except Exception as err:
         return ''
 
-def load_table_to_df(filepath, index_col=None):
+def load_table_to_df(filepath, index_col=None, columns=None):
     if filepath.endswith('.csv'):
-        df = pd.read_csv(filepath, index_col=index_col)
+        df = pd.read_csv(
+            filepath, index_col=index_col, 
+            usecols=_csv_usecols(columns, index_col)
+        )
     elif filepath.endswith('.h5'):
-        df = _load_spots_table_h5(filepath)
+        df = _load_spots_table_h5(filepath, columns=columns)
+    elif filepath.endswith('.parquet'):
+        df = _load_spots_table_parquet(filepath, columns=columns)
     return df
 
 class channelName:
@@ -2427,6 +3189,8 @@ def save_df_spots(
     filepath = os.path.join(folder_path, filename)
     if extension == '.csv':
         df.to_csv(filepath)
+    elif extension == '.parquet':
+        save_df_spots_to_parquet(df, folder_path, filename)
     else:
         save_df_spots_to_hdf(df, folder_path, filename)
     return filepath
@@ -2466,6 +3230,65 @@ def save_df_spots_to_hdf(
     shutil.move(temp_filepath, dst_filepath)
     shutil.rmtree(temp_dirpath)
 
+def _parquet_dictionary_columns(df):
+    dictionary_cols = []
+    for col, dtype in df.dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            dictionary_cols.append(str(col))
+        elif pd.api.types.is_string_dtype(dtype):
+            dictionary_cols.append(str(col))
+    return dictionary_cols
+
+def save_df_spots_to_parquet(
+        df: pd.DataFrame, folder_path: os.PathLike, filename: str
+    ):
+    """Save spots table to Apache Parquet file with one row group per frame. 
+    Categorical and string columns are dictionary-encoded.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Spots table with 'frame_i' as first level of the index
+    folder_path : os.PathLike
+        Destination folder
+    filename : str
+        Name of the .parquet file
+    """
+    pa, pq = _import_pyarrow_parquet()
+    schema = pa.Schema.from_pandas(df, preserve_index=True)
+    dictionary_cols = _parquet_dictionary_columns(df)
+    
+    temp_dirpath = tempfile.mkdtemp()
+    temp_filepath = os.path.join(temp_dirpath, filename)
+    writer = pq.ParquetWriter(
+        temp_filepath, schema, 
+        use_dictionary=dictionary_cols, 
+        compression='zstd'
+    )
+    try:
+        for frame_i, sub_df in df.groupby(level=0, sort=True):
+            table = pa.Table.from_pandas(
+                sub_df, schema=schema, preserve_index=True
+            )
+            writer.write_table(table, row_group_size=len(sub_df))
+    finally:
+        writer.close()
+    dst_filepath = os.path.join(folder_path, filename)
+    shutil.move(temp_filepath, dst_filepath)
+    shutil.rmtree(temp_dirpath)
+
+def _save_concat_dfs_to_parquet(
+        dfs, keys, dst_folderpath, filename, names=None
+    ):
+    pa, pq = _import_pyarrow_parquet()
+    filepath = os.path.join(dst_folderpath, filename)
+    df = pd.concat(dfs, keys=keys, names=names)
+    df.to_parquet(
+        filepath, engine='pyarrow', compression='zstd', 
+        use_dictionary=_parquet_dictionary_columns(df)
+    )
+    return df
+
 def _save_concat_dfs_to_hdf(
         dfs, keys, dst_folderpath, filename, return_concat_df=False, 
         names=get_run_number_from_ini_filepath
@@ -2528,12 +3351,41 @@ def save_concat_dfs(
         df = _save_concat_dfs_to_excel(
             dfs, keys, dst_folderpath, filename, names=names, 
         )
+    elif ext == '.parquet':
+        df = _save_concat_dfs_to_parquet(
+            dfs, keys, dst_folderpath, filename, names=names, 
+        )
     return df
 
 def save_df_agg_to_csv(df: pd.DataFrame, folder_path: os.PathLike, filename: str):
     if df is None:
         return
 
+def get_df_agg_filename(df_spots_filename_no_ext, df_spots_file_ext='.csv'):
+    """Get the filename of the aggregated table. The aggregated table is 
+    saved as .parquet when the spots table is .parquet and as .csv otherwise.
+    """
+    agg_ext = '.parquet' if df_spots_file_ext == '.parquet' else '.csv'
+    return f'{df_spots_filename_no_ext}_aggregated{agg_ext}'
+
+def save_df_agg(
+        df_agg: pd.DataFrame, folder_path: os.PathLike, 
+        df_spots_filename_no_ext: str, df_spots_file_ext: str='.csv'
+    ):
+    agg_filename = get_df_agg_filename(
+        df_spots_filename_no_ext, df_spots_file_ext=df_spots_file_ext
+    )
+    filepath = os.path.join(folder_path, agg_filename)
+    if filepath.endswith('.parquet'):
+        _import_pyarrow_parquet()
+        df_agg.to_parquet(
+            filepath, engine='pyarrow', compression='zstd', 
+            use_dictionary=_parquet_dictionary_columns(df_agg)
+        )
+    else:
+        df_agg.to_csv(filepath)
+    return filepath
+
 def save_ref_ch_mask(
         ref_ch_segm_data, 
         images_path, 
@@ -2548,18 +3400,10 @@ def save_ref_ch_mask(
     if verbose:
         logger_func(f'Saving reference channel masks...')
         
-    if not basename.endswith('_'):
-        basename = f'{basename}_'
-    ref_ch_segm_filename = (
-        f'{basename}run_num{run_number}_{ref_ch_endname}_ref_ch_segm_mask'
+    ref_ch_segm_filepath = get_ref_ch_mask_filepath(
+        images_path, ref_ch_endname, basename, run_number, 
+        text_to_append=text_to_append
     )
-    if text_to_append:
-        if not text_to_append.startswith('_'):
-            text_to_append = f'_{text_to_append}'
-        ref_ch_segm_filename = f'{ref_ch_segm_filename}{text_to_append}'
-    
-    ref_ch_segm_filename = f'{ref_ch_segm_filename}.npz'
-    ref_ch_segm_filepath = os.path.join(images_path, ref_ch_segm_filename)
 
     if pad_width is not None:
         ref_ch_segm_data = np.pad(ref_ch_segm_data, pad_width)
@@ -2572,6 +3416,161 @@ def save_ref_ch_mask(
             f'Reference channel masks saved to "{ref_ch_segm_filepath}"'
         )
 
+SPARSE_SPOTS_MASKS_EXT = '_sparse.zip'
+
+class SparseSpotsMasksWriter:
+    """Write spots masks to a sparse file one frame at a time.
+
+    Each frame is stored as the run-length encoding (RLE) of the flattened 
+    labels array (see `transformations.from_df_spots_objs_to_spots_lab_rle`), 
+    i.e., three arrays `frame_<frame_i>_starts.npy`, 
+    `frame_<frame_i>_lengths.npy`, and `frame_<frame_i>_values.npy` in a 
+    compressed zip file. Frames that are never written are empty. 
+    Load the file with `SparseSpotsMasks`.
+
+    Parameters
+    ----------
+    filepath : os.PathLike
+        Path of the output file (ending with '_sparse.zip').
+    shape : tuple of ints
+        Shape of the entire masks data with frames on the first axis.
+    """
+    def __init__(self, filepath, shape):
+        self.filepath = filepath
+        self.shape = tuple(shape)
+        self._file = zipfile.ZipFile(
+            filepath, mode='w', compression=zipfile.ZIP_DEFLATED, 
+            allowZip64=True
+        )
+        self._write_array('shape', np.array(self.shape, dtype=np.int64))
+    
+    def _write_array(self, name, arr):
+        with self._file.open(f'{name}.npy', mode='w', force_zip64=True) as f:
+            np.lib.format.write_array(f, np.asarray(arr))
+    
+    def write_frame_rle(self, frame_i, starts, lengths, values):
+        self._write_array(f'frame_{frame_i}_starts', starts)
+        self._write_array(f'frame_{frame_i}_lengths', lengths)
+        self._write_array(f'frame_{frame_i}_values', values)
+    
+    def close(self):
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class SparseSpotsMasks:
+    """Read spots masks saved with `SparseSpotsMasksWriter`. 
+    
+    Frames are decoded to dense arrays only when accessed with 
+    `masks[frame_i]`, so that the entire (T, Z, Y, X) array is never 
+    allocated unless calling `to_dense`.
+
+    Parameters
+    ----------
+    filepath : os.PathLike
+        Path of the file ending with '_sparse.zip'.
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        with np.load(filepath) as npz:
+            self.shape = tuple(int(size) for size in npz['shape'])
+        self.dtype = np.dtype(np.uint32)
+        self.frame_shape = self.shape[1:]
+    
+    def __len__(self):
+        return self.shape[0]
+    
+    def rle(self, frame_i):
+        """Get the run-length encoding `(starts, lengths, values)` of the 
+        frame `frame_i` (see `transformations.from_spots_lab_rle_to_spots_lab`)
+        """
+        with np.load(self.filepath) as npz:
+            try:
+                return (
+                    npz[f'frame_{frame_i}_starts'], 
+                    npz[f'frame_{frame_i}_lengths'], 
+                    npz[f'frame_{frame_i}_values']
+                )
+            except KeyError:
+                empty = np.zeros(0, dtype=np.int64)
+                return empty, empty, np.zeros(0, dtype=self.dtype)
+    
+    def __getitem__(self, frame_i):
+        if frame_i < 0:
+            frame_i += len(self)
+        if frame_i < 0 or frame_i >= len(self):
+            raise IndexError(
+                f'Frame index {frame_i} is out of range for masks with '
+                f'{len(self)} frames'
+            )
+        starts, lengths, values = self.rle(frame_i)
+        return transformations.from_spots_lab_rle_to_spots_lab(
+            starts, lengths, values, self.frame_shape
+        )
+    
+    def to_dense(self):
+        """Decode all the frames. The returned array is the same as the one 
+        saved in the dense `.npz` file, i.e., with size-1 axes squeezed"""
+        data = np.zeros(self.shape, dtype=self.dtype)
+        for frame_i in range(len(self)):
+            starts, lengths, values = self.rle(frame_i)
+            transformations.from_spots_lab_rle_to_spots_lab(
+                starts, lengths, values, self.frame_shape, 
+                spots_lab=data[frame_i]
+            )
+        return np.squeeze(data)
+
+def load_spots_masks(filepath, lazy=False):
+    """Load spots masks saved with `save_spots_masks`
+
+    Parameters
+    ----------
+    filepath : os.PathLike
+        Path of the dense '.npz' file or of the sparse '_sparse.zip' file.
+    lazy : bool, optional
+        If True and the file is sparse, return a `SparseSpotsMasks` object 
+        that decodes one frame at a time. Default is False
+
+    Returns
+    -------
+    numpy.ndarray or SparseSpotsMasks
+        The spots masks
+    """
+    if not filepath.endswith(SPARSE_SPOTS_MASKS_EXT):
+        return np.load(filepath)['arr_0']
+    
+    masks = SparseSpotsMasks(filepath)
+    if lazy:
+        return masks
+    return masks.to_dense()
+
+def _get_spots_masks_size_colnames(sizes_for_spot_masks):
+    colnames = []
+    if not sizes_for_spot_masks:
+        return colnames
+    
+    for group, features in sizes_for_spot_masks.items():
+        for feature in features:
+            if group == 'custom':
+                values_text_pixel = re.findall(
+                    rf'\(({float_re}), ({float_re}), ({float_re})\) pixel',
+                    feature
+                )
+                values_text_fn = (
+                    '_'.join(values_text_pixel[0])
+                    .replace('.', 'p')
+                )
+                spot_mask_size_colname = f'custom_{values_text_fn}_pixel'
+            else:
+                key = f'{group}, {feature}'
+                spot_mask_size_colname = group_feature_to_col_mapper[key]
+            colnames.append(spot_mask_size_colname)
+    return colnames
+
 def save_spots_masks(
         df_spots, 
         images_path, 
@@ -2583,7 +3582,8 @@ def save_spots_masks(
         text_to_append='', 
         mask_shape=None, 
         verbose=True, 
-        logger_func=print
+        logger_func=print,
+        spots_masks_format: Literal['dense', 'sparse']='dense'
     ):
     if verbose:
         logger_func(f'Saving spots masks...')
@@ -2601,79 +3601,74 @@ def save_spots_masks(
             text_to_append = f'_{text_to_append}'
         spots_ch_segm_filename = f'{spots_ch_segm_filename}{text_to_append}'
     
-    spots_ch_segm_filename = f'{spots_ch_segm_filename}.npz'
+    if spots_masks_format == 'sparse':
+        spots_ch_segm_filename = (
+            f'{spots_ch_segm_filename}{SPARSE_SPOTS_MASKS_EXT}'
+        )
+    else:
+        spots_ch_segm_filename = f'{spots_ch_segm_filename}.npz'
     spots_ch_segm_filepath = os.path.join(images_path, spots_ch_segm_filename)
     
-    spots_mask_data = np.zeros(mask_shape, dtype=np.uint32)
-    custom_spots_masks_data = {}
-    if sizes_for_spot_masks:
-        custom_spots_masks_data = defaultdict(dict)
-        for group, features in sizes_for_spot_masks.items():
-            for feature in features:
-                if group == 'custom':
-                    values_text_pixel = re.findall(
-                        rf'\(({float_re}), ({float_re}), ({float_re})\) pixel',
-                        feature
-                    )
-                    values_text_fn = (
-                        '_'.join(values_text_pixel[0])
-                        .replace('.', 'p')
-                    )
-                    spot_mask_size_colname = f'custom_{values_text_fn}_pixel'
-                else:
-                    key = f'{group}, {feature}'
-                    spot_mask_size_colname = group_feature_to_col_mapper[key]
-                custom_spots_masks_data[spot_mask_size_colname] = (
-                    np.zeros_like(spots_mask_data)
-                )
-        
-    for frame_i, df_spots_frame_i in df_spots.groupby(level=0):
-        df_spots_frame_i = df_spots_frame_i.loc[frame_i]
-        spots_lab = spots_mask_data[frame_i]
-        spots_lab = transformations.from_df_spots_objs_to_spots_lab(
-            df_spots_frame_i, spots_lab.shape, spots_lab=spots_lab
+    # The first writer is the default spots masks (None size colname), 
+    # the others are the additional masks with the requested sizes
+    size_colnames = [None]
+    size_colnames.extend(_get_spots_masks_size_colnames(sizes_for_spot_masks))
+    filepaths = {None: spots_ch_segm_filepath}
+    for colname in size_colnames[1:]:
+        filepaths[colname] = spots_ch_segm_filepath.replace(
+            '_spots_segm_mask', f'_spots_segm_mask_{colname}'
         )
-        spots_mask_data[frame_i] = spots_lab
-        
-        if not sizes_for_spot_masks:
-            continue
-        
-        _add_custom_size_spots_masks(
-            custom_spots_masks_data, frame_i, df_spots_frame_i, 
-            sizes_for_spot_masks
-        )                
-
-    np.savez_compressed(spots_ch_segm_filepath, np.squeeze(spots_mask_data))
+    
+    writers = {}
+    for colname, filepath in filepaths.items():
+        if spots_masks_format == 'sparse':
+            writers[colname] = SparseSpotsMasksWriter(filepath, mask_shape)
+        else:
+            writers[colname] = ImageDataFramesWriter(
+                filepath, mask_shape, np.uint32
+            )
+    
+    frame_shape = tuple(mask_shape[1:])
+    try:
+        for frame_i, df_spots_frame_i in df_spots.groupby(level=0, sort=True):
+            df_spots_frame_i = df_spots_frame_i.loc[frame_i]
+            for colname, writer in writers.items():
+                _write_spots_masks_frame(
+                    writer, frame_i, df_spots_frame_i, frame_shape, 
+                    spots_masks_format, spot_mask_size_colname=colname
+                )
+    finally:
+        for writer in writers.values():
+            writer.close()
+    
     df_spots = df_spots.drop(columns='spot_mask')
     if verbose:
         logger_func(f'Spots masks saved to "{spots_ch_segm_filepath}"')
-        
-    for colname, custom_spots_masks_data in custom_spots_masks_data.items():
-        custom_spots_segm_filepath = spots_ch_segm_filepath.replace(
-            '_spots_segm_mask', f'_spots_segm_mask_{colname}'
-        )
-        np.savez_compressed(
-            custom_spots_segm_filepath, np.squeeze(custom_spots_masks_data)
-        )
-        if verbose:
+        for colname in size_colnames[1:]:
             logger_func(
-                f'Custom size spots masks saved to "{custom_spots_segm_filepath}"'
+                f'Custom size spots masks saved to "{filepaths[colname]}"'
             ) 
     
     return df_spots
 
-def _add_custom_size_spots_masks(
-        custom_spots_masks_data, frame_i, df_spots_frame_i, 
-        sizes_for_spot_masks
+def _write_spots_masks_frame(
+        writer, frame_i, df_spots_frame_i, frame_shape, spots_masks_format, 
+        spot_mask_size_colname=None
     ):
-    for colname, spots_masks_data in custom_spots_masks_data.items():
-        spots_lab = spots_masks_data[frame_i]
-        
-        spots_lab = transformations.from_df_spots_objs_to_spots_lab(
-            df_spots_frame_i, spots_lab.shape, spots_lab=spots_lab,
-            spot_mask_size_colname=colname
-        ) 
-        custom_spots_masks_data[colname][frame_i] = spots_lab
+    if spots_masks_format == 'sparse':
+        rle = transformations.from_df_spots_objs_to_spots_lab_rle(
+            df_spots_frame_i, frame_shape, 
+            spot_mask_size_colname=spot_mask_size_colname
+        )
+        writer.write_frame_rle(frame_i, *rle)
+        return
+    
+    spots_lab = np.zeros(frame_shape, dtype=np.uint32)
+    spots_lab = transformations.from_df_spots_objs_to_spots_lab(
+        df_spots_frame_i, frame_shape, spots_lab=spots_lab, 
+        spot_mask_size_colname=spot_mask_size_colname
+    )
+    writer[frame_i] = spots_lab
 
 def addToRecentPaths(selectedPath):
     if not os.path.exists(selectedPath):
@@ -2876,10 +3871,14 @@ def nnet_params_from_ini_params(
 def load_df_agg_from_df_spots_filename(
         spotmax_output_folderpath, df_spots_filename
     ):
-    filename_no_ext, _ = os.path.splitext(df_spots_filename)
-    aggr_filename = f'{filename_no_ext}_aggregated.csv'
+    filename_no_ext, ext = os.path.splitext(df_spots_filename)
+    aggr_filename = get_df_agg_filename(filename_no_ext, df_spots_file_ext=ext)
     aggr_filepath = os.path.join(spotmax_output_folderpath, aggr_filename)
-    df_aggr = pd.read_csv(aggr_filepath, index_col=['frame_i', 'Cell_ID'])
+    if not os.path.exists(aggr_filepath):
+        # Aggregated tables saved before the .parquet format are always .csv
+        aggr_filename = get_df_agg_filename(filename_no_ext)
+        aggr_filepath = os.path.join(spotmax_output_folderpath, aggr_filename)
+    df_aggr = load_table_to_df(aggr_filepath, index_col=['frame_i', 'Cell_ID'])
     return df_aggr
 
 def df_spots_filename_parts(df_spots_filename):
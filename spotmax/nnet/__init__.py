@@ -9,15 +9,22 @@ from cellacdc.myutils import check_install_package, check_install_torch
 
 from spotmax import is_cli, printl, io
 
-def install_and_download():
-    check_install_torch(is_cli=is_cli, caller_name='SpotMAX')
-
-    check_install_package(
-        'pytorch3dunet', 
-        pypi_name='pytorch3dunet-spotmax', # 'git+https://github.com/ElpadoCan/pytorch3dunet.git',
-        is_cli=is_cli,
-        caller_name='SpotMAX'
-    )
+def install_and_download(backend='pytorch'):
+    if backend == 'onnxruntime':
+        check_install_package(
+            'onnxruntime', 
+            is_cli=is_cli,
+            caller_name='SpotMAX'
+        )
+    else:
+        check_install_torch(is_cli=is_cli, caller_name='SpotMAX')
+
+        check_install_package(
+            'pytorch3dunet', 
+            pypi_name='pytorch3dunet-spotmax', # 'git+https://github.com/ElpadoCan/pytorch3dunet.git',
+            is_cli=is_cli,
+            caller_name='SpotMAX'
+        )
 
     check_install_package(
         'yaml', 
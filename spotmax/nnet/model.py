@@ -4,7 +4,12 @@ from typing import Iterable, List
 
 import numpy as np
 
-import torch.nn as nn
+try:
+    import torch.nn as nn
+    ModuleBase = nn.Module
+except Exception as err:
+    # torch is not required by the ONNX Runtime backend of the 2D model
+    ModuleBase = object
 
 import skimage
 import skimage.measure
@@ -14,14 +19,15 @@ from cellacdc._types import Vector
 
 from spotmax import io, printl
 from spotmax.nnet import install_and_download, config_yaml_path
+from spotmax.nnet.tiling import TileBlendings
 
-def install_and_import_modules():
-    install_and_download()
+def install_and_import_modules(backend='pytorch'):
+    install_and_download(backend=backend)
     from spotmax.nnet import transform
     from spotmax.nnet.models.nd_model import (
-        Data, Operation, NDModel, Models, models
+        Data, Operation, NDModel, Models
     )
-    return transform, Data, Operation, NDModel, Models, models
+    return transform, Data, Operation, NDModel, Models
 
 def read_default_config():
     import yaml
@@ -35,6 +41,9 @@ def read_default_config():
 class AvailableModels:
     values = ['2D', '3D']
 
+class InferenceBackends:
+    values = ['pytorch', 'onnxruntime']
+
 class NotParam:
     not_a_param = True
 
@@ -65,7 +74,7 @@ class CustomSignals:
                 argwidget.widget.setValue(thresh_val)
                 break
 
-class Model(nn.Module):
+class Model(ModuleBase):
     """SpotMAX neural network model for semantic segmentation. This is 
     also a PyTorch model with a forward method
     """
@@ -82,6 +91,16 @@ class Model(nn.Module):
             resolution_multiplier_yx: float=1.0,
             use_gpu=False,
             save_prediction_map=False,
+            batch_size: int=1,
+            cpu_num_threads: int=0,
+            channels_last=False,
+            cpu_bfloat16=False,
+            tile_size: int=0,
+            tile_overlap: int=32,
+            tile_blending: TileBlendings='gaussian',
+            tile_num_workers: int=1,
+            memmap_prediction_map=False,
+            backend: InferenceBackends='pytorch',
             verbose=True,
         ):
         """Initialization method of the model
@@ -135,20 +154,65 @@ class Model(nn.Module):
             If True, the model will return the prediction map and if the model 
             is used as part of SpotMAX analysis, the map will be saved in 
             each Position folder loaded. Default is False
+        batch_size : int, optional
+            Number of 2D images (z-slices and frames) processed together 
+            by the 2D model. Larger batches are faster on CPUs with many cores 
+            at the cost of higher memory usage. Default is 1
+        cpu_num_threads : int, optional
+            Number of threads used by PyTorch when running on the CPU. 
+            Pass 0 to use the PyTorch default. Default is 0
+        channels_last : bool, optional
+            If True, the 2D model uses the channels-last memory format, 
+            which is usually faster on CPUs. Default is False
+        cpu_bfloat16 : bool, optional
+            If True and the CPU supports it, the 2D model runs inference in 
+            bfloat16 precision. This is faster on recent CPUs, but the 
+            prediction map is slightly less accurate. Default is False
+        tile_size : int, optional
+            If > 0, the images are predicted in overlapping square tiles 
+            of `tile_size` pixels (after rescaling) along y and x, which 
+            bounds the memory required by the network regardless of the 
+            image size. For the 3D model, this must be larger than the 
+            patch shape of the configuration file. Pass 0 to predict the 
+            whole image at once. Default is 0
+        tile_overlap : int, optional
+            Overlap in pixels between neighbouring tiles. Default is 32
+        tile_blending : {'gaussian', 'linear'} str, optional
+            Weighting used to blend the prediction of overlapping tiles. 
+            Both give more weight to the center of the tiles. Default is 
+            'gaussian'
+        tile_num_workers : int, optional
+            Number of threads that predict the tiles in parallel. 
+            Default is 1
+        memmap_prediction_map : bool, optional
+            If True and `tile_size` > 0, the prediction map is stored in a 
+            temporary file on disk instead of memory. Default is False
+        backend : {'pytorch', 'onnxruntime'} str, optional
+            Library used to run inference. If 'onnxruntime', the network 
+            runs on the CPU with ONNX Runtime (`channels_last` and 
+            `cpu_bfloat16` are ignored) and the 2D model does not require 
+            PyTorch. The model must be exported first with the command 
+            ``spotmax_export_onnx``. Default is 'pytorch'
         verbose : bool, optional
             If True, print additional information text to the terminal. 
             Default is True
         """       
-        nn.Module.__init__(self)
+        ModuleBase.__init__(self)
+        
+        if backend not in InferenceBackends.values:
+            raise ValueError(
+                f'Invalid backend "{backend}". Valid backends are '
+                f'{InferenceBackends.values}'
+            )
+        self.backend = backend
          
-        modules = install_and_import_modules()
-        transform, Data, Operation, NDModel, Models, models =  modules            
+        modules = install_and_import_modules(backend=backend)
+        transform, Data, Operation, NDModel, Models =  modules            
         self.transform = transform
         self.Data = Data
         self.Operation = Operation
         self.NDModel = NDModel
         self.Models = Models
-        self.models = models
         
         config_yaml_filepath = config_yaml_filepath.replace('\\', '/')
         if config_yaml_filepath == 'spotmax/nnet/config.yaml':
@@ -168,7 +232,25 @@ class Model(nn.Module):
         self.x_transformer = self._init_data_transformer(
             remove_hot_pixels, gaussian_filter_sigma, use_gpu
         )
-        self._config['device'] = self._get_device_str(use_gpu)
+        if backend == 'onnxruntime':
+            self._config['device'] = 'cpu'
+        else:
+            self._config['device'] = self._get_device_str(use_gpu)
+        tiling_config = {
+            'tile_size': tile_size,
+            'overlap': tile_overlap,
+            'blending': tile_blending,
+            'num_workers': tile_num_workers,
+            'memmap': memmap_prediction_map,
+        }
+        self._config['unet2D']['inference'] = {
+            'batch_size': batch_size,
+            'num_threads': cpu_num_threads,
+            'channels_last': channels_last,
+            'bfloat16': cpu_bfloat16,
+            'tiling': tiling_config,
+        }
+        self._config['unet3D']['predict']['tiling'] = tiling_config
         self._batch_preprocess = (
             preprocess_across_experiment or preprocess_across_timepoints
         )
@@ -232,6 +314,10 @@ class Model(nn.Module):
     
     def _init_model(self, model_type):
         model_class = self._get_model_class(model_type=model_type)
+        if self.backend == 'onnxruntime':
+            from spotmax.nnet.onnx_backend import OnnxNDModel
+            return OnnxNDModel(model=model_class, config=self._config)
+        
         model = self.NDModel(
             operation=self.Operation.PREDICT,
             model=model_class,
@@ -351,41 +437,44 @@ class Model(nn.Module):
                 '(N, Z, Y, X) shape where N is the number of individual images'
             )
         out = np.zeros(x.shape, dtype=bool)
-        for n, img in enumerate(x):
-            lab = self.segment(
-                np.squeeze(img), 
-                label_components=False
+        if self.model_type != '2D':
+            for n, img in enumerate(x):
+                lab = self.segment(
+                    np.squeeze(img), 
+                    label_components=False
+                )
+                out[n] = lab
+            return out
+        
+        # The 2D model runs on z-slices --> stack the z-slices of all the 
+        # images to run them in mini-batches of `batch_size`
+        self.init_inference_params(label_components=False)
+        inputs = [self._prepare_input(np.squeeze(img)) for img in x]
+        rescaled_imgs = [
+            rescaled.reshape(-1, *rescaled.shape[-2:]) 
+            for rescaled, _, _ in inputs
+        ]
+        predictions = self._predict(np.concatenate(rescaled_imgs))
+        start = 0
+        for n, (rescaled, pad_width, orig_yx_shape) in enumerate(inputs):
+            stop = start + len(rescaled_imgs[n])
+            prediction = predictions[start:stop].reshape(rescaled.shape)
+            lab = self._postprocess_prediction(
+                prediction, pad_width, orig_yx_shape, False
             )
             out[n] = lab
+            start = stop
         return out
     
-    def segment(
-            self, image,
-            label_components=False,
-            return_pred: NotParam=False,
-        ):
-        """Run inference and return the segmentation result
-
-        Parameters
-        ----------
-        image : (Y, X) numpy.ndarray or (Z, Y, X) numpy.ndarray of floats in the range (-1, 1)
-            Input 2D or 3D image.
-        label_components : bool, optional
-            If True, the binary mask will be labelled with `skimage.measure.label`. 
-            This will separate the connected components into objects with an 
-            integer ID. Default is False
-
-        Returns
-        -------
-        (Y, X) numpy.ndarray or (Z, Y, X) numpy.ndarray of ints or bools
-            Segmentation mask with the same shape as the input image. If 
-            `label_components` is `True`, the boolean masked is labelled 
-            with `skimage.measure.label` before being returned.
-        """        
-        self.init_inference_params(
-            label_components=label_components,
-        )
-        
+    @property
+    def throughput(self):
+        """Inference throughput in slices/second of the last prediction made 
+        with the 2D model (None for the 3D model)
+        """
+        model_instance = self.model._predict_model_instance
+        return getattr(model_instance, 'throughput', None)
+    
+    def _prepare_input(self, image):
         orig_yx_shape = image.shape[-2:]
         if not self._batch_preprocess:
             image = self.preprocess(image[np.newaxis])[0]
@@ -402,28 +491,90 @@ class Model(nn.Module):
             rescaled, pad_width = self.pad_if_smaller_than_patch_shape(
                 patch_shape, rescaled
             )
-                
+        return rescaled, pad_width, orig_yx_shape
+    
+    def _predict(self, rescaled):
         input_data = self.Data(
             images=rescaled, masks=None, val_images=None, val_masks=None
         )
         prediction, _ = self.model(input_data)
-        
+        return prediction
+    
+    def _postprocess_prediction(
+            self, prediction, pad_width, orig_yx_shape, label_components, 
+            return_pred=False
+        ):
         if pad_width is not None:
             prediction = self.remove_padding(pad_width, prediction)
         
-        thresh = prediction > self._threshold_value
-        thresh = self.resize_to_orig_shape(thresh, orig_yx_shape)
+        is_2D = prediction.ndim == 2
+        if is_2D:
+            prediction = prediction[np.newaxis]
+        
+        # Threshold and resize one z-slice at a time into the preallocated 
+        # outputs to avoid temporary arrays as large as the prediction map
+        out_shape = (len(prediction), *orig_yx_shape)
+        thresh = np.zeros(out_shape, dtype=bool)
+        for z, prediction_z in enumerate(prediction):
+            thresh[z] = self.resize_to_orig_shape(
+                prediction_z > self._threshold_value, orig_yx_shape
+            )
+        
+        if return_pred and prediction.shape[-2:] != orig_yx_shape:
+            prediction_resized = np.zeros(out_shape)
+            for z, prediction_z in enumerate(prediction):
+                prediction_resized[z] = self.resize_to_orig_shape(
+                    prediction_z, orig_yx_shape
+                )
+            prediction = prediction_resized
+        
+        if is_2D:
+            thresh = thresh[0]
+            prediction = prediction[0]
         
         if label_components:
             lab = skimage.measure.label(thresh)
         else:
             lab = thresh
         
-        if return_pred or self._save_prediction_map:
-            prediction = self.resize_to_orig_shape(prediction, orig_yx_shape)
+        if return_pred:
             return lab, prediction
         else:
             return lab
+    
+    def segment(
+            self, image,
+            label_components=False,
+            return_pred: NotParam=False,
+        ):
+        """Run inference and return the segmentation result
+
+        Parameters
+        ----------
+        image : (Y, X) numpy.ndarray or (Z, Y, X) numpy.ndarray of floats in the range (-1, 1)
+            Input 2D or 3D image.
+        label_components : bool, optional
+            If True, the binary mask will be labelled with `skimage.measure.label`. 
+            This will separate the connected components into objects with an 
+            integer ID. Default is False
+
+        Returns
+        -------
+        (Y, X) numpy.ndarray or (Z, Y, X) numpy.ndarray of ints or bools
+            Segmentation mask with the same shape as the input image. If 
+            `label_components` is `True`, the boolean masked is labelled 
+            with `skimage.measure.label` before being returned.
+        """        
+        self.init_inference_params(
+            label_components=label_components,
+        )
+        
+        rescaled, pad_width, orig_yx_shape = self._prepare_input(image)
+        prediction = self._predict(rescaled)
+        return self._postprocess_prediction(
+            prediction, pad_width, orig_yx_shape, label_components, 
+            return_pred=return_pred or self._save_prediction_map
+        )
 
 def get_model_params_from_ini_params(
         ini_params, use_default_for_missing=False, subsection='spots'
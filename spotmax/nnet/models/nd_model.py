@@ -1,8 +1,6 @@
 from dataclasses import dataclass
 import numpy as np
 from enum import Enum
-from .unet2d_model import Unet2DModel
-from .unet3D_model import Unet3DModel
 
 from .. import printl
 
@@ -39,10 +37,23 @@ class Models(Enum):
     UNET2D = 'unet2D'
     UNET3D = 'unet3D'
 
-models = {
-    Models.UNET2D: Unet2DModel,
-    Models.UNET3D: Unet3DModel
-}
+def get_model_class(model:Models):
+    """Import and return the PyTorch class of the model. The import is 
+    deferred so that this module can be imported without torch (e.g., by the 
+    ONNX Runtime backend).
+
+    Args:
+        model (Models): The model to use (2D, 3D).
+
+    Returns:
+        type: Unet2DModel or Unet3DModel class
+    """
+    if model == Models.UNET2D:
+        from .unet2d_model import Unet2DModel
+        return Unet2DModel
+    else:
+        from .unet3D_model import Unet3DModel
+        return Unet3DModel
 
 default_threshold = {
     Models.UNET2D: 0.9,
@@ -90,6 +101,7 @@ class NDModel(object):
         self.operation = operation
         self.model = model
         self.config = config
+        self._predict_model_instance = None
 
     def _init_model_instance(self, verbose=None):
         if self.model == Models.UNET2D:
@@ -121,7 +133,7 @@ class NDModel(object):
         config['device'] = self.config['device']
         
         # Instanciate the model using the config
-        model_instance = models[self.model](config)
+        model_instance = get_model_class(self.model)(config)
         
         return model_instance
     
@@ -140,8 +152,14 @@ class NDModel(object):
         # data.check_dimensions()
         check_valid_operation(self.operation, self.model, data)
         
-        # Instanciate the model using the config
-        model_instance = self._init_model_instance()
+        # Instanciate the model using the config. For prediction, the 
+        # instance (and the loaded weights) is reused across calls
+        if self.operation == Operation.PREDICT:
+            if self._predict_model_instance is None:
+                self._predict_model_instance = self._init_model_instance()
+            model_instance = self._predict_model_instance
+        else:
+            model_instance = self._init_model_instance()
 
         # Train or predict
         if self.operation == Operation.TRAIN:
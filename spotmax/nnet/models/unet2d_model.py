@@ -1,4 +1,5 @@
 import random
+import time
 import torch
 import os
 import numpy as np
@@ -17,6 +18,7 @@ import shutil as sh
 from cellacdc import printl
 
 from .base_model import BaseModel
+from ..tiling import get_tiled_inference
 from .unet2D.unet_2D_model import UNet2D
 from .unet2D.dice_score import dice_loss, dice_coeff, multiclass_dice_coeff
 
@@ -92,6 +94,24 @@ class Unet2DModel(BaseModel):
         self.training_directory = os.path.expanduser(
             self.model_config['training_path']
         )
+        inference_config = config.get('inference', {})
+        self.batch_size = max(int(inference_config.get('batch_size', 1)), 1)
+        self.num_threads = int(inference_config.get('num_threads', 0))
+        self.channels_last = inference_config.get('channels_last', False)
+        self.bfloat16 = inference_config.get('bfloat16', False)
+        self.tiler = get_tiled_inference(
+            self._predict_batch, inference_config.get('tiling'), 
+            batch_size=self.batch_size
+        )
+        self.throughput = None
+        self._use_bfloat16 = False
+        if self.bfloat16:
+            self._use_bfloat16 = self._is_cpu_bfloat16_supported()
+            if not self._use_bfloat16:
+                print(
+                    '[WARNING]: bfloat16 inference is not supported on this '
+                    'device. Using float32.'
+                )
         self.net = None        
 
     def initialize_network(self):
@@ -341,35 +361,79 @@ class Unet2DModel(BaseModel):
             return dice_score
         return dice_score / num_val_batches
 
-    def _predict_img(self, full_img:np.ndarray) -> np.ndarray:
-        """Predict the mask for a single image
-
-        Args:
-            full_img (np.ndarray): Image to predict the mask for
+    def _is_cpu_bfloat16_supported(self) -> bool:
+        """Check if the CPU supports bfloat16 inference
 
         Returns:
-            np.ndarray: Predicted mask
+            bool: True if the device is the CPU and it supports bfloat16
+        """
+        if self.device.type != 'cpu':
+            return False
+        try:
+            return torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        except Exception as err:
+            return False
+
+    def _init_inference(self) -> None:
+        """Set the number of CPU threads and the memory format of the network 
+        used for inference
         """
-
         self.net.eval()
-        full_img = full_img.reshape(1, 1, full_img.shape[0], full_img.shape[1])
-        img = torch.from_numpy(full_img)
-        img = img.to(device=self.device, dtype=torch.float32)
+        if self.num_threads > 0 and self.device.type == 'cpu':
+            torch.set_num_threads(self.num_threads)
+        
+        if self.channels_last:
+            self.net = self.net.to(memory_format=torch.channels_last)
 
-        with torch.no_grad():
-            output = self.net(img)
+    def _predict_batch(self, batch:np.ndarray) -> np.ndarray:
+        """Predict the masks for a batch of images
+
+        Args:
+            batch (np.ndarray): Images of shape (B, H, W) to predict the 
+                masks for
+
+        Returns:
+            np.ndarray: Predicted masks
+        """
+        batch = batch.reshape(batch.shape[0], 1, batch.shape[1], batch.shape[2])
+        imgs = torch.from_numpy(batch)
+        imgs = imgs.to(device=self.device, dtype=torch.float32)
+        if self.channels_last:
+            imgs = imgs.contiguous(memory_format=torch.channels_last)
+
+        with torch.inference_mode(), torch.autocast(
+                device_type='cpu', dtype=torch.bfloat16, 
+                enabled=self._use_bfloat16
+            ):
+            output = self.net(imgs)
             if self.net.n_classes > 1:
-                probs = F.softmax(output, dim=1)[0]
+                probs = F.softmax(output.float(), dim=1)
             else:
-                probs = torch.sigmoid(output)[0]
+                probs = torch.sigmoid(output.float())
 
         probs = probs.cpu()
-        to_return = probs if self.net.n_classes == 1 else probs[1]
+        to_return = probs if self.net.n_classes == 1 else probs[:, 1]
         return to_return.numpy()
 
+    def _predict_img(self, full_img:np.ndarray) -> np.ndarray:
+        """Predict the mask for a single image
+
+        Args:
+            full_img (np.ndarray): Image to predict the mask for
+
+        Returns:
+            np.ndarray: Predicted mask
+        """
+        self.net.eval()
+        return self._predict_batch(full_img[np.newaxis])[0]
 
     def predict(self, images: np.ndarray) -> np.ndarray:
-        """Predict the mask for a batch of images
+        """Predict the mask for a batch of images. The images are processed 
+        in mini-batches of `batch_size` images (see the 'inference' section 
+        of the configuration) and the throughput in slices/second is stored 
+        in the `throughput` attribute. If tiling is enabled (see the 'tiling' 
+        entry of the 'inference' section), the images are predicted in 
+        overlapping tiles of `batch_size` tiles.
 
         Args:
             images (np.ndarray): Batch of images to predict the mask for
@@ -380,15 +444,28 @@ class Unet2DModel(BaseModel):
 
         if not self.net:
             self.load()
+        
+        self._init_inference()
 
+        num_images = len(images)
+        masks = []
         desc = 'Running inference'
-        masks = [
-            self._predict_img(full_img=image)
-            for image in tqdm(
-                images, total=len(images), desc=desc, ncols=100,
-                leave=False
-            )
-        ]
+        pbar = tqdm(
+            total=num_images, desc=desc, ncols=100, leave=False, unit='slice'
+        )
+        t0 = time.perf_counter()
+        if self.tiler is not None:
+            masks = self.tiler.predict(np.asarray(images), pbar=pbar)
+        else:
+            for start in range(0, num_images, self.batch_size):
+                batch = np.asarray(images[start:start+self.batch_size])
+                masks.extend(self._predict_batch(batch))
+                pbar.update(len(batch))
+        pbar.close()
+        
+        elapsed = time.perf_counter() - t0
+        if elapsed > 0:
+            self.throughput = num_images/elapsed
 
         return np.asarray(masks)
 
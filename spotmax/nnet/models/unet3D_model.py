@@ -8,6 +8,8 @@ from .unet3D.unet3d.trainer import create_trainer
 import os
 import torch
 
+from ..tiling import get_tiled_inference
+
 
 def _get_predictor(model, output_dir, config):
     predictor_config = config.get('predictor', {})
@@ -62,14 +64,13 @@ class Unet3DModel(BaseModel):
         # Start training
         trainer.fit()
 
-    def predict(self, images: np.ndarray) -> np.ndarray:
-        """Predict the model."""
-
+    def _predict_volume(self, volume: np.ndarray) -> np.ndarray:
         if self.model is None:
             # Read the model trained
             model = get_model(self.config['model'])
             model_path = os.path.expanduser(self.config['model_path'])
             utils.load_checkpoint(model_path, model)
+            self.model = model
         else:
             model = self.model
 
@@ -82,7 +83,7 @@ class Unet3DModel(BaseModel):
 
         # create predictor instance
         predictor = _get_predictor(model, output_dir ,self.config)
-        test_loader = get_test_numpy_loader(self.config, images)
+        test_loader = get_test_numpy_loader(self.config, volume)
         
         # Run inference
         predicted = predictor(test_loader)
@@ -96,3 +97,17 @@ class Unet3DModel(BaseModel):
 
         return predictions
 
+    def _predict_volumes(self, volumes: np.ndarray) -> np.ndarray:
+        return np.array([self._predict_volume(volume) for volume in volumes])
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        """Predict the model. If tiling is enabled (see the 'tiling' entry 
+        of the configuration), the volume is predicted in overlapping 
+        (y, x) tiles."""
+        tiler = get_tiled_inference(
+            self._predict_volumes, self.config.get('tiling')
+        )
+        if tiler is None:
+            return self._predict_volume(images)
+        
+        return tiler.predict(images[np.newaxis])[0]
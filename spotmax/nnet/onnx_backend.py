@@ -0,0 +1,513 @@
+"""ONNX Runtime inference backend for the SpotMAX U-Net models.
+
+Export the PyTorch weights to ONNX with the command
+`spotmax_export_onnx --model_type 2D` (or `3D`) and then initialize
+the model with `Model(backend='onnxruntime')`. The 2D model does not
+require torch at run time.
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+from tqdm import tqdm
+
+from .. import printl
+from . import config_yaml_path
+from .tiling import get_tiled_inference
+
+def _load_config(config_yaml_filepath=config_yaml_path):
+    import yaml
+    with open(config_yaml_filepath, 'r') as f:
+        config = yaml.safe_load(f)
+    return config
+
+def get_onnx_filepath(config, model_type='2D'):
+    """Get the path of the ONNX model. This is the path of the PyTorch
+    weights defined in the configuration file with the .onnx extension.
+
+    Parameters
+    ----------
+    config : dict
+        Configuration loaded from the YAML configuration file of the model
+    model_type : {'2D', '3D'} str, optional
+        Model type. Default is '2D'
+
+    Returns
+    -------
+    str
+        Path of the ONNX model
+    """
+    if model_type == '2D':
+        weights_path = config['unet2D']['model']['best_model_path']
+    else:
+        weights_path = config['unet3D']['predict']['model_path']
+    weights_path = os.path.expanduser(weights_path)
+    return f'{os.path.splitext(weights_path)[0]}.onnx'
+
+def _load_torch_net(config, model_type='2D'):
+    if model_type == '2D':
+        from .models.unet2d_model import Unet2DModel
+        model_config = {**config['unet2D'], 'device': 'cpu'}
+        model_instance = Unet2DModel(model_config)
+        model_instance.load()
+        net = model_instance.net
+    else:
+        from .models.unet3D.unet3d.model import get_model
+        from .models.unet3D.unet3d import utils
+        model_config = config['unet3D']['predict']
+        net = get_model(model_config['model'])
+        model_path = os.path.expanduser(model_config['model_path'])
+        utils.load_checkpoint(model_path, net)
+    net.eval()
+    return net
+
+def export_to_onnx(
+        model_type='2D',
+        config_yaml_filepath=config_yaml_path,
+        onnx_filepath=None,
+        opset_version=17,
+    ):
+    """Export the PyTorch weights of the U-Net model to ONNX
+
+    Parameters
+    ----------
+    model_type : {'2D', '3D'} str, optional
+        Model type. Default is '2D'
+    config_yaml_filepath : os.PathLike, optional
+        Path to the YAML configuration file of the model. Default is the
+        configuration file of the pre-trained models
+    onnx_filepath : os.PathLike, optional
+        Path of the exported model. If None, the model is saved next to the
+        PyTorch weights (see `get_onnx_filepath`). Default is None
+    opset_version : int, optional
+        ONNX opset version. Default is 17
+
+    Returns
+    -------
+    str
+        Path of the exported model
+    """
+    import torch
+
+    config = _load_config(config_yaml_filepath)
+    if onnx_filepath is None:
+        onnx_filepath = get_onnx_filepath(config, model_type=model_type)
+
+    net = _load_torch_net(config, model_type=model_type)
+    if model_type == '2D':
+        # Height and width are dynamic because the 2D model runs on the
+        # full z-slices
+        dummy_input = torch.rand(1, 1, 256, 256)
+        dynamic_axes = {
+            'input': {0: 'batch', 2: 'height', 3: 'width'},
+            'output': {0: 'batch', 2: 'height', 3: 'width'}
+        }
+    else:
+        # The 3D model runs on patches of fixed shape
+        loaders_config = config['unet3D']['predict']['loaders']
+        patch_shape = loaders_config['test']['slice_builder']['patch_shape']
+        dummy_input = torch.rand(1, 1, *patch_shape)
+        dynamic_axes = {'input': {0: 'batch'}, 'output': {0: 'batch'}}
+
+    os.makedirs(os.path.dirname(os.path.abspath(onnx_filepath)), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            net, dummy_input, onnx_filepath,
+            input_names=['input'],
+            output_names=['output'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset_version
+        )
+    return onnx_filepath
+
+def check_onnx_export(
+        model_type='2D',
+        config_yaml_filepath=config_yaml_path,
+        onnx_filepath=None,
+        num_samples=2,
+        atol=1e-4
+    ):
+    """Check that the raw network output of the exported ONNX model is
+    equivalent to the output of the PyTorch model on random input
+
+    Parameters
+    ----------
+    model_type : {'2D', '3D'} str, optional
+        Model type. Default is '2D'
+    config_yaml_filepath : os.PathLike, optional
+        Path to the YAML configuration file of the model. Default is the
+        configuration file of the pre-trained models
+    onnx_filepath : os.PathLike, optional
+        Path of the exported model. If None, it is determined with
+        `get_onnx_filepath`. Default is None
+    num_samples : int, optional
+        Number of random input images. Default is 2
+    atol : float, optional
+        Maximum absolute difference allowed. Default is 1e-4
+
+    Returns
+    -------
+    float
+        Maximum absolute difference between the outputs
+
+    Raises
+    ------
+    ValueError
+        If the maximum absolute difference is larger than `atol`
+    """
+    import torch
+
+    config = _load_config(config_yaml_filepath)
+    if onnx_filepath is None:
+        onnx_filepath = get_onnx_filepath(config, model_type=model_type)
+
+    if model_type == '2D':
+        input_shape = (num_samples, 1, 256, 256)
+    else:
+        loaders_config = config['unet3D']['predict']['loaders']
+        patch_shape = loaders_config['test']['slice_builder']['patch_shape']
+        input_shape = (num_samples, 1, *patch_shape)
+
+    rng = np.random.default_rng(seed=0)
+    x = rng.uniform(-1, 1, size=input_shape).astype(np.float32)
+
+    net = _load_torch_net(config, model_type=model_type)
+    with torch.no_grad():
+        torch_out = net(torch.from_numpy(x)).numpy()
+
+    session = create_inference_session(onnx_filepath)
+    onnx_out = session.run(None, {session.get_inputs()[0].name: x})[0]
+
+    max_abs_diff = float(np.max(np.abs(torch_out - onnx_out)))
+    if max_abs_diff > atol:
+        raise ValueError(
+            'The output of the ONNX model is not equivalent to the output '
+            f'of the PyTorch model (max. absolute difference = {max_abs_diff} '
+            f'> {atol}).'
+        )
+    return max_abs_diff
+
+def compare_backends(image, label_components=False, **model_kwargs):
+    """Run the same image through the PyTorch and the ONNX Runtime backends
+    of `spotmax.nnet.model.Model` (same pre-processing and thresholding) and
+    compare the results.
+
+    Parameters
+    ----------
+    image : (Y, X) numpy.ndarray or (Z, Y, X) numpy.ndarray
+        Input image
+    label_components : bool, optional
+        Passed to `Model.segment`. Default is False
+    **model_kwargs :
+        Additional keyword arguments passed to `Model` (except `backend`)
+
+    Returns
+    -------
+    dict
+        Dictionary with the keys 'max_abs_diff_prediction' (maximum absolute
+        difference between the prediction maps) and 'mismatched_pixels_ratio'
+        (fraction of pixels where the thresholded masks differ)
+    """
+    from .model import Model
+
+    results = {}
+    for backend in ('pytorch', 'onnxruntime'):
+        model = Model(backend=backend, **model_kwargs)
+        results[backend] = model.segment(
+            image, label_components=label_components, return_pred=True
+        )
+
+    torch_lab, torch_pred = results['pytorch']
+    onnx_lab, onnx_pred = results['onnxruntime']
+    comparison = {
+        'max_abs_diff_prediction': float(
+            np.max(np.abs(torch_pred - onnx_pred))
+        ),
+        'mismatched_pixels_ratio': float(
+            np.count_nonzero((torch_lab > 0) != (onnx_lab > 0))/torch_lab.size
+        )
+    }
+    return comparison
+
+def create_inference_session(onnx_filepath, num_threads=0):
+    """Create an ONNX Runtime inference session on the CPU
+
+    Parameters
+    ----------
+    onnx_filepath : os.PathLike
+        Path of the exported model
+    num_threads : int, optional
+        Number of intra-op threads. Pass 0 to use the ONNX Runtime default.
+        Default is 0
+
+    Returns
+    -------
+    onnxruntime.InferenceSession
+        The inference session
+
+    Raises
+    ------
+    FileNotFoundError
+        If the ONNX model does not exist
+    """
+    import onnxruntime as ort
+
+    if not os.path.exists(onnx_filepath):
+        raise FileNotFoundError(
+            f'The ONNX model "{onnx_filepath}" does not exist. Export the '
+            'model first with the command `spotmax_export_onnx`.'
+        )
+
+    sess_options = ort.SessionOptions()
+    if num_threads > 0:
+        sess_options.intra_op_num_threads = num_threads
+    sess_options.graph_optimization_level = (
+        ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    )
+    session = ort.InferenceSession(
+        onnx_filepath, sess_options=sess_options,
+        providers=['CPUExecutionProvider']
+    )
+    return session
+
+def _softmax(x, axis=1):
+    x = x - x.max(axis=axis, keepdims=True)
+    exp_x = np.exp(x)
+    return exp_x/exp_x.sum(axis=axis, keepdims=True)
+
+def _sigmoid(x):
+    return 1/(1 + np.exp(-x))
+
+class OnnxUnet2DModel:
+    """ONNX Runtime counterpart of
+    `spotmax.nnet.models.unet2d_model.Unet2DModel` (prediction only)
+    """
+    def __init__(self, config, onnx_filepath):
+        self.n_classes = config['model']['n_classes']
+        inference_config = config.get('inference', {})
+        self.batch_size = max(int(inference_config.get('batch_size', 1)), 1)
+        self.num_threads = int(inference_config.get('num_threads', 0))
+        self.tiler = get_tiled_inference(
+            self._predict_batch, inference_config.get('tiling'), 
+            batch_size=self.batch_size
+        )
+        self.throughput = None
+        self.session = create_inference_session(
+            onnx_filepath, num_threads=self.num_threads
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _predict_batch(self, batch:np.ndarray) -> np.ndarray:
+        batch = batch.reshape(batch.shape[0], 1, batch.shape[1], batch.shape[2])
+        batch = batch.astype(np.float32)
+        output = self.session.run(None, {self.input_name: batch})[0]
+        if self.n_classes > 1:
+            probs = _softmax(output, axis=1)
+            return probs[:, 1]
+        else:
+            return _sigmoid(output)
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        num_images = len(images)
+        masks = []
+        desc = 'Running inference (ONNX Runtime)'
+        pbar = tqdm(
+            total=num_images, desc=desc, ncols=100, leave=False, unit='slice'
+        )
+        t0 = time.perf_counter()
+        if self.tiler is not None:
+            masks = self.tiler.predict(np.asarray(images), pbar=pbar)
+        else:
+            for start in range(0, num_images, self.batch_size):
+                batch = np.asarray(images[start:start+self.batch_size])
+                masks.extend(self._predict_batch(batch))
+                pbar.update(len(batch))
+        pbar.close()
+        elapsed = time.perf_counter() - t0
+        if elapsed > 0:
+            self.throughput = num_images/elapsed
+        return np.asarray(masks)
+
+class _OnnxNetAdapter:
+    """Wrap an ONNX Runtime session with the interface of a torch module
+    used by the 3D U-Net predictor
+    """
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, batch):
+        import torch
+        x = batch.cpu().numpy().astype(np.float32)
+        output = self.session.run(None, {self.input_name: x})[0]
+        return torch.from_numpy(output)
+
+class OnnxUnet3DModel:
+    """ONNX Runtime counterpart of
+    `spotmax.nnet.models.unet3D_model.Unet3DModel` (prediction only).
+
+    Note that the patch extraction and stitching of the 3D model still use
+    the PyTorch data loaders, hence torch is required.
+    """
+    def __init__(self, config, onnx_filepath, num_threads=0):
+        from cellacdc.myutils import check_install_torch
+        from spotmax import is_cli
+        check_install_torch(is_cli=is_cli, caller_name='SpotMAX')
+
+        self.config = config
+        self.config['device'] = 'cpu'
+        self.throughput = None
+        session = create_inference_session(
+            onnx_filepath, num_threads=num_threads
+        )
+        self.model = _OnnxNetAdapter(session)
+
+    def _predict_volume(self, volume: np.ndarray) -> np.ndarray:
+        from .models.unet3D_model import _get_predictor
+        from .models.unet3D.datasets.utils import get_test_numpy_loader
+
+        output_dir = self.config['loaders'].get('output_dir', None)
+        predictor = _get_predictor(self.model, output_dir, self.config)
+        test_loader = get_test_numpy_loader(self.config, volume)
+
+        predictions = np.asarray(predictor(test_loader)).squeeze()
+        if len(predictions.shape) == 2:
+            predictions = np.expand_dims(predictions, axis=0)
+
+        return predictions
+
+    def _predict_volumes(self, volumes: np.ndarray) -> np.ndarray:
+        return np.array([self._predict_volume(volume) for volume in volumes])
+
+    def predict(self, images: np.ndarray) -> np.ndarray:
+        tiler = get_tiled_inference(
+            self._predict_volumes, self.config.get('tiling')
+        )
+        if tiler is None:
+            return self._predict_volume(images)
+        
+        return tiler.predict(images[np.newaxis])[0]
+
+class OnnxNDModel:
+    """ONNX Runtime counterpart of `spotmax.nnet.models.nd_model.NDModel`
+    (prediction only)
+    """
+    def __init__(self, model, config):
+        """Initialize the model.
+
+        Args:
+            model (Models): The model to use (2D, 3D).
+            config (dict): The config to use.
+        """
+        self.model = model
+        self.config = config
+        self._predict_model_instance = None
+
+    def _init_model_instance(self):
+        from .models.nd_model import Models
+
+        if self.model == Models.UNET2D:
+            onnx_filepath = get_onnx_filepath(self.config, model_type='2D')
+            return OnnxUnet2DModel(self.config['unet2D'], onnx_filepath)
+        
+        onnx_filepath = get_onnx_filepath(self.config, model_type='3D')
+        inference_config = self.config['unet2D'].get('inference', {})
+        return OnnxUnet3DModel(
+            self.config['unet3D']['predict'], onnx_filepath,
+            num_threads=int(inference_config.get('num_threads', 0))
+        )
+
+    def __call__(self, data, verbose=True):
+        from .models.nd_model import (
+            Operation, check_valid_operation, default_threshold
+        )
+        check_valid_operation(Operation.PREDICT, self.model, data)
+
+        if self._predict_model_instance is None:
+            self._predict_model_instance = self._init_model_instance()
+
+        predictions = self._predict_model_instance.predict(data.images)
+        return predictions, default_threshold[self.model]
+
+def cli_parser():
+    ap = argparse.ArgumentParser(
+        prog='spotmax_export_onnx',
+        description=(
+            'Export the SpotMAX U-Net models to ONNX to run inference with '
+            'ONNX Runtime (`backend = onnxruntime` in the AI parameters).'
+        )
+    )
+    ap.add_argument(
+        '-m', '--model_type',
+        default='2D',
+        choices=['2D', '3D'],
+        help='Model type to export. Default is 2D'
+    )
+    ap.add_argument(
+        '-y', '--config_yaml_filepath',
+        default=config_yaml_path,
+        type=str,
+        metavar='CONFIG_YAML_FILEPATH',
+        help='Path to the YAML configuration file of the model'
+    )
+    ap.add_argument(
+        '-o', '--onnx_filepath',
+        default=None,
+        type=str,
+        metavar='ONNX_FILEPATH',
+        help=(
+            'Path of the exported model. Default is the path of the PyTorch '
+            'weights with the .onnx extension. Note that the ONNX Runtime '
+            'backend loads the model from the default path.'
+        )
+    )
+    ap.add_argument(
+        '--opset_version',
+        default=17,
+        type=int,
+        help='ONNX opset version. Default is 17'
+    )
+    ap.add_argument(
+        '--skip_check',
+        action='store_true',
+        help=(
+            'Do not check that the exported model is equivalent to the '
+            'PyTorch model'
+        )
+    )
+    return vars(ap.parse_args())
+
+def run():
+    args = cli_parser()
+
+    from . import install_and_download
+    install_and_download(backend='pytorch')
+    install_and_download(backend='onnxruntime')
+
+    onnx_filepath = export_to_onnx(
+        model_type=args['model_type'],
+        config_yaml_filepath=args['config_yaml_filepath'],
+        onnx_filepath=args['onnx_filepath'],
+        opset_version=args['opset_version'],
+    )
+    print(f'ONNX model saved to "{onnx_filepath}"')
+
+    if args['skip_check']:
+        return
+
+    max_abs_diff = check_onnx_export(
+        model_type=args['model_type'],
+        config_yaml_filepath=args['config_yaml_filepath'],
+        onnx_filepath=onnx_filepath
+    )
+    print(
+        'The ONNX model is equivalent to the PyTorch model '
+        f'(max. absolute difference = {max_abs_diff:.2e})'
+    )
+
+if __name__ == '__main__':
+    run()
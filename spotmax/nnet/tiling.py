@@ -0,0 +1,308 @@
+"""Sliding-window tiled inference with overlap blending.
+
+The images are split along the last two axes (y, x) into overlapping tiles
+that are predicted in batches and blended into a preallocated (optionally
+memory-mapped) prediction map. The memory required by the prediction
+depends only on the tile shape, the batch size and the number of workers.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+
+import numpy as np
+
+class TileBlendings:
+    values = ['gaussian', 'linear']
+
+def get_tiles_start_coords(size, tile_size, overlap):
+    """Get the start coordinates of the tiles along one axis. The last tile
+    is shifted inwards so that all the tiles have the same size.
+
+    Parameters
+    ----------
+    size : int
+        Size of the image along the axis
+    tile_size : int
+        Size of the tiles
+    overlap : int
+        Overlap in pixels between neighbouring tiles
+
+    Returns
+    -------
+    list of ints
+        Start coordinates of the tiles
+    """
+    if tile_size >= size:
+        return [0]
+
+    step = max(tile_size - overlap, 1)
+    starts = list(range(0, size - tile_size + 1, step))
+    if starts[-1] + tile_size < size:
+        starts.append(size - tile_size)
+    return starts
+
+def get_tiles_slices(yx_shape, tile_shape, overlap):
+    """Get the (y, x) slices of the tiles
+
+    Parameters
+    ----------
+    yx_shape : (int, int) tuple
+        Shape of the image along the last two axes
+    tile_shape : (int, int) tuple
+        Shape of the tiles. If the image is smaller than the tile along an
+        axis, the tile will be as large as the image along that axis.
+    overlap : int
+        Overlap in pixels between neighbouring tiles
+
+    Returns
+    -------
+    list of (slice, slice) tuples
+        Slices of the tiles
+    """
+    Y, X = yx_shape
+    tile_y, tile_x = min(tile_shape[0], Y), min(tile_shape[1], X)
+    tiles_slices = []
+    for y0 in get_tiles_start_coords(Y, tile_y, overlap):
+        for x0 in get_tiles_start_coords(X, tile_x, overlap):
+            tiles_slices.append(
+                (slice(y0, y0+tile_y), slice(x0, x0+tile_x))
+            )
+    return tiles_slices
+
+def _linear_weights_1D(size, overlap):
+    ramp = np.minimum(np.arange(1, size+1), np.arange(size, 0, -1))
+    return np.minimum(ramp/(overlap+1), 1.0)
+
+def _gaussian_weights_1D(size, sigma_scale=1/8):
+    coords = np.arange(size) - (size - 1)/2
+    sigma = max(size*sigma_scale, 1)
+    return np.exp(-coords**2/(2*sigma**2))
+
+def get_blending_weights(tile_shape, overlap, blending='gaussian'):
+    """Get the weights used to blend the predictions of overlapping tiles.
+    The weights are higher at the center of the tiles where the prediction
+    is more accurate.
+
+    Parameters
+    ----------
+    tile_shape : (int, int) tuple
+        Shape of the tiles
+    overlap : int
+        Overlap in pixels between neighbouring tiles. Used only for
+        `blending = 'linear'`
+    blending : {'gaussian', 'linear'}, optional
+        If 'gaussian', the weights are a 2D gaussian with sigma equal to
+        1/8 of the tile size. If 'linear', the weights increase linearly
+        from the edges of the tile to 1 at a distance of `overlap` pixels.
+        Default is 'gaussian'
+
+    Returns
+    -------
+    (Y, X) numpy.ndarray of floats
+        Blending weights. The minimum weight is always > 0.
+    """
+    if blending == 'gaussian':
+        wy = _gaussian_weights_1D(tile_shape[0])
+        wx = _gaussian_weights_1D(tile_shape[1])
+    elif blending == 'linear':
+        wy = _linear_weights_1D(tile_shape[0], overlap)
+        wx = _linear_weights_1D(tile_shape[1], overlap)
+    else:
+        raise ValueError(
+            f'"{blending}" is not a valid blending. Valid blendings are '
+            f'{TileBlendings.values}'
+        )
+    weights = np.outer(wy, wx).astype(np.float32)
+    weights = np.maximum(weights, 1e-3)
+    return weights
+
+def get_prediction_map_memmap(shape, dtype=np.float32):
+    """Create a zero-filled array stored in an anonymous temporary file that
+    is deleted when the array is garbage collected
+
+    Parameters
+    ----------
+    shape : tuple of ints
+        Shape of the array
+    dtype : numpy.dtype, optional
+        Data type of the array. Default is np.float32
+
+    Returns
+    -------
+    numpy.memmap
+        Array stored on disk
+    """
+    return np.memmap(
+        tempfile.TemporaryFile(), mode='w+', dtype=dtype, shape=tuple(shape)
+    )
+
+class TiledInference:
+    """Run a prediction function on overlapping tiles and blend the results
+
+    Parameters
+    ----------
+    predict_func : callable
+        Function that takes a batch of tiles with shape (B, ..., tile_y,
+        tile_x) and returns the prediction with the same shape
+    tile_shape : (int, int) tuple
+        Shape (y, x) of the tiles
+    overlap : int, optional
+        Overlap in pixels between neighbouring tiles. Default is 32
+    blending : {'gaussian', 'linear'}, optional
+        Blending of overlapping tiles (see `get_blending_weights`).
+        Default is 'gaussian'
+    batch_size : int, optional
+        Number of tiles passed to `predict_func` at once. Default is 1
+    num_workers : int, optional
+        Number of threads calling `predict_func` in parallel. At most
+        `2*num_workers` batches are predicted at the same time. Default is 1
+    memmap : bool, optional
+        If True, the prediction map is stored in a temporary file on disk.
+        Default is False
+    """
+    def __init__(
+            self, predict_func, tile_shape, overlap=32, blending='gaussian',
+            batch_size=1, num_workers=1, memmap=False
+        ):
+        if overlap >= min(tile_shape):
+            raise ValueError(
+                f'The tiles overlap ({overlap}) must be smaller than the '
+                f'tile shape {tile_shape}'
+            )
+        self.predict_func = predict_func
+        self.tile_shape = tuple(tile_shape)
+        self.overlap = overlap
+        self.blending = blending
+        self.batch_size = max(int(batch_size), 1)
+        self.num_workers = max(int(num_workers), 1)
+        self.memmap = memmap
+
+    def _get_norm_map(self, yx_shape, tiles_slices, weights):
+        norm_map = np.zeros(yx_shape, dtype=np.float32)
+        for tile_slice in tiles_slices:
+            norm_map[tile_slice] += weights
+        return norm_map
+
+    def _iter_batches(self, images, tiles_slices):
+        batch_idxs = []
+        for n in range(len(images)):
+            for tile_slice in tiles_slices:
+                batch_idxs.append((n, tile_slice))
+                if len(batch_idxs) == self.batch_size:
+                    yield batch_idxs
+                    batch_idxs = []
+        if batch_idxs:
+            yield batch_idxs
+
+    def _predict_batch(self, images, batch_idxs):
+        batch = np.array([
+            images[n][(..., *tile_slice)] for n, tile_slice in batch_idxs
+        ])
+        return batch_idxs, self.predict_func(batch)
+
+    def predict(self, images, out=None, pbar=None):
+        """Predict the images tile by tile
+
+        Parameters
+        ----------
+        images : (N, ..., Y, X) numpy.ndarray
+            Input images
+        out : (N, ..., Y, X) numpy.ndarray of floats, optional
+            Preallocated prediction map. If None, it is allocated in memory
+            or in a temporary file on disk if `memmap` is True.
+            Default is None
+        pbar : tqdm.tqdm, optional
+            Progress bar updated by 1 every time an image is done.
+            Default is None
+
+        Returns
+        -------
+        (N, ..., Y, X) numpy.ndarray of floats
+            Prediction map
+        """
+        yx_shape = images.shape[-2:]
+        if out is None and self.memmap:
+            out = get_prediction_map_memmap(images.shape)
+        elif out is None:
+            out = np.zeros(images.shape, dtype=np.float32)
+        else:
+            out[:] = 0
+
+        tiles_slices = get_tiles_slices(yx_shape, self.tile_shape, self.overlap)
+        tile_shape = (
+            tiles_slices[0][0].stop - tiles_slices[0][0].start,
+            tiles_slices[0][1].stop - tiles_slices[0][1].start
+        )
+        weights = get_blending_weights(
+            tile_shape, self.overlap, blending=self.blending
+        )
+        norm_map = self._get_norm_map(yx_shape, tiles_slices, weights)
+
+        num_tiles_per_image = len(tiles_slices)
+        num_tiles_done = [0]*len(images)
+
+        def accumulate(batch_idxs, batch_pred):
+            for (n, tile_slice), pred in zip(batch_idxs, batch_pred):
+                out[n][(..., *tile_slice)] += pred*weights
+                num_tiles_done[n] += 1
+                if num_tiles_done[n] < num_tiles_per_image:
+                    continue
+                out[n] /= norm_map
+                if pbar is not None:
+                    pbar.update(1)
+
+        batches = self._iter_batches(images, tiles_slices)
+        if self.num_workers == 1:
+            for batch_idxs in batches:
+                accumulate(*self._predict_batch(images, batch_idxs))
+            return out
+
+        # Submit at most 2*num_workers batches at a time to bound memory
+        max_pending = 2*self.num_workers
+        with ThreadPoolExecutor(self.num_workers) as executor:
+            pending = []
+            for batch_idxs in batches:
+                pending.append(
+                    executor.submit(self._predict_batch, images, batch_idxs)
+                )
+                if len(pending) < max_pending:
+                    continue
+                accumulate(*pending.pop(0).result())
+            for future in pending:
+                accumulate(*future.result())
+        return out
+
+def get_tiled_inference(predict_func, tiling_config, batch_size=1):
+    """Initialize `TiledInference` from the 'tiling' section of the model
+    configuration
+
+    Parameters
+    ----------
+    predict_func : callable
+        See `TiledInference`
+    tiling_config : dict
+        Dictionary with the keys 'tile_size', 'overlap', 'blending',
+        'num_workers', and 'memmap'
+    batch_size : int, optional
+        Number of tiles passed to `predict_func` at once. Default is 1
+
+    Returns
+    -------
+    TiledInference or None
+        None if tiling is disabled (i.e., 'tile_size' is missing or <= 0)
+    """
+    if tiling_config is None:
+        return
+
+    tile_size = int(tiling_config.get('tile_size', 0))
+    if tile_size <= 0:
+        return
+
+    tiler = TiledInference(
+        predict_func, (tile_size, tile_size),
+        overlap=int(tiling_config.get('overlap', 32)),
+        blending=tiling_config.get('blending', 'gaussian'),
+        batch_size=batch_size,
+        num_workers=int(tiling_config.get('num_workers', 1)),
+        memmap=tiling_config.get('memmap', False)
+    )
+    return tiler
@@ -1,9 +1,15 @@
+import os
+import math
+import multiprocessing
+
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from tqdm import tqdm
 
 import numpy as np
 import pandas as pd
 
+import scipy.ndimage
 import skimage.measure
 import skimage.filters
 
@@ -1080,6 +1086,19 @@ def _compute_obj_spots_features(
             leave=False
         )
     
+    # Features are buffered and assigned to df_obj_spots as whole columns 
+    # at the end, since pandas scalar setitem is slower than the metrics
+    df_buffer = features.DataFrameColumnsBuffer(df_obj_spots)
+    
+    # Background metrics at center z-slice are the same for all the spots 
+    # on the same z-slice --> compute them once per z-slice
+    backgr_z_slice_metrics = {}
+    
+    # Bounding box of the local background of each spot (label spot_idx+1)
+    local_bkgr_obj_slices = scipy.ndimage.find_objects(
+        spheroids_local_bkgr_lab
+    )
+    
     spot_ids_to_drop = []
     for spot_idx, row in enumerate(df_obj_spots.itertuples()):
         spot_id = row.Index
@@ -1114,13 +1133,32 @@ def _compute_obj_spots_features(
             spot_ids_to_drop.append(spot_id)
             continue
         
-        local_spot_bkgr_lab_z = spheroids_local_bkgr_lab[zyx_center[0]]
+        try:
+            local_bkgr_obj_slice = local_bkgr_obj_slices[spot_idx]
+        except IndexError:
+            local_bkgr_obj_slice = None
+        if local_bkgr_obj_slice is None:
+            local_bkgr_yx_slice = (slice(0, 0), slice(0, 0))
+        else:
+            local_bkgr_yx_slice = local_bkgr_obj_slice[1:]
+        local_spot_bkgr_lab_z = (
+            spheroids_local_bkgr_lab[zyx_center[0]][local_bkgr_yx_slice]
+        )
         local_spot_bkgr_mask_z = local_spot_bkgr_lab_z==(spot_idx+1)
-        local_sharp_spot_bkgr_vals = sharp_spot_obj_z[local_spot_bkgr_mask_z]
-        local_preproc_spot_bkgr_vals = preproc_spot_obj_z[local_spot_bkgr_mask_z]
-        local_raw_spot_bkgr_vals = raw_spot_obj_z[local_spot_bkgr_mask_z]
+        local_sharp_spot_bkgr_vals = (
+            sharp_spot_obj_z[local_bkgr_yx_slice][local_spot_bkgr_mask_z]
+        )
+        local_preproc_spot_bkgr_vals = (
+            preproc_spot_obj_z[local_bkgr_yx_slice][local_spot_bkgr_mask_z]
+        )
+        local_raw_spot_bkgr_vals = (
+            raw_spot_obj_z[local_bkgr_yx_slice][local_spot_bkgr_mask_z]
+        )
         
         if debug:
+            local_spot_bkgr_mask_z = (
+                spheroids_local_bkgr_lab[zyx_center[0]]==(spot_idx+1)
+            )
             _debug_compute_obj_spots_features(
                 row, raw_spots_img_obj, zyx_center, sharp_spot_obj_z, 
                 backgr_mask_z_spot, spheroids_mask, local_spot_bkgr_mask_z, 
@@ -1130,30 +1168,36 @@ def _compute_obj_spots_features(
 
         # Add spot volume from mask
         spot_mask_vol = np.count_nonzero(spot_mask)
-        df_obj_spots.at[spot_id, 'spot_mask_volume_voxel'] = spot_mask_vol
+        df_buffer.at[spot_id, 'spot_mask_volume_voxel'] = spot_mask_vol
         spot_mask_vol_fl = spot_mask_vol*vox_to_fl
-        df_obj_spots.at[spot_id, 'spot_mask_volume_fl'] = spot_mask_vol_fl
+        df_buffer.at[spot_id, 'spot_mask_volume_fl'] = spot_mask_vol_fl
             
         # Add background metrics at center z-slice
-        sharp_spot_bkgr_values_z = sharp_spot_obj_z[backgr_mask_z_spot]
-        features.add_distribution_metrics(
-            sharp_spot_bkgr_values_z, df_obj_spots, spot_id, 
-            col_name='background_*name_z_slice_spot_detection_image'
-        )
-        
         zc_spot = zyx_center[0]
-        spot_bkgr_values_z = spots_img_obj[zc_spot, backgr_mask_z_spot]
-        features.add_distribution_metrics(
-            spot_bkgr_values_z, df_obj_spots, spot_id, 
-            col_name='background_*name_z_slice_preproc_image'
-        )
-        
-        if raw_spots_img_obj is not None:
+        if zc_spot not in backgr_z_slice_metrics:
+            backgr_z_slice_metrics[zc_spot] = (
+                features.get_distribution_metrics(
+                    backgr_vals_z_spot, 
+                    col_name='background_*name_z_slice_spot_detection_image'
+                )
+            )
+            spot_bkgr_values_z = spots_img_obj[zc_spot, backgr_mask_z_spot]
+            backgr_z_slice_metrics[zc_spot].update(
+                features.get_distribution_metrics(
+                    spot_bkgr_values_z, 
+                    col_name='background_*name_z_slice_preproc_image'
+                )
+            )
             raw_bkgr_values_z = raw_spots_img_obj[zc_spot, backgr_mask_z_spot]
-            features.add_distribution_metrics(
-                raw_bkgr_values_z, df_obj_spots, spot_id, 
-                col_name='background_*name_z_slice_raw_image'
+            backgr_z_slice_metrics[zc_spot].update(
+                features.get_distribution_metrics(
+                    raw_bkgr_values_z, 
+                    col_name='background_*name_z_slice_raw_image'
+                )
             )
+        
+        for col_name, value in backgr_z_slice_metrics[zc_spot].items():
+            df_buffer.at[spot_id, col_name] = value
             
         # Crop masks
         spheroid_mask = spot_mask[slice_crop_local]
@@ -1190,9 +1234,9 @@ def _compute_obj_spots_features(
         local_sharp_bkgr_vals = local_spot_bkgr_mask_z
 
         value = spots_img_obj[zyx_center]
-        df_obj_spots.at[spot_id, 'spot_center_preproc_intensity'] = value
+        df_buffer.at[spot_id, 'spot_center_preproc_intensity'] = value
         features.add_distribution_metrics(
-            spot_intensities, df_obj_spots, spot_id, 
+            spot_intensities, df_buffer, spot_id, 
             col_name='spot_preproc_*name_in_spot_minimumsize_vol',
             add_bkgr_corrected_metrics=True, 
             logger_warning_report=logger_warning_report, 
@@ -1206,10 +1250,10 @@ def _compute_obj_spots_features(
                 raw_spots_img_obj[slice_global_to_local][spheroid_mask]
             )
             value = raw_spots_img_obj[zyx_center]
-            df_obj_spots.at[spot_id, 'spot_center_raw_intensity'] = value
+            df_buffer.at[spot_id, 'spot_center_raw_intensity'] = value
 
             features.add_distribution_metrics(
-                raw_spot_intensities, df_obj_spots, spot_id, 
+                raw_spot_intensities, df_buffer, spot_id, 
                 col_name='spot_raw_*name_in_spot_minimumsize_vol',
                 add_bkgr_corrected_metrics=True, 
                 logger_warning_report=logger_warning_report, 
@@ -1218,17 +1262,17 @@ def _compute_obj_spots_features(
 
         # Intensities metrics from background around the spots (local)
         features.add_distribution_metrics(
-            local_sharp_spot_bkgr_vals, df_obj_spots, spot_id, 
+            local_sharp_spot_bkgr_vals, df_buffer, spot_id, 
             col_name='background_local_*name_z_slice_spot_detection_image',
             add_bkgr_corrected_metrics=False
         )
         features.add_distribution_metrics(
-            local_preproc_spot_bkgr_vals, df_obj_spots, spot_id, 
+            local_preproc_spot_bkgr_vals, df_buffer, spot_id, 
             col_name='background_local_*name_z_slice_preproc_image',
             add_bkgr_corrected_metrics=False
         )
         features.add_distribution_metrics(
-            local_raw_spot_bkgr_vals, df_obj_spots, spot_id, 
+            local_raw_spot_bkgr_vals, df_buffer, spot_id, 
             col_name='background_local_*name_z_slice_raw_image',
             add_bkgr_corrected_metrics=False
         )
@@ -1237,20 +1281,20 @@ def _compute_obj_spots_features(
         # at the center z-slice of the spot
         features.add_ttest_values(
             sharp_spot_intensities_z_edt, backgr_vals_z_spot, 
-            df_obj_spots, spot_id, name='spot_vs_backgr',
+            df_buffer, spot_id, name='spot_vs_backgr',
             logger_func=logger_func
         )
         
         features.add_effect_sizes(
             sharp_spot_intensities_z_edt, backgr_vals_z_spot, 
-            df_obj_spots, spot_id, name='spot_vs_backgr',
+            df_buffer, spot_id, name='spot_vs_backgr',
             debug=debug, logger_warning_report=logger_warning_report, 
             logger_func=logger_func
         )
         
         features.add_effect_sizes(
             sharp_spot_intensities_z_edt, local_sharp_spot_bkgr_vals, 
-            df_obj_spots, spot_id, name='spot_vs_local_backgr',
+            df_buffer, spot_id, name='spot_vs_local_backgr',
             debug=debug, logger_warning_report=logger_warning_report,
             logger_func=logger_func
         )
@@ -1259,7 +1303,7 @@ def _compute_obj_spots_features(
         #     import pdb; pdb.set_trace()
         
         features.add_spot_localization_metrics(
-            df_obj_spots, spot_id, zyx_center, obj_centroid,
+            df_buffer, spot_id, zyx_center, obj_centroid,
             voxel_size=zyx_voxel_size,
             logger_warning_report=logger_warning_report,
             logger_func=logger_func
@@ -1279,27 +1323,27 @@ def _compute_obj_spots_features(
         )
         features.add_ttest_values(
             normalised_spot_intensities, normalised_ref_ch_intensities, 
-            df_obj_spots, spot_id, name='spot_vs_ref_ch',
+            df_buffer, spot_id, name='spot_vs_ref_ch',
             logger_func=logger_func
         )
         features.add_effect_sizes(
             normalised_spot_intensities, normalised_ref_ch_intensities, 
-            df_obj_spots, spot_id, name='spot_vs_ref_ch', 
+            df_buffer, spot_id, name='spot_vs_ref_ch', 
             logger_warning_report=logger_warning_report, 
             logger_func=logger_func
         )
         _add_spot_vs_ref_location(
-            ref_ch_mask_obj, zyx_center, df_obj_spots, spot_id
+            ref_ch_mask_obj, zyx_center, df_buffer, spot_id
         )                
         
         value = ref_ch_img_obj[zyx_center]
-        df_obj_spots.at[spot_id, 'ref_ch_raw_intensity_at_center'] = value
+        df_buffer.at[spot_id, 'ref_ch_raw_intensity_at_center'] = value
 
         ref_ch_intensities = (
             ref_ch_img_obj[slice_global_to_local][spheroid_mask]
         )
         features.add_distribution_metrics(
-            ref_ch_intensities, df_obj_spots, spot_id, 
+            ref_ch_intensities, df_buffer, spot_id, 
             col_name='ref_ch_raw_*name_in_spot_minimumsize_vol'
         )
         if show_progress:
@@ -1307,6 +1351,8 @@ def _compute_obj_spots_features(
     if show_progress:
         pbar.close()
     
+    df_obj_spots = df_buffer.to_df()
+    
     if custom_combined_measurements is not None:
         df_obj_spots = features.add_custom_combined_measurements(
             df_obj_spots, logger_func=logger_func, 
@@ -2007,6 +2053,10 @@ def spotfit(
         sigma_z_guess_expr='spotsize_initial_radius_z_pixel',
         A_guess_expr='spotsize_A_max',
         B_guess_expr='spotsize_surface_median',  
+        num_workers=1,
+        parallel_backend='processes',
+        chunksize=None,
+        executor=None
     ):
     """Run spotFIT (fitting 3D gaussian curves) and get the related features
 
@@ -2162,6 +2212,25 @@ def spotfit(
         Default is 'spotsize_surface_median'.
         More details here: 
         https://pandas.pydata.org/docs/reference/api/pandas.eval.html
+    num_workers : int, optional
+        Number of parallel workers used to fit the segmented objects. Each 
+        object is fitted independently, hence the objects are distributed 
+        among the workers in chunks. If 1, the objects are fitted one after 
+        the other. If 0 or less, use as many workers as the number of CPU 
+        cores available. Default is 1
+    parallel_backend : {'processes', 'threads'}, optional
+        Type of worker pool used when `num_workers` is greater than 1. Only 
+        the cropped sub-volumes of each object are sent to the workers. 
+        Default is 'processes'
+    chunksize : int, optional
+        Number of objects fitted by each task of the worker pool. If None, 
+        the objects are split in about four chunks per worker. 
+        Default is None
+    executor : concurrent.futures.Executor, optional
+        Pool of workers created with `get_spotfit_executor`, used when 
+        `num_workers` is greater than 1. If None, a new pool is created and 
+        shut down at every call. Pass an executor to avoid starting the 
+        workers again for every frame. Default is None
         
     Returns
     -------
@@ -2225,120 +2294,82 @@ def spotfit(
     dfs_spots_spotfit_iter0 = []
     keys = []
     
+    # df_spots_spotfit = df_spots.drop(columns=['spot_mask'], errors='ignore')
+    df_spots_spotfit = df_spots.copy()
+    non_spotfit_cols = df_spots_spotfit.columns.to_list()
+    expanded_objs = [
+        transformations.get_expanded_obj(obj, delta_tol, lab) for obj in rp
+        if obj.label in df_spots.index
+    ]
+    
     if show_progress:
         desc = 'Measuring spots'
         pbar = tqdm(
-            total=len(rp), ncols=100, desc=desc, position=3, leave=False
+            total=len(expanded_objs), ncols=100, desc=desc, position=3, 
+            leave=False
         )
-    # df_spots_spotfit = df_spots.drop(columns=['spot_mask'], errors='ignore')
-    df_spots_spotfit = df_spots.copy()
-    non_spotfit_cols = df_spots_spotfit.columns.to_list()
-    filtered_spots_info = defaultdict(dict)
-    for obj in rp:
-        if obj.label not in df_spots.index:
-            continue
-        expanded_obj = transformations.get_expanded_obj(obj, delta_tol, lab)
-        df_spots_obj = df_spots_spotfit.loc[obj.label].copy()
-        start_num_spots = len(df_spots_obj)
-        filtered_spots_info[obj.label]['start_num_spots'] = start_num_spots
-        i = 0
-        while True:                
-            kernel.set_args(
-                expanded_obj, 
-                spots_img, 
-                df_spots_obj, 
-                zyx_voxel_size, 
-                zyx_spot_min_vol_um, 
-                xy_center_half_interval_val=xy_center_half_interval_val, 
-                z_center_half_interval_val=z_center_half_interval_val, 
-                sigma_x_min_max_expr=sigma_x_min_max_expr,
-                sigma_y_min_max_expr=sigma_y_min_max_expr,
-                sigma_z_min_max_expr=sigma_z_min_max_expr,
-                A_min_max_expr=A_min_max_expr,
-                B_min_max_expr=B_min_max_expr,
-                sigma_x_guess_expr=sigma_x_guess_expr,
-                sigma_y_guess_expr=sigma_y_guess_expr,
-                sigma_z_guess_expr=sigma_z_guess_expr,
-                A_guess_expr=A_guess_expr,
-                B_guess_expr=B_guess_expr,
+    
+    spotfit_obj_kwargs = {
+        'zyx_voxel_size': zyx_voxel_size, 
+        'zyx_spot_min_vol_um': zyx_spot_min_vol_um,
+        'non_spotfit_cols': non_spotfit_cols,
+        'spots_zyx_radii_pxl': spots_zyx_radii_pxl,
+        'drop_peaks_too_close': drop_peaks_too_close,
+        'custom_combined_measurements': custom_combined_measurements,
+        'xy_center_half_interval_val': xy_center_half_interval_val, 
+        'z_center_half_interval_val': z_center_half_interval_val, 
+        'sigma_x_min_max_expr': sigma_x_min_max_expr,
+        'sigma_y_min_max_expr': sigma_y_min_max_expr,
+        'sigma_z_min_max_expr': sigma_z_min_max_expr,
+        'A_min_max_expr': A_min_max_expr,
+        'B_min_max_expr': B_min_max_expr,
+        'sigma_x_guess_expr': sigma_x_guess_expr,
+        'sigma_y_guess_expr': sigma_y_guess_expr,
+        'sigma_z_guess_expr': sigma_z_guess_expr,
+        'A_guess_expr': A_guess_expr,
+        'B_guess_expr': B_guess_expr,
+        'max_number_pairs_check_merge': max_number_pairs_check_merge,
+        'use_gpu': use_gpu, 
+        'logger_func': logger_func
+    }
+    
+    if num_workers is None or num_workers <= 0:
+        num_workers = os.cpu_count()
+    num_workers = min(num_workers, len(expanded_objs))
+    
+    if num_workers > 1:
+        spotfit_objs_results = _spotfit_objs_parallel(
+            kernel, expanded_objs, spots_img, df_spots_spotfit, 
+            spots_masks_check_merge, ref_ch_mask_or_labels, num_workers, 
+            parallel_backend=parallel_backend, chunksize=chunksize,
+            pbar=pbar if show_progress else None, executor=executor,
+            **spotfit_obj_kwargs
+        )
+    else:
+        spotfit_objs_results = []
+        for expanded_obj in expanded_objs:
+            df_spots_obj = df_spots_spotfit.loc[expanded_obj.label].copy()
+            result = _spotfit_obj(
+                kernel, expanded_obj, spots_img, df_spots_obj,
                 spots_masks_check_merge=spots_masks_check_merge,
-                max_number_pairs_check_merge=max_number_pairs_check_merge,
                 ref_ch_mask_or_labels=ref_ch_mask_or_labels,
-                use_gpu=use_gpu, 
-                logger_func=logger_func, 
-                show_progress=show_progress
+                show_progress=show_progress, 
+                **spotfit_obj_kwargs
             )
-            kernel.fit()
-            prev_num_spots = len(kernel.df_spotFIT_ID)
-            
-            if custom_combined_measurements is not None:
-                kernel.add_custom_combined_features(
-                    **custom_combined_measurements
-                )
-            
-            if i == 0:
-                # Store all features at first iteration
-                dfs_spots_spotfit_iter0.append(kernel.df_spotFIT_ID.copy())
-            
-            if not drop_peaks_too_close: 
-                num_spots = prev_num_spots
-                break
-            
-            df_spotfit = kernel.df_spotFIT_ID
-            
-            fit_coords = df_spotfit[ZYX_FIT_COLS].to_numpy()
-            fit_coords_int = np.round(fit_coords).astype(int)
-            intensities = spots_img[tuple(fit_coords_int.transpose())]
-            
-            valid_fit_coords = filters.filter_valid_points_min_distance(
-                fit_coords, spots_zyx_radii_pxl, intensities=intensities, 
-            )
-            
-            if 'do_not_drop' in df_spotfit.columns:
-                undroppable_coords = (
-                    df_spotfit[df_spotfit['do_not_drop'] > 0]
-                    [ZYX_FIT_COLS].to_numpy()
-                )
-                valid_fit_coords = np.unique(
-                    np.vstack((valid_fit_coords, undroppable_coords)), 
-                    axis=0
-                )
-
-            num_spots = len(valid_fit_coords)
-            if num_spots == prev_num_spots:
-                # All spots are valid --> break loop
-                break
-            
-            if num_spots == 0:
-                kernel.df_spotFIT_ID = kernel.df_spotFIT_ID[0:0]
-                break
-            
-            index_names = kernel.df_spotFIT_ID.index.names
-            filter_zyx_index = pd.MultiIndex.from_arrays(
-                tuple(valid_fit_coords.transpose())
-            )
-            df_spots_obj = (
-                kernel.df_spotFIT_ID.reset_index()
-                .set_index(ZYX_FIT_COLS)
-                .loc[filter_zyx_index]
-                .reset_index()
-                .set_index(index_names)
-                .sort_index()
-                [non_spotfit_cols]
-            )
-            prev_num_spots = num_spots      
-            i += 1
-
-        filtered_spots_info[obj.label]['end_num_spots'] = num_spots
-        filtered_spots_info[obj.label]['num_iter'] = i
-        
-        dfs_spots_spotfit.append(kernel.df_spotFIT_ID)
-        keys.append((frame_i, obj.label))
-        if show_progress:
-            pbar.update()
+            spotfit_objs_results.append(result)
+            if show_progress:
+                pbar.update()
     if show_progress:
         pbar.close()
     
+    filtered_spots_info = defaultdict(dict)
+    for expanded_obj, result in zip(expanded_objs, spotfit_objs_results):
+        df_spotfit_obj, df_spotfit_obj_iter0, obj_filtered_info = result
+        filtered_spots_info[expanded_obj.label] = obj_filtered_info
+        dfs_spots_spotfit.append(df_spotfit_obj)
+        dfs_spots_spotfit_iter0.append(df_spotfit_obj_iter0)
+        keys.append((frame_i, expanded_obj.label))
+    
     _log_filtered_number_spots(
         verbose, frame_i, filtered_spots_info, logger_func, 
         category='valid spots according to spotFIT'
@@ -2354,6 +2385,308 @@ def spotfit(
         )
         return df_spots_spotfit, df_spots_spotfit_iter0
 
+def _spotfit_obj(
+        kernel, 
+        expanded_obj, 
+        spots_img, 
+        df_spots_obj, 
+        zyx_voxel_size=None, 
+        zyx_spot_min_vol_um=None,
+        non_spotfit_cols=None,
+        spots_zyx_radii_pxl=None,
+        drop_peaks_too_close=False,
+        custom_combined_measurements=None,
+        spots_masks_check_merge=None,
+        ref_ch_mask_or_labels=None,
+        spots_img_peaks=None,
+        spots_img_peaks_start=None,
+        show_progress=False,
+        logger_func=print,
+        **set_args_kwargs
+    ):
+    """Run spotFIT on the spots of a single segmented object. See `spotfit` 
+    for details about the parameters.
+
+    `spots_img_peaks` is the image used to read the intensity at the fitted 
+    centers when `drop_peaks_too_close` is True and `spots_img_peaks_start` 
+    are its global (z, y, x) start coordinates. It must contain every 
+    fitted center (see `_crop_spotfit_obj_inputs`). If None, use 
+    `spots_img`, which then must be the full image.
+
+    Returns
+    -------
+    df_spotfit_obj : pandas.DataFrame
+        DataFrame with spotFIT features of the valid spots.
+    df_spotfit_obj_iter0 : pandas.DataFrame
+        DataFrame with spotFIT features of all the input spots.
+    filtered_info : dict
+        Dictionary with the keys 'start_num_spots', 'end_num_spots', and 
+        'num_iter'.
+    """    
+    filtered_info = {'start_num_spots': len(df_spots_obj)}
+    if non_spotfit_cols is None:
+        non_spotfit_cols = df_spots_obj.columns.to_list()
+    
+    i = 0
+    while True:                
+        kernel.set_args(
+            expanded_obj, 
+            spots_img, 
+            df_spots_obj, 
+            zyx_voxel_size, 
+            zyx_spot_min_vol_um, 
+            spots_masks_check_merge=spots_masks_check_merge,
+            ref_ch_mask_or_labels=ref_ch_mask_or_labels,
+            logger_func=logger_func, 
+            show_progress=show_progress,
+            **set_args_kwargs
+        )
+        kernel.fit()
+        prev_num_spots = len(kernel.df_spotFIT_ID)
+        
+        if custom_combined_measurements is not None:
+            kernel.add_custom_combined_features(
+                **custom_combined_measurements
+            )
+        
+        if i == 0:
+            # Store all features at first iteration
+            df_spotfit_obj_iter0 = kernel.df_spotFIT_ID.copy()
+        
+        if not drop_peaks_too_close: 
+            num_spots = prev_num_spots
+            break
+        
+        df_spotfit = kernel.df_spotFIT_ID
+        
+        fit_coords = df_spotfit[ZYX_FIT_COLS].to_numpy()
+        
+        if spots_img_peaks is None:
+            spots_img_peaks = spots_img
+            spots_img_peaks_start = (0, 0, 0)
+        
+        intensities = _get_fitted_peaks_intensities(
+            fit_coords, spots_img_peaks, spots_img_peaks_start
+        )
+        
+        valid_fit_coords = filters.filter_valid_points_min_distance(
+            fit_coords, spots_zyx_radii_pxl, intensities=intensities, 
+        )
+        
+        if 'do_not_drop' in df_spotfit.columns:
+            undroppable_coords = (
+                df_spotfit[df_spotfit['do_not_drop'] > 0]
+                [ZYX_FIT_COLS].to_numpy()
+            )
+            valid_fit_coords = np.unique(
+                np.vstack((valid_fit_coords, undroppable_coords)), 
+                axis=0
+            )
+
+        num_spots = len(valid_fit_coords)
+        if num_spots == prev_num_spots:
+            # All spots are valid --> break loop
+            break
+        
+        if num_spots == 0:
+            kernel.df_spotFIT_ID = kernel.df_spotFIT_ID[0:0]
+            break
+        
+        index_names = kernel.df_spotFIT_ID.index.names
+        filter_zyx_index = pd.MultiIndex.from_arrays(
+            tuple(valid_fit_coords.transpose())
+        )
+        df_spots_obj = (
+            kernel.df_spotFIT_ID.reset_index()
+            .set_index(ZYX_FIT_COLS)
+            .loc[filter_zyx_index]
+            .reset_index()
+            .set_index(index_names)
+            .sort_index()
+            [non_spotfit_cols]
+        )
+        prev_num_spots = num_spots      
+        i += 1
+
+    filtered_info['end_num_spots'] = num_spots
+    filtered_info['num_iter'] = i
+    return kernel.df_spotFIT_ID, df_spotfit_obj_iter0, filtered_info
+
+def _get_fitted_peaks_intensities(
+        fit_coords, spots_img_peaks, spots_img_peaks_start
+    ):
+    # Centers fitted outside of the image (only at the image borders) 
+    # get the intensity of the closest pixel
+    fit_coords_peaks = (
+        np.round(fit_coords).astype(int) - np.array(spots_img_peaks_start)
+    )
+    fit_coords_peaks = np.clip(
+        fit_coords_peaks, 0, np.array(spots_img_peaks.shape)-1
+    )
+    return spots_img_peaks[tuple(fit_coords_peaks.transpose())]
+
+def _crop_spotfit_obj_inputs(
+        expanded_obj, spots_img, spots_masks_check_merge, ref_ch_mask_or_labels,
+        zyx_center_half_interval=(0, 0, 0)
+    ):
+    obj_slice = expanded_obj.slice
+    local_obj = transformations.ExpandedObject(name='ExpandedObject')
+    local_obj.slice = tuple(slice(0, s.stop-s.start) for s in obj_slice)
+    local_obj.label = expanded_obj.label
+    local_obj.crop_obj_start = expanded_obj.crop_obj_start
+    local_obj.image = expanded_obj.image
+    
+    spots_img_local = spots_img[obj_slice]
+    
+    spots_masks_local = None
+    if spots_masks_check_merge is not None:
+        spots_masks_local = spots_masks_check_merge[obj_slice]
+    
+    ref_ch_local = None
+    if ref_ch_mask_or_labels is not None:
+        ref_ch_local = ref_ch_mask_or_labels[obj_slice]
+    
+    # The fitted centers can move outside of the object crop by up to the 
+    # center bounds --> crop a padded image to read the peaks intensities
+    pad = np.ceil(np.abs(zyx_center_half_interval)).astype(int)
+    peaks_start = np.clip(
+        np.array([s.start for s in obj_slice]) - pad, 0, None
+    )
+    peaks_stop = np.clip(
+        np.array([s.stop for s in obj_slice]) + pad, None, spots_img.shape
+    )
+    peaks_slice = tuple(
+        slice(start, stop) for start, stop in zip(peaks_start, peaks_stop)
+    )
+    spots_img_peaks = spots_img[peaks_slice]
+    
+    return (
+        local_obj, spots_img_local, spots_masks_local, ref_ch_local, 
+        spots_img_peaks, peaks_start
+    )
+
+def _spotfit_objs_chunk(objs_inputs, debug=False, **spotfit_obj_kwargs):
+    # Every chunk gets its own SpotFIT instance since `set_args` 
+    # stores the state of the object being fitted
+    kernel = core.SpotFIT(debug=debug)
+    results = []
+    for obj_inputs in objs_inputs:
+        (local_obj, spots_img_local, df_spots_obj, masks_local, ref_ch_local, 
+        spots_img_peaks, peaks_start) = obj_inputs
+        result = _spotfit_obj(
+            kernel, local_obj, spots_img_local, df_spots_obj, 
+            spots_masks_check_merge=masks_local,
+            ref_ch_mask_or_labels=ref_ch_local,
+            spots_img_peaks=spots_img_peaks,
+            spots_img_peaks_start=peaks_start,
+            show_progress=False,
+            **spotfit_obj_kwargs
+        )
+        results.append(result)
+    return results
+
+def get_spotfit_executor(num_workers, parallel_backend='processes'):
+    """Create the pool of workers used by `spotfit` to fit the segmented 
+    objects in parallel. 
+    
+    Pass the returned executor to `spotfit` (argument `executor`) to reuse 
+    the same workers for every frame and Position, and shut it down with 
+    `executor.shutdown()` at the end of the analysis.
+
+    Parameters
+    ----------
+    num_workers : int
+        Number of parallel workers. If 0 or less, use as many workers as the 
+        number of CPU cores available.
+    parallel_backend : {'processes', 'threads'}, optional
+        Type of worker pool. Default is 'processes'
+
+    Returns
+    -------
+    concurrent.futures.Executor
+        The pool of workers. The processes are started with the 'spawn' 
+        method because forking after numba started its threading layer 
+        (e.g., with `numba.set_num_threads`) makes the interpreter hang 
+        at exit.
+    """
+    if num_workers is None or num_workers <= 0:
+        num_workers = os.cpu_count()
+    
+    if parallel_backend == 'processes':
+        return ProcessPoolExecutor(
+            max_workers=num_workers, 
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    
+    if parallel_backend == 'threads':
+        return ThreadPoolExecutor(max_workers=num_workers)
+    
+    raise TypeError(
+        f'"{parallel_backend}" is not a valid parallel backend. '
+        'Valid backends are "processes" and "threads".'
+    )
+
+def _spotfit_objs_parallel(
+        kernel, expanded_objs, spots_img, df_spots_spotfit, 
+        spots_masks_check_merge, ref_ch_mask_or_labels, num_workers, 
+        parallel_backend='processes', chunksize=None, pbar=None,
+        executor=None, **spotfit_obj_kwargs
+    ):
+    if executor is None:
+        with get_spotfit_executor(num_workers, parallel_backend) as executor:
+            return _spotfit_objs_parallel(
+                kernel, expanded_objs, spots_img, df_spots_spotfit, 
+                spots_masks_check_merge, ref_ch_mask_or_labels, num_workers, 
+                parallel_backend=parallel_backend, chunksize=chunksize, 
+                pbar=pbar, executor=executor, **spotfit_obj_kwargs
+            )
+    
+    if isinstance(executor, ProcessPoolExecutor):
+        # Loggers cannot be reliably shared with other processes
+        spotfit_obj_kwargs['logger_func'] = print
+    
+    if chunksize is None:
+        chunksize = math.ceil(len(expanded_objs)/(num_workers*4))
+    chunksize = max(1, chunksize)
+    
+    zyx_center_half_interval = (
+        spotfit_obj_kwargs.get('z_center_half_interval_val', 0),
+        spotfit_obj_kwargs.get('xy_center_half_interval_val', 0),
+        spotfit_obj_kwargs.get('xy_center_half_interval_val', 0),
+    )
+    objs_inputs = []
+    for expanded_obj in expanded_objs:
+        (local_obj, spots_img_local, masks_local, ref_ch_local, 
+        spots_img_peaks, peaks_start) = _crop_spotfit_obj_inputs(
+            expanded_obj, spots_img, spots_masks_check_merge, 
+            ref_ch_mask_or_labels, 
+            zyx_center_half_interval=zyx_center_half_interval
+        )
+        df_spots_obj = df_spots_spotfit.loc[expanded_obj.label].copy()
+        objs_inputs.append((
+            local_obj, spots_img_local, df_spots_obj, masks_local, 
+            ref_ch_local, spots_img_peaks, peaks_start
+        ))
+    
+    chunks = [
+        objs_inputs[i:i+chunksize] 
+        for i in range(0, len(objs_inputs), chunksize)
+    ]
+    debug = getattr(kernel, 'debug', False)
+    results = []
+    futures = [
+        executor.submit(
+            _spotfit_objs_chunk, chunk, debug=debug, **spotfit_obj_kwargs
+        ) 
+        for chunk in chunks
+    ]
+    # Gather in submission order to preserve the order of the objects
+    for chunk, future in zip(chunks, futures):
+        results.extend(future.result())
+        if pbar is not None:
+            pbar.update(len(chunk))
+    return results
+
 def filter_spots_from_features_thresholds(
         df_features: pd.DataFrame, 
         features_thresholds: dict, 
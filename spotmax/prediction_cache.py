@@ -0,0 +1,445 @@
+"""On-disk cache of the outputs of the neural network models (SpotMAX AI,
+BioImage.IO models, and Spotiflow).
+
+Entries are content-addressed, i.e., the key is the hash of the input image,
+of the model (initialization parameters and weights files), and of the
+parameters passed to the `segment` method. The outputs are stored
+compressed and the least recently used entries are deleted when the cache
+exceeds its maximum size.
+
+Inspect and purge the cache from the command line with
+`spotmax_prediction_cache info` and `spotmax_prediction_cache purge`.
+"""
+import os
+import time
+import hashlib
+import argparse
+import tempfile
+
+import numpy as np
+
+from . import spotmax_appdata_path, printl
+
+prediction_cache_path = os.path.join(spotmax_appdata_path, 'prediction_cache')
+
+ENTRY_EXT = '.npz'
+TEMP_ENTRY_EXT = f'{ENTRY_EXT}.tmp'
+HASH_CHUNK_SIZE = 2**20
+
+def _hash_file(filepath, hasher):
+    with open(filepath, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+
+def _hash_path(path, hasher):
+    if os.path.isfile(path):
+        _hash_file(path, hasher)
+        return
+
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for file in sorted(files):
+            filepath = os.path.join(root, file)
+            hasher.update(os.path.relpath(filepath, path).encode())
+            _hash_file(filepath, hasher)
+
+def params_to_str(params):
+    if isinstance(params, dict):
+        items = sorted(params.items(), key=lambda item: str(item[0]))
+        return repr([(str(key), params_to_str(val)) for key, val in items])
+    return repr(params)
+
+def get_model_weights_paths(model, init_params=None):
+    """Get the paths of the files that define the weights of the model
+
+    Parameters
+    ----------
+    model : object
+        Initialized model (SpotMAX AI, BioImage.IO, or Spotiflow model)
+    init_params : dict, optional
+        Parameters used to initialize the model. Any parameter value that
+        is an existing file or folder is considered a weights path.
+        Default is None
+
+    Returns
+    -------
+    list of str
+        Paths of the weights files or folders.
+    """
+    paths = []
+    if init_params is not None:
+        for value in init_params.values():
+            if not isinstance(value, str) or not value:
+                continue
+            path = os.path.expanduser(value)
+            if os.path.exists(path):
+                paths.append(path)
+
+    # SpotMAX AI: weights are defined in the YAML configuration file
+    model_config = getattr(model, '_config', None)
+    if isinstance(model_config, dict):
+        try:
+            model_paths = (
+                model_config['unet2D']['model']['best_model_path'],
+                model_config['unet3D']['predict']['model_path']
+            )
+        except Exception as err:
+            model_paths = ()
+        for model_path in model_paths:
+            model_path = os.path.expanduser(model_path)
+            if os.path.exists(model_path):
+                paths.append(model_path)
+
+    return sorted(set(paths))
+
+def get_model_hash(model, init_params=None):
+    """Hash of the model class, initialization parameters and weights
+
+    Parameters
+    ----------
+    model : object
+        Initialized model (SpotMAX AI, BioImage.IO, or Spotiflow model)
+    init_params : dict, optional
+        Parameters used to initialize the model. Default is None
+
+    Returns
+    -------
+    str
+        Hexadecimal hash
+    """
+    hasher = hashlib.blake2b(digest_size=20)
+    model_class = type(model)
+    hasher.update(f'{model_class.__module__}.{model_class.__name__}'.encode())
+    if init_params is not None:
+        hasher.update(params_to_str(init_params).encode())
+    for path in get_model_weights_paths(model, init_params=init_params):
+        hasher.update(path.encode())
+        _hash_path(path, hasher)
+    return hasher.hexdigest()
+
+def get_entry_key(image, model_hash, segment_kwargs=None):
+    """Key of the cache entry (hexadecimal hash)
+
+    Parameters
+    ----------
+    image : numpy.ndarray
+        Input image of the model
+    model_hash : str
+        Hash of the model (see `get_model_hash`)
+    segment_kwargs : dict, optional
+        Keyword arguments passed to the `segment` method of the model.
+        Default is None
+
+    Returns
+    -------
+    str
+        Hexadecimal hash
+    """
+    image = np.ascontiguousarray(image)
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(model_hash.encode())
+    hasher.update(f'{image.dtype.str}{image.shape}'.encode())
+    hasher.update(image.data)
+    if segment_kwargs is not None:
+        hasher.update(params_to_str(segment_kwargs).encode())
+    return hasher.hexdigest()
+
+class PredictionCache:
+    """Size-bounded on-disk cache with least recently used (LRU) eviction
+
+    Parameters
+    ----------
+    cache_folderpath : os.PathLike, optional
+        Folder where the entries are stored. Default is
+        `~/spotmax_appdata/prediction_cache`
+    max_size_GB : float, optional
+        Maximum size of the cache in GB. Default is 10.0
+    
+    Notes
+    -----
+    The size of the cache is scanned from disk only once and then updated 
+    in memory at every `put`. The entries are scanned again only when the 
+    size exceeds the maximum size (see `evict`), which also accounts for 
+    the entries written by other processes.
+    """
+    def __init__(
+            self, cache_folderpath=prediction_cache_path, max_size_GB=10.0
+        ):
+        self.cache_folderpath = cache_folderpath
+        self.max_size_bytes = int(max_size_GB*1e9)
+        os.makedirs(cache_folderpath, exist_ok=True)
+        # Running total of the size of the cache in bytes (None = unknown)
+        self._size_bytes = None
+
+    def _entry_filepath(self, key):
+        return os.path.join(self.cache_folderpath, f'{key}{ENTRY_EXT}')
+
+    def entries(self):
+        """Get the entries stored in the cache
+
+        Returns
+        -------
+        list of (str, int, float) tuples
+            List of (filepath, size in bytes, last access time) sorted from
+            the least recently used entry
+        """
+        entries = []
+        for entry in os.scandir(self.cache_folderpath):
+            if not entry.name.endswith(ENTRY_EXT):
+                continue
+            stat = entry.stat()
+            entries.append((entry.path, stat.st_size, stat.st_mtime))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def size(self):
+        """Total size of the cache in bytes"""
+        self._size_bytes = sum([size for _, size, _ in self.entries()])
+        return self._size_bytes
+
+    def get(self, key):
+        """Get the output stored in the cache
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry (see `get_entry_key`)
+
+        Returns
+        -------
+        None, numpy.ndarray, or tuple of numpy.ndarray
+            None if the entry is not in the cache
+        """
+        filepath = self._entry_filepath(key)
+        try:
+            with np.load(filepath) as npz:
+                is_tuple = bool(npz['is_tuple'])
+                num_outputs = int(npz['num_outputs'])
+                outputs = [npz[f'output_{i}'] for i in range(num_outputs)]
+        except Exception as err:
+            return
+
+        # The modification time is used as the last access time
+        try:
+            os.utime(filepath)
+        except Exception as err:
+            pass
+
+        if is_tuple:
+            return tuple(outputs)
+        return outputs[0]
+
+    def put(self, key, output):
+        """Store the output in the cache and evict the least recently used
+        entries if the cache is larger than its maximum size.
+        
+        The size of the cache is tracked in memory, so that the entries are 
+        scanned only when the maximum size is exceeded.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry (see `get_entry_key`)
+        output : numpy.ndarray or tuple of numpy.ndarray
+            Output of the `segment` method of the model
+        """
+        is_tuple = isinstance(output, tuple)
+        outputs = output if is_tuple else (output,)
+        arrays = {f'output_{i}': np.asarray(out) for i, out in enumerate(outputs)}
+
+        if self._size_bytes is None:
+            self.size()
+        
+        filepath = self._entry_filepath(key)
+        try:
+            # Entry is overwritten --> its size is replaced
+            prev_entry_size = os.path.getsize(filepath)
+        except Exception as err:
+            prev_entry_size = 0
+        
+        # Write to a temporary file first so that parallel processes never
+        # read partially written entries. The temporary suffix is skipped by
+        # `entries` so that size scans and evictions ignore these files
+        fd, temp_filepath = tempfile.mkstemp(
+            suffix=TEMP_ENTRY_EXT, dir=self.cache_folderpath
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(
+                    f, is_tuple=is_tuple, num_outputs=len(outputs), **arrays
+                )
+            entry_size = os.path.getsize(temp_filepath)
+            os.replace(temp_filepath, filepath)
+        except Exception as err:
+            if os.path.exists(temp_filepath):
+                os.remove(temp_filepath)
+            raise err
+        
+        self._size_bytes += entry_size - prev_entry_size
+        if self._size_bytes > self.max_size_bytes:
+            self.evict()
+
+    def evict(self, max_size_bytes=None):
+        """Delete the least recently used entries until the cache size is
+        lower than `max_size_bytes`
+
+        Parameters
+        ----------
+        max_size_bytes : int, optional
+            If None, uses the maximum size of the cache. Default is None
+
+        Returns
+        -------
+        int
+            Number of deleted entries
+        """
+        if max_size_bytes is None:
+            max_size_bytes = self.max_size_bytes
+
+        entries = self.entries()
+        total_size = sum([size for _, size, _ in entries])
+        num_deleted = 0
+        for filepath, size, _ in entries:
+            if total_size <= max_size_bytes:
+                break
+            try:
+                os.remove(filepath)
+            except Exception as err:
+                continue
+            total_size -= size
+            num_deleted += 1
+        
+        self._size_bytes = total_size
+        return num_deleted
+
+    def purge(self, older_than_days=None):
+        """Delete entries from the cache
+
+        Parameters
+        ----------
+        older_than_days : float, optional
+            If not None, delete only the entries that were not accessed in
+            the last `older_than_days` days. Default is None
+
+        Returns
+        -------
+        int
+            Number of deleted entries
+        """
+        now = time.time()
+        num_deleted = 0
+        for filepath, _, last_access in self.entries():
+            if older_than_days is not None:
+                if (now - last_access) < older_than_days*86400:
+                    continue
+            try:
+                os.remove(filepath)
+            except Exception as err:
+                continue
+            num_deleted += 1
+        
+        # Size is scanned again at the next `put`
+        self._size_bytes = None
+        return num_deleted
+
+class CachedModel:
+    """Wrap a model so that the outputs of its `segment` method are read
+    from the prediction cache when available. All other attributes are
+    forwarded to the wrapped model.
+
+    Parameters
+    ----------
+    model : object
+        Initialized model (SpotMAX AI, BioImage.IO, or Spotiflow model)
+    cache : PredictionCache
+        The prediction cache
+    init_params : dict, optional
+        Parameters used to initialize the model. Default is None
+    """
+    def __init__(self, model, cache, init_params=None):
+        self.model = model
+        self.cache = cache
+        self.model_hash = get_model_hash(model, init_params=init_params)
+
+    def __getattr__(self, name):
+        if name == 'model':
+            # Avoid infinite recursion when `model` is not set yet 
+            # (e.g., while unpickling)
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def segment(self, image, **segment_kwargs):
+        key = get_entry_key(image, self.model_hash, segment_kwargs)
+        output = self.cache.get(key)
+        if output is not None:
+            return output
+
+        output = self.model.segment(image, **segment_kwargs)
+        try:
+            self.cache.put(key, output)
+        except Exception as err:
+            printl(f'[WARNING]: Prediction could not be cached ({err})')
+        return output
+
+def _format_size(size_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size_bytes < 1000:
+            return f'{size_bytes:.1f} {unit}'
+        size_bytes /= 1000
+    return f'{size_bytes:.1f} TB'
+
+def cli_parser():
+    ap = argparse.ArgumentParser(
+        prog='spotmax_prediction_cache',
+        description='Inspect and purge the SpotMAX prediction cache.'
+    )
+    ap.add_argument(
+        'command',
+        choices=['info', 'purge'],
+        help=(
+            '`info` prints location, number of entries, and size of the '
+            'cache. `purge` deletes the entries.'
+        )
+    )
+    ap.add_argument(
+        '-f', '--cache_folderpath',
+        default=prediction_cache_path,
+        type=str,
+        metavar='CACHE_FOLDERPATH',
+        help=f'Folder of the cache. Default is "{prediction_cache_path}"'
+    )
+    ap.add_argument(
+        '--older_than_days',
+        default=None,
+        type=float,
+        help=(
+            'Purge only the entries that were not used in the last '
+            'OLDER_THAN_DAYS days'
+        )
+    )
+    return vars(ap.parse_args())
+
+def run():
+    args = cli_parser()
+    cache = PredictionCache(cache_folderpath=args['cache_folderpath'])
+    if args['command'] == 'purge':
+        num_deleted = cache.purge(older_than_days=args['older_than_days'])
+        print(f'Deleted {num_deleted} entries from "{cache.cache_folderpath}"')
+        return
+
+    entries = cache.entries()
+    total_size = sum([size for _, size, _ in entries])
+    print(f'Location: "{cache.cache_folderpath}"')
+    print(f'Number of entries: {len(entries)}')
+    print(f'Total size: {_format_size(total_size)}')
+    if entries:
+        oldest = time.strftime('%Y-%m-%d %H:%M', time.localtime(entries[0][2]))
+        newest = time.strftime('%Y-%m-%d %H:%M', time.localtime(entries[-1][2]))
+        print(f'Least recently used entry: {oldest}')
+        print(f'Most recently used entry: {newest}')
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,368 @@
+"""Experiment-level store of the results tables (SQLite database).
+
+When enabled, every analysed Position appends its spots and aggregated
+tables to a single database file per experiment and run number, saved in
+`<experiment_folder>/spotMAX_output`. The tables are indexed on
+(Position, frame_i, Cell_ID), so that statistics across Positions do not
+require opening the per-Position files.
+
+Example
+-------
+>>> from spotmax import results_store
+>>> store = results_store.ResultsStore(filepath)
+>>> df = store.query(
+...     'spots_gop',
+...     features_thresholds={'spot_vs_backgr_effect_size_glass': (0.8, None)}
+... )
+"""
+import os
+import sqlite3
+import datetime
+from contextlib import contextmanager
+
+import pandas as pd
+from natsort import natsorted
+
+STORE_FILENAME = '*rn*_results_store*desc*.db'
+INDEX_COLUMNS = ('Position', 'frame_i', 'Cell_ID')
+
+def get_results_store_filepath(exp_path, run_number, text_to_append=''):
+    """Get the path of the results store of an experiment
+
+    Parameters
+    ----------
+    exp_path : os.PathLike
+        Path of the experiment folder containing the Position folders
+    run_number : int
+        Run number of the analysis
+    text_to_append : str, optional
+        Text appended at the end of the output files. Default is ''
+
+    Returns
+    -------
+    str
+        Path of the .db file in `<exp_path>/spotMAX_output`
+    """
+    if text_to_append and not text_to_append.startswith('_'):
+        text_to_append = f'_{text_to_append}'
+    filename = STORE_FILENAME.replace('*rn*', str(run_number))
+    filename = filename.replace('*desc*', text_to_append)
+    return os.path.join(exp_path, 'spotMAX_output', filename)
+
+def _quote(name):
+    name = str(name).replace('"', '""')
+    return f'"{name}"'
+
+def _sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def _to_sql_values(series):
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.tolist()
+
+    # Text columns: missing values to NULL and everything else to string
+    return [
+        None if pd.isna(value) else str(value)
+        for value in series.to_numpy(dtype=object)
+    ]
+
+class ResultsStore:
+    """SQLite database with the results tables of one experiment and run
+
+    Parameters
+    ----------
+    filepath : os.PathLike
+        Path of the .db file (see `get_results_store_filepath`). The parent
+        folder is created if it does not exist.
+    timeout : float, optional
+        Seconds to wait for other processes (e.g., Positions analysed in
+        parallel) to release the lock on the database. Default is 60.0
+    """
+    def __init__(self, filepath, timeout=60.0):
+        self.filepath = filepath
+        self.timeout = timeout
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+
+    @contextmanager
+    def connect(self):
+        """Context manager that commits the transaction (or rolls it back 
+        if an error is raised) and closes the connection"""
+        con = sqlite3.connect(self.filepath, timeout=self.timeout)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def tables(self):
+        """Names of the tables stored in the database"""
+        with self.connect() as con:
+            rows = con.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "ORDER BY name"
+            ).fetchall()
+        # Tables starting with '_' are used internally
+        return [row[0] for row in rows if not row[0].startswith('_')]
+
+    def columns(self, table):
+        """Names of the columns of `table`"""
+        self._check_table(table)
+        with self.connect() as con:
+            return self._columns(con, table)
+
+    def _columns(self, con, table):
+        rows = con.execute(f'PRAGMA table_info({_quote(table)})').fetchall()
+        return [row[1] for row in rows]
+
+    def _check_table(self, table):
+        if table not in self.tables():
+            raise KeyError(
+                f'Table "{table}" is not in the results store. '
+                f'Available tables are {self.tables()}'
+            )
+
+    def positions(self, table=None):
+        """Names of the Position folders stored in the database
+
+        Parameters
+        ----------
+        table : str, optional
+            If not None, return only the Positions stored in `table`. 
+            Default is None
+        """
+        query = 'SELECT DISTINCT Position FROM _positions_saved'
+        params = ()
+        if table is not None:
+            self._check_table(table)
+            query = f'{query} WHERE table_name = ?'
+            params = (table,)
+        with self.connect() as con:
+            try:
+                rows = con.execute(query, params).fetchall()
+            except sqlite3.OperationalError as err:
+                # Nothing saved yet
+                rows = []
+        return natsorted([row[0] for row in rows])
+
+    def append(self, table, df, position):
+        """Add the rows of one Position to `table`. Existing rows of the
+        same Position are replaced (e.g., when the Position is re-analysed).
+
+        Parameters
+        ----------
+        table : str
+            Name of the table (e.g., 'spots_gop' or 'agg_gop')
+        df : pd.DataFrame
+            Table with 'frame_i' and 'Cell_ID' either as columns or as levels
+            of the index
+        position : str
+            Name of the Position folder (e.g., 'Position_1')
+        """
+        if df.index.names != [None]:
+            df = df.reset_index()
+        df = df.drop(columns='Position', errors='ignore')
+        df.insert(0, 'Position', position)
+
+        with self.connect() as con:
+            # Lock the database for writing before reading the schema
+            con.execute('BEGIN IMMEDIATE')
+            self._create_or_update_table(con, table, df)
+            con.execute(
+                f'DELETE FROM {_quote(table)} WHERE Position = ?', (position,)
+            )
+            if not df.empty:
+                cols = ', '.join([_quote(col) for col in df.columns])
+                placeholders = ', '.join(['?']*len(df.columns))
+                values = zip(*[_to_sql_values(df[col]) for col in df.columns])
+                con.executemany(
+                    f'INSERT INTO {_quote(table)} ({cols}) '
+                    f'VALUES ({placeholders})',
+                    values
+                )
+            con.execute(
+                'INSERT OR REPLACE INTO _positions_saved '
+                '(table_name, Position, num_rows, date_saved) '
+                'VALUES (?, ?, ?, ?)',
+                (table, position, len(df), datetime.datetime.now().isoformat())
+            )
+
+    def _create_or_update_table(self, con, table, df):
+        con.execute(
+            'CREATE TABLE IF NOT EXISTS _positions_saved ('
+            'table_name TEXT, Position TEXT, num_rows INTEGER, '
+            'date_saved TEXT, PRIMARY KEY (table_name, Position))'
+        )
+        existing_cols = self._columns(con, table)
+        if not existing_cols:
+            cols_defs = ', '.join([
+                f'{_quote(col)} {_sql_type(dtype)}'
+                for col, dtype in df.dtypes.items()
+            ])
+            con.execute(f'CREATE TABLE {_quote(table)} ({cols_defs})')
+            index_cols = [col for col in INDEX_COLUMNS if col in df.columns]
+            index_name = f'idx_{table}_' + '_'.join(index_cols)
+            con.execute(
+                f'CREATE INDEX {_quote(index_name)} ON {_quote(table)} '
+                f'({", ".join([_quote(col) for col in index_cols])})'
+            )
+            return
+
+        # Features requested in the new analysis might be missing in the
+        # table saved by previous Positions
+        for col, dtype in df.dtypes.items():
+            if col in existing_cols:
+                continue
+            con.execute(
+                f'ALTER TABLE {_quote(table)} '
+                f'ADD COLUMN {_quote(col)} {_sql_type(dtype)}'
+            )
+
+    def query(
+            self, table, columns=None, features_thresholds=None,
+            positions=None, frames=None, where='', params=(),
+            index_col=('Position', 'frame_i', 'Cell_ID')
+        ):
+        """Load the rows of `table` that satisfy the conditions
+
+        Parameters
+        ----------
+        table : str
+            Name of the table (e.g., 'spots_gop' or 'agg_gop')
+        columns : list of str, optional
+            Columns to load in addition to `index_col`. If None, load all
+            the columns. Default is None
+        features_thresholds : dict, optional
+            Dictionary of `{feature_name: (min, max)}` where `None` indicates
+            the absence of minimum or maximum, as in
+            `filters.filter_df_from_features_thresholds`. All the conditions
+            must be satisfied. Default is None
+        positions : list of str, optional
+            Load only these Positions. Default is None
+        frames : list of int, optional
+            Load only these frames. Default is None
+        where : str, optional
+            Additional SQL condition with `?` placeholders, for example
+            `'spot_id < ?'`. Default is ''
+        params : tuple, optional
+            Values of the `?` placeholders in `where`. Default is ()
+        index_col : tuple of str, optional
+            Columns set as index of the returned DataFrame.
+            Default is ('Position', 'frame_i', 'Cell_ID')
+
+        Returns
+        -------
+        pd.DataFrame
+            The selected rows
+        """
+        self._check_table(table)
+        table_cols = self.columns(table)
+        index_col = [col for col in index_col if col in table_cols]
+
+        if columns is None:
+            select = '*'
+        else:
+            select_cols = index_col + [
+                col for col in columns if col not in index_col
+            ]
+            self._check_columns(table, select_cols, table_cols)
+            select = ', '.join([_quote(col) for col in select_cols])
+
+        conditions = []
+        values = []
+        if features_thresholds is not None:
+            self._check_columns(table, features_thresholds, table_cols)
+            for feature_name, (_min, _max) in features_thresholds.items():
+                if _min is not None:
+                    conditions.append(f'{_quote(feature_name)} > ?')
+                    values.append(_min)
+                if _max is not None:
+                    conditions.append(f'{_quote(feature_name)} < ?')
+                    values.append(_max)
+
+        for col, selection in (('Position', positions), ('frame_i', frames)):
+            if selection is None:
+                continue
+            selection = list(selection)
+            placeholders = ', '.join(['?']*len(selection))
+            conditions.append(f'{_quote(col)} IN ({placeholders})')
+            values.extend(selection)
+
+        if where:
+            conditions.append(f'({where})')
+            values.extend(params)
+
+        query = f'SELECT {select} FROM {_quote(table)}'
+        if conditions:
+            query = f'{query} WHERE {" AND ".join(conditions)}'
+
+        df = self.sql(query, params=values)
+        if index_col:
+            df = df.set_index(index_col)
+        return df
+
+    def _check_columns(self, table, columns, table_cols):
+        missing_cols = [col for col in columns if col not in table_cols]
+        if missing_cols:
+            raise KeyError(
+                f'The columns {missing_cols} are not in the table "{table}"'
+            )
+
+    def sql(self, query, params=()):
+        """Run a SQL query and return the result as a DataFrame
+
+        Parameters
+        ----------
+        query : str
+            SQL query with `?` placeholders
+        params : tuple, optional
+            Values of the `?` placeholders. Default is ()
+
+        Returns
+        -------
+        pd.DataFrame
+            Result of the query
+        """
+        with self.connect() as con:
+            df = pd.read_sql_query(query, con, params=list(params))
+        return df
+
+def append_position_results(
+        exp_path, position, run_number, dfs, text_to_append=''
+    ):
+    """Append the tables of one Position to the results store of the
+    experiment
+
+    Parameters
+    ----------
+    exp_path : os.PathLike
+        Path of the experiment folder containing the Position folder
+    position : str
+        Name of the Position folder (e.g., 'Position_1')
+    run_number : int
+        Run number of the analysis
+    dfs : dict of {str: pd.DataFrame}
+        Tables to store where the keys are the names of the tables
+        (e.g., 'spots_gop' or 'agg_gop'). None values are ignored.
+    text_to_append : str, optional
+        Text appended at the end of the output files. Default is ''
+
+    Returns
+    -------
+    str
+        Path of the results store
+    """
+    filepath = get_results_store_filepath(
+        exp_path, run_number, text_to_append=text_to_append
+    )
+    store = ResultsStore(filepath)
+    for table, df in dfs.items():
+        if df is None:
+            continue
+        store.append(table, df, position)
+    return filepath
@@ -150,6 +150,82 @@ def expand_labels(label_image, distance=1, zyx_vox_size=None):
     labels_out[dilate_mask] = nearest_labels
     return labels_out
 
+def get_distance_footprint_offsets(distance, zyx_vox_size):
+    """Get the (z, y, x) offsets of the voxels whose physical distance from 
+    the origin is lower or equal than `distance` (origin excluded)
+
+    Parameters
+    ----------
+    distance : float
+        Maximum distance in physical units
+    zyx_vox_size : (3,) sequence of floats
+        Voxel size along each dimension
+
+    Returns
+    -------
+    (N, 3) numpy.ndarray of ints
+        Offsets within `distance`. This is the footprint of `expand_labels` 
+        with the same `distance` and `zyx_vox_size`.
+    """
+    zyx_vox_size = np.asarray(zyx_vox_size, dtype=np.float64)
+    radii = np.floor(distance/zyx_vox_size).astype(int)
+    ranges = [np.arange(-r, r+1) for r in radii]
+    offsets = np.stack(
+        np.meshgrid(*ranges, indexing='ij'), axis=-1
+    ).reshape(-1, len(radii))
+    dist = np.sqrt(np.sum(np.square(offsets*zyx_vox_size), axis=1))
+    offsets = offsets[(dist <= distance) & np.any(offsets != 0, axis=1)]
+    return offsets
+
+def get_touching_labels_pairs(lab, distance=1, zyx_vox_size=None):
+    """Get the pairs of labels that are within `distance` from each other 
+    with a single pass over the volume.
+
+    Two labels (a, b) are touching if any voxel of `b` is in the expansion 
+    of `a` with `expand_labels(lab==a, distance, zyx_vox_size)`.
+
+    Parameters
+    ----------
+    lab : (Z, Y, X) numpy.ndarray of ints
+        Labels array
+    distance : float, optional
+        Maximum distance in physical units. Default is 1
+    zyx_vox_size : (3,) sequence of floats, optional
+        Voxel size along each dimension. If None, isotropic voxels of size 
+        1 are used. Default is None
+
+    Returns
+    -------
+    (N, 2) numpy.ndarray of ints
+        Unique pairs of touching labels. Both (a, b) and (b, a) are returned.
+    """
+    if zyx_vox_size is None:
+        zyx_vox_size = (1,)*lab.ndim
+    
+    offsets = get_distance_footprint_offsets(distance, zyx_vox_size)
+    pairs = [np.zeros((0, 2), dtype=lab.dtype)]
+    for offset in offsets:
+        src_slice = []
+        dst_slice = []
+        for o in offset:
+            if o >= 0:
+                src_slice.append(slice(0, -o if o > 0 else None))
+                dst_slice.append(slice(o, None))
+            else:
+                src_slice.append(slice(-o, None))
+                dst_slice.append(slice(0, o))
+        src = lab[tuple(src_slice)]
+        dst = lab[tuple(dst_slice)]
+        touching_mask = (src != dst) & (src > 0) & (dst > 0)
+        if not np.any(touching_mask):
+            continue
+        offset_pairs = np.column_stack(
+            (src[touching_mask], dst[touching_mask])
+        )
+        pairs.append(np.unique(offset_pairs, axis=0))
+    pairs = np.unique(np.concatenate(pairs), axis=0)
+    return pairs
+
 def get_aggregate_obj_slice(
         obj, max_h_top, max_height, max_h_bottom, max_d_fwd, max_depth, 
         max_d_back, img_data_shape, dx=0
@@ -196,77 +272,6 @@ def get_aggregate_obj_slice(
     )
     return obj_slice
 
-def _aggregate_objs(
-        img_data, lab, zyx_tolerance=None, debug=False, 
-        return_x_slice_idxs=False
-    ):
-    # Add tolerance based on resolution limit
-    if zyx_tolerance is not None:
-        dz, dy, dx = zyx_tolerance
-    else:
-        dz, dy, dx = 0, 0, 0
-
-    # Get max height and total width
-    rp_merged = skimage.measure.regionprops(lab)
-    tot_width = 0
-    max_height = 0
-    max_depth = 0
-    for obj in rp_merged:
-        d, h, w = obj.image.shape
-        d, h, w = d+dz, h+dy, w+dx
-        if h > max_height:
-            max_height = h
-        if d > max_depth:
-            max_depth = d
-        tot_width += w
-
-    Z, Y, X = lab.shape
-    if max_depth > Z:
-        max_depth = Z
-    if max_height > Y:
-        max_height = Y
-    
-    if return_x_slice_idxs:
-        x_slice_idxs = []
-    
-    # Aggregate data horizontally by slicing object centered at 
-    # centroid and using largest object as slicing box
-    aggr_shape = (max_depth, max_height, tot_width)
-    max_h_top = int(max_height/2)
-    max_h_bottom = max_height-max_h_top
-    max_d_fwd = int(max_depth/2)
-    max_d_back = max_depth-max_d_fwd
-    aggregated_img = np.zeros(aggr_shape, dtype=img_data.dtype)
-    aggregated_img[:] = aggregated_img.min()
-    aggregated_lab = np.zeros(aggr_shape, dtype=lab.dtype)
-    last_w = 0
-    excess_width = 0
-    for obj in rp_merged:
-        w = obj.image.shape[-1] + dx
-        obj_slice = get_aggregate_obj_slice(
-            obj, max_h_top, max_height, max_h_bottom, max_d_fwd, max_depth, 
-            max_d_back, img_data.shape, dx=dx
-        )
-        obj_width = obj_slice[-1].stop - obj_slice[-1].start
-        excess_width += w - obj_width
-        slice_x_end = last_w+obj_width
-        aggregated_img[:, :, last_w:slice_x_end] = img_data[obj_slice]
-        obj_lab = lab[obj_slice].copy()
-        obj_lab[obj_lab != obj.label] = 0
-        aggregated_lab[:, :, last_w:slice_x_end] = obj_lab
-        last_w += obj_width
-        if return_x_slice_idxs:
-            x_slice_idxs.append(slice_x_end)
-    if excess_width > 0:
-        # Trim excess width result of adding dx to all objects
-        aggregated_img = aggregated_img[..., :-excess_width]
-        aggregated_lab = aggregated_lab[..., :-excess_width]
-    
-    if return_x_slice_idxs:
-        return aggregated_img, aggregated_lab, x_slice_idxs
-    else:
-        return aggregated_img, aggregated_lab
-
 def _merge_moth_bud(lineage_table, lab, return_bud_images=False):
     if lineage_table is None:
         if return_bud_images:
@@ -315,29 +320,229 @@ def _separate_moth_buds(lab_merged, bud_images):
         lab_merged[obj.slice][bud_image] = budID
     return lab_merged
 
+class AggregationPlan:
+    """Geometry of the aggregation of the objects in `lab` into a single 
+    image where the objects are placed side-by-side along the x-axis.
+
+    The slices of each object in the input image and in the aggregated 
+    image are computed only once and they can be applied to any number of 
+    images (e.g., spots channel, reference channel, neural network input) 
+    with `aggregate`. The reverse mapping is done with `deaggregate`.
+
+    Parameters
+    ----------
+    lab : (Z, Y, X) numpy.ndarray of ints
+        Segmentation masks of the objects to aggregate (e.g., single cells)
+    zyx_tolerance : (3,) sequence of ints, optional
+        Number of pixels added to each object along each dimension. 
+        Default is None
+    lineage_table : pandas.DataFrame, optional
+        If not None, buds are aggregated together with their mother. 
+        Default is None
+    separate_buds : bool, optional
+        If True, the buds in the aggregated segmentation masks are separated 
+        from the mother. Default is True
+    """
+    def __init__(
+            self, lab, zyx_tolerance=None, lineage_table=None, 
+            separate_buds=True
+        ):
+        self.lab = lab
+        lab_merged, bud_images = _merge_moth_bud(
+            lineage_table, lab, return_bud_images=True
+        )
+        self._init_slices(lab_merged, zyx_tolerance)
+        aggregated_lab = self.aggregate(lab_merged, mask_IDs=True)
+        if separate_buds:
+            aggregated_lab = _separate_moth_buds(aggregated_lab, bud_images)
+        self.aggregated_lab = aggregated_lab
+        self._rp = None
+        self._aggr_rp = None
+        self._deaggr_slices = {}
+    
+    def _init_slices(self, lab_merged, zyx_tolerance):
+        if zyx_tolerance is not None:
+            dz, dy, dx = zyx_tolerance
+        else:
+            dz, dy, dx = 0, 0, 0
+        
+        # Get max height and max depth
+        rp_merged = skimage.measure.regionprops(lab_merged)
+        max_height = 0
+        max_depth = 0
+        for obj in rp_merged:
+            d, h, w = obj.image.shape
+            max_height = max(max_height, h+dy)
+            max_depth = max(max_depth, d+dz)
+        
+        Z, Y, X = lab_merged.shape
+        max_depth = min(max_depth, Z)
+        max_height = min(max_height, Y)
+        
+        # Slice objects centered at centroid and using largest object 
+        # as slicing box
+        max_h_top = int(max_height/2)
+        max_h_bottom = max_height-max_h_top
+        max_d_fwd = int(max_depth/2)
+        max_d_back = max_depth-max_d_fwd
+        self.IDs = []
+        self.obj_slices = []
+        self.aggr_x_slices = []
+        self.x_slice_idxs = []
+        last_w = 0
+        for obj in rp_merged:
+            obj_slice = get_aggregate_obj_slice(
+                obj, max_h_top, max_height, max_h_bottom, max_d_fwd, 
+                max_depth, max_d_back, lab_merged.shape, dx=dx
+            )
+            obj_width = obj_slice[-1].stop - obj_slice[-1].start
+            slice_x_end = last_w+obj_width
+            self.IDs.append(obj.label)
+            self.obj_slices.append(obj_slice)
+            self.aggr_x_slices.append(slice(last_w, slice_x_end))
+            self.x_slice_idxs.append(slice_x_end)
+            last_w = slice_x_end
+        
+        self.shape = (max_depth, max_height, last_w)
+    
+    def aggregate(self, img_data, out=None, mask_IDs=False):
+        """Aggregate `img_data` into a (max_depth, max_height, total_width) 
+        image.
+
+        Parameters
+        ----------
+        img_data : (Z, Y, X) numpy.ndarray
+            Image with the same shape as the `lab` used to create the plan
+        out : numpy.ndarray, optional
+            If not None, pre-allocated output array with shape `self.shape`. 
+            Default is None
+        mask_IDs : bool, optional
+            If True, `img_data` is a labels array and the pixels that do not 
+            belong to the sliced object are set to 0. Default is False
+
+        Returns
+        -------
+        numpy.ndarray
+            Aggregated image
+        """
+        if out is None:
+            out = np.zeros(self.shape, dtype=img_data.dtype)
+        
+        for ID, obj_slice, aggr_x_slice in zip(
+                self.IDs, self.obj_slices, self.aggr_x_slices
+            ):
+            aggr_obj_img = out[..., aggr_x_slice]
+            aggr_obj_img[:] = img_data[obj_slice]
+            if mask_IDs:
+                aggr_obj_img[aggr_obj_img != ID] = 0
+        return out
+    
+    def aggregate_many(self, imgs):
+        """Aggregate multiple images. Items that are None are returned as 
+        None
+        """
+        return [None if img is None else self.aggregate(img) for img in imgs]
+    
+    @property
+    def rp(self):
+        if self._rp is None:
+            self._rp = skimage.measure.regionprops(self.lab)
+        return self._rp
+    
+    @property
+    def aggr_rp(self):
+        if self._aggr_rp is None:
+            self._aggr_rp = {
+                aggr_obj.label:aggr_obj for aggr_obj in 
+                skimage.measure.regionprops(self.aggregated_lab)
+            }
+        return self._aggr_rp
+    
+    def deaggregate_slices(self, delta_expand=None):
+        """Return list of (obj_slice, aggr_obj_slice) used to index the 
+        aggregated image into the input image (see `deaggregate_img`)
+        """
+        key = None if delta_expand is None else tuple(delta_expand)
+        slices = self._deaggr_slices.get(key)
+        if slices is not None:
+            return slices
+        
+        slices = []
+        for obj in self.rp:
+            aggr_obj = self.aggr_rp[obj.label]
+            if delta_expand is not None:
+                obj_slice, _ = get_expanded_obj_slice(
+                    obj, delta_expand, self.lab
+                )
+                aggr_obj_slice, _ = get_expanded_obj_slice(
+                    aggr_obj, delta_expand, self.aggregated_lab
+                )
+                obj_slice, aggr_obj_slice = equalize_two_obj_slices(
+                    obj_slice, aggr_obj_slice
+                )
+            else:
+                obj_slice = obj.slice
+                aggr_obj_slice = aggr_obj.slice
+            slices.append((obj_slice, aggr_obj_slice))
+        self._deaggr_slices[key] = slices
+        return slices
+    
+    def deaggregate(self, aggr_img, delta_expand=None, out=None):
+        """Index the aggregated image `aggr_img` into an image with the same 
+        shape as the input `lab` (see `deaggregate_img`)
+        """
+        if out is None:
+            out = np.zeros(self.lab.shape, dtype=aggr_img.dtype)
+        
+        for obj_slice, aggr_obj_slice in self.deaggregate_slices(delta_expand):
+            deaggr_img_sliced = out[obj_slice]
+            deaggr_zero_mask = deaggr_img_sliced==0
+            deaggr_img_sliced[deaggr_zero_mask] = (
+                aggr_img[aggr_obj_slice][deaggr_zero_mask]
+            )
+        return out
+
+class DeaggregationPlan(AggregationPlan):
+    """Reverse mapping of an `AggregationPlan` for aggregated images that 
+    were not created with a plan (e.g., pre-aggregated images). The region 
+    properties of `lab` and `aggregated_lab` are computed only once.
+    """
+    def __init__(self, lab, aggregated_lab):
+        self.lab = lab
+        self.aggregated_lab = aggregated_lab
+        self._rp = None
+        self._aggr_rp = None
+        self._deaggr_slices = {}
+    
+    @property
+    def aggr_rp(self):
+        if self._aggr_rp is not None:
+            return self._aggr_rp
+        
+        if self.aggregated_lab is self.lab:
+            aggr_rp = self.rp
+        else:
+            aggr_rp = skimage.measure.regionprops(self.aggregated_lab)
+        self._aggr_rp = {aggr_obj.label:aggr_obj for aggr_obj in aggr_rp}
+        return self._aggr_rp
+
 def aggregate_objs(
         img_data, lab, zyx_tolerance=None, return_bud_images=True, 
         additional_imgs_to_aggr=None, lineage_table=None, debug=False, 
-        return_x_slice_idxs=False
+        return_x_slice_idxs=False, aggr_plan=None
     ):
-    lab_merged, bud_images = _merge_moth_bud(
-        lineage_table, lab, return_bud_images=return_bud_images
-    )
-        
-    aggregated_img, aggregated_lab, x_slice_idxs = _aggregate_objs(
-        img_data, lab_merged, zyx_tolerance=zyx_tolerance, debug=debug, 
-        return_x_slice_idxs=True
-    )
+    if aggr_plan is None:
+        aggr_plan = AggregationPlan(
+            lab, zyx_tolerance=zyx_tolerance, lineage_table=lineage_table, 
+            separate_buds=return_bud_images
+        )
+    
+    aggregated_img = aggr_plan.aggregate(img_data)
+    aggregated_lab = aggr_plan.aggregated_lab
     if additional_imgs_to_aggr is not None:
-        additional_aggr_imgs = []
-        for _img in additional_imgs_to_aggr:
-            if _img is None:
-                additional_aggr_imgs.append(None)
-                continue
-            additional_aggr_img, _ = _aggregate_objs(
-                _img, lab_merged, zyx_tolerance=zyx_tolerance, debug=debug
-            )
-            additional_aggr_imgs.append(additional_aggr_img)
+        additional_aggr_imgs = aggr_plan.aggregate_many(
+            additional_imgs_to_aggr
+        )
     else:
         additional_aggr_imgs = [None]
     
@@ -346,10 +551,8 @@ def aggregate_objs(
     #     imshow(aggregated_img, aggregated_lab)
     #     import pdb; pdb.set_trace()
     
-    aggregated_lab = _separate_moth_buds(
-        aggregated_lab, bud_images
-    )
     if return_x_slice_idxs:
+        x_slice_idxs = aggr_plan.x_slice_idxs
         return aggregated_img, aggregated_lab, additional_aggr_imgs, x_slice_idxs
     else:
         return aggregated_img, aggregated_lab, additional_aggr_imgs
@@ -483,36 +686,16 @@ def crop_from_segm_data_info(segm_data, delta_tolerance, lineage_table=None):
     return segm_slice, pad_widths, crop_to_global_coords
 
 def deaggregate_img(
-        aggr_img, aggregated_lab, lab, delta_expand=None, debug=False
+        aggr_img, aggregated_lab, lab, delta_expand=None, debug=False, 
+        aggr_plan=None
     ):
-    deaggr_img = np.zeros(lab.shape, dtype=aggr_img.dtype)
-    rp = skimage.measure.regionprops(lab)
-    aggr_rp = skimage.measure.regionprops(aggregated_lab)
-    aggr_rp = {aggr_obj.label:aggr_obj for aggr_obj in aggr_rp}
-    for obj in rp:
-        aggr_obj = aggr_rp[obj.label]
-        if delta_expand is not None:
-            obj_slice, _ = get_expanded_obj_slice(obj, delta_expand, lab)
-            aggr_obj_slice, _ = get_expanded_obj_slice(
-                aggr_obj, delta_expand, aggregated_lab
-            )
-            obj_slice, aggr_obj_slice = equalize_two_obj_slices(
-                obj_slice, aggr_obj_slice
-            )
-        else:
-            obj_slice = obj.slice
-            aggr_obj_slice = aggr_obj.slice
-        
-        deaggr_img_sliced = deaggr_img[obj_slice]
-        deaggr_zero_mask = deaggr_img_sliced==0
-        deaggr_img_sliced[deaggr_zero_mask] = (
-            aggr_img[aggr_obj_slice][deaggr_zero_mask]
-        )
-    return deaggr_img
+    if aggr_plan is None:
+        aggr_plan = DeaggregationPlan(lab, aggregated_lab)
+    return aggr_plan.deaggregate(aggr_img, delta_expand=delta_expand)
 
 def index_aggregated_segm_into_input_lab(
         lab, aggregated_segm, aggregated_lab, x_slice_idxs,
-        keep_objects_touching_lab_intact=False
+        keep_objects_touching_lab_intact=False, aggr_plan=None
     ):     
     """Reshape aggregated segmentation into original shape (`lab`)
 
@@ -532,6 +715,10 @@ def index_aggregated_segm_into_input_lab(
         intact even if they extend outside of the object. If False, the 
         part of the touching object that extends outside is removed. 
         Default is False
+    aggr_plan : AggregationPlan, optional
+        If not None, the plan used to aggregate `lab` into `aggregated_lab`. 
+        Its cached region properties are used instead of recomputing them. 
+        Default is None
 
     Returns
     -------
@@ -541,10 +728,10 @@ def index_aggregated_segm_into_input_lab(
         `lab`.
     """           
     subobj_labels = np.zeros_like(lab)
-    rp = skimage.measure.regionprops(lab)
-    obj_idxs = {obj.label:obj for obj in rp}
-    aggr_rp = skimage.measure.regionprops(aggregated_lab)
-    aggr_obj_idxs = {aggr_obj.label:aggr_obj for aggr_obj in aggr_rp}
+    if aggr_plan is None:
+        aggr_plan = DeaggregationPlan(lab, aggregated_lab)
+    obj_idxs = {obj.label:obj for obj in aggr_plan.rp}
+    aggr_obj_idxs = aggr_plan.aggr_rp
     if not keep_objects_touching_lab_intact:
         aggregated_segm[aggregated_lab == 0] = False
     
@@ -885,6 +1072,9 @@ def normalise_img(
     else:
         _norm_value = norm_value
     norm_img = img/_norm_value
+    if np.issubdtype(img.dtype, np.floating):
+        # Preserve input precision (e.g., float32)
+        norm_img = norm_img.astype(img.dtype, copy=False)
     return norm_img, norm_value
 
 def from_spots_coords_arr_to_df(spots_coords, lab):
@@ -935,21 +1125,16 @@ def from_spots_coords_to_spots_masks(spots_coords, spot_zyx_size, debug=False):
     ]
     return spots_masks
 
-def from_df_spots_objs_to_spots_lab(
+def _iter_spots_objs_masks(
         df_spots_objs: pd.DataFrame, 
         arr_shape, 
-        spots_lab=None, 
         show_pbar=False,
         spot_mask_size_colname=None
     ):
-    debug = False
-    
-    if spots_lab is None:
-        spots_lab = np.zeros(arr_shape, dtype=np.uint32)
-    
-    if spots_lab.ndim == 2:
-        spots_lab = spots_lab[np.newaxis]
-    
+    """Iterate the spots in the order they are painted into the labels array 
+    and yield `(spot_id, slice_global_to_local, cropped_spot_mask)` 
+    (see `get_slices_local_into_global_3D_arr`)
+    """
     is_spot_mask_size_feature = (
         spot_mask_size_colname is not None 
         and not spot_mask_size_colname.startswith('custom_')
@@ -996,12 +1181,134 @@ def from_df_spots_objs_to_spots_lab(
             zyx_center, arr_shape, spot_mask.shape
         )
         slice_global_to_local, slice_crop_local = slices
-        cropped_spot_mask = spot_mask[slice_crop_local].copy()
-        spots_lab[slice_global_to_local][cropped_spot_mask] = spot_id
+        cropped_spot_mask = spot_mask[slice_crop_local]
+        yield spot_id, slice_global_to_local, cropped_spot_mask
         if show_pbar:
             pbar.update()
     if show_pbar:
         pbar.close()
+
+def from_df_spots_objs_to_spots_lab(
+        df_spots_objs: pd.DataFrame, 
+        arr_shape, 
+        spots_lab=None, 
+        show_pbar=False,
+        spot_mask_size_colname=None
+    ):
+    debug = False
+    
+    if spots_lab is None:
+        spots_lab = np.zeros(arr_shape, dtype=np.uint32)
+    
+    if spots_lab.ndim == 2:
+        spots_lab = spots_lab[np.newaxis]
+    
+    spots_objs_masks = _iter_spots_objs_masks(
+        df_spots_objs, arr_shape, show_pbar=show_pbar, 
+        spot_mask_size_colname=spot_mask_size_colname
+    )
+    for spot_id, slice_global_to_local, cropped_spot_mask in spots_objs_masks:
+        spots_lab[slice_global_to_local][cropped_spot_mask] = spot_id
+    return spots_lab
+
+def from_df_spots_objs_to_spots_lab_rle(
+        df_spots_objs: pd.DataFrame, 
+        arr_shape, 
+        spot_mask_size_colname=None
+    ):
+    """Run-length encoding (RLE) of the spots labels array returned by 
+    `from_df_spots_objs_to_spots_lab` without allocating the dense array
+
+    Parameters
+    ----------
+    df_spots_objs : pd.DataFrame
+        Spots table of a single frame with ('Cell_ID', 'spot_id') as index 
+        (see `from_df_spots_objs_to_spots_lab`)
+    arr_shape : tuple
+        Shape (Z, Y, X) or (Y, X) of the labels array
+    spot_mask_size_colname : str, optional
+        See `from_df_spots_objs_to_spots_lab`. Default is None
+
+    Returns
+    -------
+    tuple of three 1D numpy.ndarrays
+        `(starts, lengths, values)` where `starts` are the indices of the 
+        first voxel of the runs in the flattened labels array, `lengths` 
+        the number of voxels, and `values` the spot_id of the runs.
+    """
+    if len(arr_shape) == 2:
+        arr_shape = (1, *arr_shape)
+    
+    spots_objs_masks = _iter_spots_objs_masks(
+        df_spots_objs, arr_shape, 
+        spot_mask_size_colname=spot_mask_size_colname
+    )
+    flat_idxs = []
+    flat_values = []
+    for spot_id, slice_global_to_local, cropped_spot_mask in spots_objs_masks:
+        local_coords = np.nonzero(cropped_spot_mask)
+        global_coords = tuple(
+            coords + _slice.start for coords, _slice 
+            in zip(local_coords, slice_global_to_local)
+        )
+        flat_idxs.append(np.ravel_multi_index(global_coords, arr_shape))
+        flat_values.append(
+            np.full(len(local_coords[0]), spot_id, dtype=np.uint32)
+        )
+    
+    if not flat_idxs:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0, dtype=np.uint32)
+    
+    # Spots painted later overwrite the previous ones --> keep the last 
+    # occurrence of each voxel (np.unique also sorts the indices)
+    flat_idxs = np.concatenate(flat_idxs)[::-1]
+    flat_values = np.concatenate(flat_values)[::-1]
+    flat_idxs, unique_idxs = np.unique(flat_idxs, return_index=True)
+    flat_values = flat_values[unique_idxs]
+    
+    # A new run starts where the voxels are not contiguous or the value changes
+    is_run_start = np.ones(len(flat_idxs), dtype=bool)
+    is_run_start[1:] = (
+        (np.diff(flat_idxs) != 1) | (np.diff(flat_values.astype(np.int64)) != 0)
+    )
+    run_starts_idxs = np.flatnonzero(is_run_start)
+    starts = flat_idxs[run_starts_idxs]
+    lengths = np.diff(np.append(run_starts_idxs, len(flat_idxs)))
+    values = flat_values[run_starts_idxs]
+    return starts, lengths, values
+
+def from_spots_lab_rle_to_spots_lab(
+        starts, lengths, values, arr_shape, spots_lab=None
+    ):
+    """Decode the run-length encoding returned by 
+    `from_df_spots_objs_to_spots_lab_rle` into the dense labels array
+
+    Parameters
+    ----------
+    starts, lengths, values : 1D numpy.ndarrays
+        Run-length encoding (see `from_df_spots_objs_to_spots_lab_rle`)
+    arr_shape : tuple
+        Shape of the labels array
+    spots_lab : numpy.ndarray, optional
+        If not None, the runs are written into this array. Default is None
+
+    Returns
+    -------
+    numpy.ndarray
+        Labels array with shape `arr_shape`
+    """
+    if spots_lab is None:
+        spots_lab = np.zeros(arr_shape, dtype=np.uint32)
+    
+    lengths = np.asarray(lengths, dtype=np.int64)
+    run_offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    flat_idxs = (
+        np.repeat(np.asarray(starts, dtype=np.int64), lengths)
+        + np.arange(lengths.sum()) - run_offsets
+    )
+    flat_values = np.repeat(values, lengths)
+    spots_lab[np.unravel_index(flat_idxs, spots_lab.shape)] = flat_values
     return spots_lab
 
 def add_closest_ID_col(
@@ -4,7 +4,6 @@ import pandas as pd
 import datetime
 import time
 import difflib
-import cv2
 import logging
 import traceback
 from importlib import import_module
@@ -789,6 +788,8 @@ def mergeChannels(channel1_img, channel2_img, color, alpha):
     return merge
 
 def objContours(obj):
+    import cv2
+    
     contours, _ = cv2.findContours(
         obj.image.astype(np.uint8), cv2.RETR_EXTERNAL,
         cv2.CHAIN_APPROX_NONE
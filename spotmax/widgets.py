@@ -809,7 +809,43 @@ def _refChThresholdFuncWidget():
 
 def _dfSpotsFileExtensionsWidget(parent=None):
     widget = myQComboBox(parent)
-    items = ['.h5', '.csv']
+    items = ['.h5', '.csv', '.parquet']
+    widget.addItems(items)
+    return widget
+
+def _spotsMasksFormatWidget(parent=None):
+    widget = myQComboBox(parent)
+    items = ['dense', 'sparse']
+    widget.addItems(items)
+    return widget
+
+def _spotfitParallelBackendWidget(parent=None):
+    widget = myQComboBox(parent)
+    items = ['processes', 'threads']
+    widget.addItems(items)
+    return widget
+
+def _imagesOutputFileFormatWidget(parent=None):
+    widget = myQComboBox(parent)
+    items = ['default', '.h5']
+    widget.addItems(items)
+    return widget
+
+def _imagesOutputCompressionWidget(parent=None):
+    widget = myQComboBox(parent)
+    items = list(io.H5_COMPRESSIONS)
+    widget.addItems(items)
+    return widget
+
+def _imagesOutputChunksWidget(parent=None):
+    widget = myQComboBox(parent)
+    items = list(io.H5_CHUNKS)
+    widget.addItems(items)
+    return widget
+
+def _floatPrecisionWidget(parent=None):
+    widget = myQComboBox(parent)
+    items = ['float32', 'float64']
     widget.addItems(items)
     return widget
 
@@ -0,0 +1,57 @@
+# Test the analytic Jacobian of the gaussian model used by spotFIT.
+
+import numpy as np
+import pytest
+
+from spotmax import core
+
+NUM_COEFFS = 7 # z0, y0, x0, sz, sy, sx, A (per spot) + shared background B
+
+def _random_problem(rng, num_spots):
+    zz, yy, xx = np.meshgrid(
+        np.arange(7), np.arange(13), np.arange(13), indexing='ij'
+    )
+    z, y, x = zz.ravel().astype(float), yy.ravel(), xx.ravel()
+    coeffs = []
+    for _ in range(num_spots):
+        z0, y0, x0 = rng.uniform((2, 4, 4), (4, 8, 8))
+        sz, sy, sx = rng.uniform((0.8, 1.0, 1.0), (2.0, 3.0, 3.0))
+        A = rng.uniform(0.5, 5.0)
+        coeffs.extend([z0, y0, x0, sz, sy, sx, A])
+    coeffs.append(rng.uniform(0.0, 0.5)) # B
+    coeffs = np.array(coeffs)
+    data = rng.normal(1.0, 0.2, size=len(z))
+    return z, y, x, coeffs, data
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('num_spots', [1, 3])
+@pytest.mark.parametrize('fixed_coeffs', [False, True])
+def test_jacobian_matches_finite_differences(seed, num_spots, fixed_coeffs):
+    rng = np.random.default_rng(seed)
+    z, y, x, coeffs, data = _random_problem(rng, num_spots)
+    model = core.GaussianModel()
+    model.pbar = None
+    
+    const_coeffs = np.full(len(coeffs), np.nan)
+    if fixed_coeffs:
+        # Fix sz of every spot and the background (equal bounds)
+        for i in range(num_spots):
+            const_coeffs[i*NUM_COEFFS+3] = coeffs[i*NUM_COEFFS+3]
+        const_coeffs[-1] = coeffs[-1]
+    variable_coeffs = coeffs[np.isnan(const_coeffs)]
+    
+    # Contribution of neighbouring spots that are not fitted
+    const = 0.1*np.exp(-((y - 2.0)**2 + (x - 10.0)**2)/8)
+    
+    args = (data, z, y, x, num_spots, NUM_COEFFS, const_coeffs)
+    jac = model.jacobian(variable_coeffs, *args, const=const)
+    jac_fd = model.finite_diff_jacobian(variable_coeffs, *args, const=const)
+    
+    assert jac.shape == (len(z), len(variable_coeffs))
+    scale = np.abs(jac_fd).max()
+    np.testing.assert_allclose(jac, jac_fd, rtol=0, atol=1e-6*scale)
+    
+    max_rel_diff, is_valid = model.check_jacobian(
+        variable_coeffs, *args, const=const
+    )
+    assert is_valid, max_rel_diff
@@ -0,0 +1,112 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+import skimage.filters
+import skimage.measure
+
+from spotmax import filters, transformations
+
+def _get_bimodal_values(dtype, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate([
+        rng.normal(100, 10, 5000), rng.normal(200, 20, 1000)
+    ])
+    if np.issubdtype(dtype, np.integer):
+        values = np.clip(values, 0, np.iinfo(dtype).max)
+    return values.astype(dtype)
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize(
+    'dtype', [np.float64, np.float32, np.uint16, np.uint8]
+)
+@pytest.mark.parametrize(
+    'method', filters.HistogramThresholds.SUPPORTED_METHODS
+)
+def test_histogram_thresholds_equal_skimage(method, dtype, seed):
+    values = _get_bimodal_values(dtype, seed=seed)
+    
+    thresh_val = filters.HistogramThresholds(values).threshold(method)
+    expected_thresh_val = getattr(skimage.filters, method)(values)
+    
+    assert np.asarray(thresh_val).dtype == np.asarray(expected_thresh_val).dtype
+    assert np.isclose(thresh_val, expected_thresh_val, rtol=1e-6, atol=0)
+
+def test_threshold_values_shared_histogram():
+    values = _get_bimodal_values(np.float32)
+    threshold_funcs = {
+        method: getattr(skimage.filters, method) 
+        for method in filters.HistogramThresholds.SUPPORTED_METHODS
+    }
+    threshold_funcs['custom'] = lambda vals: np.median(vals)
+    
+    thresh_vals = filters.threshold_values(values, threshold_funcs)
+    
+    for method, threshold_func in threshold_funcs.items():
+        expected_thresh_val = threshold_func(values)
+        assert np.isclose(
+            thresh_vals[method], expected_thresh_val, rtol=1e-6, atol=0
+        )
+
+def _get_objects_image(seed=0):
+    rng = np.random.default_rng(seed)
+    lab = np.zeros((6, 40, 60), dtype=np.uint32)
+    lab[1:4, 5:20, 5:25] = 1
+    lab[2:6, 22:38, 8:30] = 2
+    lab[0:3, 10:30, 35:55] = 3
+    image = rng.normal(100, 10, size=lab.shape)
+    image[rng.random(lab.shape) > 0.9] += 80
+    return image.astype(np.float32), lab
+
+@pytest.mark.parametrize('do_max_proj', [False, True])
+def test_threshold_values_per_object_equal_single_objects(do_max_proj):
+    image, lab = _get_objects_image()
+    threshold_funcs = filters._get_threshold_funcs(try_all=True)
+    zyx_tolerance = (1, 2, 2)
+    
+    df_thresh_vals = filters.threshold_values_per_object(
+        image, lab, threshold_funcs, do_max_proj=do_max_proj, 
+        zyx_tolerance=zyx_tolerance
+    )
+    
+    slicer = transformations.SliceImageFromSegmObject(
+        lab, zyx_tolerance=zyx_tolerance
+    )
+    for obj in skimage.measure.regionprops(lab):
+        img_obj, lab_mask_lab, obj_slice, _ = slicer.slice(image, obj)
+        input_vals = filters._get_threshold_input_vals(
+            img_obj, do_max_proj=do_max_proj, 
+            mask=lab_mask_lab[obj_slice] > 0
+        )
+        expected_thresh_vals = filters.threshold_values(
+            input_vals, threshold_funcs
+        )
+        for method, expected_thresh_val in expected_thresh_vals.items():
+            assert np.isclose(
+                df_thresh_vals.at[obj.label, method], expected_thresh_val, 
+                rtol=1e-6, atol=0
+            )
+
+def test_local_semantic_segmentation_batched_thresholds():
+    image, lab = _get_objects_image()
+    kwargs = dict(zyx_tolerance=(1, 2, 2), do_max_proj=True)
+    
+    # Without lineage table the thresholds of all objects are batched
+    result = filters.local_semantic_segmentation(image, lab, **kwargs)
+    
+    # A lineage table of G1 cells only slices the same single objects but 
+    # thresholds them one by one
+    IDs = np.unique(lab[lab > 0])
+    lineage_table = pd.DataFrame({
+        'Cell_ID': IDs, 
+        'cell_cycle_stage': 'G1', 
+        'relationship': 'mother', 
+        'relative_ID': -1
+    }).set_index('Cell_ID')
+    expected_result = filters.local_semantic_segmentation(
+        image, lab, lineage_table=lineage_table, **kwargs
+    )
+    
+    assert result.keys() == expected_result.keys()
+    for method, expected_labels in expected_result.items():
+        np.testing.assert_array_equal(result[method], expected_labels)
@@ -0,0 +1,63 @@
+import os
+
+import numpy as np
+import h5py
+import pytest
+
+from spotmax import core, io
+
+def _save_h5(filepath, data):
+    with h5py.File(filepath, 'w') as h5f:
+        h5f.create_dataset('data', data=data)
+
+def test_lazy_h5_image_data_close(tmp_path):
+    filepath = os.path.join(tmp_path, 'image.h5')
+    img_data = np.random.default_rng(0).random((3, 4, 5))
+    _save_h5(filepath, img_data)
+    
+    lazy_data = io.load_image_data(filepath, to_float=True, lazy=True)
+    assert np.allclose(lazy_data[1], img_data[1])
+    
+    lazy_data.close()
+    assert not lazy_data._data._file
+    
+    # Closing twice is allowed
+    lazy_data.close()
+    
+    # The file can be overwritten once it is closed
+    _save_h5(filepath, img_data[:2])
+    
+    with io.load_image_data(filepath, to_float=True, lazy=True) as lazy_data:
+        h5f = lazy_data._data._file
+        assert len(lazy_data) == 2
+        assert np.allclose(lazy_data[0], img_data[0])
+    
+    assert not h5f
+
+@pytest.mark.parametrize(
+    'chunks_option, expected_chunks', 
+    [('frame', (1, 3, 8, 9)), ('z-slice', (1, 1, 8, 9))]
+)
+def test_nnet_pred_map_h5_chunks(tmp_path, chunks_option, expected_chunks):
+    kernel = core.Kernel.__new__(core.Kernel)
+    kernel._params = {'Configuration': {
+        'imagesOutputFileFormat': {'loadedVal': '.h5'},
+        'imagesOutputCompression': {'loadedVal': 'gzip'},
+        'imagesOutputChunks': {'loadedVal': chunks_option},
+    }}
+    spots_ch = np.random.default_rng(0).random((2, 3, 8, 9))
+    data = {
+        'spots_ch': spots_ch,
+        'spots_ch.filepath': os.path.join(tmp_path, 'spots.tif'),
+        'basename': 'test_',
+        'pad_width': None
+    }
+    
+    with kernel._init_nnet_pred_map(data, 'spots', 1) as writer:
+        for frame_i, pred_map in enumerate(spots_ch):
+            writer[frame_i] = pred_map
+    
+    with h5py.File(writer.filepath, 'r') as h5f:
+        assert h5f['data'].chunks == expected_chunks
+        assert h5f['data'].compression == 'gzip'
+        assert np.array_equal(h5f['data'][:], spots_ch)
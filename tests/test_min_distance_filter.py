@@ -0,0 +1,64 @@
+import pytest
+
+import numpy as np
+
+from spotmax import filters
+
+def _brute_force_valid_points_mask(points, min_distance):
+    # Greedy suppression: a point is valid if it is not inside the 
+    # ellipsoid of any previous valid point
+    valid_points_mask = np.ones(len(points), dtype=bool)
+    for i, point in enumerate(points):
+        for j in range(i):
+            if not valid_points_mask[j]:
+                continue
+            dist = np.sum(np.square((point - points[j])/min_distance))
+            if dist < 1:
+                valid_points_mask[i] = False
+                break
+    return valid_points_mask
+
+def _get_random_points(rng, num_points, shape):
+    # Integer coordinates so that many pairs are exactly at min_distance
+    return np.column_stack([
+        rng.integers(0, size, size=num_points) for size in shape
+    ])
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize(
+    'shape, min_distance', [
+        ((40, 40), (3, 3)),
+        ((40, 40), (2, 4)),
+        ((8, 30, 30), (1, 3, 3)),
+        ((8, 30, 30), (2, 4, 4)),
+    ]
+)
+def test_filter_valid_points_min_distance_equals_brute_force(
+        seed, shape, min_distance
+    ):
+    rng = np.random.default_rng(seed)
+    points = _get_random_points(rng, 300, shape)
+    intensities = rng.integers(0, 20, size=len(points)).astype(float)
+    min_distance = np.array(min_distance)
+    
+    valid_points, valid_points_mask = filters.filter_valid_points_min_distance(
+        points, min_distance, intensities=intensities, 
+        return_valid_points_mask=True
+    )
+    
+    sorted_points = points[np.flip(intensities.argsort())]
+    expected_mask = _brute_force_valid_points_mask(sorted_points, min_distance)
+    
+    assert np.array_equal(valid_points_mask, expected_mask)
+    assert np.array_equal(valid_points, sorted_points[expected_mask])
+
+def test_filter_valid_points_min_distance_ties():
+    # Points exactly at min_distance are not too close
+    points = np.array([[0, 0, 0], [0, 0, 3], [0, 3, 0], [1, 0, 0], [0, 2, 2]])
+    min_distance = np.array([1, 3, 3])
+    
+    valid_points = filters.filter_valid_points_min_distance(
+        points, min_distance
+    )
+    
+    assert np.array_equal(valid_points, points[[0, 1, 2, 3]])
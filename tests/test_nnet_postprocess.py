@@ -0,0 +1,49 @@
+# Test thresholding and resizing the prediction map of the neural network.
+
+import numpy as np
+import pytest
+import skimage.measure
+import skimage.transform
+
+from spotmax.nnet import model
+
+def _get_model(threshold_value=0.5):
+    # Post-processing does not need the network. `Model` is a torch module 
+    # when torch is installed --> initialise the base class
+    nnet_model = model.Model.__new__(model.Model)
+    model.ModuleBase.__init__(nnet_model)
+    nnet_model._threshold_value = threshold_value
+    return nnet_model
+
+@pytest.mark.parametrize('orig_yx_shape', [(16, 16), (20, 24)])
+@pytest.mark.parametrize('label_components', [False, True])
+def test_postprocess_prediction_per_slice(orig_yx_shape, label_components):
+    rng = np.random.default_rng(0)
+    prediction = rng.random((3, 16, 16))
+    pad_width = ((0, 0), (0, 2), (0, 3))
+    padded_prediction = np.pad(prediction, pad_width)
+    nnet_model = _get_model()
+
+    lab, prediction_out = nnet_model._postprocess_prediction(
+        padded_prediction, pad_width, orig_yx_shape, label_components,
+        return_pred=True
+    )
+
+    expected_thresh = np.array([
+        skimage.transform.resize(prediction_z > 0.5, orig_yx_shape)
+        for prediction_z in prediction
+    ])
+    expected_prediction = np.array([
+        skimage.transform.resize(prediction_z, orig_yx_shape)
+        for prediction_z in prediction
+    ])
+    if label_components:
+        expected_thresh = skimage.measure.label(expected_thresh)
+    np.testing.assert_array_equal(lab, expected_thresh)
+    np.testing.assert_array_equal(prediction_out, expected_prediction)
+
+    # 2D prediction maps give 2D outputs
+    lab_2D = nnet_model._postprocess_prediction(
+        prediction[0], None, orig_yx_shape, False
+    )
+    np.testing.assert_array_equal(lab_2D, expected_thresh[0] > 0)
@@ -0,0 +1,88 @@
+# Test that the ONNX Runtime backend gives the same segmentation as the
+# PyTorch backend with small randomly initialised networks (the pre-trained
+# weights are not needed).
+
+import os
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+pytest.importorskip('onnxruntime')
+pytest.importorskip('pytorch3dunet')
+yaml = pytest.importorskip('yaml')
+
+from spotmax import io
+from spotmax.nnet import onnx_backend
+from spotmax.nnet.models.unet2D.unet_2D_model import UNet2D
+from spotmax.nnet.models.unet3D.unet3d.model import get_model
+
+def _write_small_models_config(tmp_path):
+    config = onnx_backend._load_config()
+
+    unet2D_config = config['unet2D']['model']
+    unet2D_config['best_model_path'] = os.path.join(
+        tmp_path, 'unet2D', 'unet_best.pth'
+    )
+
+    unet3D_config = config['unet3D']['predict']
+    unet3D_config['model_path'] = os.path.join(
+        tmp_path, 'unet3D', 'best_checkpoint.pytorch'
+    )
+    unet3D_config['model']['f_maps'] = [4, 8]
+    unet3D_config['loaders']['num_workers'] = 0
+    slice_builder_config = unet3D_config['loaders']['test']['slice_builder']
+    slice_builder_config['patch_shape'] = [16, 32, 32]
+    slice_builder_config['stride_shape'] = [8, 16, 16]
+
+    torch.manual_seed(0)
+    net2D = UNet2D(
+        n_channels=unet2D_config['n_channels'],
+        n_classes=unet2D_config['n_classes'],
+        bilinear=unet2D_config['bilinear']
+    )
+    os.makedirs(os.path.dirname(unet2D_config['best_model_path']))
+    torch.save(net2D.state_dict(), unet2D_config['best_model_path'])
+
+    net3D = get_model(unet3D_config['model'])
+    os.makedirs(os.path.dirname(unet3D_config['model_path']))
+    torch.save(
+        {'model_state_dict': net3D.state_dict()}, unet3D_config['model_path']
+    )
+
+    config_yaml_filepath = os.path.join(tmp_path, 'config.yaml')
+    with open(config_yaml_filepath, 'w') as f:
+        yaml.safe_dump(config, f)
+    return config_yaml_filepath, config['base_pixel_size_nm']
+
+@pytest.mark.parametrize(
+    'model_type, image_shape', [('2D', (3, 64, 64)), ('3D', (20, 40, 40))]
+)
+def test_onnx_backend_equals_pytorch(
+        tmp_path, monkeypatch, model_type, image_shape
+    ):
+    # The random networks replace the pre-trained models
+    monkeypatch.setattr(io, 'download_unet_models', lambda: None)
+    config_yaml_filepath, base_pixel_size_nm = _write_small_models_config(
+        tmp_path
+    )
+    onnx_backend.export_to_onnx(
+        model_type=model_type, config_yaml_filepath=config_yaml_filepath
+    )
+    max_abs_diff = onnx_backend.check_onnx_export(
+        model_type=model_type, config_yaml_filepath=config_yaml_filepath
+    )
+    assert max_abs_diff <= 1e-4
+
+    rng = np.random.default_rng(0)
+    image = rng.uniform(-1, 1, size=image_shape).astype(np.float32)
+    comparison = onnx_backend.compare_backends(
+        image,
+        model_type=model_type,
+        config_yaml_filepath=config_yaml_filepath,
+        PhysicalSizeX=base_pixel_size_nm/1000,
+        threshold_value=0.5,
+        verbose=False
+    )
+    assert comparison['max_abs_diff_prediction'] <= 1e-4
+    assert comparison['mismatched_pixels_ratio'] <= 1e-3
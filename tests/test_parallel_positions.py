@@ -0,0 +1,101 @@
+# Test analysing Positions in parallel from the command line.
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+
+from benchmarks import synthetic_experiment
+
+REPO_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Columns that depend on when the analysis was run
+TIMESTAMP_COLUMNS = ['analysis_datetime', 'run_timestamp']
+
+def _make_two_positions_experiment(exp_path):
+    synthetic_experiment.make_experiment(exp_path, size_t=1, size_z=8)
+    shutil.copytree(
+        os.path.join(exp_path, 'Position_1'), 
+        os.path.join(exp_path, 'Position_2')
+    )
+
+def _run_cli(ini_filepath, timeout=300, temp_dirpath=None):
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(
+        [REPO_PATH, env.get('PYTHONPATH', '')]
+    )
+    if temp_dirpath is not None:
+        env['TMPDIR'] = temp_dirpath
+    args = [sys.executable, '-m', 'spotmax', '-p', ini_filepath]
+    # Raises `subprocess.TimeoutExpired` if the process does not exit 
+    # (e.g., stuck at interpreter shutdown)
+    return subprocess.run(
+        args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, 
+        stderr=subprocess.STDOUT, text=True, env=env, timeout=timeout
+    )
+
+def _load_output_tables(exp_path):
+    tables = {}
+    for pos in ('Position_1', 'Position_2'):
+        output_path = os.path.join(exp_path, pos, 'spotMAX_output')
+        for filename in os.listdir(output_path):
+            if not filename.endswith('.csv'):
+                continue
+            df = pd.read_csv(os.path.join(output_path, filename))
+            df = df.drop(columns=TIMESTAMP_COLUMNS, errors='ignore')
+            tables[(pos, filename)] = df
+    return tables
+
+def test_parallel_positions_cli(tmp_path):
+    tables = {}
+    for num_parallel in (1, 2):
+        exp_path = os.path.join(tmp_path, f'exp_{num_parallel}')
+        _make_two_positions_experiment(exp_path)
+        ini_filepath = synthetic_experiment.write_params_ini(
+            os.path.join(tmp_path, f'params_{num_parallel}.ini'), 
+            exp_path, size_t=1, size_z=8, do_spotfit=True, 
+            configuration={
+                'Number of Positions analysed in parallel': num_parallel
+            }
+        )
+        completed = _run_cli(ini_filepath)
+        assert completed.returncode == 0, completed.stdout[-5000:]
+        tables[num_parallel] = _load_output_tables(exp_path)
+    
+    serial_tables, parallel_tables = tables[1], tables[2]
+    assert parallel_tables.keys() == serial_tables.keys()
+    assert any(
+        filename.endswith('_2_spotfit.csv') 
+        for _, filename in serial_tables.keys()
+    )
+    for key, df_serial in serial_tables.items():
+        pd.testing.assert_frame_equal(parallel_tables[key], df_serial)
+
+def test_stream_frames_cli_removes_temp_files(tmp_path):
+    tables = {}
+    temp_dirpath = os.path.join(tmp_path, 'temp')
+    os.makedirs(temp_dirpath)
+    for stream_frames in (False, True):
+        exp_path = os.path.join(tmp_path, f'exp_stream_{stream_frames}')
+        _make_two_positions_experiment(exp_path)
+        ini_filepath = synthetic_experiment.write_params_ini(
+            os.path.join(tmp_path, f'params_stream_{stream_frames}.ini'), 
+            exp_path, size_t=1, size_z=8, do_spotfit=True, segm_ref_ch=True,
+            configuration={
+                'Stream frames from disk (low memory)': stream_frames
+            }
+        )
+        completed = _run_cli(ini_filepath, temp_dirpath=temp_dirpath)
+        assert completed.returncode == 0, completed.stdout[-5000:]
+        tables[stream_frames] = _load_output_tables(exp_path)
+    
+    # Reference channel masks were stored in the temporary folder
+    assert not any(
+        filename.startswith('spotmax_stream_') 
+        for filename in os.listdir(temp_dirpath)
+    )
+    assert tables[True].keys() == tables[False].keys()
+    for key, df in tables[False].items():
+        pd.testing.assert_frame_equal(tables[True][key], df)
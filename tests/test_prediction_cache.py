@@ -0,0 +1,68 @@
+import numpy as np
+
+from spotmax import prediction_cache
+
+def _get_output(i):
+    # Random values do not compress --> entries have similar sizes
+    return np.random.default_rng(i).random((32, 32))
+
+def test_prediction_cache_put_get(tmp_path):
+    cache = prediction_cache.PredictionCache(cache_folderpath=tmp_path)
+    output = _get_output(0)
+    cache.put('key', output)
+    cache.put('key_tuple', (output, output > 0.5))
+    
+    assert np.array_equal(cache.get('key'), output)
+    cached_tuple = cache.get('key_tuple')
+    assert isinstance(cached_tuple, tuple)
+    assert np.array_equal(cached_tuple[1], output > 0.5)
+    assert cache.get('missing_key') is None
+
+def test_prediction_cache_evicts_only_when_full(tmp_path, monkeypatch):
+    cache = prediction_cache.PredictionCache(cache_folderpath=tmp_path)
+    cache.put('entry_0', _get_output(0))
+    entry_size = cache.size()
+    
+    max_num_entries = 5
+    cache.max_size_bytes = int(entry_size*(max_num_entries + 0.5))
+    
+    num_evict_calls = 0
+    evict = cache.evict
+    def count_evict(*args, **kwargs):
+        nonlocal num_evict_calls
+        num_evict_calls += 1
+        return evict(*args, **kwargs)
+    monkeypatch.setattr(cache, 'evict', count_evict)
+    
+    # Overwriting an entry does not change the size of the cache
+    cache.put('entry_0', _get_output(0))
+    for i in range(1, max_num_entries):
+        cache.put(f'entry_{i}', _get_output(i))
+    assert num_evict_calls == 0
+    assert cache._size_bytes == cache.size()
+    
+    # Every new entry exceeds the maximum size
+    for i in range(max_num_entries, 2*max_num_entries):
+        cache.put(f'entry_{i}', _get_output(i))
+    
+    assert num_evict_calls == max_num_entries
+    assert len(cache.entries()) == max_num_entries
+    assert cache.size() <= cache.max_size_bytes
+    assert cache._size_bytes == cache.size()
+    
+    # Most recently written entries are kept
+    assert cache.get(f'entry_{2*max_num_entries-1}') is not None
+
+def test_prediction_cache_entries_skip_temp_files(tmp_path):
+    cache = prediction_cache.PredictionCache(cache_folderpath=tmp_path)
+    cache.put('entry_0', _get_output(0))
+    
+    # Partially written entry of another process
+    temp_filepath = tmp_path / f'tmp_entry{prediction_cache.TEMP_ENTRY_EXT}'
+    temp_filepath.write_bytes(b'partial')
+    
+    entries_filepaths = [filepath for filepath, _, _ in cache.entries()]
+    assert entries_filepaths == [cache._entry_filepath('entry_0')]
+    
+    cache.evict(max_size_bytes=0)
+    assert temp_filepath.exists()
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from spotmax import filters, results_store
+
+FEATURES_THRESHOLDS = [
+    {'spot_vs_backgr_effect_size_glass': (0.8, None)},
+    {'spot_vs_ref_ch_ttest_pvalue': (None, 0.025)},
+    {
+        'spot_vs_backgr_effect_size_glass': (0.5, 1.5),
+        'spot_vs_ref_ch_ttest_pvalue': (None, 0.05),
+        'spot_vs_ref_ch_ttest_tstat': (0, None)
+    },
+]
+
+def _get_df_spots(rng, num_frames=2, num_cells=3, num_spots=40):
+    dfs = []
+    for frame_i in range(num_frames):
+        for cell_id in range(1, num_cells+1):
+            effect_size = rng.normal(1.0, 0.5, size=num_spots)
+            # Values exactly at the thresholds are excluded
+            effect_size[:3] = (0.5, 0.8, 1.5)
+            pvalue = rng.uniform(0, 0.1, size=num_spots)
+            pvalue[3:5] = (0.025, 0.05)
+            # Missing values never satisfy the conditions
+            pvalue[5] = np.nan
+            df = pd.DataFrame({
+                'frame_i': frame_i,
+                'Cell_ID': cell_id,
+                'spot_id': np.arange(1, num_spots+1),
+                'spot_vs_backgr_effect_size_glass': effect_size,
+                'spot_vs_ref_ch_ttest_pvalue': pvalue,
+                'spot_vs_ref_ch_ttest_tstat': rng.normal(0, 2, size=num_spots)
+            })
+            dfs.append(df)
+    return pd.concat(dfs).set_index(['frame_i', 'Cell_ID', 'spot_id'])
+
+@pytest.mark.parametrize('features_thresholds', FEATURES_THRESHOLDS)
+def test_query_equals_filter_df_from_features_thresholds(
+        tmp_path, features_thresholds
+    ):
+    rng = np.random.default_rng(22)
+    store = results_store.ResultsStore(os.path.join(tmp_path, 'results.db'))
+    dfs_spots = {
+        f'Position_{p}': _get_df_spots(rng) for p in range(1, 4)
+    }
+    for position, df_spots in dfs_spots.items():
+        store.append('spots_gop', df_spots, position)
+    
+    df_query = store.query(
+        'spots_gop', features_thresholds=features_thresholds
+    )
+    
+    num_expected_rows = 0
+    for position, df_spots in dfs_spots.items():
+        df_filtered = filters.filter_df_from_features_thresholds(
+            df_spots, features_thresholds
+        )
+        num_expected_rows += len(df_filtered)
+        
+        df_query_pos = (
+            df_query.loc[position].reset_index()
+            .set_index(['frame_i', 'Cell_ID', 'spot_id'])
+        )
+        assert len(df_query_pos) == len(df_filtered)
+        pd.testing.assert_frame_equal(
+            df_query_pos.sort_index(), df_filtered.sort_index(), 
+            check_dtype=False
+        )
+    
+    assert 0 < len(df_query) == num_expected_rows
+    assert len(df_query) < sum([len(df) for df in dfs_spots.values()])
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+import numpy as np
+import pandas as pd
+
+from spotmax import io, transformations
+
+MASK_SHAPE = (3, 6, 40, 48)
+SIZES_FOR_SPOT_MASKS = {'custom': ['(1.5, 2.5, 2.5) pixel']}
+
+def _get_df_spots(rng_seed=23):
+    rng = np.random.default_rng(rng_seed)
+    spot_masks = [
+        transformations.get_local_spheroid_mask(radii) 
+        for radii in ((1, 2, 2), (2, 3, 3), (1.5, 4, 4))
+    ]
+    dfs = []
+    # Frame 1 has no spots
+    for frame_i in (0, 2):
+        num_spots = 30
+        # Spots close to each other (overlapping masks) and at the borders 
+        # of the image (cropped masks)
+        zz = rng.integers(0, MASK_SHAPE[1], size=num_spots)
+        yy = rng.integers(0, MASK_SHAPE[2], size=num_spots)
+        xx = rng.integers(0, MASK_SHAPE[3], size=num_spots)
+        df = pd.DataFrame({
+            'frame_i': frame_i,
+            'Cell_ID': rng.integers(1, 3, size=num_spots),
+            'spot_id': np.arange(1, num_spots+1),
+            'z': zz, 'y': yy, 'x': xx,
+            'spot_mask': [
+                spot_masks[i] for i in rng.integers(0, 3, size=num_spots)
+            ]
+        })
+        dfs.append(df)
+    return pd.concat(dfs).set_index(['frame_i', 'Cell_ID', 'spot_id'])
+
+def _save_spots_masks(images_path, df_spots, spots_masks_format):
+    io.save_spots_masks(
+        df_spots, images_path, 'test', 'spots*rn**desc*', 'spots', 1, 
+        sizes_for_spot_masks=SIZES_FOR_SPOT_MASKS, mask_shape=MASK_SHAPE, 
+        verbose=False, spots_masks_format=spots_masks_format
+    )
+    filepaths = {}
+    for file in os.listdir(images_path):
+        is_custom = '_spots_segm_mask_custom' in file
+        filepaths[is_custom] = os.path.join(images_path, file)
+    return filepaths
+
+def test_sparse_spots_masks_equal_dense(tmp_path):
+    df_spots = _get_df_spots()
+    
+    dense_path = os.path.join(tmp_path, 'dense')
+    sparse_path = os.path.join(tmp_path, 'sparse')
+    os.makedirs(dense_path)
+    os.makedirs(sparse_path)
+    dense_filepaths = _save_spots_masks(dense_path, df_spots, 'dense')
+    sparse_filepaths = _save_spots_masks(sparse_path, df_spots, 'sparse')
+    
+    # Default and custom size masks
+    assert len(dense_filepaths) == len(sparse_filepaths) == 2
+    for is_custom, dense_filepath in dense_filepaths.items():
+        sparse_filepath = sparse_filepaths[is_custom]
+        assert sparse_filepath.endswith(io.SPARSE_SPOTS_MASKS_EXT)
+        
+        dense_masks = io.load_spots_masks(dense_filepath)
+        sparse_masks = io.load_spots_masks(sparse_filepath)
+        
+        assert dense_masks.shape == MASK_SHAPE
+        assert np.any(dense_masks[0]) and not np.any(dense_masks[1])
+        assert np.array_equal(sparse_masks, dense_masks)
+        
+        # Single frames decoded lazily
+        lazy_masks = io.load_spots_masks(sparse_filepath, lazy=True)
+        assert isinstance(lazy_masks, io.SparseSpotsMasks)
+        assert len(lazy_masks) == MASK_SHAPE[0]
+        for frame_i in (2, 0, 1, -1):
+            frame_masks = lazy_masks[frame_i]
+            assert frame_masks.dtype == dense_masks.dtype
+            assert np.array_equal(frame_masks, dense_masks[frame_i])
+        
+        with pytest.raises(IndexError):
+            lazy_masks[MASK_SHAPE[0]]
+
+@pytest.mark.parametrize('seed', range(3))
+def test_spots_lab_rle_roundtrip(seed):
+    df_spots = _get_df_spots(rng_seed=seed)
+    frame_shape = MASK_SHAPE[1:]
+    df_spots_frame = df_spots.loc[0]
+    
+    spots_lab = transformations.from_df_spots_objs_to_spots_lab(
+        df_spots_frame, frame_shape
+    )
+    rle = transformations.from_df_spots_objs_to_spots_lab_rle(
+        df_spots_frame, frame_shape
+    )
+    decoded_spots_lab = transformations.from_spots_lab_rle_to_spots_lab(
+        *rle, frame_shape
+    )
+    
+    assert np.array_equal(decoded_spots_lab, spots_lab)
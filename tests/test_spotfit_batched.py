@@ -0,0 +1,86 @@
+# Test the batched gaussian fit used by spotFIT against single group fits.
+
+import numpy as np
+
+from spotmax import core
+
+NUM_COEFFS = 7 # z0, y0, x0, sz, sy, sx, A (per spot) + shared background B
+
+def _random_group(rng, num_spots, with_const):
+    zz, yy, xx = np.meshgrid(
+        np.arange(7), np.arange(15), np.arange(15), indexing='ij'
+    )
+    z, y, x = zz.ravel(), yy.ravel(), xx.ravel()
+    true_coeffs = []
+    init_guess = []
+    for _ in range(num_spots):
+        z0, y0, x0 = rng.uniform((2, 4, 4), (4, 10, 10))
+        sz, sy, sx = rng.uniform((0.8, 1.0, 1.0), (1.5, 2.0, 2.0))
+        A = rng.uniform(1.0, 5.0)
+        true_coeffs.extend([z0, y0, x0, sz, sy, sx, A])
+        init_guess.extend([
+            round(z0), round(y0), round(x0), 1.0, 1.5, 1.5, 0.8*A
+        ])
+    true_coeffs.append(0.2) # B
+    init_guess.append(0.1)
+    true_coeffs = np.array(true_coeffs)
+    init_guess = np.array(init_guess)
+
+    low_limit = np.tile([0, 0, 0, 0.5, 0.5, 0.5, 0.0], num_spots)
+    high_limit = np.tile([6, 14, 14, 3.0, 4.0, 4.0, 10.0], num_spots)
+    low_limit = np.append(low_limit, 0.0)
+    high_limit = np.append(high_limit, 1.0)
+
+    const = 0
+    if with_const:
+        # Contribution of already fitted neighbouring spots
+        const = 0.5*np.exp(-((y - 1.0)**2 + (x - 13.0)**2)/8)
+
+    data = core.GaussianModel().numba_func(
+        z, y, x, true_coeffs, num_spots, NUM_COEFFS, const
+    )
+    data = data + rng.normal(0, 0.01, size=len(data))
+    bounds = (low_limit, high_limit)
+    return init_guess, data, z, y, x, num_spots, const, bounds, true_coeffs
+
+def test_curve_fit_batch_equals_single_fits():
+    rng = np.random.default_rng(0)
+    groups = [
+        _random_group(rng, num_spots, with_const)
+        for num_spots, with_const in [(1, False), (3, True), (2, False),
+                                      (1, True)]
+    ]
+    model = core.GaussianModel()
+    tol = 1e-11
+
+    fit_coeffs_li, success_li = model.curve_fit_batch(
+        [group[0] for group in groups],
+        [group[1] for group in groups],
+        [group[2] for group in groups],
+        [group[3] for group in groups],
+        [group[4] for group in groups],
+        [group[5] for group in groups],
+        NUM_COEFFS,
+        [group[6] for group in groups],
+        [group[7] for group in groups],
+        tol,
+        pbar_desc=None
+    )
+    assert len(fit_coeffs_li) == len(groups)
+
+    for group, fit_coeffs, success in zip(groups, fit_coeffs_li, success_li):
+        init_guess, data, z, y, x, num_spots, const, bounds, true_coeffs = (
+            group
+        )
+        single_fit_coeffs, single_success = model.curve_fit(
+            init_guess, data, z, y, x, num_spots, NUM_COEFFS, const, bounds,
+            tol, pbar_desc=None
+        )
+        np.testing.assert_array_equal(fit_coeffs, single_fit_coeffs)
+        assert success == single_success
+
+        # Fitted coefficients are within the bounds and recover the truth
+        low_limit, high_limit = bounds
+        assert np.all(fit_coeffs >= low_limit)
+        assert np.all(fit_coeffs <= high_limit)
+        np.testing.assert_allclose(fit_coeffs, true_coeffs, rtol=0.1)
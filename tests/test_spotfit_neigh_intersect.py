@@ -0,0 +1,112 @@
+import pytest
+
+import numpy as np
+import pandas as pd
+
+import skimage.measure
+import skimage.segmentation
+
+from spotmax import core, transformations
+
+def _get_dense_cluster_lab(seed):
+    rng = np.random.default_rng(seed)
+    lab = np.zeros((8, 40, 40), dtype=np.uint32)
+    
+    # Dense cluster of spots touching each other
+    num_cluster_spots = 25
+    zz = rng.integers(2, 6, size=num_cluster_spots)
+    yy = rng.integers(5, 20, size=num_cluster_spots)
+    xx = rng.integers(5, 20, size=num_cluster_spots)
+    lab[zz, yy, xx] = np.arange(1, num_cluster_spots+1)
+    lab = skimage.segmentation.expand_labels(lab, distance=2)
+    
+    # Isolated spots
+    lab[4, 30, 30] = num_cluster_spots + 1
+    lab[3:5, 34:36, 25:27] = num_cluster_spots + 2
+    
+    # Keep only the spots that survived the expansion
+    lab, _, _ = skimage.segmentation.relabel_sequential(lab)
+    return lab
+
+def _compute_neigh_intersect_per_spot(spotfit):
+    # Previous implementation that expanded every spot separately
+    zyx_vox_dim = spotfit.zyx_vox_size
+    zvd, yvd, _ = zyx_vox_dim
+    spots_3D_lab_ID = spotfit.spots_3D_lab_ID
+    spots_3D_lab_ID_connect = skimage.measure.label(spots_3D_lab_ID>0)
+    all_intersect_idx = []
+    all_neigh_idx = []
+    obj_ids = []
+    num_intersect = []
+    num_neigh = []
+    all_neigh_ids = []
+    for s, s_obj in enumerate(spotfit.spots_rp):
+        spot_3D_lab = np.zeros_like(spots_3D_lab_ID)
+        spot_3D_lab[s_obj.slice][s_obj.image] = s_obj.label
+        spot_3D_mask = spot_3D_lab>0
+        expanded_spot_3D = transformations.expand_labels(
+            spot_3D_lab, distance=yvd, zyx_vox_size=zyx_vox_dim
+        )
+        spot_surf_mask = np.logical_xor(expanded_spot_3D>0, spot_3D_mask)
+        intersect_ids = np.unique(spots_3D_lab_ID[spot_surf_mask])
+        intersect_idx = [
+            spotfit.spot_ids.index(id) for id in intersect_ids if id!=0
+        ]
+        intersect_idx.append(s)
+        all_intersect_idx.append(intersect_idx)
+        num_intersect.append(len(intersect_idx))
+
+        obj_id = np.unique(spots_3D_lab_ID_connect[spot_3D_mask])[-1]
+        obj_ids.append(obj_id)
+        obj_mask = np.zeros_like(spot_3D_mask)
+        obj_mask[spots_3D_lab_ID_connect == obj_id] = True
+        neigh_ids = np.unique(spots_3D_lab_ID[obj_mask])
+        neigh_ids = [id for id in neigh_ids if id!=0]
+        neigh_idx = [spotfit.spot_ids.index(id) for id in neigh_ids]
+        all_neigh_idx.append(neigh_idx)
+        all_neigh_ids.append(neigh_ids)
+        num_neigh.append(len(neigh_idx))
+    
+    df_intersect = pd.DataFrame({
+        'id': spotfit.spot_ids,
+        'obj_id': obj_ids,
+        'num_intersect': num_intersect,
+        'num_neigh': num_neigh,
+        'intersecting_idx': all_intersect_idx,
+        'neigh_idx': all_neigh_idx,
+        'neigh_ids': all_neigh_ids}
+    ).sort_values('num_intersect')
+    df_intersect.index.name = 's'
+    return df_intersect
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize(
+    'zyx_vox_size', [(1.0, 1.0, 1.0), (0.35, 0.07, 0.07), (0.1, 0.1, 0.1)]
+)
+def test_compute_neigh_intersect_dense_cluster(seed, zyx_vox_size):
+    spots_lab = _get_dense_cluster_lab(seed)
+    
+    spotfit = core.SpotFIT()
+    spotfit.zyx_vox_size = zyx_vox_size
+    spotfit.spots_3D_lab_ID = spots_lab
+    spotfit.spots_rp = skimage.measure.regionprops(spots_lab)
+    spotfit.spot_ids = [obj.label for obj in spotfit.spots_rp]
+    
+    spotfit.compute_neigh_intersect()
+    expected_df_intersect = _compute_neigh_intersect_per_spot(spotfit)
+    
+    df_intersect = spotfit.df_intersect
+    # The cluster must contain spots touching multiple other spots
+    assert df_intersect['num_intersect'].max() > 2
+    
+    list_cols = ['intersecting_idx', 'neigh_idx', 'neigh_ids']
+    pd.testing.assert_frame_equal(
+        df_intersect.drop(columns=list_cols),
+        expected_df_intersect.drop(columns=list_cols),
+        check_dtype=False
+    )
+    for col in list_cols:
+        for idx, expected_idx in zip(
+                df_intersect[col], expected_df_intersect[col]
+            ):
+            assert list(idx) == list(expected_idx)
@@ -0,0 +1,190 @@
+# Test fitting the segmented objects in parallel with `pipe.spotfit`.
+
+import os
+
+import numpy as np
+import pandas as pd
+import skimage.filters
+import skimage.measure
+
+from benchmarks import synthetic_experiment
+
+from spotmax import core, filters, pipe, transformations
+
+from test_parallel_positions import _make_two_positions_experiment, _run_cli
+
+ZYX_VOXEL_SIZE = (
+    synthetic_experiment.VOXEL_DEPTH,
+    synthetic_experiment.PIXEL_SIZE_YX,
+    synthetic_experiment.PIXEL_SIZE_YX
+)
+SPOTS_ZYX_RADII_PXL = np.array((2.0, 3.0, 3.0))
+
+def _get_spotfit_inputs():
+    spots_data, _, segm_data = synthetic_experiment.generate_timelapse(
+        size_t=1, size_z=8, size_yx=(96, 96), num_cells=4, spots_per_cell=6
+    )
+    image = spots_data[0].astype(float)/np.iinfo(spots_data.dtype).max
+    lab = np.repeat(segm_data[0][np.newaxis], len(image), axis=0)
+    df_spots = _detect_spots(image, lab)
+    return image, lab, df_spots
+
+def _detect_spots(image, lab):
+    sharp_image = filters.DoG_spots(image, SPOTS_ZYX_RADII_PXL, lab=lab)
+    spots_semantic_segm = np.logical_and(
+        filters.threshold(sharp_image, skimage.filters.threshold_li), lab > 0
+    )
+    df_spots_coords = pipe.spot_detection(
+        sharp_image,
+        spots_segmantic_segm=spots_semantic_segm,
+        spots_zyx_radii_pxl=SPOTS_ZYX_RADII_PXL,
+        lab=lab,
+        return_df=True
+    )[0]
+    keys, _, dfs_spots_gop = pipe.spots_calc_features_and_filter(
+        image, SPOTS_ZYX_RADII_PXL, df_spots_coords,
+        sharp_spots_image=sharp_image,
+        lab=lab,
+        rp=skimage.measure.regionprops(lab),
+        delta_tol=transformations.get_expand_obj_delta_tolerance(
+            SPOTS_ZYX_RADII_PXL
+        ),
+        zyx_voxel_size=ZYX_VOXEL_SIZE,
+        show_progress=False,
+        verbose=False
+    )
+    df_spots = pd.concat(
+        dfs_spots_gop, keys=keys, names=['frame_i', 'Cell_ID', 'spot_id']
+    ).loc[0]
+    return df_spots
+
+def _run_spotfit(image, lab, df_spots, **parallel_kwargs):
+    df_spotfit, _ = pipe.spotfit(
+        core.SpotFIT(),
+        image,
+        df_spots,
+        zyx_voxel_size=ZYX_VOXEL_SIZE,
+        spots_zyx_radii_pxl=SPOTS_ZYX_RADII_PXL,
+        rp=skimage.measure.regionprops(lab),
+        lab=lab,
+        drop_peaks_too_close=True,
+        return_df=True,
+        show_progress=False,
+        verbose=False,
+        **parallel_kwargs
+    )
+    return df_spotfit
+
+def test_spotfit_parallel_equals_serial():
+    image, lab, df_spots = _get_spotfit_inputs()
+    df_serial = _run_spotfit(image, lab, df_spots)
+    assert not df_serial.empty
+    
+    executor = pipe.get_spotfit_executor(2, parallel_backend='processes')
+    with executor:
+        # Reusing the executor must give the same result at every call
+        for _ in range(2):
+            df_processes = _run_spotfit(
+                image, lab, df_spots, num_workers=2, executor=executor
+            )
+            pd.testing.assert_frame_equal(df_processes, df_serial)
+    
+    df_threads = _run_spotfit(
+        image, lab, df_spots, num_workers=2, parallel_backend='threads'
+    )
+    pd.testing.assert_frame_equal(df_threads, df_serial)
+
+def _write_spotfit_parallel_params_ini(
+        ini_filepath, exp_path, num_workers, configuration=None
+    ):
+    ini_filepath = synthetic_experiment.write_params_ini(
+        ini_filepath, exp_path, size_t=1, size_z=8, do_spotfit=True, 
+        configuration=configuration
+    )
+    with open(ini_filepath, 'r', encoding='utf-8') as ini:
+        ini_text = ini.read()
+    ini_text = ini_text.replace(
+        'Number of threads used by numba = -1', 
+        'Number of threads used by numba = 2'
+    )
+    ini_text = (
+        f'{ini_text}\n'
+        '[SpotFIT]\n'
+        f'Number of parallel workers = {num_workers}\n'
+        'Parallel workers backend = processes\n'
+    )
+    with open(ini_filepath, 'w', encoding='utf-8') as ini:
+        ini.write(ini_text)
+    return ini_filepath
+
+def test_spotfit_parallel_cli_exits(tmp_path):
+    # The CLI calls `numba.set_num_threads` before starting the spotFIT 
+    # workers, which used to make the process hang at exit
+    exp_path = os.path.join(tmp_path, 'exp')
+    synthetic_experiment.make_experiment(exp_path, size_t=1, size_z=8)
+    ini_filepath = _write_spotfit_parallel_params_ini(
+        os.path.join(tmp_path, 'params.ini'), exp_path, 2
+    )
+    
+    completed = _run_cli(ini_filepath)
+    assert completed.returncode == 0, completed.stdout[-5000:]
+    
+    spotfit_filepath = os.path.join(
+        exp_path, 'Position_1', 'spotMAX_output', '1_2_spotfit.csv'
+    )
+    assert os.path.exists(spotfit_filepath), completed.stdout[-5000:]
+
+def test_spotfit_workers_capped_in_parallel_positions(tmp_path):
+    exp_path = os.path.join(tmp_path, 'exp')
+    _make_two_positions_experiment(exp_path)
+    
+    # 0 workers means one per CPU core in each of the two Positions
+    ini_filepath = _write_spotfit_parallel_params_ini(
+        os.path.join(tmp_path, 'params.ini'), exp_path, 0, 
+        configuration={'Number of Positions analysed in parallel': 2}
+    )
+    
+    completed = _run_cli(ini_filepath)
+    assert completed.returncode == 0, completed.stdout[-5000:]
+    
+    max_num_workers = max(1, os.cpu_count()//2)
+    assert (
+        f'Using {max_num_workers} spotFIT workers per Position'
+        in completed.stdout
+    ), completed.stdout[-5000:]
+
+def test_fitted_peaks_intensities_outside_obj_crop():
+    rng = np.random.default_rng(0)
+    spots_img = rng.random((10, 40, 40))
+    lab = np.zeros(spots_img.shape, dtype=np.uint32)
+    lab[3:6, 10:20, 10:20] = 1
+    obj = skimage.measure.regionprops(lab)[0]
+    expanded_obj = transformations.get_expanded_obj(obj, (1, 2, 2), lab)
+    
+    # Fitted centers can move outside of the object crop by up to the 
+    # center bounds
+    zyx_center_half_interval = (1.5, 3, 3)
+    fit_coords = np.array([
+        [1.4, 6.6, 9.0], # outside the crop (z=2:7, y=8:22, x=8:22)
+        [6.6, 24.2, 12.0], 
+        [4.0, 15.0, 15.0], # inside the crop
+    ])
+    fit_coords_int = np.round(fit_coords).astype(int)
+    crop_start = np.array([s.start for s in expanded_obj.slice])
+    crop_stop = np.array([s.stop for s in expanded_obj.slice])
+    is_in_crop = np.all(
+        (fit_coords_int >= crop_start) & (fit_coords_int < crop_stop), axis=1
+    )
+    assert not is_in_crop[:2].any()
+    
+    _, _, _, _, spots_img_peaks, peaks_start = (
+        pipe._crop_spotfit_obj_inputs(
+            expanded_obj, spots_img, None, None, 
+            zyx_center_half_interval=zyx_center_half_interval
+        )
+    )
+    intensities = pipe._get_fitted_peaks_intensities(
+        fit_coords, spots_img_peaks, peaks_start
+    )
+    expected_intensities = spots_img[tuple(fit_coords_int.transpose())]
+    np.testing.assert_array_equal(intensities, expected_intensities)
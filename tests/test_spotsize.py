@@ -0,0 +1,56 @@
+# Test the spots size estimated by `SpotFIT.spotSIZE` against reference 
+# values computed on a seeded synthetic image with spots of different sizes
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from spotmax import data
+
+from test_spotfit_parallel import _detect_spots, _run_spotfit
+
+TESTS_DATA_PATH = os.path.join(os.path.dirname(__file__), 'data')
+SPOTSIZE_REFERENCE_FILEPATH = os.path.join(
+    TESTS_DATA_PATH, 'spotsize_reference.csv'
+)
+
+def _get_spots_image(rng_seed=15):
+    rng = np.random.default_rng(rng_seed)
+    shape = (10, 64, 64)
+    image = np.zeros(shape)
+    # Grid of spots with different sizes (rows) and intensities (columns)
+    for i, yx_sigma in enumerate((0.8, 1.2, 1.8, 2.5)):
+        for j, amplitude in enumerate((0.4, 0.7, 1.0)):
+            zyx_spot = (5, 10 + 14*i, 12 + 18*j)
+            spot = data._generate_syntetic_spots_img(
+                np.zeros(shape), [zyx_spot], 
+                (yx_sigma*0.8, yx_sigma, yx_sigma)
+            )
+            image += amplitude*spot/spot.max()
+    image += rng.gamma(1.0, 0.05, size=shape)
+    lab = np.zeros(shape, dtype=np.uint32)
+    lab[:, 2:62, 2:62] = 1
+    return image, lab
+
+def _get_spotsize_df():
+    image, lab = _get_spots_image()
+    df_spots = _detect_spots(image, lab)
+    df_spotfit = _run_spotfit(image, lab, df_spots)
+    spotsize_cols = [
+        col for col in df_spotfit.columns if col.startswith('spotsize_')
+    ]
+    return df_spotfit[spotsize_cols]
+
+def test_spotsize_equals_reference():
+    df_spotsize = _get_spotsize_df()
+    df_reference = pd.read_csv(
+        SPOTSIZE_REFERENCE_FILEPATH, index_col=['frame_i', 'Cell_ID', 'spot_id']
+    )
+    
+    # Spots must have grown to different sizes
+    assert df_spotsize['spotsize_yx_radius_pxl'].nunique() > 2
+    
+    pd.testing.assert_frame_equal(
+        df_spotsize, df_reference, check_dtype=False, rtol=1e-9
+    )
@@ -0,0 +1,93 @@
+# Test mini-batch inference of the 2D U-Net with a randomly initialised
+# network (the pre-trained weights are not needed).
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from spotmax.nnet import model
+from spotmax.nnet.models import nd_model
+from spotmax.nnet.models.unet2d_model import Unet2DModel
+from spotmax.nnet.models.unet2D.unet_2D_model import UNet2D
+
+def _get_unet2d_config(batch_size):
+    return {
+        'model': {
+            'n_channels': 1,
+            'n_classes': 2,
+            'bilinear': True,
+            'model_dir': '',
+            'best_model_path': '',
+            'training_path': '',
+        },
+        'trainer': {},
+        'device': 'cpu',
+        'inference': {'batch_size': batch_size},
+    }
+
+def _get_random_net(seed=0):
+    torch.manual_seed(seed)
+    net = UNet2D(n_channels=1, n_classes=2, bilinear=True)
+    return net.eval()
+
+def _get_unet2d_model(net, batch_size):
+    unet2d_model = Unet2DModel(_get_unet2d_config(batch_size))
+    unet2d_model.net = net
+    return unet2d_model
+
+def _get_model(net, batch_size, threshold_value=0.5):
+    # Model without pre-processing and rescaling that predicts with `net`
+    nnet_model = model.Model.__new__(model.Model)
+    model.ModuleBase.__init__(nnet_model)
+    nnet_model.model_type = '2D'
+    nnet_model.threshold_value = threshold_value
+    nnet_model.Data = nd_model.Data
+    nnet_model._batch_preprocess = True
+    nnet_model._scale_factor = 1
+    nnet_model._save_prediction_map = False
+
+    config = {
+        'unet2D': _get_unet2d_config(batch_size),
+        'device': 'cpu',
+        'verbose': False
+    }
+    nnet_model.model = nd_model.NDModel(
+        operation=nd_model.Operation.PREDICT,
+        model=nd_model.Models.UNET2D,
+        config=config
+    )
+    nnet_model.model._predict_model_instance = _get_unet2d_model(
+        net, batch_size
+    )
+    return nnet_model
+
+def _get_images(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-1, 1, size=shape).astype(np.float32)
+
+@pytest.mark.parametrize('batch_size', [2, 3, 7])
+def test_unet2d_batch_size_same_prediction(batch_size):
+    net = _get_random_net()
+    images = _get_images((7, 32, 32))
+
+    prediction = _get_unet2d_model(net, 1).predict(images)
+    batched_prediction = _get_unet2d_model(net, batch_size).predict(images)
+
+    assert batched_prediction.shape == images.shape
+    np.testing.assert_allclose(
+        batched_prediction, prediction, rtol=1e-5, atol=1e-6
+    )
+
+def test_model_forward_splits_stacked_slices():
+    net = _get_random_net()
+    images = _get_images((3, 2, 32, 32))
+
+    # Batches of 4 slices mix z-slices of different images
+    nnet_model = _get_model(net, 4)
+    out = nnet_model.forward(images)
+
+    assert out.shape == images.shape
+    for n, image in enumerate(images):
+        expected_lab = _get_model(net, 1).segment(image)
+        np.testing.assert_array_equal(out[n], expected_lab)